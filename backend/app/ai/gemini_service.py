@@ -17,6 +17,10 @@ import google.generativeai as genai
 import os
 from typing import Optional, List, Dict, Any
 
+from app.ai.response_cache import get_response_cache, make_cache_key
+from app.ai.token_tracker import TokenUsageTracker, get_token_tracker
+from app.core.config import settings
+
 # --- Configuration ---
 # It's recommended to load the API key from environment variables or a secure config.
 # For example, from your app.core.config.settings
@@ -89,6 +93,7 @@ class GeminiService:
         model_name: str = DEFAULT_MODEL_NAME,
         generation_config: Optional[genai.types.GenerationConfig] = None,
         safety_settings: Optional[List[Dict[str, Any]]] = None,
+        token_tracker: Optional[TokenUsageTracker] = None,
     ):
         """
         Initializes the GeminiService.
@@ -97,35 +102,83 @@ class GeminiService:
             model_name (str): The name of the Gemini model to use.
             generation_config (Optional[genai.types.GenerationConfig]): Model generation configuration.
             safety_settings (Optional[List[Dict[str, Any]]]): Safety settings for content generation.
+            token_tracker (Optional[TokenUsageTracker]): Receives response cache statistics.
         """
         if not API_KEY:
             raise ValueError(
                 "Gemini API key is not configured. Cannot initialize GeminiService."
             )
 
+        self.model_name = model_name
+        self.generation_config = generation_config or DEFAULT_GENERATION_CONFIG
+        self.safety_settings = safety_settings or DEFAULT_SAFETY_SETTINGS
         self.model = genai.GenerativeModel(
             model_name=model_name,
-            generation_config=generation_config or DEFAULT_GENERATION_CONFIG,
-            safety_settings=safety_settings or DEFAULT_SAFETY_SETTINGS,
+            generation_config=self.generation_config,
+            safety_settings=self.safety_settings,
         )
+        self.response_cache = get_response_cache()
+        self.token_tracker = token_tracker or get_token_tracker(model_name)
         print(f"GeminiService initialized with model: {model_name}")
 
-    async def generate_text(self, prompt: str) -> Optional[str]:
+    def _cache_key(self, prompt: str) -> str:
+        """Cache key for a prompt under this service's model and configuration."""
+        return make_cache_key(
+            self.model_name, self.generation_config, self.safety_settings, prompt
+        )
+
+    async def generate_text(
+        self,
+        prompt: str,
+        cache_ttl: Optional[int] = None,
+        feature: Optional[str] = None,
+    ) -> Optional[str]:
         """
         Generates text content based on a given prompt.
 
+        Identical prompts are answered from the response cache while the
+        cached response is fresh.
+
         Args:
             prompt (str): The prompt to send to the Gemini model.
+            cache_ttl (Optional[int]): Seconds to cache the response. Defaults to
+                settings.LLM_CACHE_DEFAULT_TTL_SECONDS; 0 bypasses the cache.
+            feature (Optional[str]): Calling feature the tokens are attributed to,
+                one of the token_tracker FEATURE_* constants.
 
         Returns:
             Optional[str]: The generated text, or None if an error occurs or content is blocked.
         """
+        if cache_ttl is None:
+            cache_ttl = settings.LLM_CACHE_DEFAULT_TTL_SECONDS
+        if cache_ttl <= 0:
+            return await self._generate_text_uncached(prompt, feature)
+
+        text, source = await self.response_cache.get_or_generate(
+            self._cache_key(prompt),
+            lambda: self._generate_text_uncached(prompt, feature),
+            cache_ttl,
+        )
+        if source and text:
+            self.token_tracker.record_cache_hit(prompt, text, source)
+        else:
+            self.token_tracker.record_cache_miss()
+        return text
+
+    async def _generate_text_uncached(
+        self, prompt: str, feature: Optional[str] = None
+    ) -> Optional[str]:
+        """Call the model for a prompt and record its token usage."""
         try:
             response = await self.model.generate_content_async(prompt)
             # Accessing the text directly. You might need to inspect `response.candidates`
             # for more complex scenarios or if `candidate_count > 1`.
+            text = None
             if response.candidates and response.candidates[0].content.parts:
-                return response.candidates[0].content.parts[0].text
+                text = response.candidates[0].content.parts[0].text
+            await self._track_usage(prompt, text, response, feature)
+            if text is not None:
+                return text
             else:
                 # This can happen if the content is blocked by safety settings
                 # or if the response is empty for other reasons.
@@ -140,7 +193,38 @@ class GeminiService:
             # Consider logging the full exception traceback here
             return None
 
-    async def generate_json(self, prompt: str, strict: bool = True) -> Optional[Any]:
+    async def _track_usage(
+        self, prompt: str, text: Optional[str], response: Any, feature: Optional[str]
+    ) -> None:
+        """
+        Record a call's tokens, as counted by Gemini when the response
+        carries usage_metadata. Thinking tokens are billed as output.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        input_tokens = output_tokens = None
+        if usage is not None and getattr(usage, "prompt_token_count", None):
+            input_tokens = usage.prompt_token_count
+            output_tokens = (getattr(usage, "candidates_token_count", 0) or 0) + (
+                getattr(usage, "thoughts_token_count", 0) or 0
+            )
+        try:
+            await self.token_tracker.track_usage(
+                prompt,
+                text or "",
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                feature=feature,
+            )
+        except Exception as e:
+            print(f"Error recording Gemini token usage: {e}")
+
+    async def generate_json(
+        self,
+        prompt: str,
+        strict: bool = True,
+        cache_ttl: Optional[int] = None,
+        feature: Optional[str] = None,
+    ) -> Optional[Any]:
         """
         Attempts to generate text that can be parsed as JSON.
         Note: Gemini models (especially Flash) may not always strictly adhere to JSON format
@@ -153,13 +237,17 @@ class GeminiService:
         Args:
             prompt (str): The prompt designed to elicit a JSON response.
             strict (bool): If True, raises an error if parsing fails. If False, returns None.
+            cache_ttl (Optional[int]): Seconds to cache the raw response, see generate_text.
+            feature (Optional[str]): Calling feature, see generate_text.
 
         Returns:
             Optional[Any]: The parsed JSON data, or None if generation/parsing fails.
         """
         import json
 
-        text_response = await self.generate_text(prompt)
+        text_response = await self.generate_text(
+            prompt, cache_ttl=cache_ttl, feature=feature
+        )
         if not text_response:
             return None
 
@@ -175,6 +263,8 @@ class GeminiService:
         except json.JSONDecodeError as e:
             print(f"Error decoding JSON from Gemini response: {e}")
             print(f"Raw Gemini response for JSON prompt: {text_response}")
+            # Don't keep serving a response that cannot be parsed
+            await self.response_cache.invalidate(self._cache_key(prompt))
             if strict:
                 raise
             return None
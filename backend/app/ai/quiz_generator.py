@@ -11,6 +11,7 @@ from uuid import uuid4
 from app.ai.gemini_service import (
     GeminiService,
 )  # Assuming GeminiService is in the same directory
+from app.ai.token_tracker import FEATURE_QUIZ_QUESTIONS
 
 # from app.database.models.quiz import QuestionType # If you need to reference the enum directly
 
@@ -76,7 +77,9 @@ class QuizQuestionGenerator:
 
         prompt += "\n\nGenerated Question:"
 
-        question_text = await self.ai_service.generate_text(prompt)
+        question_text = await self.ai_service.generate_text(
+            prompt, feature=FEATURE_QUIZ_QUESTIONS
+        )
         return question_text.strip() if question_text else None
 
     async def generate_multiple_choice_options(
@@ -123,7 +126,9 @@ class QuizQuestionGenerator:
         """
 
         # Using the generate_json method from GeminiService
-        generated_data = await self.ai_service.generate_json(prompt)
+        generated_data = await self.ai_service.generate_json(
+            prompt, feature=FEATURE_QUIZ_QUESTIONS
+        )
 
         if isinstance(generated_data, list) and all(
             isinstance(item, dict) for item in generated_data
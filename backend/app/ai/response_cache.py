@@ -0,0 +1,223 @@
+"""
+Content-addressed cache for LLM responses.
+
+Responses are keyed by a hash of the model name, generation config, safety
+settings and prompt, so identical requests are answered without another
+model call. Lookups go through three layers:
+
+1. A per-worker LRU with TTL
+2. The shared Redis cache (when Redis is reachable), read and written
+   through the async request-path client so the event loop is not blocked
+3. In-flight requests: concurrent identical prompts await a single call
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+from app.core.async_redis_client import maybe_await
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(
+    model_name: str,
+    generation_config: Any,
+    safety_settings: Any,
+    prompt: str,
+) -> str:
+    """
+    Hash everything that determines a model response
+
+    Args:
+        model_name: Model identifier
+        generation_config: GenerationConfig or dict of generation parameters
+        safety_settings: Safety settings sent with the request
+        prompt: Prompt text
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = json.dumps(
+        {
+            "model": model_name,
+            "generation_config": _as_plain(generation_config),
+            "safety_settings": _as_plain(safety_settings),
+            "prompt": prompt,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _as_plain(value: Any) -> Any:
+    """Convert SDK config objects to JSON-serializable values"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _as_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_as_plain(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return {
+            k: _as_plain(v) for k, v in vars(value).items() if not k.startswith("_")
+        }
+    return str(value)
+
+
+class LLMResponseCache:
+    """
+    Two-tier response cache with stampede protection
+    """
+
+    REDIS_PREFIX = "llm"
+
+    def __init__(self, max_entries: int = 1000, redis_client=None):
+        self.max_entries = max_entries
+        self.redis = redis_client
+        # key -> (response, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "shared_in_flight": 0,
+            "misses": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Optional[str]]],
+        ttl: int,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return a cached response or generate and cache one
+
+        Empty responses (errors, blocked content) are never cached.
+
+        Args:
+            key: Cache key from make_cache_key
+            generate: Coroutine factory calling the model
+            ttl: Seconds to keep a generated response
+
+        Returns:
+            (response, source) where source is "local", "redis", "in_flight"
+            or None when the model was called
+        """
+        response = self._get_local(key)
+        if response is not None:
+            self.stats["local_hits"] += 1
+            return response, "local"
+
+        response = await self._get_redis(key)
+        if response is not None:
+            self.stats["redis_hits"] += 1
+            self._set_local(key, response, ttl)
+            return response, "redis"
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.stats["shared_in_flight"] += 1
+            try:
+                return await asyncio.shield(in_flight), "in_flight"
+            except asyncio.CancelledError:
+                # Re-raise our own cancellation; if only the caller that
+                # owned the request gave up (e.g. a stage timeout), generate
+                # the response ourselves
+                if not in_flight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            response = await generate()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future does not log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+        finally:
+            self._in_flight.pop(key, None)
+
+        if response:
+            self._set_local(key, response, ttl)
+            await self._set_redis(key, response, ttl)
+        return response, None
+
+    async def invalidate(self, key: str):
+        """Drop a response from both tiers"""
+        self._entries.pop(key, None)
+        if self.redis is not None:
+            await maybe_await(self.redis.cache_delete(f"{self.REDIS_PREFIX}:{key}"))
+
+    def clear(self):
+        """Drop all local entries"""
+        self._entries.clear()
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        response, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _set_local(self, key: str, response: str, ttl: int):
+        self._entries[key] = (response, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[str]:
+        if self.redis is None:
+            return None
+        cached = await maybe_await(self.redis.cache_get(f"{self.REDIS_PREFIX}:{key}"))
+        if isinstance(cached, dict):
+            return cached.get("response")
+        return None
+
+    async def _set_redis(self, key: str, response: str, ttl: int):
+        if self.redis is not None:
+            await maybe_await(
+                self.redis.cache_set(
+                    f"{self.REDIS_PREFIX}:{key}", {"response": response}, ttl
+                )
+            )
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Process-wide LLM response cache"""
+    global _response_cache
+
+    if _response_cache is None:
+        redis_client = None
+        if settings.LLM_CACHE_REDIS:
+            from app.core.async_redis_client import get_request_redis
+
+            redis_client = get_request_redis()
+        _response_cache = LLMResponseCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES, redis_client=redis_client
+        )
+    return _response_cache
@@ -3,17 +3,65 @@ Token Usage Tracker for LLM API calls.
 
 This module provides tools to track token usage and estimate costs when using
 language models like OpenAI's GPT or Google's Gemini.
+
+Token counts come from the model when it reports them (Gemini's
+usage_metadata) and from tiktoken for OpenAI models. Otherwise they are
+estimated from character counts, scaled by a factor calibrated against
+the counts Gemini did report. Each call is attributed to the feature
+that issued it, see the FEATURE_* constants.
 """
 
 import os
-import json
 import time
+import logging
+from collections import deque
 from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime
 import tiktoken
 from tqdm.auto import tqdm
 import google.generativeai as genai
 from app.core.config import settings
+from app.ai.usage_log import get_usage_log_writer, hourly_usage, usage_aggregates
+
+logger = logging.getLogger(__name__)
+
+# Call sites LLM usage is attributed to (GeminiService `feature=`)
+FEATURE_QUIZ_QUESTIONS = "quiz_question_generation"
+FEATURE_PSYCHOLOGY_INSIGHTS = "psychology_insights"
+FEATURE_LEAD_ANALYSIS = "lead_analysis"
+FEATURE_MARKET_TRENDS = "market_trends"
+UNATTRIBUTED = "unattributed"
+
+
+class TokenEstimator:
+    """
+    Calibration of character-based token estimates
+
+    Keeps, separately for prompts and responses, an exponentially weighted
+    ratio of the token counts a model reported to what the character-based
+    estimate predicted for the same text.
+    """
+
+    # Weight of a new observation once a few have been seen
+    SMOOTHING = 0.05
+    DIRECTIONS = ("input", "output")
+
+    def __init__(self):
+        self.scale = {direction: 1.0 for direction in self.DIRECTIONS}
+        self.observations = {direction: 0 for direction in self.DIRECTIONS}
+
+    def observe(self, direction: str, estimated: int, actual: int) -> None:
+        """Fold in a reported count for text estimated at `estimated` tokens"""
+        if estimated <= 0 or actual <= 0:
+            return
+        seen = self.observations[direction]
+        # Plain average for the first observations, then a moving one
+        weight = max(self.SMOOTHING, 1 / (seen + 1))
+        self.scale[direction] += weight * (actual / estimated - self.scale[direction])
+        self.observations[direction] = seen + 1
+
+    def apply(self, direction: str, estimated: int) -> int:
+        return int(round(estimated * self.scale[direction]))
 
 
 class TokenUsageTracker:
@@ -48,7 +96,7 @@ class TokenUsageTracker:
     def __init__(
         self,
         model_name: str = None,
-        log_file: str = "token_usage.jsonl",
+        log_file: Optional[str] = None,
         streaming: bool = True,
     ):
         """
@@ -56,17 +104,29 @@ class TokenUsageTracker:
 
         Args:
             model_name: Name of LLM model to track
-            log_file: Path to log file for token usage
-            streaming: Whether to stream token usage to console
+            log_file: Path to log file for token usage (defaults to
+                settings.TOKEN_USAGE_LOG_FILE)
+            streaming: Whether to log a line per call
         """
         self.model_name = model_name or settings.LLM_MODEL_NAME
-        self.log_file = log_file
+        self.estimator = TokenEstimator()
+        self.log_file = log_file or settings.TOKEN_USAGE_LOG_FILE
         self.streaming = streaming
-        self.usage_log = []
+        # Most recent usage records; the full history is in the log file
+        self.usage_log: deque = deque(maxlen=settings.TOKEN_USAGE_RECENT_SIZE)
+        self.total_calls = 0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
         self.total_cost = 0.0
 
+        # Response cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_hits_by_source: Dict[str, int] = {}
+        self.saved_input_tokens = 0
+        self.saved_output_tokens = 0
+        self.saved_cost = 0.0
+
         # Set up tokenizer
         if "gpt" in self.model_name.lower():
             # Get the appropriate OpenAI tokenizer
@@ -92,13 +152,17 @@ class TokenUsageTracker:
         tokens_per_char = self.TOKENS_PER_CHAR.get(lang, self.TOKENS_PER_CHAR["other"])
         return int(chars * tokens_per_char)
 
-    def count_tokens(self, text: str, lang: str = "english") -> int:
+    def count_tokens(
+        self, text: str, lang: str = "english", direction: str = "input"
+    ) -> int:
         """
         Count tokens in text.
 
         Args:
             text: Text to count tokens for
             lang: Language of text for character-based estimation
+            direction: "input" for prompts, "output" for responses; picks
+                the calibration applied to estimates
 
         Returns:
             Token count
@@ -106,7 +170,22 @@ class TokenUsageTracker:
         if self.tokenizer:
             return self._count_tokens_with_tiktoken(text)
         else:
-            return self._estimate_tokens_by_chars(text, lang)
+            return self.estimator.apply(
+                direction, self._estimate_tokens_by_chars(text, lang)
+            )
+
+    def calibrate(
+        self, prompt: str, response: str, input_tokens: int, output_tokens: int
+    ):
+        """Calibrate estimates against token counts reported by the model"""
+        if self.tokenizer:
+            return
+        self.estimator.observe(
+            "input", self._estimate_tokens_by_chars(prompt), input_tokens
+        )
+        self.estimator.observe(
+            "output", self._estimate_tokens_by_chars(response), output_tokens
+        )
 
     def calculate_cost(self, input_tokens: int, output_tokens: int) -> float:
         """
@@ -130,7 +209,13 @@ class TokenUsageTracker:
         return input_cost + output_cost
 
     async def track_usage(
-        self, prompt: str, response: str, metadata: Optional[Dict[str, Any]] = None
+        self,
+        prompt: str,
+        response: str,
+        metadata: Optional[Dict[str, Any]] = None,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        feature: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Track token usage for a prompt-response pair.
@@ -139,13 +224,28 @@ class TokenUsageTracker:
             prompt: Input prompt text
             response: Output response text
             metadata: Additional tracking metadata
+            input_tokens: Prompt tokens reported by the model, if any
+            output_tokens: Response tokens reported by the model, if any
+            feature: Calling feature (FEATURE_*); defaults to
+                metadata["feature"] or the decorated function's name
 
         Returns:
             Usage data dictionary
         """
-        # Count tokens
-        input_tokens = self.count_tokens(prompt)
-        output_tokens = self.count_tokens(response)
+        # Count tokens, preferring the model's own counts
+        reported = input_tokens is not None and output_tokens is not None
+        if reported:
+            self.calibrate(prompt, response, input_tokens, output_tokens)
+        else:
+            input_tokens = self.count_tokens(prompt)
+            output_tokens = self.count_tokens(response, direction="output")
+        estimated = not reported and self.tokenizer is None
+        feature = (
+            feature
+            or (metadata or {}).get("feature")
+            or (metadata or {}).get("function")
+            or UNATTRIBUTED
+        )
 
         # Calculate cost
         cost = self.calculate_cost(input_tokens, output_tokens)
@@ -159,6 +259,8 @@ class TokenUsageTracker:
             "output_tokens": output_tokens,
             "total_tokens": input_tokens + output_tokens,
             "estimated_cost_usd": cost,
+            "feature": feature,
+            "token_source": "estimate" if estimated else "reported",
         }
 
         # Add metadata if provided
@@ -166,44 +268,83 @@ class TokenUsageTracker:
             usage_data["metadata"] = metadata
 
         # Update totals
+        self.total_calls += 1
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
         self.total_cost += cost
+        usage_aggregates.record(
+            self.model_name, feature, input_tokens, output_tokens, cost
+        )
+        hourly_usage.record(
+            self.model_name, feature, input_tokens, output_tokens, cost, estimated
+        )
 
-        # Add to log
+        # Keep recent records in memory; the writer thread appends to the log
         self.usage_log.append(usage_data)
+        get_usage_log_writer(self.log_file).submit(usage_data)
 
-        # Save to log file
-        with open(self.log_file, "a") as f:
-            f.write(json.dumps(usage_data) + "\n")
-
-        # Stream to console if enabled
+        # Stream to the log if enabled
         if self.streaming:
             self._stream_usage(usage_data)
 
         return usage_data
 
+    def record_cache_hit(self, prompt: str, response: str, source: str) -> None:
+        """
+        Record an LLM call answered from the response cache.
+
+        Args:
+            prompt: Prompt that would have been sent
+            response: Cached response text
+            source: Cache tier that answered ("local", "redis", "in_flight")
+        """
+        input_tokens = self.count_tokens(prompt)
+        output_tokens = self.count_tokens(response, direction="output")
+
+        self.cache_hits += 1
+        self.cache_hits_by_source[source] = self.cache_hits_by_source.get(source, 0) + 1
+        self.saved_input_tokens += input_tokens
+        self.saved_output_tokens += output_tokens
+        self.saved_cost += self.calculate_cost(input_tokens, output_tokens)
+
+    def record_cache_miss(self) -> None:
+        """Record an LLM call that had to go to the model."""
+        self.cache_misses += 1
+
+    def get_cache_summary(self) -> Dict[str, Any]:
+        """Get response cache hit rate and the tokens and cost it saved."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hits_by_source": dict(self.cache_hits_by_source),
+            "hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            "saved_input_tokens": self.saved_input_tokens,
+            "saved_output_tokens": self.saved_output_tokens,
+            "saved_tokens": self.saved_input_tokens + self.saved_output_tokens,
+            "saved_cost_usd": self.saved_cost,
+        }
+
     def _stream_usage(self, usage_data: Dict[str, Any]) -> None:
-        """Stream usage data to console."""
-        print("\n" + "=" * 50)
-        print(f"TOKEN USAGE - {usage_data['timestamp']}")
-        print(f"Model: {self.model_name}")
-        print(f"Input tokens: {usage_data['input_tokens']}")
-        print(f"Output tokens: {usage_data['output_tokens']}")
-        print(f"Total tokens: {usage_data['total_tokens']}")
-        print(f"Estimated cost: ${usage_data['estimated_cost_usd']:.6f}")
-        print("=" * 50)
+        """Log usage data as a single line."""
+        logger.info(
+            f"Token usage: model={self.model_name} "
+            f"input={usage_data['input_tokens']} "
+            f"output={usage_data['output_tokens']} "
+            f"cost=${usage_data['estimated_cost_usd']:.6f}"
+        )
 
     def get_summary(self) -> Dict[str, Any]:
         """Get summary of total token usage and costs."""
         return {
             "model": self.model_name,
-            "total_calls": len(self.usage_log),
+            "total_calls": self.total_calls,
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
             "total_cost_usd": self.total_cost,
             "log_file": self.log_file,
+            "cache": self.get_cache_summary(),
         }
 
     def print_summary(self) -> None:
@@ -220,6 +361,26 @@ class TokenUsageTracker:
         print("=" * 50)
 
 
+# Shared trackers keyed by model name
+_trackers: Dict[str, TokenUsageTracker] = {}
+
+
+def get_token_tracker(model_name: Optional[str] = None) -> TokenUsageTracker:
+    """
+    Get the process-wide tracker for a model.
+
+    Args:
+        model_name: Model to track (defaults to settings.LLM_MODEL_NAME)
+
+    Returns:
+        Shared TokenUsageTracker instance
+    """
+    model_name = model_name or settings.LLM_MODEL_NAME
+    if model_name not in _trackers:
+        _trackers[model_name] = TokenUsageTracker(model_name, streaming=False)
+    return _trackers[model_name]
+
+
 # Decorator for tracking LLM function calls
 def track_tokens(tracker: TokenUsageTracker):
     """
@@ -0,0 +1,386 @@
+"""
+Token usage sink.
+
+TokenUsageTracker hands each usage record to a UsageLogWriter instead of
+appending to the log file itself. The writer owns a bounded queue and a
+background thread that drains it in batches, writing each batch with one
+``writelines`` call, and rotates the log by size or age. A full queue
+drops the record from the log (counted in the writer stats) rather than
+blocking the caller.
+
+RollingUsage keeps per-model and per-feature totals over a sliding time
+window, in fixed-size time buckets, for the monitoring endpoints.
+HourlyUsage accumulates the same totals per UTC hour until they are
+added to the llm_usage_hourly_rollups table (app.services.llm_usage).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import deque
+from datetime import datetime
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class UsageLogWriter:
+    """
+    Background, batched JSON-lines writer with log rotation
+    """
+
+    # Seconds to wait for the queue to drain on close
+    CLOSE_TIMEOUT = 5.0
+
+    def __init__(
+        self,
+        path: str,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        backups: Optional[int] = None,
+    ):
+        """
+        Args:
+            path: Log file; rotated copies are path.1 (newest) to path.N
+            queue_size: Records allowed to wait for the writer thread
+            batch_size: Most records written per writelines call
+            flush_interval: Seconds the thread waits for more records
+            max_bytes: Rotate once the file reaches this size (0 disables)
+            max_age: Rotate once the file has been written to for this many
+                seconds (0 disables)
+            backups: Rotated files kept
+        """
+
+        def setting(value, default):
+            return default if value is None else value
+
+        self.path = path
+        self.batch_size = setting(batch_size, settings.TOKEN_USAGE_BATCH_SIZE)
+        self.flush_interval = setting(
+            flush_interval, settings.TOKEN_USAGE_FLUSH_SECONDS
+        )
+        self.max_bytes = setting(max_bytes, settings.TOKEN_USAGE_LOG_MAX_BYTES)
+        self.max_age = setting(max_age, settings.TOKEN_USAGE_LOG_MAX_AGE_HOURS * 3600)
+        self.backups = setting(backups, settings.TOKEN_USAGE_LOG_BACKUPS)
+
+        self._queue: queue.Queue = queue.Queue(
+            setting(queue_size, settings.TOKEN_USAGE_QUEUE_SIZE)
+        )
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._file = None
+        self._opened_at = 0.0
+
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        """
+        Queue a record for writing without blocking
+
+        Returns:
+            False if the queue was full and the record was dropped
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = CLOSE_TIMEOUT) -> bool:
+        """Block until records queued so far are written"""
+        self._ensure_thread()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self):
+        """Write what is queued, then stop the thread and close the file"""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(self.CLOSE_TIMEOUT)
+        self._thread = None
+        self._close_file()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="token-usage-log", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch: List[Any] = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            records = [item for item in batch if isinstance(item, dict)]
+            if records:
+                self._write(records)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _write(self, records: List[Dict[str, Any]]):
+        try:
+            self._rotate_if_needed()
+            if self._file is None:
+                self._open_file()
+            self._file.writelines(
+                json.dumps(record, default=str) + "\n" for record in records
+            )
+            self._file.flush()
+            self.written += len(records)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Failed to write {len(records)} token usage records: {e}")
+            self._close_file()
+
+    def _open_file(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+
+    def _rotate_if_needed(self):
+        if self._file is None:
+            if not os.path.exists(self.path):
+                return
+            self._open_file()
+
+        size = self._file.tell()
+        if size == 0:
+            return
+        too_big = self.max_bytes and size >= self.max_bytes
+        too_old = self.max_age and time.time() - self._opened_at >= self.max_age
+        if not (too_big or too_old):
+            return
+
+        self._close_file()
+        if self.backups > 0:
+            for index in range(self.backups - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "errors": self.errors,
+        }
+
+
+class RollingUsage:
+    """
+    Thread-safe token and cost totals per model and per feature over a
+    sliding window
+    """
+
+    # Width of each time bucket in seconds
+    BUCKET_SECONDS = 60
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        Args:
+            window: Seconds covered (defaults to TOKEN_USAGE_WINDOW_SECONDS)
+        """
+        self.window = window or settings.TOKEN_USAGE_WINDOW_SECONDS
+        # (bucket start, {(model, feature): [calls, input, output, cost]})
+        self._buckets: deque = deque()
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        model: str,
+        feature: str,
+        input_tokens: int,
+        output_tokens: int,
+        cost: float,
+        at: Optional[float] = None,
+    ):
+        at = time.time() if at is None else at
+        start = int(at // self.BUCKET_SECONDS) * self.BUCKET_SECONDS
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != start:
+                self._buckets.append((start, {}))
+            totals = self._buckets[-1][1].setdefault((model, feature), [0, 0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += input_tokens
+            totals[2] += output_tokens
+            totals[3] += cost
+            self._prune(at)
+
+    def _prune(self, now: float):
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            self._buckets.popleft()
+
+    def summary(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Totals over the window
+
+        Returns:
+            Calls, tokens and cost keyed by model and by feature
+        """
+        now = time.time() if now is None else now
+        by_model: Dict[str, Dict[str, Any]] = {}
+        by_feature: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            self._prune(now)
+            for _, bucket in self._buckets:
+                for (model, feature), totals in bucket.items():
+                    for key, group in ((model, by_model), (feature, by_feature)):
+                        _add(group.setdefault(key, _empty_totals()), totals)
+
+        for group in (by_model, by_feature):
+            for totals in group.values():
+                totals["total_tokens"] = (
+                    totals["input_tokens"] + totals["output_tokens"]
+                )
+                totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return {
+            "window_seconds": self.window,
+            "by_model": by_model,
+            "by_feature": by_feature,
+        }
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+
+
+def _add(target: Dict[str, Any], totals: List):
+    target["calls"] += totals[0]
+    target["input_tokens"] += totals[1]
+    target["output_tokens"] += totals[2]
+    target["cost_usd"] += totals[3]
+
+
+class HourlyUsage:
+    """
+    Thread-safe per-hour usage totals not yet stored in the database
+    """
+
+    def __init__(self):
+        # {(hour, model, feature): [calls, estimated calls, input, output, cost]}
+        self._pending: Dict[Tuple[datetime, str, str], List] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        model: str,
+        feature: str,
+        input_tokens: int,
+        output_tokens: int,
+        cost: float,
+        estimated: bool = False,
+        at: Optional[datetime] = None,
+    ):
+        hour = (at or datetime.utcnow()).replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            totals = self._pending.setdefault((hour, model, feature), [0, 0, 0, 0, 0.0])
+            _merge(totals, [1, int(estimated), input_tokens, output_tokens, cost])
+
+    def take(self) -> Dict[Tuple[datetime, str, str], List]:
+        """Remove and return the pending totals"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Dict[Tuple[datetime, str, str], List]):
+        """Put back totals that could not be stored"""
+        with self._lock:
+            for key, totals in pending.items():
+                _merge(self._pending.setdefault(key, [0, 0, 0, 0, 0.0]), totals)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+def _merge(target: List, totals: List):
+    for index, value in enumerate(totals):
+        target[index] += value
+
+
+# One writer per log file, shared by every tracker in the process
+_writers: Dict[str, UsageLogWriter] = {}
+_writers_lock = threading.Lock()
+
+# Aggregates across every tracker in the process
+usage_aggregates = RollingUsage()
+hourly_usage = HourlyUsage()
+
+
+def get_usage_log_writer(path: Optional[str] = None) -> UsageLogWriter:
+    """
+    Get the process-wide writer for a log file
+
+    Args:
+        path: Log file (defaults to settings.TOKEN_USAGE_LOG_FILE)
+    """
+    key = os.path.abspath(path or settings.TOKEN_USAGE_LOG_FILE)
+    with _writers_lock:
+        if key not in _writers:
+            _writers[key] = UsageLogWriter(path or settings.TOKEN_USAGE_LOG_FILE)
+        return _writers[key]
+
+
+def close_usage_log_writers():
+    """Flush and stop every writer, e.g. on shutdown"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
+
+
+def get_usage_metrics() -> Dict[str, Any]:
+    """Rolling token usage aggregates and the log writers' stats"""
+    with _writers_lock:
+        writers = [writer.stats() for writer in _writers.values()]
+    return {**usage_aggregates.summary(), "log_writers": writers}
@@ -5,6 +5,7 @@ This package contains all Effi API related functionality.
 """
 
 from .client import EffiClient
+from .async_client import AsyncEffiClient, get_async_effi_client
 
-# Export the client class
-__all__ = ["EffiClient"]
+# Export the client classes
+__all__ = ["EffiClient", "AsyncEffiClient", "get_async_effi_client"]
@@ -0,0 +1,426 @@
+"""
+Async Effi API Client
+
+asyncio variant of EffiClient for use from async endpoints and services.
+All requests share one pooled HTTP session with keep-alive, run under a
+per-worker concurrency limit and a timeout, and are retried with jittered
+exponential backoff on 429 and 5xx responses. Requests and responses are
+built and parsed by the same helpers as the synchronous client.
+"""
+
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+import random
+
+import httpx
+
+from app.core.config import settings
+from .client import (
+    as_imported_lead,
+    as_page,
+    build_import_payload,
+    build_leads_params,
+    build_search_params,
+    merge_lead_update,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncEffiClient:
+    """Async client for the Effi API with a pooled HTTP session."""
+
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+    # Methods that are safe to repeat after a 5xx or a connection error;
+    # anything else is only retried on 429, when the server did no work
+    IDEMPOTENT_METHODS = {"GET", "PUT"}
+    MAX_BACKOFF_SECONDS = 30.0
+    KEEPALIVE_EXPIRY_SECONDS = 30.0
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """Initialize the async Effi API client.
+
+        Args:
+            api_key: API key for authentication. Defaults to EFFI_API_KEY.
+            base_url: Base URL for the API. Defaults to EFFI_BASE_URL.
+            timeout: Default per-request timeout in seconds
+            max_connections: Size of the connection pool
+            max_concurrency: Requests allowed in flight at once
+            max_retries: Retries after the first attempt
+            backoff: Base delay in seconds for exponential backoff
+            transport: Optional httpx transport (used by tests)
+        """
+        self.api_key = api_key or os.getenv("EFFI_API_KEY")
+        self.base_url = base_url or os.getenv(
+            "EFFI_BASE_URL", "https://broker-service-m2m.lf.effi.com.au"
+        )
+        if not self.api_key:
+            raise ValueError("Effi API key is required")
+
+        self.timeout = timeout if timeout is not None else settings.EFFI_TIMEOUT_SECONDS
+        self.max_connections = max_connections or settings.EFFI_MAX_CONNECTIONS
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.EFFI_MAX_RETRIES
+        )
+        self.backoff = (
+            backoff if backoff is not None else settings.EFFI_RETRY_BACKOFF_SECONDS
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(
+            max_concurrency or settings.EFFI_MAX_CONCURRENCY
+        )
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def _get_headers(self) -> Dict[str, str]:
+        """Get headers for API requests."""
+        return {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}",
+            "x-api-key": self.api_key,
+        }
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Create the pooled session on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self._get_headers(),
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=self.KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def close(self):
+        """Close the pooled session and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncEffiClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """Send a request with retries and return the decoded JSON body.
+
+        Args:
+            method: HTTP method
+            path: Path relative to the base URL
+            params: Query parameters
+            json: JSON request body
+            timeout: Override for the default timeout in seconds
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            httpx.HTTPStatusError: For error responses once retries run out
+            httpx.TransportError: For connection errors and timeouts
+        """
+        client = self._get_client()
+        idempotent = method in self.IDEMPOTENT_METHODS
+        attempt = 0
+
+        while True:
+            self.stats["requests"] += 1
+            try:
+                async with self._semaphore:
+                    response = await client.request(
+                        method,
+                        path,
+                        params=params,
+                        json=json,
+                        timeout=timeout if timeout is not None else self.timeout,
+                    )
+            except httpx.TransportError as e:
+                if not idempotent or attempt >= self.max_retries:
+                    self.stats["failures"] += 1
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(
+                    f"Effi {method} {path} failed ({type(e).__name__}), "
+                    f"retrying in {delay:.2f}s"
+                )
+            else:
+                retryable = response.status_code in self.RETRY_STATUS_CODES and (
+                    idempotent or response.status_code == 429
+                )
+                if not retryable or attempt >= self.max_retries:
+                    if response.is_error:
+                        self.stats["failures"] += 1
+                    response.raise_for_status()
+                    return response.json()
+                delay = self._backoff_delay(
+                    attempt, response.headers.get("Retry-After")
+                )
+                logger.warning(
+                    f"Effi {method} {path} returned {response.status_code}, "
+                    f"retrying in {delay:.2f}s"
+                )
+
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter exponential backoff, honouring Retry-After seconds."""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.MAX_BACKOFF_SECONDS)
+            except ValueError:
+                pass  # HTTP-date form; fall back to our own backoff
+        ceiling = min(self.backoff * (2**attempt), self.MAX_BACKOFF_SECONDS)
+        return random.uniform(0, ceiling)
+
+    async def search_leads(
+        self,
+        status: Optional[str] = None,
+        name: Optional[str] = None,
+        email: Optional[str] = None,
+        phone: Optional[str] = None,
+        postal_code: Optional[str] = None,
+        broker_id: Optional[str] = None,
+        min_loan_amount: Optional[float] = None,
+        max_loan_amount: Optional[float] = None,
+        created_from: Optional[str] = None,
+        created_to: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 20,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Search for leads with various filters.
+
+        Takes the same filters as EffiClient.search_leads.
+
+        Returns:
+            Dictionary containing leads matching the filters and pagination information
+        """
+        params = build_search_params(
+            status=status,
+            name=name,
+            email=email,
+            phone=phone,
+            postal_code=postal_code,
+            broker_id=broker_id,
+            min_loan_amount=min_loan_amount,
+            max_loan_amount=max_loan_amount,
+            created_from=created_from,
+            created_to=created_to,
+            page=page,
+            page_size=page_size,
+        )
+
+        try:
+            data = await self._request(
+                "GET", "/api/Leads/Search", params=params, timeout=timeout
+            )
+            return as_page(data, page, page_size)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error searching leads: {str(e)}")
+            raise Exception(f"Error searching leads: {str(e)}")
+
+    async def get_leads(
+        self,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        top: int = 50,
+        skip: int = 0,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Get all leads.
+
+        Args:
+            from_date: Created from date (format: YYYY-MM-DD)
+            to_date: Created to date (format: YYYY-MM-DD)
+            top: Number of records to be fetched (default: 50)
+            skip: Number of records to be skipped (default: 0)
+            timeout: Optional timeout override in seconds
+
+        Returns:
+            Dictionary containing lead data with pagination information
+        """
+        params = build_leads_params(from_date, to_date, top, skip)
+
+        try:
+            data = await self._request(
+                "GET", "/api/v2/Leads", params=params, timeout=timeout
+            )
+            return as_page(data, (skip // top) + 1, top)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching leads: {str(e)}")
+            raise
+
+    async def get_lead(
+        self, lead_id: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Get a specific lead by ID.
+
+        Args:
+            lead_id: ID of the lead to retrieve
+            timeout: Optional timeout override in seconds
+
+        Returns:
+            Lead object with details
+        """
+        try:
+            return await self._request("GET", f"/api/Leads/{lead_id}", timeout=timeout)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error fetching lead {lead_id}: {str(e)}")
+            raise
+
+    async def update_lead(
+        self, lead_id: str, timeout: Optional[float] = None, **kwargs
+    ) -> Dict[str, Any]:
+        """Update a lead in the platform.
+
+        Args:
+            lead_id: ID of the lead to update
+            timeout: Optional timeout override in seconds
+            **kwargs: Fields to update, as for EffiClient.update_lead
+
+        Returns:
+            The updated lead object
+        """
+        # First get current lead data to update only the changed fields
+        try:
+            current_lead = await self.get_lead(lead_id, timeout=timeout)
+        except httpx.HTTPError:
+            current_lead = {}
+
+        payload = merge_lead_update(current_lead, kwargs)
+
+        try:
+            return await self._request(
+                "PUT", f"/api/Leads/{lead_id}", json=payload, timeout=timeout
+            )
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error updating lead {lead_id}: {str(e)}")
+            raise
+
+    async def assign_broker_to_lead(
+        self,
+        lead_id: str,
+        broker_id: str,
+        notes: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """Assign a broker to a lead.
+
+        Args:
+            lead_id: ID of the lead to update
+            broker_id: ID of the broker to assign
+            notes: Optional notes about the assignment
+            timeout: Optional timeout override in seconds
+
+        Returns:
+            Updated lead object
+        """
+        payload = {"BrokerId": broker_id}
+        if notes:
+            payload["Notes"] = notes
+
+        try:
+            return await self._request(
+                "PUT",
+                f"/api/v2/Leads/{lead_id}/AssignBroker",
+                json=payload,
+                timeout=timeout,
+            )
+
+        except httpx.HTTPError as e:
+            logger.error(
+                f"Error assigning broker {broker_id} to lead {lead_id}: {str(e)}"
+            )
+            raise
+
+    async def import_lead(
+        self,
+        first_name: str,
+        last_name: str,
+        email: str,
+        phone: str,
+        timeout: Optional[float] = None,
+        **optional_fields,
+    ) -> Dict[str, Any]:
+        """Import a lead into the platform.
+
+        Args:
+            first_name: First name of the lead
+            last_name: Last name of the lead
+            email: Email address of the lead
+            phone: Phone number of the lead
+            timeout: Optional timeout override in seconds
+            **optional_fields: Optional fields as for EffiClient.import_lead
+
+        Returns:
+            The created lead object
+        """
+        payload = build_import_payload(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone,
+            **optional_fields,
+        )
+
+        try:
+            result = await self._request(
+                "POST", "/api/Leads/Import", json=payload, timeout=timeout
+            )
+            return as_imported_lead(result, payload)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error importing lead: {str(e)}")
+            raise
+
+
+_async_client: Optional[AsyncEffiClient] = None
+
+
+def get_async_effi_client() -> AsyncEffiClient:
+    """Process-wide async Effi client sharing one connection pool"""
+    global _async_client
+
+    if _async_client is None:
+        _async_client = AsyncEffiClient()
+    return _async_client
+
+
+async def close_async_effi_client():
+    """Close the shared client's connections (called on shutdown)"""
+    global _async_client
+
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
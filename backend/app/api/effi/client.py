@@ -14,6 +14,174 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Snake_case update fields accepted by update_lead and their API names
+LEAD_FIELD_MAPPING = {
+    "first_name": "FirstName",
+    "last_name": "LastName",
+    "email": "Email",
+    "phone": "Phone",
+    "postcode": "Postcode",
+    "suburb": "Suburb",
+    "state": "State",
+    "broker_id": "BrokerId",
+    "estimated_property_value": "EstimatedPropertyValue",
+    "loan_amount": "LoanAmount",
+    "reference": "Reference",
+    "source_url": "SourceUrl",
+    "best_time_to_contact": "BestTimeToContact",
+    "notes": "Notes",
+    "status": "Status",
+}
+
+
+def build_search_params(
+    status: Optional[str] = None,
+    name: Optional[str] = None,
+    email: Optional[str] = None,
+    phone: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    broker_id: Optional[str] = None,
+    min_loan_amount: Optional[float] = None,
+    max_loan_amount: Optional[float] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    page: int = 1,
+    page_size: int = 20,
+) -> Dict[str, Any]:
+    """Build query parameters for the lead search endpoint."""
+    # Calculate skip value for pagination
+    params = {"top": page_size, "skip": (page - 1) * page_size}
+
+    if status:
+        params["status"] = status
+    if name:
+        params["search"] = name
+    if email:
+        params["email"] = email
+    if phone:
+        params["phone"] = phone
+    if postal_code:
+        params["postalCode"] = postal_code
+    if broker_id:
+        params["brokerId"] = broker_id
+    if min_loan_amount is not None:
+        params["minAmount"] = min_loan_amount
+    if max_loan_amount is not None:
+        params["maxAmount"] = max_loan_amount
+    if created_from:
+        params["from"] = created_from
+    if created_to:
+        params["to"] = created_to
+    return params
+
+
+def build_leads_params(
+    from_date: Optional[str], to_date: Optional[str], top: int, skip: int
+) -> Dict[str, Any]:
+    """Build query parameters for the lead listing endpoint."""
+    params = {"top": top, "skip": skip}
+
+    if from_date:
+        params["from"] = from_date
+    if to_date:
+        params["to"] = to_date
+    return params
+
+
+def as_page(data: Any, page: int, page_size: int) -> Dict[str, Any]:
+    """Wrap a bare list response in the paginated dictionary format.
+
+    Args:
+        data: Decoded JSON response
+        page: Page number that was requested
+        page_size: Page size that was requested
+
+    Returns:
+        The response unchanged if it is already paginated, otherwise a
+        dictionary with Items and pagination information
+    """
+    if isinstance(data, list):
+        return {
+            "Items": data,
+            "TotalCount": len(data),
+            "CurrentPage": page,
+            "PageSize": page_size,
+            "TotalPages": (len(data) + page_size - 1) // page_size,
+        }
+    return data
+
+
+def merge_lead_update(
+    current_lead: Dict[str, Any], updates: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Apply snake_case updates on top of the current lead data."""
+    payload = current_lead
+    for key, value in updates.items():
+        if key in LEAD_FIELD_MAPPING and value is not None:
+            payload[LEAD_FIELD_MAPPING[key]] = value
+    return payload
+
+
+def build_import_payload(
+    first_name: str,
+    last_name: str,
+    email: str,
+    phone: str,
+    postcode: Optional[str] = None,
+    suburb: Optional[str] = None,
+    state: Optional[str] = None,
+    broker_id: Optional[str] = None,
+    estimated_property_value: Optional[float] = None,
+    loan_amount: Optional[float] = None,
+    reference: Optional[str] = None,
+    source_url: Optional[str] = None,
+    best_time_to_contact: Optional[str] = None,
+    notes: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build the request body for the lead import endpoint."""
+    payload = {
+        "FirstName": first_name,
+        "LastName": last_name,
+        "Email": email,
+        "Phone": phone,
+    }
+
+    # Add optional fields if provided
+    if postcode:
+        payload["Postcode"] = postcode
+    if suburb:
+        payload["Suburb"] = suburb
+    if state:
+        payload["State"] = state
+    if broker_id:
+        payload["BrokerId"] = broker_id
+    if estimated_property_value is not None:
+        payload["EstimatedPropertyValue"] = estimated_property_value
+    if loan_amount is not None:
+        payload["LoanAmount"] = loan_amount
+    if reference:
+        payload["Reference"] = reference
+    if source_url:
+        payload["SourceUrl"] = source_url
+    if best_time_to_contact:
+        payload["BestTimeToContact"] = best_time_to_contact
+    if notes:
+        payload["Notes"] = notes
+    return payload
+
+
+def as_imported_lead(result: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize the import response, which may be just the new lead ID."""
+    if isinstance(result, str):
+        return {
+            "id": result,
+            "firstName": payload["FirstName"],
+            "lastName": payload["LastName"],
+            "email": payload["Email"],
+            "phone": payload["Phone"],
+        }
+    return result
+
 
 class EffiClient:
     """Client for the Effi API."""
@@ -85,53 +253,27 @@ class EffiClient:
         """
         url = f"{self.base_url}/api/Leads/Search"
 
-        # Calculate skip value for pagination
-        skip = (page - 1) * page_size
-
-        # Build query parameters
-        params = {"top": page_size, "skip": skip}
-
-        if status:
-            params["status"] = status
-        if name:
-            params["search"] = name
-        if email:
-            params["email"] = email
-        if phone:
-            params["phone"] = phone
-        if postal_code:
-            params["postalCode"] = postal_code
-        if broker_id:
-            params["brokerId"] = broker_id
-        if min_loan_amount is not None:
-            params["minAmount"] = min_loan_amount
-        if max_loan_amount is not None:
-            params["maxAmount"] = max_loan_amount
-        if created_from:
-            params["from"] = created_from
-        if created_to:
-            params["to"] = created_to
+        params = build_search_params(
+            status=status,
+            name=name,
+            email=email,
+            phone=phone,
+            postal_code=postal_code,
+            broker_id=broker_id,
+            min_loan_amount=min_loan_amount,
+            max_loan_amount=max_loan_amount,
+            created_from=created_from,
+            created_to=created_to,
+            page=page,
+            page_size=page_size,
+        )
 
         # Make the request
         try:
             response = requests.get(url, params=params, headers=self._get_headers())
             response.raise_for_status()  # Raise exception for 4XX/5XX status codes
 
-            # Get the JSON response
-            data = response.json()
-
-            # If the response is a list, convert it to the expected dictionary format
-            if isinstance(data, list):
-                return {
-                    "Items": data,
-                    "TotalCount": len(data),
-                    "CurrentPage": page,
-                    "PageSize": page_size,
-                    "TotalPages": (len(data) + page_size - 1) // page_size,
-                }
-
-            # Return the JSON response as is if it's already in the expected format
-            return data
+            return as_page(response.json(), page, page_size)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error searching leads: {str(e)}")
@@ -157,36 +299,14 @@ class EffiClient:
         """
         url = f"{self.base_url}/api/v2/Leads"
 
-        # Build query parameters
-        params = {"top": top, "skip": skip}
-
-        if from_date:
-            params["from"] = from_date
-
-        if to_date:
-            params["to"] = to_date
+        params = build_leads_params(from_date, to_date, top, skip)
 
         # Make the request
         try:
             response = requests.get(url, params=params, headers=self._get_headers())
             response.raise_for_status()  # Raise exception for 4XX/5XX status codes
 
-            # Get the JSON response
-            data = response.json()
-
-            # If the response is a list, convert it to the expected dictionary format
-            if isinstance(data, list):
-                page = (skip // top) + 1
-                return {
-                    "Items": data,
-                    "TotalCount": len(data),
-                    "CurrentPage": page,
-                    "PageSize": top,
-                    "TotalPages": (len(data) + top - 1) // top,
-                }
-
-            # Return the JSON response as is if it's already in the expected format
-            return data
+            return as_page(response.json(), (skip // top) + 1, top)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching leads: {str(e)}")
@@ -241,25 +361,6 @@ class EffiClient:
         """
         url = f"{self.base_url}/api/Leads/{lead_id}"
 
-        # Build request payload - convert from snake_case to PascalCase
-        field_mapping = {
-            "first_name": "FirstName",
-            "last_name": "LastName",
-            "email": "Email",
-            "phone": "Phone",
-            "postcode": "Postcode",
-            "suburb": "Suburb",
-            "state": "State",
-            "broker_id": "BrokerId",
-            "estimated_property_value": "EstimatedPropertyValue",
-            "loan_amount": "LoanAmount",
-            "reference": "Reference",
-            "source_url": "SourceUrl",
-            "best_time_to_contact": "BestTimeToContact",
-            "notes": "Notes",
-            "status": "Status",
-        }
-
         # First get current lead data to update only the changed fields
         try:
             current_lead = self.get_lead(lead_id)
@@ -267,13 +368,7 @@ class EffiClient:
             # If we can't get the current lead data, proceed with just the provided fields
             current_lead = {}
 
-        # Start with current lead data
-        payload = current_lead
-
-        # Update with new data
-        for key, value in kwargs.items():
-            if key in field_mapping and value is not None:
-                payload[field_mapping[key]] = value
+        payload = merge_lead_update(current_lead, kwargs)
 
         # Make the request
         try:
@@ -361,56 +456,29 @@ class EffiClient:
         """
         url = f"{self.base_url}/api/Leads/Import"
 
-        # Build request payload
-        payload = {
-            "FirstName": first_name,
-            "LastName": last_name,
-            "Email": email,
-            "Phone": phone,
-        }
-
-        # Add optional fields if provided
-        if postcode:
-            payload["Postcode"] = postcode
-        if suburb:
-            payload["Suburb"] = suburb
-        if state:
-            payload["State"] = state
-        if broker_id:
-            payload["BrokerId"] = broker_id
-        if estimated_property_value is not None:
-            payload["EstimatedPropertyValue"] = estimated_property_value
-        if loan_amount is not None:
-            payload["LoanAmount"] = loan_amount
-        if reference:
-            payload["Reference"] = reference
-        if source_url:
-            payload["SourceUrl"] = source_url
-        if best_time_to_contact:
-            payload["BestTimeToContact"] = best_time_to_contact
-        if notes:
-            payload["Notes"] = notes
+        payload = build_import_payload(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone,
+            postcode=postcode,
+            suburb=suburb,
+            state=state,
+            broker_id=broker_id,
+            estimated_property_value=estimated_property_value,
+            loan_amount=loan_amount,
+            reference=reference,
+            source_url=source_url,
+            best_time_to_contact=best_time_to_contact,
+            notes=notes,
+        )
 
         # Make the request
         try:
             response = requests.post(url, json=payload, headers=self._get_headers())
             response.raise_for_status()  # Raise exception for 4XX/5XX status codes
 
-            # Get the JSON response
-            result = response.json()
-
-            # If the result is a string (just an ID), wrap it in a dictionary
-            if isinstance(result, str):
-                return {
-                    "id": result,
-                    "firstName": first_name,
-                    "lastName": last_name,
-                    "email": email,
-                    "phone": phone,
-                }
-
-            # Return the JSON response
-            return result
+            return as_imported_lead(response.json(), payload)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error importing lead: {str(e)}")
@@ -17,6 +17,7 @@ from app.core.auth import get_current_user
 from app.database.models.user import User, UserType
 from app.database.models.quiz import UserQuizResponse, QuizQuestion, QuizCategory, Quiz
 from app.services.adaptive_quiz_service import AdaptiveQuizService
+from app.services.quiz_session_store import QuizSessionConflictError
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -48,7 +49,27 @@ async def start_adaptive_quiz(
                 detail="Only clients can take adaptive quizzes",
             )
 
-        # Check for existing incomplete quiz session
+        adaptive_service = AdaptiveQuizService(db)
+
+        # Resume from the session store when the user has a live session
+        stored_state = adaptive_service.get_active_quiz_state(current_user.id)
+        if stored_state:
+            completed = stored_state.get("completed", False)
+            logger.info(
+                f"Resuming stored quiz session {stored_state['session']['session_id']} "
+                f"for user {current_user.id} (completed={completed})"
+            )
+            return {
+                "success": True,
+                "data": stored_state,
+                "message": (
+                    "Completed quiz session restored"
+                    if completed
+                    else "Adaptive quiz session resumed"
+                ),
+            }
+
+        # Fall back to rebuilding the session from saved responses
         existing_responses = (
             db.query(UserQuizResponse)
             .filter(UserQuizResponse.user_id == current_user.id)
@@ -101,7 +122,6 @@ async def start_adaptive_quiz(
                 if len(session_responses) >= 10:
                     logger.info(f"Found completed quiz session with {len(session_responses)} responses")
                     # Restore the completed session
-                    adaptive_service = AdaptiveQuizService(db)
                     result = await adaptive_service.restore_quiz_session(
                         current_user.id, 
                         session_id,
@@ -123,6 +143,10 @@ async def start_adaptive_quiz(
                         result["recommendations"] = recommendations
                     except Exception as e:
                         logger.error(f"Error generating final insights: {str(e)}")
+
+                    adaptive_service.save_quiz_state(
+                        result, result["session"]["version"]
+                    )
                     
                     return {
                         "success": True,
@@ -132,7 +156,6 @@ async def start_adaptive_quiz(
 
         # If no incomplete session found, start a new one
         logger.info("Starting new quiz session")
-        adaptive_service = AdaptiveQuizService(db)
         result = await adaptive_service.start_adaptive_quiz(current_user.id)
 
         # Create a new quiz record for this session
@@ -150,6 +173,7 @@ async def start_adaptive_quiz(
             
             # Store quiz_id in session data
             result["session"]["quiz_id"] = new_quiz.id
+            adaptive_service.save_quiz_state(result, result["session"]["version"])
             logger.info(f"Created new quiz with ID {new_quiz.id} for session {session_id}")
 
         return {
@@ -193,6 +217,12 @@ async def submit_response_and_continue(
         logger.info(f"Received session data type: {type(session_data)}")
         logger.info(f"Received session data: {json.dumps(session_data)}")
 
+        adaptive_service = AdaptiveQuizService(db)
+
+        # The stored session is authoritative; the posted copy is only used
+        # when the store no longer has it (e.g. expired)
+        session_data, from_store = adaptive_service.resume_session(session_data)
+
         # Verify user owns this session
         if session_data.get("user_id") != current_user.id:
             raise HTTPException(
@@ -235,10 +265,10 @@ async def submit_response_and_continue(
             "timestamp": datetime.utcnow().isoformat()
         }
 
-        # Update session data with only the current response
-        session_data["responses"] = [current_response]
+        # Without a stored session, only trust the current response
+        if not from_store:
+            session_data["responses"] = [current_response]
 
-        adaptive_service = AdaptiveQuizService(db)
         logger.info("Calling submit_response_and_get_next with formatted data")
         result = await adaptive_service.submit_response_and_get_next(
             session_data, formatted_response
@@ -321,6 +351,12 @@ async def submit_response_and_continue(
             "message": "Response submitted successfully",
         }
 
+    except HTTPException:
+        raise
+    except QuizSessionConflictError as e:
+        logger.warning(f"Rejected stale quiz response: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except ValueError as e:
         logger.error(f"Validation error while processing quiz response: {str(e)}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -445,30 +481,26 @@ async def get_quiz_session(
     db: Session = Depends(get_db),
 ):
     """
-    Get quiz session data (for resuming or reviewing).
-
-    Note: In a production system, you'd store session data in Redis or database.
-    For now, this is a placeholder endpoint.
+    Get stored quiz session data (for resuming or reviewing).
     """
-    try:
-        # In a real implementation, you'd retrieve session data from storage
-        # For now, return a placeholder response
-        return {
-            "success": True,
-            "data": {
-                "session_id": session_id,
-                "user_id": current_user.id,
-                "status": "not_implemented",
-                "message": "Session storage not implemented yet",
-            },
-            "message": "Session data retrieved (placeholder)",
-        }
-
-    except Exception as e:
+    adaptive_service = AdaptiveQuizService(db)
+    state = adaptive_service.load_quiz_state(session_id)
+    if not state:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error retrieving session: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz session not found or expired",
         )
+    if state["session"].get("user_id") != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own quiz sessions",
+        )
+
+    return {
+        "success": True,
+        "data": state,
+        "message": "Session data retrieved successfully",
+    }
 
 
 @router.get("/insights/{user_id}", response_model=Dict[str, Any])
@@ -714,6 +746,7 @@ async def restart_adaptive_quiz(
 
         # Start a new quiz session
         adaptive_service = AdaptiveQuizService(db)
+        adaptive_service.discard_user_session(current_user.id)
         result = await adaptive_service.start_adaptive_quiz(current_user.id)
 
         # Create a new quiz record for this session
@@ -731,6 +764,7 @@ async def restart_adaptive_quiz(
             
             # Store quiz_id in session data
             result["session"]["quiz_id"] = new_quiz.id
+            adaptive_service.save_quiz_state(result, result["session"]["version"])
 
         return {
             "success": True,
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import Optional
+import logging
 
 from app.database import get_db
 from app.schemas.dashboard import (
@@ -19,9 +20,14 @@ from app.schemas.dashboard import (
 )
 from app.database.models.user import UserType
 from app.services.admin_dashboard_service import AdminDashboardService
+from app.services.admin_metrics import invalidate_admin_metrics
+from app.services.cohort_retention import get_cohort_retention
+from app.services import conversion_funnel
 from app.core.auth import require_admin
 from app.database.models.user import User
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
@@ -237,39 +243,43 @@ def get_cohort_analysis(
     - Monthly cohort data with retention rates
     - User lifecycle analytics
     """
-    # Placeholder for future implementation
-    return {
-        "message": "Cohort analysis endpoint - implement based on specific business metrics",
-        "months": months,
-        "note": "This would show user retention patterns by registration month",
-    }
+    try:
+        return get_cohort_retention(db, months)
+    except Exception:
+        logger.exception("Error computing cohort retention")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
 
 
 @router.get("/analytics/conversion-funnel")
 def get_conversion_funnel(
-    db: Session = Depends(get_db), current_user: User = Depends(require_admin)
+    days: int = Query(
+        30, ge=1, le=365, description="Registration window in days for the funnel"
+    ),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_admin),
 ):
     """
     Get conversion funnel analysis from registration to successful match.
 
+    Query Parameters:
+    - days: Clients registered in this many days (1-365)
+
     Returns:
     - Step-by-step conversion rates
     - Drop-off points analysis
     - Funnel optimization insights
     """
-    # Placeholder for future implementation
-    return {
-        "message": "Conversion funnel analysis endpoint",
-        "stages": [
-            "Registration",
-            "Profile Completion",
-            "Quiz Completion",
-            "First Match",
-            "Match Acceptance",
-            "Successful Completion",
-        ],
-        "note": "This would show conversion rates between each stage",
-    }
+    try:
+        return conversion_funnel.get_conversion_funnel(db, days)
+    except Exception:
+        logger.exception("Error computing conversion funnel")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
 
 
 @router.get("/users/management")
@@ -436,6 +446,7 @@ def verify_broker(
 
         db.commit()
         db.refresh(broker)
+        invalidate_admin_metrics()
 
         # Here you would send notification to broker
         return {
@@ -3,7 +3,8 @@ from app.schemas.user import UserRegister, UserLogin
 from app.database import get_db
 from sqlalchemy.orm import Session
 from app.services import user_service
-from app.core.security import verify_password, create_access_token, get_password_hash
+from app.core.security import create_access_token
+from app.core.password_hasher import PasswordHasherBusy, get_password_hasher
 from app.database.models.user import User, UserType
 import uuid
 from datetime import datetime
@@ -12,6 +13,29 @@ from fastapi.security import OAuth2PasswordRequestForm
 router = APIRouter()
 
 
+def hashing_unavailable(error: PasswordHasherBusy) -> HTTPException:
+    """503 telling the client to retry once the hashing pool drains"""
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+async def check_password(db: Session, db_user: User, password: str) -> bool:
+    """
+    Verify a login password off the event loop, storing a rehashed
+    password when the bcrypt cost has changed since it was hashed
+    """
+    valid, new_hash = await get_password_hasher().verify_and_update(
+        password, db_user.password_hash
+    )
+    if valid and new_hash is not None:
+        db_user.password_hash = new_hash
+        db.commit()
+    return valid
+
+
 @router.post("/register")
 async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     try:
@@ -21,7 +45,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Hash the password
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await get_password_hasher().hash(user_data.password)
 
         # Create user instance
         new_user = User(
@@ -49,6 +73,8 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
                 "phone": new_user.phone_number,
             },
         }
+    except PasswordHasherBusy as e:
+        raise hashing_unavailable(e)
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
@@ -81,7 +107,7 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
         print(
             f"Password check: {user.password} vs hash {db_user.password_hash[:10]}..."
         )
-        result = verify_password(user.password, db_user.password_hash)
+        result = await check_password(db, db_user, user.password)
         print(f"Password verification result: {result}")
 
         if not result:
@@ -93,6 +119,8 @@ async def login(user: UserLogin, db: Session = Depends(get_db)):
         access_token = create_access_token(subject=str(db_user.id))
 
         return {"access_token": access_token, "token_type": "bearer"}
+    except PasswordHasherBusy as e:
+        raise hashing_unavailable(e)
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
@@ -136,7 +164,7 @@ async def create_test_user(db: Session = Depends(get_db)):
         user_id = str(uuid.uuid4())
         now = datetime.utcnow()
 
-        hashed_password = get_password_hash(test_user["password"])
+        hashed_password = await get_password_hasher().hash(test_user["password"])
 
         new_user = User(
             id=user_id,
@@ -185,13 +213,15 @@ async def login_for_swagger(
             raise HTTPException(status_code=401, detail="Invalid username or password")
 
         # Check if the password is correct
-        if not verify_password(form_data.password, db_user.password_hash):
+        if not await check_password(db, db_user, form_data.password):
             raise HTTPException(status_code=401, detail="Invalid username or password")
 
         # Generate JWT token
         access_token = create_access_token(subject=str(db_user.id))
 
         return {"access_token": access_token, "token_type": "bearer"}
+    except PasswordHasherBusy as e:
+        raise hashing_unavailable(e)
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
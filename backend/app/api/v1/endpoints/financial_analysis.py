@@ -6,6 +6,7 @@ generating AI insights, and enhancing broker matching.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import asyncio
@@ -13,7 +14,7 @@ import asyncio
 from app.database import get_db
 from app.core.auth import get_current_user
 from app.database.models.user import User, UserType
-from app.api.effi.client import EffiClient
+from app.api.effi.async_client import get_async_effi_client
 
 router = APIRouter()
 
@@ -145,9 +146,9 @@ async def search_effi_leads(
     Requires: Admin or Broker role
     """
     try:
-        effi_client = EffiClient()
+        effi_client = get_async_effi_client()
 
-        leads = effi_client.search_leads(
+        leads = await effi_client.search_leads(
             status=status,
             name=name,
             email=email,
@@ -181,8 +182,8 @@ async def get_effi_lead(
     Requires: Admin or Broker role
     """
     try:
-        effi_client = EffiClient()
-        lead = effi_client.get_lead(lead_id)
+        effi_client = get_async_effi_client()
+        lead = await effi_client.get_lead(lead_id)
 
         return {"success": True, "lead": lead, "retrieved_by": current_user.id}
 
@@ -204,8 +205,8 @@ async def analyze_effi_lead(
     """
     try:
         # Get the lead from Effi
-        effi_client = EffiClient()
-        lead_data = effi_client.get_lead(lead_id)
+        effi_client = get_async_effi_client()
+        lead_data = await effi_client.get_lead(lead_id)
 
         # Analyze the lead
         from app.services.financial_analysis_service import FinancialAnalysisService
@@ -229,48 +230,63 @@ async def analyze_effi_lead(
 
 @router.post("/batch-analyze")
 async def batch_analyze_leads(
-    lead_ids: List[str], current_user: User = Depends(require_admin)
+    lead_ids: List[str],
+    stream: Optional[str] = Query(
+        None,
+        pattern="^(ndjson|sse)$",
+        description="Stream per-lead results as they complete (ndjson or sse)",
+    ),
+    current_user: User = Depends(require_admin),
 ):
     """
     Batch analyze multiple leads from Effi
 
+    Leads are fetched and analyzed concurrently. By default the full batch
+    is returned at once; with ?stream=ndjson or ?stream=sse each lead's
+    result is sent as soon as it completes, followed by a summary record.
+
     Requires: Admin role
     """
-    try:
-        if len(lead_ids) > 50:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Maximum 50 leads can be analyzed in a batch",
-            )
-
-        effi_client = EffiClient()
-        from app.services.financial_analysis_service import FinancialAnalysisService
-
-        service = FinancialAnalysisService()
-
-        results = []
+    if len(lead_ids) > 50:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Maximum 50 leads can be analyzed in a batch",
+        )
 
-        for lead_id in lead_ids:
-            try:
-                # Get lead data
-                lead_data = effi_client.get_lead(lead_id)
+    try:
+        from app.core.config import settings
+        from app.services.batch_analysis import (
+            STREAM_MEDIA_TYPES,
+            BatchAnalysisEngine,
+            encode_batch_stream,
+            summarize_batch,
+        )
+        from app.services.cached_financial_analysis_service import (
+            cached_financial_service,
+        )
 
-                # Analyze lead
-                analysis = await service.analyze_lead_financial_profile(lead_data)
+        engine = BatchAnalysisEngine(
+            cached_financial_service,
+            get_async_effi_client(),
+            concurrency=settings.FINANCIAL_BATCH_CONCURRENCY,
+        )
 
-                results.append(
-                    {"lead_id": lead_id, "success": True, "analysis": analysis}
-                )
+        if stream:
+            return StreamingResponse(
+                encode_batch_stream(
+                    engine.run(lead_ids),
+                    stream,
+                    summary_fields={"analyzed_by": current_user.id},
+                ),
+                media_type=STREAM_MEDIA_TYPES[stream],
+            )
 
-            except Exception as e:
-                results.append({"lead_id": lead_id, "success": False, "error": str(e)})
+        results = await engine.run_all(lead_ids)
 
         return {
             "success": True,
             "batch_results": results,
-            "total_processed": len(results),
-            "successful": len([r for r in results if r["success"]]),
-            "failed": len([r for r in results if not r["success"]]),
+            **summarize_batch(results),
             "analyzed_by": current_user.id,
         }
 
@@ -328,10 +344,10 @@ async def test_effi_connection(current_user: User = Depends(require_admin)):
     Requires: Admin role
     """
     try:
-        effi_client = EffiClient()
+        effi_client = get_async_effi_client()
 
         # Test basic connection by getting recent leads
-        test_response = effi_client.get_leads(top=5, skip=0)
+        test_response = await effi_client.get_leads(top=5, skip=0)
 
         return {
             "success": True,
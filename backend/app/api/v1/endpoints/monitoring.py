@@ -13,7 +13,12 @@ from datetime import datetime, timedelta
 from app.database import get_db
 from app.core.auth import get_current_user
 from app.database.models.user import User, UserType
-from app.core.redis_client import get_redis
+from app.core.async_redis_client import get_request_redis, maybe_await
+from app.core.password_hasher import get_password_hasher
+from app.ai.usage_log import get_usage_metrics
+from app.services.llm_usage import get_llm_usage
+from app.core.redis_client import expand_analytics
+from app.core.timeseries import DAY, TimeSeriesStore
 from app.services.cached_financial_analysis_service import get_cache_performance
 from app.core.security_middleware import audit_logger
 
@@ -35,10 +40,10 @@ async def health_check():
     System health check - available to all users
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         # Check Redis connection
-        redis_health = redis_client.health_check()
+        redis_health = await maybe_await(redis_client.health_check())
 
         # Basic system status
         health_status = {
@@ -94,6 +99,9 @@ async def get_cache_statistics(current_user: User = Depends(require_admin)):
 @router.get("/analytics")
 async def get_platform_analytics(
     days: int = Query(7, ge=1, le=30, description="Number of days to analyze"),
+    compact: bool = Query(
+        False, description="Return per-event count arrays instead of objects"
+    ),
     current_user: User = Depends(require_admin),
 ):
     """
@@ -102,7 +110,7 @@ async def get_platform_analytics(
     Requires: Admin role
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         # Get analytics for various events
         events_to_analyze = [
@@ -116,29 +124,20 @@ async def get_platform_analytics(
             "cache_miss_lead_analysis",
         ]
 
-        analytics = {}
-        for event in events_to_analyze:
-            analytics[event] = redis_client.get_analytics(event, days=days)
-
-        # Calculate summary metrics
-        total_requests = sum(
-            day["count"] for day in analytics.get("api_request", {}).get("daily", [])
-        )
-
-        financial_requests = sum(
-            day["count"]
-            for day in analytics.get("financial_analysis_request", {}).get("daily", [])
-        )
-
-        cache_hits = sum(
-            day["count"]
-            for day in analytics.get("cache_hit_lead_analysis", {}).get("daily", [])
+        # All counters in one round trip
+        bulk = await maybe_await(
+            redis_client.get_analytics_bulk(events_to_analyze, days=days)
         )
+        totals = {
+            event: sum(series["daily"])
+            for event, series in bulk.get("events", {}).items()
+        }
 
-        cache_misses = sum(
-            day["count"]
-            for day in analytics.get("cache_miss_lead_analysis", {}).get("daily", [])
-        )
+        # Calculate summary metrics
+        total_requests = totals.get("api_request", 0)
+        financial_requests = totals.get("financial_analysis_request", 0)
+        cache_hits = totals.get("cache_hit_lead_analysis", 0)
+        cache_misses = totals.get("cache_miss_lead_analysis", 0)
 
         cache_hit_rate = (
             (cache_hits / (cache_hits + cache_misses) * 100)
@@ -153,10 +152,20 @@ async def get_platform_analytics(
             "analysis_period_days": days,
         }
 
+        if compact:
+            analytics = {"series": bulk}
+        else:
+            analytics = {
+                "detailed_analytics": {
+                    event: expand_analytics(bulk, event) if bulk else {}
+                    for event in events_to_analyze
+                }
+            }
+
         return {
             "success": True,
             "summary": summary,
-            "detailed_analytics": analytics,
+            **analytics,
             "retrieved_by": current_user.id,
             "timestamp": datetime.utcnow().isoformat(),
         }
@@ -168,6 +177,65 @@ async def get_platform_analytics(
         )
 
 
+@router.get("/analytics/series")
+async def get_analytics_series(
+    events: List[str] = Query(
+        ["api_request"], description="Event types, or 'total'", max_length=20
+    ),
+    start: Optional[datetime] = Query(None, description="Defaults to 24 hours ago"),
+    end: Optional[datetime] = Query(None, description="Defaults to now"),
+    resolution: Optional[str] = Query(
+        None,
+        pattern="^(minute|hour|day|month)$",
+        description="Point size; picked from the range if omitted",
+    ),
+    current_user: User = Depends(require_admin),
+):
+    """
+    Get event counts over a time range
+
+    Requires: Admin role
+    """
+    end = end or datetime.now()
+    start = start or end - timedelta(days=1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end",
+        )
+    if (
+        resolution
+        and TimeSeriesStore.point_count(start, end, resolution)
+        > TimeSeriesStore.MAX_POINTS
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Range is more than {TimeSeriesStore.MAX_POINTS} {resolution} "
+                "points; use a coarser resolution or a shorter range"
+            ),
+        )
+
+    try:
+        redis_client = get_request_redis()
+        series = await maybe_await(
+            redis_client.get_series(events, start, end, resolution=resolution)
+        )
+
+        return {
+            "success": True,
+            **series,
+            "retrieved_by": current_user.id,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving analytics series: {str(e)}",
+        )
+
+
 @router.get("/security-events")
 async def get_security_events(
     event_type: Optional[str] = Query(None, description="Filter by event type"),
@@ -181,21 +249,20 @@ async def get_security_events(
     Requires: Admin role
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         # This is a simplified version - in production, you'd query audit logs more efficiently
         security_events = []
 
-        # Get failed login attempts
-        failed_logins = redis_client.get_analytics("failed_login", days=days)
-
-        # Get financial data access events
-        financial_access = redis_client.get_analytics(
-            "financial_data_access", days=days
+        bulk = await maybe_await(
+            redis_client.get_analytics_bulk(
+                ["failed_login", "financial_data_access", "admin_action"], days=days
+            )
+        )
+        failed_logins, financial_access, admin_actions = (
+            expand_analytics(bulk, event) if bulk else {}
+            for event in ("failed_login", "financial_data_access", "admin_action")
         )
-
-        # Get admin actions
-        admin_actions = redis_client.get_analytics("admin_action", days=days)
 
         summary = {
             "failed_login_attempts": sum(
@@ -237,21 +304,23 @@ async def get_performance_metrics(current_user: User = Depends(require_admin)):
     Requires: Admin role
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         # Get Redis performance
-        redis_health = redis_client.health_check()
+        redis_health = await maybe_await(redis_client.health_check())
 
         # Get cache performance
         cache_performance = get_cache_performance()
 
         # Get API performance metrics
-        api_errors = redis_client.get_analytics("api_error", days=1)
-        total_requests = redis_client.get_analytics("api_request", days=1)
+        bulk = await maybe_await(
+            redis_client.get_analytics_bulk(["api_error", "api_request"], days=1)
+        )
+        events = bulk.get("events", {})
 
         # Calculate error rate
-        total_errors = sum(day["count"] for day in api_errors.get("daily", []))
-        total_reqs = sum(day["count"] for day in total_requests.get("daily", []))
+        total_errors = sum(events.get("api_error", {}).get("daily", []))
+        total_reqs = sum(events.get("api_request", {}).get("daily", []))
         error_rate = (total_errors / total_reqs * 100) if total_reqs > 0 else 0
 
         performance_metrics = {
@@ -262,6 +331,8 @@ async def get_performance_metrics(current_user: User = Depends(require_admin)):
                 "total_requests_24h": total_reqs,
                 "total_errors_24h": total_errors,
             },
+            "password_hashing": get_password_hasher().stats(),
+            "token_usage": get_usage_metrics(),
             "timestamp": datetime.utcnow().isoformat(),
         }
 
@@ -278,6 +349,33 @@ async def get_performance_metrics(current_user: User = Depends(require_admin)):
         )
 
 
+@router.get("/llm-usage")
+async def get_llm_usage_rollups(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Hours to report"),
+    feature: Optional[str] = Query(None, description="Only this calling feature"),
+    current_user: User = Depends(require_admin),
+    db: Session = Depends(get_db),
+):
+    """
+    Get hourly LLM calls, tokens and cost by calling feature and model
+
+    Requires: Admin role
+    """
+    try:
+        return {
+            "success": True,
+            "llm_usage": get_llm_usage(db, hours=hours, feature=feature),
+            "retrieved_by": current_user.id,
+            "timestamp": datetime.utcnow().isoformat(),
+        }
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving LLM usage: {str(e)}",
+        )
+
+
 @router.post("/cache/invalidate")
 async def invalidate_cache(
     cache_type: str = Query(..., description="Type of cache to invalidate"),
@@ -335,18 +433,25 @@ async def get_user_activity(
     Requires: Admin role
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         if user_id:
-            # Get specific user activity
-            user_events = {}
-            for i in range(days):
-                date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-                count = (
-                    redis_client.get(f"user_events:{user_id}:{date}", parse_json=False)
-                    or 0
+            # Get specific user activity from their daily series
+            series = TimeSeriesStore.user_series(user_id)
+            activity = await maybe_await(
+                redis_client.get_series(
+                    [series],
+                    datetime.now() - timedelta(days=days - 1),
+                    resolution=DAY,
                 )
-                user_events[date] = int(count)
+            )
+            user_events = {
+                timestamp[:10]: count
+                for timestamp, count in zip(
+                    activity.get("timestamps", []),
+                    activity.get("series", {}).get(series, []),
+                )
+            }
 
             return {
                 "success": True,
@@ -384,21 +489,21 @@ async def get_system_status(current_user: User = Depends(require_admin)):
     Requires: Admin role
     """
     try:
-        redis_client = get_redis()
+        redis_client = get_request_redis()
 
         # Get various system metrics
-        redis_health = redis_client.health_check()
+        redis_health = await maybe_await(redis_client.health_check())
         cache_stats = get_cache_performance()
 
         # Get recent activity
-        recent_requests = redis_client.get_analytics("api_request", days=1)
-        recent_errors = redis_client.get_analytics("api_error", days=1)
+        bulk = await maybe_await(
+            redis_client.get_analytics_bulk(["api_request", "api_error"], days=1)
+        )
+        events = bulk.get("events", {})
 
         # Calculate uptime and performance indicators
-        total_requests_24h = sum(
-            day["count"] for day in recent_requests.get("daily", [])
-        )
-        total_errors_24h = sum(day["count"] for day in recent_errors.get("daily", []))
+        total_requests_24h = sum(events.get("api_request", {}).get("daily", []))
+        total_errors_24h = sum(events.get("api_error", {}).get("daily", []))
 
         system_status = {
             "overall_status": "healthy",  # Would determine based on various factors
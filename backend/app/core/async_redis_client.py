@@ -0,0 +1,537 @@
+"""
+Async Redis Client
+
+asyncio variant of RedisClient for the request path (SecurityMiddleware,
+async endpoints and the cached services), so cache lookups, rate-limit
+checks and event tracking do not block the event loop. It has the same
+surface as RedisClient with coroutine methods, shares its key layout and
+Lua scripts, and talks to Redis through one connection pool sized by
+REDIS_MAX_CONNECTIONS.
+"""
+
+import json
+import logging
+import asyncio
+import inspect
+import os
+from typing import Any, Dict, Iterable, List, Optional
+from datetime import datetime
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.redis_client import (
+    AnalyticsMemo,
+    RedisClient,
+    analytics_queries,
+    compact_analytics,
+    expand_analytics,
+    get_redis,
+    plan_event_increments,
+    series_result,
+    track_events_script_args,
+)
+from app.core.timeseries import TimeSeriesStore
+
+logger = logging.getLogger(__name__)
+
+
+async def maybe_await(value: Any) -> Any:
+    """
+    Resolve the result of a RedisClient or AsyncRedisClient call
+
+    Lets callers accept either client: coroutine results are awaited,
+    plain values are returned as is.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class AsyncRedisClient:
+    """asyncio Redis client with a pooled connection and common operations"""
+
+    SOCKET_TIMEOUT_SECONDS = 5
+
+    def __init__(
+        self,
+        timeseries: Optional[TimeSeriesStore] = None,
+        max_connections: Optional[int] = None,
+    ):
+        """
+        Initialize the async Redis client
+
+        No connection is opened until the first command.
+
+        Args:
+            timeseries: Layout of the analytics counters written by
+                track_event; defaults to TimeSeriesStore()
+            max_connections: Size of the connection pool; defaults to
+                REDIS_MAX_CONNECTIONS
+        """
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.redis_host = os.getenv("REDIS_HOST", "localhost")
+        self.redis_port = int(os.getenv("REDIS_PORT", "6379"))
+        self.redis_db = int(os.getenv("REDIS_DB", "0"))
+        self.redis_password = os.getenv("REDIS_PASSWORD")
+        self.max_connections = max_connections or settings.REDIS_MAX_CONNECTIONS
+
+        self.timeseries = timeseries or TimeSeriesStore()
+        self.event_key_layout = self.timeseries.event_windows()
+
+        self.breaker = CircuitBreaker(
+            "Async Redis",
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            failure_window=settings.REDIS_BREAKER_FAILURE_WINDOW_SECONDS,
+            reset_timeout=settings.REDIS_BREAKER_RESET_SECONDS,
+        )
+
+        # Connections belong to the event loop that opened them, so the
+        # pool is (re)created per loop
+        self._client: Optional[aioredis.Redis] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._scripts: Dict[str, Any] = {}
+        self._rate_limiter = None
+        self.analytics_memo = AnalyticsMemo(settings.ANALYTICS_MEMO_SECONDS)
+
+    def _create_pool(self) -> aioredis.ConnectionPool:
+        options = {
+            "max_connections": self.max_connections,
+            "decode_responses": True,
+            "socket_connect_timeout": self.SOCKET_TIMEOUT_SECONDS,
+            "socket_timeout": self.SOCKET_TIMEOUT_SECONDS,
+            "retry_on_timeout": True,
+        }
+        if self.redis_url.startswith("redis://"):
+            # Use URL connection (for cloud Redis)
+            return aioredis.ConnectionPool.from_url(self.redis_url, **options)
+        # Use host/port connection (for local Redis)
+        return aioredis.ConnectionPool(
+            host=self.redis_host,
+            port=self.redis_port,
+            db=self.redis_db,
+            password=self.redis_password,
+            **options,
+        )
+
+    @property
+    def client(self) -> aioredis.Redis:
+        """Redis client bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = aioredis.Redis(connection_pool=self._create_pool())
+            self._loop = loop
+            self._scripts = {}
+        return self._client
+
+    async def is_connected(self) -> bool:
+        """
+        Check if Redis is usable
+
+        Does not send a PING while the circuit breaker is closed; health is
+        tracked from operation failures.
+        """
+        if self.breaker.state == CircuitBreaker.CLOSED:
+            return True
+        if not self.breaker.allow_request():
+            return False
+        # Trial call after the breaker's cool-down
+        return await self._probe()
+
+    async def _probe(self) -> bool:
+        """PING Redis and report the result"""
+        try:
+            await self.client.ping()
+        except Exception as e:
+            logger.warning(f"Async Redis health probe failed: {str(e)}")
+            self.breaker.record_failure()
+            return False
+        self.breaker.record_success()
+        return True
+
+    async def connect(self) -> bool:
+        """Open a connection now, e.g. at startup, and report whether it worked"""
+        try:
+            await self.client.ping()
+        except Exception as e:
+            logger.error(f"Failed to connect to Redis: {str(e)}")
+            self.breaker.trip()
+            return False
+        logger.info("Async Redis connection established successfully")
+        self.breaker.record_success()
+        return True
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except RuntimeError:
+                # Opened on an event loop that is gone
+                pass
+            self._client = None
+            self._loop = None
+
+    def _record_error(self, error: Exception):
+        """Count connection-level errors towards opening the breaker"""
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self.breaker.record_failure()
+
+    # Basic Operations
+    async def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
+        """Set a key-value pair with optional expiration"""
+        try:
+            if not await self.is_connected():
+                return False
+
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+
+            return bool(await self.client.set(key, value, ex=expire or None))
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis SET error: {str(e)}")
+            return False
+
+    async def get(self, key: str, parse_json: bool = True) -> Any:
+        """Get value by key"""
+        try:
+            if not await self.is_connected():
+                return None
+
+            value = await self.client.get(key)
+            if value is None or not parse_json:
+                return value
+            try:
+                return json.loads(value)
+            except (json.JSONDecodeError, TypeError):
+                return value
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis GET error: {str(e)}")
+            return None
+
+    async def delete(self, key: str) -> bool:
+        """Delete a key"""
+        try:
+            if not await self.is_connected():
+                return False
+            return bool(await self.client.delete(key))
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis DELETE error: {str(e)}")
+            return False
+
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        try:
+            if not await self.is_connected():
+                return False
+            return bool(await self.client.exists(key))
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis EXISTS error: {str(e)}")
+            return False
+
+    async def incr(self, key: str, amount: int = 1) -> Optional[int]:
+        """Increment a key"""
+        try:
+            if not await self.is_connected():
+                return None
+            return await self.client.incr(key, amount)
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis INCR error: {str(e)}")
+            return None
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        """Set expiration for a key"""
+        try:
+            if not await self.is_connected():
+                return False
+            return bool(await self.client.expire(key, seconds))
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis EXPIRE error: {str(e)}")
+            return False
+
+    async def ttl(self, key: str) -> int:
+        """Get time to live for a key"""
+        try:
+            if not await self.is_connected():
+                return -1
+            return await self.client.ttl(key)
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis TTL error: {str(e)}")
+            return -1
+
+    # Cache Operations
+    async def cache_set(self, key: str, value: Any, expire: int = 3600) -> bool:
+        """Cache a value with default 1-hour expiration"""
+        return await self.set(f"cache:{key}", value, expire)
+
+    async def cache_get(self, key: str) -> Any:
+        """Get cached value"""
+        return await self.get(f"cache:{key}")
+
+    async def cache_delete(self, key: str) -> bool:
+        """Delete cached value"""
+        return await self.delete(f"cache:{key}")
+
+    # Session Operations
+    async def session_set(
+        self, session_id: str, data: Dict[str, Any], expire: int = 86400
+    ) -> bool:
+        """Set session data with default 24-hour expiration"""
+        return await self.set(f"session:{session_id}", data, expire)
+
+    async def session_get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Get session data"""
+        return await self.get(f"session:{session_id}")
+
+    async def session_delete(self, session_id: str) -> bool:
+        """Delete session"""
+        return await self.delete(f"session:{session_id}")
+
+    async def session_refresh(self, session_id: str, expire: int = 86400) -> bool:
+        """Refresh session expiration"""
+        return await self.expire(f"session:{session_id}", expire)
+
+    async def session_compare_and_set(
+        self,
+        session_id: str,
+        payload: str,
+        expected_version: Optional[int],
+        expire: int = 86400,
+    ) -> Optional[int]:
+        """
+        Atomically replace a versioned session payload
+
+        See RedisClient.session_compare_and_set.
+        """
+        expected = "" if expected_version is None else str(expected_version)
+        result = await self.run_script(
+            RedisClient.SESSION_CAS_SCRIPT,
+            [f"session:{session_id}"],
+            [expected, payload, expire],
+        )
+        return None if result is None else int(result)
+
+    # Scripting
+    async def run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """
+        Run a Lua script with EVALSHA, loading it on first use
+
+        Returns:
+            The script result, or None if Redis is unavailable or the script
+            failed
+        """
+        try:
+            if not await self.is_connected():
+                return None
+            client = self.client
+            registered = self._scripts.get(script)
+            if registered is None:
+                registered = self._scripts[script] = client.register_script(script)
+            return await registered(keys=keys, args=args)
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis script error: {str(e)}")
+            return None
+
+    # Rate Limiting Operations
+    @property
+    def rate_limiter(self):
+        """Multi-rule limiter using this client, with a local fallback"""
+        if self._rate_limiter is None:
+            from app.core.rate_limiter import RateLimiter
+
+            self._rate_limiter = RateLimiter(self)
+        return self._rate_limiter
+
+    async def check_rate_limits(self, rules) -> Dict[str, Any]:
+        """
+        Check and count a request against several RateLimitRules at once
+
+        Falls back to a per-worker limiter while Redis is unavailable.
+        """
+        return await self.rate_limiter.check_async(rules)
+
+    async def rate_limit_check(
+        self, identifier: str, limit: int, window: int
+    ) -> Dict[str, Any]:
+        """
+        Check rate limit for an identifier
+
+        Args:
+            identifier: Unique identifier (user_id, IP, etc.)
+            limit: Maximum requests allowed
+            window: Time window in seconds
+
+        Returns:
+            Dict with allowed, remaining, reset_time
+        """
+        from app.core.rate_limiter import RateLimitRule
+
+        return await self.check_rate_limits(
+            [RateLimitRule("default", identifier, limit, window)]
+        )
+
+    # Analytics Operations
+    async def track_event(
+        self,
+        event_type: str,
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ):
+        """Track an event for analytics"""
+        await self.track_events([event_type], user_id, metadata)
+
+    async def track_events(
+        self,
+        event_types: Iterable[str],
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> bool:
+        """
+        Track several events in a single scripted round trip
+
+        Returns:
+            True if the counters were updated
+        """
+        keys, args = track_events_script_args(
+            self.event_key_layout, event_types, user_id
+        )
+        if not keys:
+            return True
+        result = await self.run_script(RedisClient.TRACK_EVENTS_SCRIPT, keys, args)
+        return result is not None
+
+    def event_increments(
+        self,
+        event_types: Iterable[str],
+        user_id: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ):
+        """Counters touched by a set of events (see RedisClient)"""
+        return plan_event_increments(self.event_key_layout, event_types, user_id, now)
+
+    async def get_analytics(self, event_type: str, days: int = 7) -> Dict[str, Any]:
+        """Get daily and today's hourly analytics for an event type"""
+        bulk = await self.get_analytics_bulk([event_type], days)
+        return expand_analytics(bulk, event_type) if bulk else {}
+
+    async def get_analytics_bulk(
+        self, event_types: Iterable[str], days: int = 7
+    ) -> Dict[str, Any]:
+        """
+        Daily and today's hourly counts for many event types at once
+
+        See RedisClient.get_analytics_bulk.
+        """
+        event_types = list(event_types)
+        memo_key = ("bulk", tuple(event_types), days)
+        cached = self.analytics_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        daily, hourly = analytics_queries(self.timeseries, event_types, days)
+        raw = await self.run_script(
+            TimeSeriesStore.READ_SCRIPT, daily.keys + hourly.keys, []
+        )
+        if raw is None:
+            return {}
+        result = compact_analytics(daily, hourly, raw)
+        self.analytics_memo.set(memo_key, result)
+        return result
+
+    async def get_series(
+        self,
+        series: Iterable[str],
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+        max_points: int = 500,
+    ) -> Dict[str, Any]:
+        """
+        Counts for several time series over a range, in one script call
+
+        See RedisClient.get_series.
+        """
+        query = self.timeseries.range_query(
+            list(series), start, end or datetime.now(), resolution, max_points
+        )
+        memo_key = (
+            "series",
+            tuple(query.series),
+            query.resolution.name,
+            query.points[0],
+            query.points[-1],
+        )
+        cached = self.analytics_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        raw = await self.run_script(TimeSeriesStore.READ_SCRIPT, query.keys, [])
+        if raw is None:
+            return {}
+        result = series_result(query, raw)
+        self.analytics_memo.set(memo_key, result)
+        return result
+
+    # Health Check
+    async def health_check(self) -> Dict[str, Any]:
+        """Redis health check"""
+        try:
+            start_time = datetime.now()
+            await self.client.ping()
+            response_time = (datetime.now() - start_time).total_seconds() * 1000
+
+            return {
+                "status": "connected",
+                "breaker": self.breaker.metrics(),
+                "response_time_ms": round(response_time, 2),
+                "max_connections": self.max_connections,
+            }
+
+        except Exception as e:
+            self._record_error(e)
+            return {
+                "status": "error",
+                "error": str(e),
+                "breaker": self.breaker.metrics(),
+            }
+
+
+# Global async Redis client instance
+_async_redis_client: Optional[AsyncRedisClient] = None
+
+
+def get_async_redis() -> AsyncRedisClient:
+    """Process-wide async Redis client sharing one connection pool"""
+    global _async_redis_client
+
+    if _async_redis_client is None:
+        _async_redis_client = AsyncRedisClient()
+    return _async_redis_client
+
+
+async def close_async_redis():
+    """Close the shared client's connections (called on shutdown)"""
+    if _async_redis_client is not None:
+        await _async_redis_client.close()
+
+
+def get_request_redis():
+    """
+    Redis client for the request path
+
+    The async client unless REDIS_ASYNC_REQUEST_PATH is off; use
+    maybe_await() on results to support both.
+    """
+    if settings.REDIS_ASYNC_REQUEST_PATH:
+        return get_async_redis()
+    return get_redis()
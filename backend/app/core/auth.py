@@ -3,14 +3,14 @@
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import jwt
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.principal import get_principal, principal_user, request_subject
 from app.database.connection import get_db
-from app.schemas.token import TokenPayload
 from app.schemas.user import User
 from app.database.models.user import User as UserModel, UserType
 
@@ -44,12 +44,20 @@ def create_access_token(subject: str, expires_delta: Optional[timedelta] = None)
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
 ) -> UserModel:
     """
     Get the current authenticated user from JWT token.
 
+    The token is decoded once per request and the user's id, type,
+    verification and deletion state come from the principal cache, so
+    this does not query the database on a cache hit. The returned user
+    is attached to `db`; its other columns load on first access.
+
     Args:
+        request: Incoming request, shared with the security middleware
         token: JWT token from Authorization header
         db: Database session
 
@@ -65,27 +73,17 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        # Decode JWT token
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-
-        token_data = TokenPayload(sub=user_id)
-    except JWTError:
+    user_id = request_subject(request, token)
+    if user_id is None:
         raise credentials_exception
 
-    # Get user from database
-    user = db.query(UserModel).filter(UserModel.id == token_data.sub).first()
-    if user is None:
+    principal = get_principal(db, user_id)
+    if principal is None or principal.is_deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
-    return user
+    return principal_user(db, principal)
 
 
 async def require_admin(
@@ -0,0 +1,150 @@
+"""
+Circuit Breaker
+
+Tracks the health of a backing service (Redis) so callers can fail fast
+while it is down instead of waiting on connection timeouts. The breaker
+opens after repeated failures within a short window, rejects calls for a
+cool-down period, then lets a single trial call through (half-open) to
+decide whether to close again.
+"""
+
+from typing import Any, Dict
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed / open / half-open circuit breaker
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    HISTORY_SIZE = 50
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        failure_window: float = 10.0,
+        reset_timeout: float = 15.0,
+    ):
+        """
+        Args:
+            name: Service name used in logs
+            failure_threshold: Failures within failure_window that open the breaker
+            failure_window: Seconds over which failures are counted
+            reset_timeout: Seconds to stay open before allowing a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+
+        self.state = self.CLOSED
+        self._failures: deque = deque()
+        self._opened_at = 0.0
+        self._trial_started_at = 0.0
+        self._lock = threading.Lock()
+
+        self.transition_counts: Dict[str, int] = {}
+        self.history: deque = deque(maxlen=self.HISTORY_SIZE)
+        self.rejected_calls = 0
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go through now
+
+        While open, the first call after reset_timeout moves the breaker to
+        half-open and is allowed as the trial; other calls are rejected
+        until the trial reports back (or itself times out).
+        """
+        if self.state == self.CLOSED:
+            return True
+
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    self.rejected_calls += 1
+                    return False
+                self._transition(self.HALF_OPEN)
+                self._trial_started_at = now
+                return True
+
+            if self.state == self.HALF_OPEN:
+                if now - self._trial_started_at < self.reset_timeout:
+                    self.rejected_calls += 1
+                    return False
+                # The previous trial never reported back; allow another
+                self._trial_started_at = now
+                return True
+
+            return True
+
+    def record_success(self):
+        """Report a successful call; closes the breaker if it was not closed"""
+        if self.state == self.CLOSED and not self._failures:
+            return
+        with self._lock:
+            self._failures.clear()
+            if self.state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def record_failure(self):
+        """Report a failed call; may open the breaker"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                self._open(now)
+                return
+
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.failure_window:
+                self._failures.popleft()
+            if (
+                self.state == self.CLOSED
+                and len(self._failures) >= self.failure_threshold
+            ):
+                self._open(now)
+
+    def trip(self):
+        """Open the breaker immediately, e.g. when the initial connect fails"""
+        with self._lock:
+            if self.state != self.OPEN:
+                self._open(time.monotonic())
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current state and transition counts for monitoring"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_failures": len(self._failures),
+                "rejected_calls": self.rejected_calls,
+                "transitions": dict(self.transition_counts),
+                "history": list(self.history),
+            }
+
+    def _open(self, now: float):
+        self._failures.clear()
+        self._opened_at = now
+        self._transition(self.OPEN)
+
+    def _transition(self, new_state: str):
+        old_state = self.state
+        if old_state == new_state:
+            return
+        self.state = new_state
+
+        label = f"{old_state}->{new_state}"
+        self.transition_counts[label] = self.transition_counts.get(label, 0) + 1
+        self.history.append({"transition": label, "at": time.time()})
+
+        log = logger.warning if new_state == self.OPEN else logger.info
+        log(f"{self.name} circuit breaker {label}")
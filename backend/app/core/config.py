@@ -25,6 +25,17 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")
     )
+    # Per-worker cache of authenticated users' id/type/verified/deleted;
+    # local updates invalidate it, other workers' within this window
+    PRINCIPAL_CACHE_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_SECONDS", "60"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    # bcrypt cost for new hashes; stored hashes with another cost are
+    # rehashed on the next successful login
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # Threads hashing passwords per worker, and how many more hashes may
+    # wait for one before requests are turned away with 503
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_QUEUE_LIMIT: int = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "32"))
 
     # CORS settings
     ORIGINS: List[str] = ["*"]
@@ -42,6 +53,117 @@ class Settings(BaseSettings):
     MAX_QUESTIONS_PER_REQUEST: int = int(os.getenv("MAX_QUESTIONS_PER_REQUEST", "5"))
     MIN_BOOK_EXCERPT_LENGTH: int = int(os.getenv("MIN_BOOK_EXCERPT_LENGTH", "100"))
 
+    # Broker matching settings
+    # Safety-net max age for the per-worker broker snapshot; local writes
+    # invalidate it immediately, writes from other workers within this window
+    BROKER_SNAPSHOT_MAX_AGE_SECONDS: int = int(
+        os.getenv("BROKER_SNAPSHOT_MAX_AGE_SECONDS", "300")
+    )
+    # Seconds the admin overview/health counters are reused for
+    ADMIN_METRICS_CACHE_SECONDS: float = float(
+        os.getenv("ADMIN_METRICS_CACHE_SECONDS", "30")
+    )
+    # Seconds between incremental refreshes of the daily analytics
+    # rollups, which also store the hourly LLM usage totals (0 disables
+    # the in-process scheduler)
+    ANALYTICS_ROLLUP_INTERVAL_SECONDS: int = int(
+        os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "300")
+    )
+
+    # Adaptive quiz session settings
+    # "redis" keeps sessions in Redis (falling back to memory while it is
+    # unreachable), "memory" keeps them in a per-worker LRU
+    QUIZ_SESSION_BACKEND: str = os.getenv("QUIZ_SESSION_BACKEND", "redis")
+    QUIZ_SESSION_TTL_SECONDS: int = int(os.getenv("QUIZ_SESSION_TTL_SECONDS", "86400"))
+    QUIZ_SESSION_MAX_ENTRIES: int = int(os.getenv("QUIZ_SESSION_MAX_ENTRIES", "10000"))
+    # Generate question N+1 in the background while the user answers question N
+    ADAPTIVE_QUIZ_PREFETCH: bool = (
+        os.getenv("ADAPTIVE_QUIZ_PREFETCH", "True").lower() == "true"
+    )
+    ADAPTIVE_QUIZ_PREFETCH_TTL_SECONDS: int = int(
+        os.getenv("ADAPTIVE_QUIZ_PREFETCH_TTL_SECONDS", "900")
+    )
+
+    # LLM response cache settings
+    # Default TTL for GeminiService responses; 0 only caches calls that pass
+    # their own cache_ttl
+    LLM_CACHE_DEFAULT_TTL_SECONDS: int = int(
+        os.getenv("LLM_CACHE_DEFAULT_TTL_SECONDS", "0")
+    )
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+    LLM_CACHE_REDIS: bool = os.getenv("LLM_CACHE_REDIS", "True").lower() == "true"
+
+    # Token usage log (TokenUsageTracker). Records are written by a
+    # background thread in batches; when the queue is full they are dropped
+    # from the log but still counted in the in-memory aggregates
+    TOKEN_USAGE_LOG_FILE: str = os.getenv("TOKEN_USAGE_LOG_FILE", "token_usage.jsonl")
+    TOKEN_USAGE_QUEUE_SIZE: int = int(os.getenv("TOKEN_USAGE_QUEUE_SIZE", "10000"))
+    TOKEN_USAGE_BATCH_SIZE: int = int(os.getenv("TOKEN_USAGE_BATCH_SIZE", "500"))
+    TOKEN_USAGE_FLUSH_SECONDS: float = float(
+        os.getenv("TOKEN_USAGE_FLUSH_SECONDS", "1")
+    )
+    # Rotate the log past this size or age (0 disables either); keep this
+    # many rotated files
+    TOKEN_USAGE_LOG_MAX_BYTES: int = int(
+        os.getenv("TOKEN_USAGE_LOG_MAX_BYTES", str(50 * 1024 * 1024))
+    )
+    TOKEN_USAGE_LOG_MAX_AGE_HOURS: float = float(
+        os.getenv("TOKEN_USAGE_LOG_MAX_AGE_HOURS", "24")
+    )
+    TOKEN_USAGE_LOG_BACKUPS: int = int(os.getenv("TOKEN_USAGE_LOG_BACKUPS", "5"))
+    # Recent usage records kept in memory per tracker, and the window of
+    # the per-model / per-feature aggregates
+    TOKEN_USAGE_RECENT_SIZE: int = int(os.getenv("TOKEN_USAGE_RECENT_SIZE", "1000"))
+    TOKEN_USAGE_WINDOW_SECONDS: int = int(
+        os.getenv("TOKEN_USAGE_WINDOW_SECONDS", "3600")
+    )
+
+    # Effi API client settings (async pooled client)
+    EFFI_TIMEOUT_SECONDS: float = float(os.getenv("EFFI_TIMEOUT_SECONDS", "10"))
+    EFFI_MAX_CONNECTIONS: int = int(os.getenv("EFFI_MAX_CONNECTIONS", "20"))
+    # Requests allowed in flight at once per worker
+    EFFI_MAX_CONCURRENCY: int = int(os.getenv("EFFI_MAX_CONCURRENCY", "10"))
+    EFFI_MAX_RETRIES: int = int(os.getenv("EFFI_MAX_RETRIES", "3"))
+    EFFI_RETRY_BACKOFF_SECONDS: float = float(
+        os.getenv("EFFI_RETRY_BACKOFF_SECONDS", "0.5")
+    )
+    # Lead analyses run at once by /financial-analysis/batch-analyze
+    FINANCIAL_BATCH_CONCURRENCY: int = int(
+        os.getenv("FINANCIAL_BATCH_CONCURRENCY", "5")
+    )
+
+    # Redis health settings: the circuit breaker opens after this many
+    # connection failures within the window and retries after the reset time
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = int(
+        os.getenv("REDIS_BREAKER_FAILURE_THRESHOLD", "5")
+    )
+    REDIS_BREAKER_FAILURE_WINDOW_SECONDS: float = float(
+        os.getenv("REDIS_BREAKER_FAILURE_WINDOW_SECONDS", "10")
+    )
+    REDIS_BREAKER_RESET_SECONDS: float = float(
+        os.getenv("REDIS_BREAKER_RESET_SECONDS", "15")
+    )
+    REDIS_HEALTH_PROBE_INTERVAL_SECONDS: float = float(
+        os.getenv("REDIS_HEALTH_PROBE_INTERVAL_SECONDS", "5")
+    )
+    # Connections in the shared pool of the asyncio client
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+    # Use the asyncio client from SecurityMiddleware and the cached services
+    REDIS_ASYNC_REQUEST_PATH: bool = (
+        os.getenv("REDIS_ASYNC_REQUEST_PATH", "True").lower() == "true"
+    )
+
+    # Analytics counter settings (RedisClient.track_event). Retention of
+    # each time series resolution; 0 keeps it until deleted
+    ANALYTICS_ENABLED: bool = os.getenv("ANALYTICS_ENABLED", "True").lower() == "true"
+    ANALYTICS_MINUTE_TTL_HOURS: int = int(os.getenv("ANALYTICS_MINUTE_TTL_HOURS", "48"))
+    ANALYTICS_HOURLY_TTL_DAYS: int = int(os.getenv("ANALYTICS_HOURLY_TTL_DAYS", "90"))
+    ANALYTICS_DAILY_TTL_DAYS: int = int(os.getenv("ANALYTICS_DAILY_TTL_DAYS", "730"))
+    ANALYTICS_MONTHLY_TTL_DAYS: int = int(os.getenv("ANALYTICS_MONTHLY_TTL_DAYS", "0"))
+    ANALYTICS_USER_TTL_DAYS: int = int(os.getenv("ANALYTICS_USER_TTL_DAYS", "30"))
+    # Seconds bulk analytics reads are reused for (dashboard refreshes)
+    ANALYTICS_MEMO_SECONDS: float = float(os.getenv("ANALYTICS_MEMO_SECONDS", "10"))
+
     # Book storage settings
     BOOK_DIRECTORY: str = os.getenv(
         "BOOK_DIRECTORY",
@@ -49,6 +171,19 @@ class Settings(BaseSettings):
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data", "books"
         ),
     )
+    # Extracted, indexed book text built by scripts/build_book_corpus.py
+    BOOK_CORPUS_DIRECTORY: str = os.getenv(
+        "BOOK_CORPUS_DIRECTORY",
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            "data",
+            "corpus",
+        ),
+    )
+    # Target characters per corpus segment, and processes extracting PDFs
+    # (0 uses one per CPU)
+    BOOK_SEGMENT_CHARS: int = int(os.getenv("BOOK_SEGMENT_CHARS", "1200"))
+    BOOK_INGEST_WORKERS: int = int(os.getenv("BOOK_INGEST_WORKERS", "0"))
 
     # Model configuration for Pydantic v2
     model_config = ConfigDict(
@@ -0,0 +1,206 @@
+"""
+Password Hasher
+
+Runs bcrypt off the event loop. Each hash or verification takes
+100-300 ms of CPU; done inline in an async handler it stalls every other
+request on the worker. Calls here are handed to a small dedicated thread
+pool (bcrypt releases the GIL while hashing) and awaited.
+
+The pool is bounded: once ``PASSWORD_HASH_WORKERS`` hashes are running
+and ``PASSWORD_HASH_QUEUE_LIMIT`` more are waiting, further calls raise
+PasswordHasherBusy straight away, which the auth endpoints turn into a
+503 with Retry-After rather than letting a login burst queue without
+limit.
+
+Verification also reports when the stored hash uses another bcrypt cost
+than ``BCRYPT_ROUNDS``, returning a replacement hash computed in the
+same pool call so logins migrate hashes transparently.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import threading
+import time
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+
+
+def make_crypt_context(rounds: int) -> CryptContext:
+    """bcrypt context hashing with, and expecting, `rounds`"""
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing is at capacity")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """
+    Bounded thread pool for bcrypt with latency and queue metrics
+    """
+
+    # Recent latencies kept per operation for the percentiles
+    LATENCY_SAMPLES = 500
+    # Retry-After sent with 503s
+    RETRY_AFTER_SECONDS = 1
+
+    def __init__(
+        self,
+        context: Optional[CryptContext] = None,
+        workers: Optional[int] = None,
+        queue_limit: Optional[int] = None,
+    ):
+        """
+        Args:
+            context: passlib context (defaults to bcrypt at BCRYPT_ROUNDS)
+            workers: Hashing threads (defaults to PASSWORD_HASH_WORKERS)
+            queue_limit: Calls allowed to wait for a thread (defaults to
+                PASSWORD_HASH_QUEUE_LIMIT)
+        """
+        self.context = context or make_crypt_context(settings.BCRYPT_ROUNDS)
+        self.workers = workers or settings.PASSWORD_HASH_WORKERS
+        self.queue_limit = (
+            settings.PASSWORD_HASH_QUEUE_LIMIT if queue_limit is None else queue_limit
+        )
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+        self.peak_in_flight = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._latencies: Dict[str, deque] = {}
+        self._waits: deque = deque(maxlen=self.LATENCY_SAMPLES)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix="password-hash"
+                    )
+        return self._executor
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self.rejected += 1
+                raise PasswordHasherBusy(self.RETRY_AFTER_SECONDS)
+            self._in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def _run(self, operation: str, func: Callable, *args) -> Any:
+        """Run `func` in the pool, recording queue wait and run time"""
+        self._acquire()
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self._waits.append(started - submitted)
+            try:
+                return func(*args)
+            finally:
+                self._latencies.setdefault(
+                    operation, deque(maxlen=self.LATENCY_SAMPLES)
+                ).append(time.perf_counter() - started)
+
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), timed)
+        finally:
+            self._release()
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost"""
+        return await self._run("hash", self.context.hash, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Check a password against a stored hash"""
+        return await self._run("verify", self.context.verify, password, password_hash)
+
+    async def verify_and_update(
+        self, password: str, password_hash: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password and rehash it if the stored cost is outdated
+
+        Returns:
+            (valid, replacement hash to store or None)
+        """
+        valid, new_hash = await self._run(
+            "verify", self.context.verify_and_update, password, password_hash
+        )
+        if new_hash is not None:
+            self.rehashed += 1
+        return valid, new_hash
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a hashing thread"""
+        return max(0, self._in_flight - self.workers)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool usage and latency percentiles in milliseconds"""
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "peak_in_flight": self.peak_in_flight,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "queue_wait_ms": _percentiles(self._waits),
+            "latency_ms": {
+                operation: _percentiles(samples)
+                for operation, samples in self._latencies.items()
+            },
+        }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _percentiles(samples: deque) -> Dict[str, float]:
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+
+    def at(fraction: float) -> float:
+        return round(
+            values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 2
+        )
+
+    return {"count": len(values), "p50": at(0.5), "p95": at(0.95), "max": at(1.0)}
+
+
+_password_hasher: Optional[PasswordHasher] = None
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Process-wide password hasher"""
+    global _password_hasher
+    if _password_hasher is None:
+        _password_hasher = PasswordHasher()
+    return _password_hasher
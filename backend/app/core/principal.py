@@ -0,0 +1,226 @@
+"""
+Principal Resolution
+
+Resolves the user behind a request's bearer token once per request.
+
+The token is decoded at most once and the subject is kept on
+``request.state``, where the security middleware and the auth
+dependencies both read it. The user is looked up through a bounded,
+per-process TTL cache of slim, immutable projections (Principal), so
+authenticating does not query the users table on every request.
+get_current_user hands endpoints a User attached to the request's
+session from that projection; only columns outside it are loaded, on
+first access.
+
+Cached principals are dropped when a session flushes a change to or
+deletes the user, and again when that session commits or rolls back, so
+a principal loaded in between from a row that is about to change is not
+kept. Other workers pick the change up once their entry is older than
+``PRINCIPAL_CACHE_SECONDS``.
+"""
+
+from collections import OrderedDict
+from typing import Any, Optional, NamedTuple, Tuple
+from itertools import chain
+import threading
+import time
+
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.database.models.user import User, UserType
+
+
+class Principal(NamedTuple):
+    """Slim, immutable projection of an authenticated user"""
+
+    id: str
+    user_type: UserType
+    is_verified: bool
+    is_deleted: bool
+
+
+def decode_subject(token: str) -> Optional[str]:
+    """Subject (user ID) of a valid access token, or None"""
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+
+def bearer_token(request: Any) -> Optional[str]:
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return auth_header[len("Bearer ") :]
+
+
+def request_subject(request: Any, token: Optional[str] = None) -> Optional[str]:
+    """
+    Subject of the request's bearer token, decoding it once per request
+
+    Args:
+        request: Incoming request; the result is kept on request.state
+        token: Token already extracted from the request, if any
+
+    Returns:
+        The user ID, or None without a valid token
+    """
+    token = token or bearer_token(request)
+    if token is None:
+        return None
+    decoded: Optional[Tuple[str, Optional[str]]] = getattr(
+        request.state, "token_subject", None
+    )
+    if decoded is not None and decoded[0] == token:
+        return decoded[1]
+    subject = decode_subject(token)
+    request.state.token_subject = (token, subject)
+    return subject
+
+
+class PrincipalCache:
+    """Bounded, thread-safe LRU of principals with a time to live"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so loads that raced one are dropped
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: str) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, principal: Principal, generation: int):
+        """Cache a principal loaded while `generation` was current"""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Users changed by a session's flushes, invalidated again when it ends
+_CHANGED_KEY = "principal_changed_users"
+
+principal_cache = PrincipalCache(
+    settings.PRINCIPAL_CACHE_SECONDS, settings.PRINCIPAL_CACHE_SIZE
+)
+
+
+def get_principal(db: Session, user_id: str) -> Optional[Principal]:
+    """
+    Principal for a user ID, from the cache or one narrow query
+
+    Returns:
+        Principal, or None if the user does not exist
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    generation = principal_cache.generation
+    row = (
+        db.query(User.id, User.user_type, User.is_verified, User.is_deleted)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if row is None:
+        return None
+    principal = Principal(
+        id=row.id,
+        user_type=row.user_type,
+        is_verified=bool(row.is_verified),
+        is_deleted=row.is_deleted is not None,
+    )
+    principal_cache.set(principal, generation)
+    return principal
+
+
+def principal_user(db: Session, principal: Principal) -> User:
+    """
+    User attached to `db` built from a principal without querying
+
+    Columns outside the projection are expired and loaded together on
+    first access; relationships lazy-load as usual.
+    """
+    user = User(
+        id=principal.id,
+        user_type=principal.user_type,
+        is_verified=principal.is_verified,
+    )
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_principal(user_id: str):
+    """Drop a cached principal so the next request reloads it"""
+    principal_cache.invalidate(str(user_id))
+
+
+@event.listens_for(Session, "after_flush")
+def _on_after_flush(session, flush_context):
+    """Invalidate principals of users changed or deleted by a flush"""
+    changed = {
+        instance.id
+        for instance in chain(session.dirty, session.deleted)
+        if isinstance(instance, User) and instance.id is not None
+    }
+    if changed:
+        session.info.setdefault(_CHANGED_KEY, set()).update(changed)
+    for user_id in changed:
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _on_after_commit(session):
+    """Invalidate again at commit, dropping principals loaded from the old row"""
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_after_rollback(session):
+    """Invalidate again on rollback, dropping principals loaded from the changes"""
+    for user_id in session.info.pop(_CHANGED_KEY, ()):
+        invalidate_principal(user_id)
@@ -0,0 +1,316 @@
+"""
+Rate Limiter
+
+Atomic rate limiting for SecurityMiddleware. A check evaluates several
+rules at once (e.g. per-IP and per-user) with a single Lua script call:
+every rule is evaluated first, and only if all of them allow the request
+is it counted against each one, so a request rejected by one rule does
+not use up the others.
+
+Two algorithms are supported per rule:
+
+- sliding_window: exact sliding log in a sorted set; at most `limit`
+  requests in any `window` seconds
+- token_bucket: bucket of `limit` tokens refilled continuously over
+  `window` seconds; allows short bursts with a smooth long-run rate
+
+When Redis is unavailable, checks fall back to an in-process limiter with
+the same algorithms instead of failing open. Its counts are per worker.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from collections import OrderedDict, deque
+import logging
+import math
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+SLIDING_WINDOW = "sliding_window"
+TOKEN_BUCKET = "token_bucket"
+ALGORITHMS = (SLIDING_WINDOW, TOKEN_BUCKET)
+
+
+class RateLimitRule(NamedTuple):
+    """One limit applied to a request"""
+
+    # Rule name reported when it rejects a request, e.g. "ip" or "user"
+    scope: str
+    # Identifier the limit is counted against
+    key: str
+    limit: int
+    # Seconds
+    window: int
+    algorithm: str = SLIDING_WINDOW
+
+
+# KEYS: one per rule. ARGV: now (ms), unique member, then per rule
+# algorithm, limit, window (ms). Returns the overall verdict followed by
+# (allowed, remaining, reset ms) per rule.
+RATE_LIMIT_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local member = ARGV[2]
+    local results = {}
+    local pending = {}
+    local all_allowed = 1
+
+    for i, key in ipairs(KEYS) do
+        local base = 3 + (i - 1) * 3
+        local algorithm = ARGV[base]
+        local limit = tonumber(ARGV[base + 1])
+        local window = tonumber(ARGV[base + 2])
+        local allowed, remaining, reset
+
+        if algorithm == 'token_bucket' then
+            local rate = limit / window
+            local state = redis.call('HMGET', key, 'tokens', 'ts')
+            local tokens = tonumber(state[1]) or limit
+            local ts = tonumber(state[2]) or now
+            tokens = math.min(limit, tokens + math.max(0, now - ts) * rate)
+            if tokens >= 1 then
+                allowed = 1
+                remaining = math.floor(tokens - 1)
+                reset = now + math.ceil((limit - tokens + 1) / rate)
+            else
+                allowed = 0
+                remaining = 0
+                reset = now + math.ceil((1 - tokens) / rate)
+            end
+            pending[i] = tokens - 1
+        else
+            redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+            local count = redis.call('ZCARD', key)
+            local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+            if oldest[2] then
+                reset = tonumber(oldest[2]) + window
+            else
+                reset = now + window
+            end
+            if count < limit then
+                allowed = 1
+                remaining = limit - count - 1
+            else
+                allowed = 0
+                remaining = 0
+            end
+        end
+
+        if allowed == 0 then
+            all_allowed = 0
+        end
+        results[#results + 1] = allowed
+        results[#results + 1] = remaining
+        results[#results + 1] = reset
+    end
+
+    if all_allowed == 1 then
+        for i, key in ipairs(KEYS) do
+            local base = 3 + (i - 1) * 3
+            local window = tonumber(ARGV[base + 2])
+            if ARGV[base] == 'token_bucket' then
+                redis.call('HSET', key, 'tokens', tostring(pending[i]), 'ts', now)
+            else
+                redis.call('ZADD', key, now, member)
+            end
+            redis.call('PEXPIRE', key, window)
+        end
+    end
+
+    table.insert(results, 1, all_allowed)
+    return results
+"""
+
+
+class LocalRateLimiter:
+    """
+    In-process limiter with the same algorithms, used while Redis is down
+    """
+
+    def __init__(self, max_keys: int = 10000):
+        self.max_keys = max_keys
+        # key -> deque of request times (sliding window) or [tokens, ts]
+        self._state: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def check(
+        self, rules: Sequence[RateLimitRule], now_ms: int
+    ) -> Tuple[bool, List[Tuple[bool, int, int]]]:
+        """
+        Evaluate rules and count the request if all of them allow it
+
+        Returns:
+            (allowed, [(allowed, remaining, reset_ms) per rule])
+        """
+        with self._lock:
+            results = []
+            pending = []
+            for rule in rules:
+                key = f"{rule.algorithm}:{rule.key}"
+                window_ms = rule.window * 1000
+                if rule.algorithm == TOKEN_BUCKET:
+                    result, tokens = self._token_bucket(key, rule, window_ms, now_ms)
+                    pending.append((key, tokens))
+                else:
+                    result = self._sliding_window(key, rule, window_ms, now_ms)
+                    pending.append((key, None))
+                results.append(result)
+
+            allowed = all(result[0] for result in results)
+            if allowed:
+                for key, tokens in pending:
+                    if tokens is None:
+                        self._state[key].append(now_ms)
+                    else:
+                        self._state[key] = [tokens - 1, now_ms]
+                    self._state.move_to_end(key)
+                while len(self._state) > self.max_keys:
+                    self._state.popitem(last=False)
+            return allowed, results
+
+    def _sliding_window(
+        self, key: str, rule: RateLimitRule, window_ms: int, now_ms: int
+    ) -> Tuple[bool, int, int]:
+        requests = self._state.get(key)
+        if not isinstance(requests, deque):
+            requests = self._state[key] = deque()
+        while requests and requests[0] <= now_ms - window_ms:
+            requests.popleft()
+
+        reset = (requests[0] if requests else now_ms) + window_ms
+        if len(requests) < rule.limit:
+            return True, rule.limit - len(requests) - 1, reset
+        return False, 0, reset
+
+    def _token_bucket(
+        self, key: str, rule: RateLimitRule, window_ms: int, now_ms: int
+    ) -> Tuple[Tuple[bool, int, int], float]:
+        rate = rule.limit / window_ms
+        tokens, ts = self._state.get(key) or (rule.limit, now_ms)
+        tokens = min(rule.limit, tokens + max(0, now_ms - ts) * rate)
+        if tokens >= 1:
+            reset = now_ms + math.ceil((rule.limit - tokens + 1) / rate)
+            return (True, math.floor(tokens - 1), reset), tokens
+        return (False, 0, now_ms + math.ceil((1 - tokens) / rate)), tokens
+
+
+class RateLimiter:
+    """
+    Multi-rule rate limiter backed by Redis with a local fallback
+    """
+
+    def __init__(self, redis_client, local_limiter: Optional[LocalRateLimiter] = None):
+        """
+        Args:
+            redis_client: RedisClient (or AsyncRedisClient, with
+                check_async) used to run the Lua script
+            local_limiter: Limiter used while Redis is unavailable
+        """
+        self.redis = redis_client
+        self.local = local_limiter or LocalRateLimiter()
+        self.stats = {"redis_checks": 0, "local_checks": 0, "rejected": 0}
+
+    def check(self, rules: Sequence[RateLimitRule]) -> Dict[str, Any]:
+        """
+        Check and count a request against all rules in one round trip
+
+        Args:
+            rules: Limits that all have to allow the request
+
+        Returns:
+            Dict with allowed, limit, remaining, reset_time (epoch seconds),
+            retry_after (seconds), the limiting rule's scope and the backend
+            that answered
+        """
+        if not rules:
+            return {"allowed": True, "remaining": 0, "reset_time": 0}
+        keys, args, now_ms = self._prepare(rules)
+        raw = self.redis.run_script(RATE_LIMIT_SCRIPT, keys, args)
+        return self._resolve(rules, raw, now_ms)
+
+    async def check_async(self, rules: Sequence[RateLimitRule]) -> Dict[str, Any]:
+        """check() for an AsyncRedisClient, whose run_script is a coroutine"""
+        if not rules:
+            return {"allowed": True, "remaining": 0, "reset_time": 0}
+        keys, args, now_ms = self._prepare(rules)
+        raw = await self.redis.run_script(RATE_LIMIT_SCRIPT, keys, args)
+        return self._resolve(rules, raw, now_ms)
+
+    def _prepare(
+        self, rules: Sequence[RateLimitRule]
+    ) -> Tuple[List[str], List[Any], int]:
+        for rule in rules:
+            if rule.algorithm not in ALGORITHMS:
+                raise ValueError(f"Unknown rate limit algorithm: {rule.algorithm}")
+        now_ms = int(time.time() * 1000)
+        keys = [self.redis_key(rule) for rule in rules]
+        return keys, self.script_args(rules, now_ms), now_ms
+
+    def _resolve(
+        self, rules: Sequence[RateLimitRule], raw: Any, now_ms: int
+    ) -> Dict[str, Any]:
+        """Summarize the script result, or check locally if there is none"""
+        if raw is not None:
+            self.stats["redis_checks"] += 1
+            allowed, results = self.parse_script_result(raw)
+            backend = "redis"
+        else:
+            self.stats["local_checks"] += 1
+            allowed, results = self.local.check(rules, now_ms)
+            backend = "local"
+
+        return self.summarize(rules, allowed, results, now_ms, backend)
+
+    @staticmethod
+    def redis_key(rule: RateLimitRule) -> str:
+        return f"rate_limit:{rule.algorithm}:{rule.key}"
+
+    @staticmethod
+    def script_args(rules: Sequence[RateLimitRule], now_ms: int) -> List[Any]:
+        args: List[Any] = [now_ms, uuid.uuid4().hex]
+        for rule in rules:
+            args.extend([rule.algorithm, rule.limit, rule.window * 1000])
+        return args
+
+    @staticmethod
+    def parse_script_result(raw: Sequence[Any]) -> Tuple[bool, List[Tuple]]:
+        values = [int(value) for value in raw]
+        results = [
+            (bool(values[i]), values[i + 1], values[i + 2])
+            for i in range(1, len(values), 3)
+        ]
+        return bool(values[0]), results
+
+    def summarize(
+        self,
+        rules: Sequence[RateLimitRule],
+        allowed: bool,
+        results: List[Tuple[bool, int, int]],
+        now_ms: int,
+        backend: str,
+    ) -> Dict[str, Any]:
+        """Report the rule closest to (or past) its limit"""
+        if allowed:
+            index = min(range(len(rules)), key=lambda i: results[i][1])
+        else:
+            self.stats["rejected"] += 1
+            denied = [i for i in range(len(rules)) if not results[i][0]]
+            index = max(denied, key=lambda i: results[i][2])
+
+        rule = rules[index]
+        _, remaining, reset_ms = results[index]
+        return {
+            "allowed": allowed,
+            "limit": rule.limit,
+            "remaining": max(0, remaining),
+            "reset_time": math.ceil(reset_ms / 1000),
+            "retry_after": (
+                0 if allowed else max(1, math.ceil((reset_ms - now_ms) / 1000))
+            ),
+            "rule": rule.scope,
+            "backend": backend,
+        }
@@ -8,30 +8,225 @@ for caching, session storage, and rate limiting.
 import redis
 import json
 import logging
-from typing import Any, Optional, Dict, List
+from typing import Any, Optional, Dict, Iterable, List, NamedTuple, Tuple
 from datetime import datetime, timedelta
 import os
+import threading
+import time
 from contextlib import asynccontextmanager
 
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.timeseries import DAY, HOUR, RangeQuery, TimeSeriesStore, align
+
 logger = logging.getLogger(__name__)
 
 
+class EventWindow(NamedTuple):
+    """A counter incremented for every tracked event"""
+
+    # Key template; may use {event}, {user} and {now}. Templates using
+    # {user} are skipped for anonymous events.
+    key: str
+    # Seconds to keep the counter; None keeps it until deleted
+    ttl: Optional[int]
+    # Hash field template (same placeholders); None for a plain counter
+    field: Optional[str] = None
+
+
+def plan_event_increments(
+    layout: List[EventWindow],
+    event_types: Iterable[str],
+    user_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Dict[Tuple[str, Optional[str]], Tuple[int, Optional[int]]]:
+    """
+    Counters touched by a set of events
+
+    Shared counters (the total, the user's series) are combined into a
+    single increment.
+
+    Returns:
+        Mapping of (key, hash field or None) to (increment, ttl)
+    """
+    now = now or datetime.now()
+
+    increments: Dict[Tuple[str, Optional[str]], Tuple[int, Optional[int]]] = {}
+    for event_type in event_types:
+        for window in layout:
+            if "{user}" in window.key and not user_id:
+                continue
+            key = window.key.format(event=event_type, user=user_id, now=now)
+            field = window.field and window.field.format(
+                event=event_type, user=user_id, now=now
+            )
+            amount, _ = increments.get((key, field), (0, None))
+            increments[(key, field)] = (amount + 1, window.ttl)
+    return increments
+
+
+def track_events_script_args(
+    layout: List[EventWindow],
+    event_types: Iterable[str],
+    user_id: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Tuple[List[str], List[Any]]:
+    """KEYS and ARGV of RedisClient.TRACK_EVENTS_SCRIPT for a set of events"""
+    keys = []
+    args: List[Any] = []
+    increments = plan_event_increments(layout, event_types, user_id, now)
+    for (key, field), (amount, ttl) in increments.items():
+        keys.append(key)
+        args.extend([field or "", amount, ttl or 0])
+    return keys, args
+
+
+def analytics_queries(
+    store: TimeSeriesStore,
+    event_types: Iterable[str],
+    days: int,
+    now: Optional[datetime] = None,
+) -> Tuple[RangeQuery, RangeQuery]:
+    """
+    Range queries behind get_analytics_bulk
+
+    Returns:
+        (daily counts for the last `days` days, today's hourly counts)
+    """
+    today = align(DAY, now or datetime.now())
+    event_types = list(event_types)
+    daily = store.range_query(event_types, today - timedelta(days=days - 1), today, DAY)
+    hourly = store.range_query(event_types, today, today + timedelta(hours=23), HOUR)
+    return daily, hourly
+
+
+def compact_analytics(
+    daily: RangeQuery, hourly: RangeQuery, raw: List[Any]
+) -> Dict[str, Any]:
+    """
+    Shape the result of reading daily.keys + hourly.keys as compact arrays
+
+    Returns:
+        {"dates": [...], "events": {event: {"daily": [counts per date],
+        "hourly": [24 counts for today]}}}
+    """
+    daily_counts = daily.parse(raw[: len(daily.keys)])
+    hourly_counts = hourly.parse(raw[len(daily.keys) :])
+    return {
+        "dates": [point.strftime("%Y-%m-%d") for point in daily.points],
+        "events": {
+            event: {"daily": daily_counts[event], "hourly": hourly_counts[event]}
+            for event in daily.series
+        },
+    }
+
+
+def expand_analytics(bulk: Dict[str, Any], event_type: str) -> Dict[str, Any]:
+    """One event type of a compact result in get_analytics' format"""
+    series = bulk["events"][event_type]
+    return {
+        "daily": [
+            {"date": date, "count": count}
+            for date, count in zip(bulk["dates"], series["daily"])
+        ],
+        "hourly": [
+            {"hour": hour, "count": count}
+            for hour, count in enumerate(series["hourly"])
+        ],
+    }
+
+
+def series_result(query: RangeQuery, raw: List[Any]) -> Dict[str, Any]:
+    """Response of get_series for a range query's script result"""
+    return {
+        "resolution": query.resolution.name,
+        "timestamps": query.timestamps(),
+        "series": query.parse(raw),
+    }
+
+
+class AnalyticsMemo:
+    """Short-lived, thread-safe memo of bulk analytics reads"""
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[Any, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any) -> Any:
+        """Memoized value, or None if missing or expired"""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, key: Any, value: Any):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if len(self._entries) >= self.MAX_ENTRIES:
+                self._entries = {
+                    k: entry for k, entry in self._entries.items() if entry[0] > now
+                }
+                if len(self._entries) >= self.MAX_ENTRIES:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
 class RedisClient:
     """Redis client with connection management and common operations"""
 
-    def __init__(self):
-        """Initialize Redis client"""
+    def __init__(self, timeseries: Optional[TimeSeriesStore] = None):
+        """
+        Initialize Redis client
+
+        Args:
+            timeseries: Layout of the analytics counters written by
+                track_event; defaults to TimeSeriesStore()
+        """
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.redis_host = os.getenv("REDIS_HOST", "localhost")
         self.redis_port = int(os.getenv("REDIS_PORT", "6379"))
         self.redis_db = int(os.getenv("REDIS_DB", "0"))
         self.redis_password = os.getenv("REDIS_PASSWORD")
 
+        self.timeseries = timeseries or TimeSeriesStore()
+        self.event_key_layout = self.timeseries.event_windows()
+
+        self.breaker = CircuitBreaker(
+            "Redis",
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            failure_window=settings.REDIS_BREAKER_FAILURE_WINDOW_SECONDS,
+            reset_timeout=settings.REDIS_BREAKER_RESET_SECONDS,
+        )
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_stop = threading.Event()
+
         self._client = None
+        self._session_cas = None
+        self._scripts: Dict[str, Any] = {}
+        self._rate_limiter = None
+        self.analytics_memo = AnalyticsMemo(settings.ANALYTICS_MEMO_SECONDS)
         self._connect()
 
     def _connect(self):
         """Establish Redis connection"""
+        self._session_cas = None
+        self._scripts = {}
         try:
             if self.redis_url.startswith("redis://"):
                 # Use URL connection (for cloud Redis)
@@ -58,25 +253,82 @@ class RedisClient:
             # Test connection
             self._client.ping()
             logger.info("Redis connection established successfully")
+            self.breaker.record_success()
 
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {str(e)}")
             self._client = None
+            self.breaker.trip()
 
     def is_connected(self) -> bool:
-        """Check if Redis is connected"""
-        if not self._client:
-            return False
-        try:
-            self._client.ping()
+        """
+        Check if Redis is usable
+
+        Does not send a PING while the circuit breaker is closed; health is
+        tracked from operation failures and the background probe.
+        """
+        if self._client is not None and self.breaker.state == CircuitBreaker.CLOSED:
             return True
-        except:
+        if not self.breaker.allow_request():
             return False
+        # Trial call after the breaker's cool-down
+        return self._probe()
 
     def reconnect(self):
         """Reconnect to Redis"""
         self._connect()
 
+    def _probe(self) -> bool:
+        """PING Redis (reconnecting if needed) and report the result"""
+        if self._client is None:
+            self.reconnect()
+            return self._client is not None
+        try:
+            self._client.ping()
+        except Exception as e:
+            logger.warning(f"Redis health probe failed: {str(e)}")
+            self.breaker.record_failure()
+            return False
+        self.breaker.record_success()
+        return True
+
+    def _record_error(self, error: Exception):
+        """Count connection-level errors towards opening the breaker"""
+        if isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            self.breaker.record_failure()
+
+    def start_health_probe(self, interval: Optional[float] = None):
+        """
+        Probe Redis in a background thread
+
+        Detects outages without waiting for requests to fail, and
+        reconnects once Redis is back after the breaker's cool-down.
+
+        Args:
+            interval: Seconds between probes
+        """
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        interval = interval or settings.REDIS_HEALTH_PROBE_INTERVAL_SECONDS
+        self._probe_stop.clear()
+
+        def run():
+            while not self._probe_stop.wait(interval):
+                if self.breaker.allow_request():
+                    self._probe()
+
+        self._probe_thread = threading.Thread(
+            target=run, name="redis-health-probe", daemon=True
+        )
+        self._probe_thread.start()
+
+    def stop_health_probe(self):
+        """Stop the background health probe"""
+        self._probe_stop.set()
+        if self._probe_thread is not None:
+            self._probe_thread.join(timeout=5)
+            self._probe_thread = None
+
     # Basic Operations
     def set(self, key: str, value: Any, expire: Optional[int] = None) -> bool:
         """Set a key-value pair with optional expiration"""
@@ -92,6 +344,7 @@ class RedisClient:
             else:
                 return self._client.set(key, value)
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis SET error: {str(e)}")
             return False
 
@@ -112,6 +365,7 @@ class RedisClient:
                     return value
             return value
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis GET error: {str(e)}")
             return None
 
@@ -122,6 +376,7 @@ class RedisClient:
                 return False
             return bool(self._client.delete(key))
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis DELETE error: {str(e)}")
             return False
 
@@ -132,6 +387,7 @@ class RedisClient:
                 return False
             return bool(self._client.exists(key))
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis EXISTS error: {str(e)}")
             return False
 
@@ -142,6 +398,7 @@ class RedisClient:
                 return None
             return self._client.incr(key, amount)
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis INCR error: {str(e)}")
             return None
 
@@ -152,6 +409,7 @@ class RedisClient:
                 return False
             return self._client.expire(key, seconds)
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis EXPIRE error: {str(e)}")
             return False
 
@@ -162,6 +420,7 @@ class RedisClient:
                 return -1
             return self._client.ttl(key)
         except Exception as e:
+            self._record_error(e)
             logger.error(f"Redis TTL error: {str(e)}")
             return -1
 
@@ -197,7 +456,101 @@ class RedisClient:
         """Refresh session expiration"""
         return self.expire(f"session:{session_id}", expire)
 
+    # Stored as "<version>:<payload>"; an empty expected version skips the check
+    SESSION_CAS_SCRIPT = """
+        local current = redis.call('GET', KEYS[1])
+        local version = 0
+        if current then
+            version = tonumber(string.match(current, '^(%d+):')) or 0
+        end
+        if ARGV[1] ~= '' and tonumber(ARGV[1]) ~= version then
+            return 0
+        end
+        version = version + 1
+        redis.call('SET', KEYS[1], version .. ':' .. ARGV[2], 'EX', ARGV[3])
+        return version
+    """
+
+    def session_compare_and_set(
+        self,
+        session_id: str,
+        payload: str,
+        expected_version: Optional[int],
+        expire: int = 86400,
+    ) -> Optional[int]:
+        """
+        Atomically replace a versioned session payload
+
+        Args:
+            session_id: Session identifier
+            payload: Serialized session data
+            expected_version: Version the caller last read (0 for a new
+                session), or None to overwrite unconditionally
+            expire: Expiration in seconds
+
+        Returns:
+            The new version, 0 if the stored version did not match, or
+            None if Redis is unavailable
+        """
+        try:
+            if not self.is_connected():
+                return None
+            if self._session_cas is None:
+                self._session_cas = self._client.register_script(
+                    self.SESSION_CAS_SCRIPT
+                )
+            expected = "" if expected_version is None else str(expected_version)
+            return int(
+                self._session_cas(
+                    keys=[f"session:{session_id}"], args=[expected, payload, expire]
+                )
+            )
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis session CAS error: {str(e)}")
+            return None
+
+    # Scripting
+    def run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """
+        Run a Lua script with EVALSHA, loading it on first use
+
+        Returns:
+            The script result, or None if Redis is unavailable or the script
+            failed
+        """
+        try:
+            if not self.is_connected():
+                return None
+            registered = self._scripts.get(script)
+            if registered is None:
+                registered = self._scripts[script] = self._client.register_script(
+                    script
+                )
+            return registered(keys=keys, args=args)
+        except Exception as e:
+            self._record_error(e)
+            logger.error(f"Redis script error: {str(e)}")
+            return None
+
     # Rate Limiting Operations
+    @property
+    def rate_limiter(self):
+        """Multi-rule limiter using this client, with a local fallback"""
+        if self._rate_limiter is None:
+            from app.core.rate_limiter import RateLimiter
+
+            self._rate_limiter = RateLimiter(self)
+        return self._rate_limiter
+
+    def check_rate_limits(self, rules) -> Dict[str, Any]:
+        """
+        Check and count a request against several RateLimitRules at once
+
+        Falls back to a per-worker limiter while Redis is unavailable.
+        """
+        return self.rate_limiter.check(rules)
+
     def rate_limit_check(
         self, identifier: str, limit: int, window: int
     ) -> Dict[str, Any]:
@@ -212,44 +565,31 @@ class RedisClient:
         Returns:
             Dict with allowed, remaining, reset_time
         """
-        try:
-            if not self.is_connected():
-                return {"allowed": True, "remaining": limit, "reset_time": 0}
+        from app.core.rate_limiter import RateLimitRule
 
-            key = f"rate_limit:{identifier}"
-            current = self._client.get(key)
-
-            if current is None:
-                # First request
-                self._client.setex(key, window, 1)
-                return {
-                    "allowed": True,
-                    "remaining": limit - 1,
-                    "reset_time": int(datetime.now().timestamp()) + window,
-                }
-
-            current_count = int(current)
-            if current_count < limit:
-                # Within limit
-                self._client.incr(key)
-                remaining = limit - current_count - 1
-                reset_time = int(datetime.now().timestamp()) + self.ttl(key)
-                return {
-                    "allowed": True,
-                    "remaining": remaining,
-                    "reset_time": reset_time,
-                }
-            else:
-                # Rate limit exceeded
-                reset_time = int(datetime.now().timestamp()) + self.ttl(key)
-                return {"allowed": False, "remaining": 0, "reset_time": reset_time}
-
-        except Exception as e:
-            logger.error(f"Rate limit check error: {str(e)}")
-            # Fail open - allow request if Redis is down
-            return {"allowed": True, "remaining": limit, "reset_time": 0}
+        return self.check_rate_limits(
+            [RateLimitRule("default", identifier, limit, window)]
+        )
 
     # Analytics Operations
+    # ARGV holds a (field, increment, ttl) triple per key: an empty field
+    # increments a plain counter, a ttl of 0 keeps the key
+    TRACK_EVENTS_SCRIPT = """
+        for i, key in ipairs(KEYS) do
+            local field = ARGV[3 * i - 2]
+            if field == '' then
+                redis.call('INCRBY', key, ARGV[3 * i - 1])
+            else
+                redis.call('HINCRBY', key, field, ARGV[3 * i - 1])
+            end
+            local ttl = tonumber(ARGV[3 * i])
+            if ttl > 0 then
+                redis.call('EXPIRE', key, ttl)
+            end
+        end
+        return #KEYS
+    """
+
     def track_event(
         self,
         event_type: str,
@@ -257,78 +597,140 @@ class RedisClient:
         metadata: Optional[Dict] = None,
     ):
         """Track an event for analytics"""
-        try:
-            if not self.is_connected():
-                return
+        self.track_events([event_type], user_id, metadata)
 
-            now = datetime.now()
-            today = now.strftime("%Y-%m-%d")
-            hour = now.strftime("%Y-%m-%d:%H")
+    def track_events(
+        self,
+        event_types: Iterable[str],
+        user_id: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> bool:
+        """
+        Track several events in a single scripted round trip
 
-            # Daily counters
-            self.incr(f"events:{event_type}:{today}")
-            self.incr(f"events:total:{today}")
+        Every resolution of the events' time series, the total and the
+        user's series is incremented together.
 
-            # Hourly counters
-            self.incr(f"events:{event_type}:{hour}")
-            self.expire(f"events:{event_type}:{hour}", 86400 * 7)  # Keep for 7 days
+        Args:
+            event_types: Events that happened, e.g. for one request
+            user_id: Optional user the events belong to
+            metadata: Optional event metadata (not stored yet)
 
-            # User-specific tracking
-            if user_id:
-                self.incr(f"user_events:{user_id}:{today}")
-                self.expire(
-                    f"user_events:{user_id}:{today}", 86400 * 30
-                )  # Keep for 30 days
+        Returns:
+            True if the counters were updated
+        """
+        keys, args = track_events_script_args(
+            self.event_key_layout, event_types, user_id
+        )
+        if not keys:
+            return True
+        return self.run_script(self.TRACK_EVENTS_SCRIPT, keys, args) is not None
 
-            # Live metrics (5-minute windows)
-            live_key = f"live:{event_type}:{now.strftime('%Y-%m-%d:%H:%M')[:-1]}0"  # Round to 10-minute
-            self.incr(live_key)
-            self.expire(live_key, 600)  # 10-minute window
+    def event_increments(
+        self,
+        event_types: Iterable[str],
+        user_id: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> Dict[Tuple[str, Optional[str]], Tuple[int, Optional[int]]]:
+        """
+        Counters touched by a set of events
 
-        except Exception as e:
-            logger.error(f"Event tracking error: {str(e)}")
+        Returns:
+            Mapping of (key, hash field) to (increment, ttl)
+        """
+        return plan_event_increments(self.event_key_layout, event_types, user_id, now)
 
     def get_analytics(self, event_type: str, days: int = 7) -> Dict[str, Any]:
-        """Get analytics for an event type"""
-        try:
-            if not self.is_connected():
-                return {}
-
-            analytics = {}
-
-            # Daily data for the last N days
-            daily_data = []
-            for i in range(days):
-                date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-                count = self.get(f"events:{event_type}:{date}", parse_json=False) or 0
-                daily_data.append({"date": date, "count": int(count)})
-
-            analytics["daily"] = list(reversed(daily_data))
-
-            # Today's hourly data
-            today = datetime.now().strftime("%Y-%m-%d")
-            hourly_data = []
-            for hour in range(24):
-                hour_key = f"{today}:{hour:02d}"
-                count = (
-                    self.get(f"events:{event_type}:{hour_key}", parse_json=False) or 0
-                )
-                hourly_data.append({"hour": hour, "count": int(count)})
+        """Get daily and today's hourly analytics for an event type"""
+        bulk = self.get_analytics_bulk([event_type], days)
+        return expand_analytics(bulk, event_type) if bulk else {}
 
-            analytics["hourly"] = hourly_data
+    def get_analytics_bulk(
+        self, event_types: Iterable[str], days: int = 7
+    ) -> Dict[str, Any]:
+        """
+        Daily and today's hourly counts for many event types at once
 
-            return analytics
+        All the time series hashes involved are read in one script call.
+        Results are memoized for ANALYTICS_MEMO_SECONDS so repeated
+        dashboard loads do not re-read the same counters.
 
-        except Exception as e:
-            logger.error(f"Analytics retrieval error: {str(e)}")
+        Args:
+            event_types: Events to read
+            days: Number of days of daily counts, ending today
+
+        Returns:
+            Compact arrays (see compact_analytics), or {} if Redis is
+            unavailable. Treat the result as read-only; it may be shared.
+        """
+        event_types = list(event_types)
+        memo_key = ("bulk", tuple(event_types), days)
+        cached = self.analytics_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        daily, hourly = analytics_queries(self.timeseries, event_types, days)
+        raw = self.run_script(TimeSeriesStore.READ_SCRIPT, daily.keys + hourly.keys, [])
+        if raw is None:
             return {}
+        result = compact_analytics(daily, hourly, raw)
+        self.analytics_memo.set(memo_key, result)
+        return result
+
+    def get_series(
+        self,
+        series: Iterable[str],
+        start: datetime,
+        end: Optional[datetime] = None,
+        resolution: Optional[str] = None,
+        max_points: int = 500,
+    ) -> Dict[str, Any]:
+        """
+        Counts for several time series over a range, in one script call
+
+        Args:
+            series: Event types, "total" or TimeSeriesStore.user_series(id)
+            start: Start of the range
+            end: End of the range; defaults to now
+            resolution: "minute", "hour", "day" or "month"; by default the
+                finest one that covers the range in at most max_points
+            max_points: Point budget when picking the resolution
+
+        Returns:
+            {"resolution", "timestamps", "series": {name: [counts]}}, or {}
+            if Redis is unavailable
+        """
+        query = self.timeseries.range_query(
+            list(series), start, end or datetime.now(), resolution, max_points
+        )
+        memo_key = (
+            "series",
+            tuple(query.series),
+            query.resolution.name,
+            query.points[0],
+            query.points[-1],
+        )
+        cached = self.analytics_memo.get(memo_key)
+        if cached is not None:
+            return cached
+
+        raw = self.run_script(TimeSeriesStore.READ_SCRIPT, query.keys, [])
+        if raw is None:
+            return {}
+        result = series_result(query, raw)
+        self.analytics_memo.set(memo_key, result)
+        return result
 
     # Health Check
     def health_check(self) -> Dict[str, Any]:
         """Redis health check"""
         try:
             if not self._client:
-                return {"status": "disconnected", "error": "No Redis client"}
+                return {
+                    "status": "disconnected",
+                    "error": "No Redis client",
+                    "breaker": self.breaker.metrics(),
+                }
 
             start_time = datetime.now()
             self._client.ping()
@@ -338,6 +740,7 @@ class RedisClient:
 
             return {
                 "status": "connected",
+                "breaker": self.breaker.metrics(),
                 "response_time_ms": round(response_time, 2),
                 "memory_usage": info.get("used_memory_human", "unknown"),
                 "connected_clients": info.get("connected_clients", 0),
@@ -345,7 +748,12 @@ class RedisClient:
             }
 
         except Exception as e:
-            return {"status": "error", "error": str(e)}
+            self._record_error(e)
+            return {
+                "status": "error",
+                "error": str(e),
+                "breaker": self.breaker.metrics(),
+            }
 
 
 # Global Redis client instance
@@ -1,13 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
 from jose import jwt
-from passlib.context import CryptContext
 from pydantic import ValidationError
 import os
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
+from app.core.config import settings
+from app.core.password_hasher import make_crypt_context
 from app.schemas.user import UserResponse
 
 # Load environment variables
@@ -18,8 +19,9 @@ SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context; async handlers should use
+# app.core.password_hasher instead of blocking on it
+pwd_context = make_crypt_context(settings.BCRYPT_ROUNDS)
 
 # OAuth2 bearer token scheme for FastAPI
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
@@ -16,6 +16,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 import hashlib
 
+from app.core.async_redis_client import get_request_redis, maybe_await
+from app.core.config import settings
+from app.core.principal import request_subject
+from app.core.rate_limiter import SLIDING_WINDOW, TOKEN_BUCKET, RateLimitRule
 from app.core.redis_client import get_redis
 from app.database.models.user import User
 
@@ -25,11 +29,17 @@ logger = logging.getLogger(__name__)
 class SecurityMiddleware(BaseHTTPMiddleware):
     """Security middleware for rate limiting and audit logging"""
 
-    def __init__(self, app, redis_client=None):
+    def __init__(self, app, redis_client=None, track_analytics=None):
         super().__init__(app)
-        self.redis = redis_client or get_redis()
+        # RedisClient or AsyncRedisClient; results go through maybe_await
+        self.redis = redis_client or get_request_redis()
+        self.track_analytics = (
+            settings.ANALYTICS_ENABLED if track_analytics is None else track_analytics
+        )
 
-        # Rate limit configurations
+        # Rate limit configurations. Each request is checked against a per-IP
+        # rule and, when authenticated, a per-user rule with the same limit.
+        # "algorithm" is sliding_window (default) or token_bucket.
         self.rate_limits = {
             # Authentication endpoints
             "/api/v1/auth/login": {
@@ -47,9 +57,17 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             "/api/v1/financial-analysis/batch-analyze": {"limit": 5, "window": 3600},
             # Quiz endpoints
             "/api/v1/adaptive-quiz/start": {"limit": 10, "window": 3600},
-            "/api/v1/adaptive-quiz/respond": {"limit": 100, "window": 3600},
+            "/api/v1/adaptive-quiz/respond": {
+                "limit": 100,
+                "window": 3600,
+                "algorithm": TOKEN_BUCKET,
+            },
             # Default rate limit for all other endpoints
-            "default": {"limit": 100, "window": 3600},  # 100 requests per hour
+            "default": {
+                "limit": 100,
+                "window": 3600,
+                "algorithm": TOKEN_BUCKET,
+            },  # 100 requests per hour
         }
 
         # Endpoints that require audit logging
@@ -64,13 +82,12 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         """Process request through security middleware"""
         start_time = time.time()
 
-        # Get client identifier (IP + User ID if available)
+        # Get client identifiers
         client_ip = self._get_client_ip(request)
         user_id = await self._get_user_id_from_request(request)
-        identifier = f"{client_ip}:{user_id}" if user_id else client_ip
 
         # Check rate limits
-        rate_limit_result = self._check_rate_limit(request, identifier)
+        rate_limit_result = await self._check_rate_limit(request, client_ip, user_id)
         if not rate_limit_result["allowed"]:
             return self._rate_limit_response(rate_limit_result)
 
@@ -89,7 +106,8 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 await self._audit_log(request, response, user_id, start_time)
 
             # Track analytics
-            self._track_request(request, response, user_id)
+            if self.track_analytics:
+                await self._track_request(request, response, user_id)
 
             return response
 
@@ -115,18 +133,14 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     async def _get_user_id_from_request(self, request: Request) -> Optional[str]:
         """Extract user ID from JWT token if available"""
         try:
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                return None
-
-            # This is a simplified version - in practice, you'd decode the JWT
-            # For now, we'll return None and rely on IP-based rate limiting
-            return None
-
+            # Decoded once; get_current_user reuses it via request.state
+            return request_subject(request)
         except Exception:
             return None
 
-    def _check_rate_limit(self, request: Request, identifier: str) -> Dict[str, Any]:
+    async def _check_rate_limit(
+        self, request: Request, client_ip: str, user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Check if request is within rate limits"""
         path = request.url.path
         method = request.method
@@ -141,12 +155,23 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         if not rate_config:
             rate_config = self.rate_limits["default"]
 
-        # Create unique key for this endpoint and method
-        rate_key = f"{identifier}:{method}:{path}"
+        # Per-IP and per-user limits for this endpoint and method, checked
+        # and counted together in one round trip
+        identifiers = [("ip", client_ip)]
+        if user_id:
+            identifiers.append(("user", user_id))
+        rules = [
+            RateLimitRule(
+                scope,
+                f"{scope}:{identifier}:{method}:{path}",
+                rate_config["limit"],
+                rate_config["window"],
+                rate_config.get("algorithm", SLIDING_WINDOW),
+            )
+            for scope, identifier in identifiers
+        ]
 
-        return self.redis.rate_limit_check(
-            rate_key, rate_config["limit"], rate_config["window"]
-        )
+        return await maybe_await(self.redis.check_rate_limits(rules))
 
     def _rate_limit_response(self, rate_limit_result: Dict[str, Any]) -> JSONResponse:
         """Return rate limit exceeded response"""
@@ -155,10 +180,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             content={
                 "error": "Rate limit exceeded",
                 "message": "Too many requests. Please try again later.",
-                "retry_after": rate_limit_result.get("reset_time", 0),
+                "retry_after": rate_limit_result.get("retry_after", 60),
             },
             headers={
-                "Retry-After": str(rate_limit_result.get("reset_time", 60)),
+                "Retry-After": str(rate_limit_result.get("retry_after", 60)),
                 "X-RateLimit-Limit": str(rate_limit_result.get("limit", 0)),
                 "X-RateLimit-Remaining": "0",
                 "X-RateLimit-Reset": str(rate_limit_result.get("reset_time", 0)),
@@ -238,7 +263,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             audit_key = (
                 f"audit:{datetime.utcnow().strftime('%Y-%m-%d')}:{int(time.time())}"
             )
-            self.redis.set(audit_key, audit_data, expire=86400 * 30)
+            await maybe_await(self.redis.set(audit_key, audit_data, expire=86400 * 30))
 
             # Also log to application logger for immediate monitoring
             logger.info(f"AUDIT: {audit_data}")
@@ -246,28 +271,32 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         except Exception as e:
             logger.error(f"Audit logging failed: {str(e)}")
 
-    def _track_request(
+    async def _track_request(
         self, request: Request, response: Response, user_id: Optional[str]
     ):
-        """Track request for analytics"""
+        """Track request for analytics in one Redis round trip"""
         try:
             # Track general API usage
-            self.redis.track_event("api_request", user_id)
+            events = ["api_request"]
 
             # Track specific endpoints
             path = request.url.path
             if "/financial-analysis/" in path:
-                self.redis.track_event("financial_analysis_request", user_id)
+                events.append("financial_analysis_request")
             elif "/adaptive-quiz/" in path:
-                self.redis.track_event("quiz_request", user_id)
+                events.append("quiz_request")
             elif "/auth/" in path:
-                self.redis.track_event("auth_request", user_id)
+                events.append("auth_request")
 
             # Track errors
             if response.status_code >= 400:
-                self.redis.track_event(
-                    "api_error", user_id, {"status_code": response.status_code}
+                events.append("api_error")
+
+            await maybe_await(
+                self.redis.track_events(
+                    events, user_id, {"status_code": response.status_code}
                 )
+            )
 
         except Exception as e:
             logger.error(f"Request tracking failed: {str(e)}")
@@ -0,0 +1,280 @@
+"""
+Time Series Store
+
+Compact event counters in Redis hashes. Every series (an event type,
+"total" or a user) is kept at several resolutions, each as one hash per
+bucket with a field per point:
+
+    minute  ts:{series}:minute:{YYYY-MM-DDTHH}  fields MM (minute)
+    hour    ts:{series}:hour:{YYYY-MM-DD}       fields HH
+    day     ts:{series}:day:{YYYY-MM}           fields DD
+    month   ts:{series}:month:{YYYY}            fields MM (month)
+
+Tracking an event increments its point at every resolution in the same
+script call, so coarser series are rolled up as they are written rather
+than by a compaction job. Each resolution has its own retention: the
+bucket hash expires that long after its last write, so fine-grained
+data is downsampled away while hourly, daily and monthly totals remain
+for long-range queries.
+
+Reads go through RangeQuery, which lists the bucket hashes covering a
+range so a caller can fetch many series in a single script call.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from datetime import datetime, timedelta
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MINUTE = "minute"
+HOUR = "hour"
+DAY = "day"
+MONTH = "month"
+
+# Approximate point widths, used to pick a resolution for a range
+RESOLUTION_SECONDS = {MINUTE: 60, HOUR: 3600, DAY: 86400, MONTH: 30 * 86400}
+
+
+class Resolution(NamedTuple):
+    """One granularity a series is stored at"""
+
+    name: str
+    # strftime formats of the bucket hash (in the key) and a point's field
+    bucket: str
+    field: str
+    # Seconds a bucket is kept after its last write; None keeps it
+    ttl: Optional[int]
+
+
+def default_resolutions() -> List[Resolution]:
+    """Resolutions with retention from settings"""
+    day = 86400
+    return [
+        Resolution(
+            MINUTE, "%Y-%m-%dT%H", "%M", settings.ANALYTICS_MINUTE_TTL_HOURS * 3600
+        ),
+        Resolution(HOUR, "%Y-%m-%d", "%H", settings.ANALYTICS_HOURLY_TTL_DAYS * day),
+        Resolution(DAY, "%Y-%m", "%d", settings.ANALYTICS_DAILY_TTL_DAYS * day or None),
+        Resolution(
+            MONTH, "%Y", "%m", settings.ANALYTICS_MONTHLY_TTL_DAYS * day or None
+        ),
+    ]
+
+
+def align(resolution: str, when: datetime) -> datetime:
+    """Start of the point containing `when`"""
+    when = when.replace(second=0, microsecond=0)
+    if resolution == MINUTE:
+        return when
+    when = when.replace(minute=0)
+    if resolution == HOUR:
+        return when
+    when = when.replace(hour=0)
+    if resolution == DAY:
+        return when
+    return when.replace(day=1)
+
+
+def advance(resolution: str, when: datetime) -> datetime:
+    """Start of the point after the (aligned) point `when`"""
+    if resolution == MONTH:
+        if when.month == 12:
+            return when.replace(year=when.year + 1, month=1)
+        return when.replace(month=when.month + 1)
+    return when + timedelta(seconds=RESOLUTION_SECONDS[resolution])
+
+
+class RangeQuery:
+    """
+    The hashes and fields holding a range of points for several series
+
+    Fetch `keys` with TimeSeriesStore.READ_SCRIPT (one HGETALL per key)
+    and pass the script result to parse().
+    """
+
+    def __init__(
+        self,
+        store: "TimeSeriesStore",
+        series: Sequence[str],
+        resolution: Resolution,
+        start: datetime,
+        end: datetime,
+    ):
+        self.series = list(series)
+        self.resolution = resolution
+        self.points: List[datetime] = []
+        point = align(resolution.name, start)
+        while point <= end:
+            self.points.append(point)
+            point = advance(resolution.name, point)
+
+        self.keys: List[str] = []
+        key_index: Dict[str, int] = {}
+        # Per series, (key index, field) for each point
+        self._slots: List[List[tuple]] = []
+        for name in self.series:
+            slots = []
+            for point in self.points:
+                key = store.series_key(name, resolution, point)
+                if key not in key_index:
+                    key_index[key] = len(self.keys)
+                    self.keys.append(key)
+                slots.append((key_index[key], point.strftime(resolution.field)))
+            self._slots.append(slots)
+
+    def parse(self, raw: Sequence[Any]) -> Dict[str, List[int]]:
+        """
+        Counts per series from the READ_SCRIPT result for `keys`
+
+        Returns:
+            Mapping of series name to one count per point
+        """
+        hashes = []
+        for flat in raw:
+            flat = list(flat or [])
+            hashes.append(dict(zip(flat[::2], flat[1::2])))
+        return {
+            name: [int(hashes[index].get(field, 0)) for index, field in slots]
+            for name, slots in zip(self.series, self._slots)
+        }
+
+    def timestamps(self) -> List[str]:
+        return [point.isoformat() for point in self.points]
+
+
+class TimeSeriesStore:
+    """Key layout, write plan and range queries for the counters"""
+
+    # One HGETALL per key, in order
+    READ_SCRIPT = """
+        local out = {}
+        for i, key in ipairs(KEYS) do
+            out[i] = redis.call('HGETALL', key)
+        end
+        return out
+    """
+
+    TOTAL_SERIES = "total"
+    # Most points a range query may return per series
+    MAX_POINTS = 2000
+    # Users' activity is only kept per day
+    USER_RESOLUTIONS = (DAY,)
+
+    def __init__(
+        self, prefix: str = "ts", resolutions: Optional[List[Resolution]] = None
+    ):
+        """
+        Args:
+            prefix: Key prefix for all series
+            resolutions: Granularities to keep; defaults to
+                default_resolutions()
+        """
+        self.prefix = prefix
+        self.resolutions = resolutions or default_resolutions()
+        self._by_name = {resolution.name: resolution for resolution in self.resolutions}
+
+    def resolution(self, name: str) -> Resolution:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise ValueError(f"Unknown time series resolution: {name}")
+
+    def series_key(self, series: str, resolution: Resolution, when: datetime) -> str:
+        return f"{self.prefix}:{series}:{resolution.name}:{when:{resolution.bucket}}"
+
+    @staticmethod
+    def user_series(user_id: str) -> str:
+        return f"user:{user_id}"
+
+    def event_windows(self) -> list:
+        """
+        Counters updated for each tracked event, as EventWindows
+
+        The event's own series and the total at every resolution, plus
+        the user's daily series.
+        """
+        from app.core.redis_client import EventWindow
+
+        windows = []
+        for series in ("{event}", self.TOTAL_SERIES, "user:{user}"):
+            for resolution in self.resolutions:
+                if series.startswith("user:") and (
+                    resolution.name not in self.USER_RESOLUTIONS
+                ):
+                    continue
+                ttl = resolution.ttl
+                if series.startswith("user:"):
+                    ttl = settings.ANALYTICS_USER_TTL_DAYS * 86400
+                windows.append(
+                    EventWindow(
+                        f"{self.prefix}:{series}:{resolution.name}:"
+                        f"{{now:{resolution.bucket}}}",
+                        ttl,
+                        f"{{now:{resolution.field}}}",
+                    )
+                )
+        return windows
+
+    def range_query(
+        self,
+        series: Sequence[str],
+        start: datetime,
+        end: datetime,
+        resolution: Optional[str] = None,
+        max_points: int = 500,
+        now: Optional[datetime] = None,
+    ) -> RangeQuery:
+        """
+        Plan a read of [start, end] for several series
+
+        Args:
+            series: Series names (event types, "total", user_series(...))
+            start: First point (aligned down to the resolution)
+            end: Last point
+            resolution: Resolution name; picked with pick_resolution() if
+                not given
+            max_points: Upper bound on points when picking a resolution
+
+        Raises:
+            ValueError: If the range is reversed or would need more than
+                MAX_POINTS points at the resolution
+        """
+        if end < start:
+            raise ValueError("Time series range ends before it starts")
+        name = resolution or self.pick_resolution(start, end, max_points, now)
+        if self.point_count(start, end, name) > self.MAX_POINTS:
+            raise ValueError(
+                f"Time series range needs more than {self.MAX_POINTS} " f"{name} points"
+            )
+        return RangeQuery(self, series, self.resolution(name), start, end)
+
+    @staticmethod
+    def point_count(start: datetime, end: datetime, resolution: str) -> int:
+        """Approximate number of points covering [start, end]"""
+        return int((end - start).total_seconds() // RESOLUTION_SECONDS[resolution]) + 1
+
+    def pick_resolution(
+        self,
+        start: datetime,
+        end: datetime,
+        max_points: int = 500,
+        now: Optional[datetime] = None,
+    ) -> str:
+        """
+        Finest resolution that still holds data for `start` and returns at
+        most max_points points, falling back to the coarsest one
+        """
+        now = now or datetime.now()
+        span = (end - start).total_seconds()
+        age = (now - start).total_seconds()
+        ordered = sorted(
+            self.resolutions, key=lambda resolution: RESOLUTION_SECONDS[resolution.name]
+        )
+        for resolution in ordered:
+            retained = resolution.ttl is None or age <= resolution.ttl
+            if retained and span / RESOLUTION_SECONDS[resolution.name] < max_points:
+                return resolution.name
+        return ordered[-1].name
@@ -10,7 +10,19 @@ from .financial import (
     PaymentType,
     BankingConnectionType,
 )
-from .analytics import UserActivity, SearchQuery, MatchMetrics
+from .analytics import (
+    UserActivity,
+    SearchQuery,
+    MatchMetrics,
+    RollupWatermark,
+    DailyRegistrationRollup,
+    DailyMatchRollup,
+    DailyQuizQuestionRollup,
+    DailyQuizUserRollup,
+    DailyUserActivityRollup,
+    FunnelDailySnapshot,
+    LLMUsageHourlyRollup,
+)
 
 # This allows importing all models from: from app.database.models import User, Broker, etc.
 __all__ = [
@@ -39,4 +51,12 @@ __all__ = [
     "UserActivity",
     "SearchQuery",
     "MatchMetrics",
+    "RollupWatermark",
+    "DailyRegistrationRollup",
+    "DailyMatchRollup",
+    "DailyQuizQuestionRollup",
+    "DailyQuizUserRollup",
+    "DailyUserActivityRollup",
+    "FunnelDailySnapshot",
+    "LLMUsageHourlyRollup",
 ]
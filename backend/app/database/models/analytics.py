@@ -1,9 +1,23 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    Float,
+    ForeignKey,
+    DateTime,
+    JSON,
+    Text,
+    Date,
+    Boolean,
+    Enum,
+)
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
 
-from .base import SoftDeleteModel
+from .base import Base, SoftDeleteModel
+from .user import UserType
+from .response import MatchStatus
 
 
 class UserActivity(SoftDeleteModel):
@@ -64,3 +78,118 @@ class MatchMetrics(SoftDeleteModel):
     def __repr__(self):
         """String representation of the match metrics"""
         return f"<MatchMetrics {self.match_id}>"
+
+
+class RollupWatermark(Base):
+    """
+    Progress of an incremental daily rollup: the newest source
+    updated_at already folded into the rollup table, and when (by the
+    database clock) that refresh started
+    """
+
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String(50), primary_key=True)
+    processed_until = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<RollupWatermark {self.name} {self.processed_until}>"
+
+
+class DailyRegistrationRollup(Base):
+    """
+    Live users per registration day, user type and verification state
+    """
+
+    __tablename__ = "daily_registration_rollups"
+
+    day = Column(Date, primary_key=True)
+    user_type = Column(Enum(UserType), primary_key=True)
+    is_verified = Column(Boolean, primary_key=True)
+    users = Column(Integer, nullable=False, default=0)
+
+
+class DailyMatchRollup(Base):
+    """
+    Live matches per match day, broker, status and score bucket
+    """
+
+    __tablename__ = "daily_match_rollups"
+
+    day = Column(Date, primary_key=True)
+    broker_id = Column(String(36), primary_key=True)
+    status = Column(Enum(MatchStatus), primary_key=True)
+    score_bucket = Column(String(20), primary_key=True)
+    matches = Column(Integer, nullable=False, default=0)
+
+
+class DailyQuizQuestionRollup(Base):
+    """
+    Quiz responses per day and question
+    """
+
+    __tablename__ = "daily_quiz_question_rollups"
+
+    day = Column(Date, primary_key=True)
+    question_id = Column(String(36), primary_key=True)
+    responses = Column(Integer, nullable=False, default=0)
+
+
+class DailyQuizUserRollup(Base):
+    """
+    Quiz responses per day and user, for distinct-user counts
+    """
+
+    __tablename__ = "daily_quiz_user_rollups"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(String(36), primary_key=True)
+    responses = Column(Integer, nullable=False, default=0)
+
+
+class DailyUserActivityRollup(Base):
+    """
+    Activity records per day and user
+    """
+
+    __tablename__ = "daily_user_activity_rollups"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(String(36), primary_key=True)
+    activities = Column(Integer, nullable=False, default=0)
+
+
+class FunnelDailySnapshot(Base):
+    """
+    Conversion funnel for the clients registered on one day: how many
+    reached each stage, in order
+    """
+
+    __tablename__ = "funnel_daily_snapshots"
+
+    day = Column(Date, primary_key=True)
+    registered = Column(Integer, nullable=False, default=0)
+    quiz_completed = Column(Integer, nullable=False, default=0)
+    first_match = Column(Integer, nullable=False, default=0)
+    match_accepted = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class LLMUsageHourlyRollup(Base):
+    """
+    LLM calls, tokens and cost per hour (UTC), model and calling feature.
+    estimated_calls counts calls whose tokens were estimated because the
+    response carried no usage metadata
+    """
+
+    __tablename__ = "llm_usage_hourly_rollups"
+
+    hour = Column(DateTime, primary_key=True)
+    model = Column(String(100), primary_key=True)
+    feature = Column(String(50), primary_key=True)
+    calls = Column(Integer, nullable=False, default=0)
+    estimated_calls = Column(Integer, nullable=False, default=0)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
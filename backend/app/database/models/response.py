@@ -8,6 +8,7 @@ from sqlalchemy import (
     Integer,
     Boolean,
     DateTime,
+    Index,
 )
 from sqlalchemy.orm import relationship
 import enum
@@ -32,6 +33,12 @@ class BrokerClientMatch(SoftDeleteModel):
     """
 
     __tablename__ = "broker_client_matches"
+    __table_args__ = (
+        # One match row per client/broker pair; backs upsert-based persistence
+        Index(
+            "uq_broker_client_matches_user_broker", "user_id", "broker_id", unique=True
+        ),
+    )
 
     user_id = Column(ForeignKey("users.id"), nullable=False)
     broker_id = Column(ForeignKey("brokers.id"), nullable=False)
@@ -11,6 +11,7 @@ This service creates personalized quiz experiences by:
 from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
+import asyncio
 import json
 import uuid
 import logging
@@ -27,8 +28,15 @@ from app.database.models.quiz import (
 from app.database.models.broker import Broker
 from app.ai.quiz_generator import QuizQuestionGenerator
 from app.ai.gemini_service import GeminiService
+from app.ai.token_tracker import FEATURE_PSYCHOLOGY_INSIGHTS, FEATURE_QUIZ_QUESTIONS
 from app.services.matching_algorithm import BrokerMatchingAlgorithm
 from app.services.psychology_book_service import PsychologyBookService
+from app.services.quiz_session_store import (
+    QuizSessionConflictError,
+    QuizSessionStore,
+    get_quiz_session_store,
+)
+from app.services.question_prefetch import get_question_prefetcher
 
 logger = logging.getLogger(__name__)
 
@@ -38,15 +46,17 @@ class AdaptiveQuizService:
     Service for creating adaptive, personalized quiz experiences enhanced with psychology.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, session_store: Optional[QuizSessionStore] = None):
         self.db = db
         self.quiz_generator = QuizQuestionGenerator()
         self.gemini_service = GeminiService()
         self.psychology_service = PsychologyBookService()
         self.matching_algorithm = BrokerMatchingAlgorithm(db)
 
-        # Simple in-memory session storage (in production, use Redis)
-        self.session_storage = {}
+        # Sessions outlive this per-request instance so any worker can continue them
+        if session_store is None:
+            session_store = get_quiz_session_store()
+        self.session_store = session_store
 
         # Define quiz structure: exactly 10 questions
         self.total_questions = 10
@@ -89,8 +99,9 @@ class AdaptiveQuizService:
 
         # Store first question text in session for repetition prevention
         quiz_session["current_question_text"] = first_question.get("text", "")
+        self._prefetch_next_question(quiz_session)
 
-        return {
+        result = {
             "session": quiz_session,
             "question": first_question,
             "progress": {
@@ -99,6 +110,8 @@ class AdaptiveQuizService:
                 "completion_percentage": 10.0,  # 1/10 * 100
             },
         }
+        self.session_store.save(result, expected_version=0)
+        return result
 
     def _create_question_plan(self) -> List[Dict[str, Any]]:
         """Create a structured plan for the 10 questions with optimal type distribution"""
@@ -185,6 +198,9 @@ class AdaptiveQuizService:
             Dict containing next question and updated session
         """
         logger.info(f"Processing response in submit_response_and_get_next: {json.dumps(response)}")
+
+        # Version the caller read; the session is only advanced if it still matches
+        expected_version = session_data.get("version")
         
         # Store the response with question text for repetition prevention
         current_question_text = session_data.get("current_question_text", "")
@@ -198,38 +214,54 @@ class AdaptiveQuizService:
         
         session_data["responses"].append(response_data)
 
-        # Analyze the response for psychology-enhanced insights
-        try:
-            insights = await self._analyze_response_with_psychology(session_data, response)
+        is_last_question = session_data["current_question"] >= self.total_questions
+
+        # Start on the next question right away; a planned question does not
+        # depend on the analysis below
+        pending_question = None
+        if not is_last_question:
+            pending_question = self._start_question_generation(
+                session_data, session_data["current_question"] + 1
+            )
+
+        # Analyze the response and update focus areas concurrently
+        insights, focus_areas = await asyncio.gather(
+            self._analyze_response_with_psychology(session_data, response),
+            self._update_focus_areas(session_data, response),
+            return_exceptions=True,
+        )
+
+        if isinstance(insights, Exception):
+            logger.error(f"Error generating insights: {str(insights)}", exc_info=insights)
+            insights = []
+        else:
             session_data["insights"].extend(insights)
             logger.info(f"Generated insights: {json.dumps(insights)}")
-        except Exception as e:
-            logger.error(f"Error generating insights: {str(e)}", exc_info=True)
-            insights = []
 
-        # Update focus areas based on response
-        try:
-            session_data["focus_areas"] = await self._update_focus_areas(
-                session_data, response
-            )
+        if isinstance(focus_areas, Exception):
+            logger.error(f"Error updating focus areas: {str(focus_areas)}", exc_info=focus_areas)
+        else:
+            session_data["focus_areas"] = focus_areas
             logger.info(f"Updated focus areas: {json.dumps(session_data['focus_areas'])}")
-        except Exception as e:
-            logger.error(f"Error updating focus areas: {str(e)}", exc_info=True)
 
         # Check if we've reached 10 questions
-        if session_data["current_question"] >= self.total_questions:
+        if is_last_question:
             # Complete the quiz
-            return await self._complete_quiz(session_data, "total_questions_completed")
+            result = await self._complete_quiz(session_data, "total_questions_completed")
+            self.session_store.save(result, expected_version)
+            return result
 
         # Generate next question
         session_data["current_question"] += 1
         next_question = await self._generate_psychology_enhanced_question(
             session_data,
             self.db.query(User).filter(User.id == session_data["user_id"]).first(),
+            pending_question,
         )
 
         # Store current question text in session for next iteration
         session_data["current_question_text"] = next_question.get("text", "")
+        self._prefetch_next_question(session_data)
 
         # Update progress
         progress = {
@@ -244,60 +276,58 @@ class AdaptiveQuizService:
         logger.info(f"Generated next question: {json.dumps(next_question)}")
         logger.info(f"Updated progress: {json.dumps(progress)}")
 
-        return {
+        result = {
             "session": session_data,
             "question": next_question,
             "progress": progress,
             "insights": insights[-2:] if insights else [],  # Last 2 insights
         }
+        self.session_store.save(result, expected_version)
+        return result
 
     async def _generate_psychology_enhanced_question(
-        self, session_data: Dict[str, Any], user: User
+        self,
+        session_data: Dict[str, Any],
+        user: User,
+        pending: Optional[Tuple[Dict[str, Any], "asyncio.Future"]] = None,
     ) -> Dict[str, Any]:
-        """Generate the next question using psychology enhancement"""
+        """
+        Generate the next question using psychology enhancement
+
+        Args:
+            session_data: Current quiz session data
+            user: The quiz taker
+            pending: (spec, task) of a generation started before the session
+                was updated; used only if the spec is still the same
+        """
 
         current_question_num = session_data["current_question"]
-        question_plan = session_data.get("question_plan", [])
 
         # Get the planned question details
-        if current_question_num <= len(question_plan):
-            planned_question = question_plan[current_question_num - 1]
-            topic = planned_question["topic"]
-            category = planned_question["category"]
-            question_type = planned_question["type"]
-        else:
+        spec = self._plan_question(session_data, current_question_num)
+        if spec is None:
             # Fallback if plan is missing
             topic, category = await self._determine_next_topic(session_data)
-            question_type = self._choose_question_type_controlled(session_data)
-
-        # Get existing questions for repetition prevention
-        existing_questions = self._get_previous_questions(session_data)
-
-        # Try psychology-enhanced generation first
-        question_data = (
-            await self.psychology_service.generate_psychology_enhanced_question(
-                topic=topic,
-                category=category,
-                question_type=question_type,
-                existing_questions=existing_questions,
-            )
-        )
+            spec = {
+                "topic": topic,
+                "category": category,
+                "question_type": self._choose_question_type_controlled(session_data),
+                "order": current_question_num,
+                "existing_questions": self._get_previous_questions(session_data),
+            }
 
-        if not question_data:
-            # Fallback to standard AI generation
-            question_data = await self.quiz_generator.create_ai_question_data(
-                topic=topic,
-                category=category,
-                question_type_str=question_type,
-                order=current_question_num,
-                existing_question_texts=existing_questions,
+        if pending is not None and pending[0] == spec:
+            question_data = await pending[1]
+        else:
+            if pending is not None:
+                logger.info(f"Discarding early generation of question {current_question_num}")
+                pending[1].cancel()
+            question_data = await self._question_content(
+                session_data.get("session_id"), spec
             )
 
-        if not question_data:
-            # Final fallback to predefined question
-            question_data = self._get_fallback_question(
-                topic, category, current_question_num
-            )
+        topic = spec["topic"]
+        question_type = spec["question_type"]
 
         # Track question type usage
         if question_type == "text":
@@ -335,6 +365,100 @@ class AdaptiveQuizService:
 
         return question_data
 
+    def _plan_question(
+        self, session_data: Dict[str, Any], order: int
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Inputs for generating a question from the session's question plan
+
+        Returns None if the plan does not cover this question.
+        """
+        question_plan = session_data.get("question_plan", [])
+        if order > len(question_plan):
+            return None
+
+        planned_question = question_plan[order - 1]
+        return {
+            "topic": planned_question["topic"],
+            "category": planned_question["category"],
+            "question_type": planned_question["type"],
+            "order": order,
+            # Get existing questions for repetition prevention
+            "existing_questions": self._get_previous_questions(session_data),
+        }
+
+    async def _generate_question_content(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate question text and options for a question spec"""
+
+        topic = spec["topic"]
+        category = spec["category"]
+        question_type = spec["question_type"]
+
+        # Try psychology-enhanced generation first
+        question_data = (
+            await self.psychology_service.generate_psychology_enhanced_question(
+                topic=topic,
+                category=category,
+                question_type=question_type,
+                existing_questions=list(spec["existing_questions"]),
+            )
+        )
+
+        if not question_data:
+            # Fallback to standard AI generation
+            question_data = await self.quiz_generator.create_ai_question_data(
+                topic=topic,
+                category=category,
+                question_type_str=question_type,
+                order=spec["order"],
+                existing_question_texts=list(spec["existing_questions"]),
+            )
+
+        if not question_data:
+            # Final fallback to predefined question
+            question_data = self._get_fallback_question(topic, category, spec["order"])
+
+        return question_data
+
+    async def _question_content(
+        self, session_id: Optional[str], spec: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Question content for a spec, reusing a speculative one if available"""
+        prefetcher = get_question_prefetcher()
+        if prefetcher is not None and session_id:
+            question_data = await prefetcher.take(session_id, spec["order"], spec)
+            if question_data:
+                logger.info(f"Using prefetched question {spec['order']} for session {session_id}")
+                return question_data
+        return await self._generate_question_content(spec)
+
+    def _start_question_generation(
+        self, session_data: Dict[str, Any], order: int
+    ) -> Optional[Tuple[Dict[str, Any], "asyncio.Future"]]:
+        """Start generating a planned question in the background"""
+        spec = self._plan_question(session_data, order)
+        if spec is None:
+            return None
+        task = asyncio.ensure_future(
+            self._question_content(session_data.get("session_id"), spec)
+        )
+        return spec, task
+
+    def _prefetch_next_question(self, session_data: Dict[str, Any]):
+        """Speculatively generate the question after the current one"""
+        prefetcher = get_question_prefetcher()
+        session_id = session_data.get("session_id")
+        order = session_data["current_question"] + 1
+        if prefetcher is None or not session_id or order > self.total_questions:
+            return
+
+        spec = self._plan_question(session_data, order)
+        if spec is None:
+            return
+        prefetcher.schedule(
+            session_id, order, spec, lambda: self._generate_question_content(spec)
+        )
+
     def _choose_question_type_controlled(self, session_data: Dict[str, Any]) -> str:
         """Choose question type based on controlled distribution (8 selection, 2 text)"""
 
@@ -479,7 +603,9 @@ class AdaptiveQuizService:
         """
 
         try:
-            ai_insights = await self.gemini_service.generate_text(prompt)
+            ai_insights = await self.gemini_service.generate_text(
+                prompt, feature=FEATURE_PSYCHOLOGY_INSIGHTS
+            )
 
             # Parse AI insights
             final_insights = []
@@ -1125,7 +1251,9 @@ class AdaptiveQuizService:
             """
 
             try:
-                ai_topic = await self.gemini_service.generate_text(prompt)
+                ai_topic = await self.gemini_service.generate_text(
+                    prompt, feature=FEATURE_QUIZ_QUESTIONS
+                )
                 # Find matching topic
                 for topic, category in advanced_topics:
                     if ai_topic and topic.lower() in ai_topic.lower():
@@ -1152,7 +1280,7 @@ class AdaptiveQuizService:
         """Generate insights based on quiz responses."""
 
         try:
-            session = self.session_storage.get(session_id)
+            session = self._get_session(session_id)
             if not session:
                 return {
                     "session_id": session_id,
@@ -1223,18 +1351,77 @@ class AdaptiveQuizService:
                 "error": str(e),
             }
 
+    def load_quiz_state(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a stored quiz state (session, current question, progress)"""
+        return self.session_store.load(session_id)
+
+    def resume_session(
+        self, session_data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Session to continue from a client's copy of it
+
+        The stored session is authoritative. The client's copy is only used
+        when the store no longer has the session (expired, evicted, or held
+        by another worker's memory store); it is then stored as a new session.
+
+        Returns:
+            The session and whether it was loaded from the store (False when
+            the client's copy was used)
+
+        Raises:
+            QuizSessionConflictError: The client's copy is out of date
+        """
+        stored_state = None
+        if session_data.get("session_id"):
+            stored_state = self.load_quiz_state(session_data["session_id"])
+        if stored_state is None:
+            return {**session_data, "version": 0}, False
+
+        client_version = session_data.get("version")
+        session = stored_state["session"]
+        if client_version is not None and client_version != session["version"]:
+            raise QuizSessionConflictError(session["session_id"], client_version)
+        return session, True
+
+    def save_quiz_state(
+        self, state: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> int:
+        """Store a quiz state, raising QuizSessionConflictError if it changed"""
+        return self.session_store.save(state, expected_version)
+
+    def get_active_quiz_state(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Latest stored quiz state for a user, if it has not expired"""
+        session_id = self.session_store.find_user_session(user_id)
+        if not session_id:
+            return None
+        state = self.session_store.load(session_id)
+        if not state or state["session"].get("user_id") != user_id:
+            return None
+        return state
+
+    def discard_user_session(self, user_id: str):
+        """Forget the user's stored quiz session"""
+        session_id = self.session_store.find_user_session(user_id)
+        if session_id:
+            self.session_store.delete(session_id, user_id)
+
     def _set_session(self, session_id: str, session_data: Dict[str, Any]):
         """Store session data"""
-        self.session_storage[session_id] = session_data
+        self.session_store.save(
+            {"session": dict(session_data, session_id=session_id)},
+            track_user=False,
+        )
 
     def _get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Get session data"""
-        return self.session_storage.get(session_id)
+        state = self.session_store.load(session_id)
+        return state["session"] if state else None
 
     async def _get_broker_matches(self, session_id: str) -> List[Dict[str, Any]]:
         """Get broker matches for the session"""
         try:
-            session = self.session_storage.get(session_id)
+            session = self._get_session(session_id)
             if not session:
                 return []
 
@@ -1247,9 +1434,6 @@ class AdaptiveQuizService:
 
             # If no matches from algorithm, create some sample matches for demo
             if not matches or len(matches) == 0:
-                from app.database.models.broker import Broker
-                from app.database.models.user import User
-
                 # Get some actual brokers from database
                 brokers = self.db.query(Broker).limit(3).all()
 
@@ -1484,6 +1668,7 @@ class AdaptiveQuizService:
 
         # Store current question text in session
         session_data["current_question_text"] = next_question.get("text", "")
+        self._prefetch_next_question(session_data)
 
         # Calculate progress
         progress = {
@@ -1496,8 +1681,10 @@ class AdaptiveQuizService:
 
         logger.info(f"Session restored successfully. Progress: {progress}")
 
-        return {
+        result = {
             "session": session_data,
             "question": next_question,
             "progress": progress,
         }
+        self.session_store.save(result)
+        return result
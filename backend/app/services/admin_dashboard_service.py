@@ -5,10 +5,20 @@ from datetime import datetime, timedelta
 from uuid import UUID
 
 from app.database.models.user import User, UserType
-from app.database.models.broker import Broker, LicenseStatus, ExperienceLevel
+from app.database.models.broker import Broker, ExperienceLevel
 from app.database.models.response import BrokerClientMatch, MatchStatus, BrokerReview
-from app.database.models.quiz import UserQuizResponse, QuizQuestion, Quiz
-from app.database.models.analytics import UserActivity, MatchMetrics, SearchQuery
+from app.database.models.quiz import QuizQuestion, Quiz
+from app.database.models.analytics import (
+    MatchMetrics,
+    SearchQuery,
+    DailyRegistrationRollup,
+    DailyMatchRollup,
+    DailyQuizQuestionRollup,
+    DailyQuizUserRollup,
+    DailyUserActivityRollup,
+)
+from app.services.admin_metrics import get_admin_metrics
+from app.services.analytics_rollups import SCORE_BUCKETS
 
 
 class AdminDashboardService:
@@ -17,95 +27,47 @@ class AdminDashboardService:
     @staticmethod
     def get_system_overview(db: Session) -> Dict[str, Any]:
         """Get comprehensive system overview with key metrics"""
-        # User statistics
-        total_users = db.query(User).filter(User.is_deleted == False).count()
-        clients = (
-            db.query(User)
-            .filter(User.user_type == UserType.CLIENT, User.is_deleted == False)
-            .count()
-        )
-        brokers = (
-            db.query(User)
-            .filter(User.user_type == UserType.BROKER, User.is_deleted == False)
-            .count()
-        )
-        admins = (
-            db.query(User)
-            .filter(User.user_type == UserType.ADMIN, User.is_deleted == False)
-            .count()
-        )
+        metrics = get_admin_metrics(db)
+        users = metrics["users"]
+        brokers = metrics["brokers"]
+        matches = metrics["matches"]
 
-        # Broker statistics
-        active_brokers = (
-            db.query(Broker)
-            .filter(Broker.is_active == True, Broker.is_deleted == False)
-            .count()
-        )
-        verified_brokers = (
-            db.query(Broker)
-            .filter(Broker.is_verified == True, Broker.is_deleted == False)
-            .count()
-        )
-
-        # Match statistics
-        total_matches = (
-            db.query(BrokerClientMatch)
-            .filter(BrokerClientMatch.is_deleted == False)
-            .count()
-        )
-        successful_matches = (
-            db.query(BrokerClientMatch)
-            .filter(
-                BrokerClientMatch.status == MatchStatus.COMPLETED,
-                BrokerClientMatch.is_deleted == False,
-            )
-            .count()
-        )
-
-        # Recent activity (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        new_users_7d = (
-            db.query(User)
-            .filter(User.created_at >= seven_days_ago, User.is_deleted == False)
-            .count()
-        )
-        new_matches_7d = (
-            db.query(BrokerClientMatch)
-            .filter(
-                BrokerClientMatch.matched_at >= seven_days_ago,
-                BrokerClientMatch.is_deleted == False,
-            )
-            .count()
-        )
+        broker_users = users["brokers"]
+        total_matches = matches["total"]
 
         # Calculate success rate
         success_rate = 0.0
         if total_matches > 0:
-            success_rate = (successful_matches / total_matches) * 100
+            success_rate = (matches["completed"] / total_matches) * 100
 
         return {
             "users": {
-                "total": total_users,
-                "clients": clients,
-                "brokers": brokers,
-                "admins": admins,
-                "new_users_7d": new_users_7d,
+                "total": users["total"],
+                "clients": users["clients"],
+                "brokers": broker_users,
+                "admins": users["admins"],
+                "new_users_7d": users["new_7d"],
             },
             "brokers": {
-                "total": brokers,
-                "active": active_brokers,
-                "verified": verified_brokers,
+                "total": broker_users,
+                "active": brokers["active"],
+                "verified": brokers["verified"],
                 "verification_rate": round(
-                    (verified_brokers / brokers * 100) if brokers > 0 else 0, 2
+                    (
+                        (brokers["verified"] / broker_users * 100)
+                        if broker_users > 0
+                        else 0
+                    ),
+                    2,
                 ),
             },
             "matches": {
                 "total": total_matches,
-                "successful": successful_matches,
+                "successful": matches["completed"],
                 "success_rate": round(success_rate, 2),
-                "new_matches_7d": new_matches_7d,
+                "new_matches_7d": matches["new_7d"],
             },
-            "last_updated": datetime.utcnow().isoformat(),
+            "last_updated": metrics["computed_at"].isoformat(),
         }
 
     @staticmethod
@@ -113,112 +75,129 @@ class AdminDashboardService:
         db: Session, days: int = 30, user_type: Optional[UserType] = None
     ) -> Dict[str, Any]:
         """Get detailed user analytics and trends"""
-        start_date = datetime.utcnow() - timedelta(days=days)
-
-        # Base query
-        base_query = db.query(User).filter(
-            User.created_at >= start_date, User.is_deleted == False
-        )
-
-        if user_type:
-            base_query = base_query.filter(User.user_type == user_type)
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        users = func.sum(DailyRegistrationRollup.users)
 
         # Daily registration trends
+        daily_query = db.query(
+            DailyRegistrationRollup.day, DailyRegistrationRollup.user_type, users
+        ).filter(DailyRegistrationRollup.day >= start_day)
+        if user_type:
+            daily_query = daily_query.filter(
+                DailyRegistrationRollup.user_type == user_type
+            )
         daily_registrations = (
-            db.query(
-                func.date(User.created_at).label("date"),
-                func.count(User.id).label("count"),
-                User.user_type,
+            daily_query.group_by(
+                DailyRegistrationRollup.day, DailyRegistrationRollup.user_type
             )
-            .filter(User.created_at >= start_date, User.is_deleted == False)
-            .group_by(func.date(User.created_at), User.user_type)
+            .order_by(DailyRegistrationRollup.day)
             .all()
         )
 
         # User type distribution
         user_type_dist = (
-            db.query(User.user_type, func.count(User.id).label("count"))
-            .filter(User.is_deleted == False)
-            .group_by(User.user_type)
+            db.query(DailyRegistrationRollup.user_type, users)
+            .group_by(DailyRegistrationRollup.user_type)
             .all()
         )
 
         # Verification status
         verification_stats = (
-            db.query(User.is_verified, func.count(User.id).label("count"))
-            .filter(User.is_deleted == False)
-            .group_by(User.is_verified)
+            db.query(DailyRegistrationRollup.is_verified, users)
+            .group_by(DailyRegistrationRollup.is_verified)
             .all()
         )
 
         # Most active users (by activity count)
-        active_users = (
-            db.query(User, func.count(UserActivity.id).label("activity_count"))
-            .join(UserActivity)
-            .filter(UserActivity.created_at >= start_date, User.is_deleted == False)
-            .group_by(User.id)
-            .order_by(desc(func.count(UserActivity.id)))
+        activity_count = func.sum(DailyUserActivityRollup.activities)
+        top_activity = (
+            db.query(DailyUserActivityRollup.user_id, activity_count)
+            .filter(DailyUserActivityRollup.day >= start_day)
+            .group_by(DailyUserActivityRollup.user_id)
+            .order_by(desc(activity_count))
             .limit(10)
             .all()
         )
+        active_user_rows = {
+            user.id: user
+            for user in db.query(User)
+            .filter(
+                User.id.in_([user_id for user_id, _ in top_activity]),
+                User.is_deleted.is_(None),
+            )
+            .all()
+        }
 
         return {
             "period_days": days,
             "daily_trends": [
                 {
-                    "date": reg.date.isoformat(),
-                    "count": reg.count,
-                    "user_type": reg.user_type.value,
+                    "date": day.isoformat(),
+                    "count": int(count),
+                    "user_type": row_type.value,
                 }
-                for reg in daily_registrations
+                for day, row_type, count in daily_registrations
             ],
             "user_type_distribution": [
-                {"user_type": dist.user_type.value, "count": dist.count}
-                for dist in user_type_dist
+                {"user_type": row_type.value, "count": int(count)}
+                for row_type, count in user_type_dist
             ],
             "verification_stats": [
-                {"verified": dist.is_verified, "count": dist.count}
-                for dist in verification_stats
+                {"verified": verified, "count": int(count)}
+                for verified, count in verification_stats
             ],
             "most_active_users": [
                 {
-                    "user_id": str(user.User.id),
-                    "name": user.User.full_name,
-                    "email": user.User.email,
-                    "user_type": user.User.user_type.value,
-                    "activity_count": user.activity_count,
+                    "user_id": str(user_id),
+                    "name": active_user_rows[user_id].full_name,
+                    "email": active_user_rows[user_id].email,
+                    "user_type": active_user_rows[user_id].user_type.value,
+                    "activity_count": int(count),
                 }
-                for user in active_users
+                for user_id, count in top_activity
+                if user_id in active_user_rows
             ],
         }
 
     @staticmethod
     def get_broker_analytics(db: Session, days: int = 30) -> Dict[str, Any]:
         """Get comprehensive broker analytics"""
-        start_date = datetime.utcnow() - timedelta(days=days)
-
         # Broker performance metrics
-        broker_performance = (
-            db.query(
-                Broker,
-                func.count(BrokerClientMatch.id).label("total_matches"),
-                func.count(
-                    case((BrokerClientMatch.status == MatchStatus.COMPLETED, 1))
-                ).label("completed_matches"),
-                func.avg(BrokerReview.rating).label("avg_rating"),
-                func.count(BrokerReview.id).label("review_count"),
+        match_totals = {
+            broker_id: (int(total), int(completed))
+            for broker_id, total, completed in db.query(
+                DailyMatchRollup.broker_id,
+                func.sum(DailyMatchRollup.matches),
+                func.sum(
+                    case(
+                        (
+                            DailyMatchRollup.status == MatchStatus.COMPLETED,
+                            DailyMatchRollup.matches,
+                        ),
+                        else_=0,
+                    )
+                ),
             )
-            .outerjoin(BrokerClientMatch)
-            .outerjoin(BrokerReview)
-            .filter(Broker.is_deleted == False)
-            .group_by(Broker.id)
+            .group_by(DailyMatchRollup.broker_id)
             .all()
-        )
+        }
+        review_stats = {
+            broker_id: (avg_rating, review_count)
+            for broker_id, avg_rating, review_count in db.query(
+                BrokerReview.broker_id,
+                func.avg(BrokerReview.rating),
+                func.count(BrokerReview.id),
+            )
+            .filter(BrokerReview.is_deleted.is_(None))
+            .group_by(BrokerReview.broker_id)
+            .all()
+        }
+        brokers = db.query(Broker).filter(Broker.is_deleted.is_(None)).all()
 
         # License status distribution
         license_dist = (
             db.query(Broker.license_status, func.count(Broker.id).label("count"))
-            .filter(Broker.is_deleted == False)
+            .filter(Broker.is_deleted.is_(None))
             .group_by(Broker.license_status)
             .all()
         )
@@ -226,38 +205,41 @@ class AdminDashboardService:
         # Experience level distribution
         experience_dist = (
             db.query(Broker.experience_level, func.count(Broker.id).label("count"))
-            .filter(Broker.is_deleted == False)
+            .filter(Broker.is_deleted.is_(None))
             .group_by(Broker.experience_level)
             .all()
         )
 
         # Top performing brokers
-        top_brokers = [
-            {
-                "broker_id": str(perf.Broker.id),
-                "license_number": perf.Broker.license_number,
-                "company_name": perf.Broker.company_name,
-                "total_matches": perf.total_matches or 0,
-                "completed_matches": perf.completed_matches or 0,
-                "success_rate": round(
-                    (
-                        (perf.completed_matches / perf.total_matches * 100)
-                        if perf.total_matches
-                        else 0
+        top_brokers = []
+        for broker in sorted(
+            brokers,
+            key=lambda broker: match_totals.get(broker.id, (0, 0))[1],
+            reverse=True,
+        )[:10]:
+            total_matches, completed_matches = match_totals.get(broker.id, (0, 0))
+            avg_rating, review_count = review_stats.get(broker.id, (0, 0))
+            top_brokers.append(
+                {
+                    "broker_id": str(broker.id),
+                    "license_number": broker.license_number,
+                    "company_name": broker.company_name,
+                    "total_matches": total_matches,
+                    "completed_matches": completed_matches,
+                    "success_rate": round(
+                        (
+                            (completed_matches / total_matches * 100)
+                            if total_matches
+                            else 0
+                        ),
+                        2,
                     ),
-                    2,
-                ),
-                "average_rating": round(float(perf.avg_rating or 0), 2),
-                "review_count": perf.review_count or 0,
-                "is_verified": perf.Broker.is_verified,
-                "is_active": perf.Broker.is_active,
-            }
-            for perf in sorted(
-                broker_performance,
-                key=lambda x: (x.completed_matches or 0),
-                reverse=True,
-            )[:10]
-        ]
+                    "average_rating": round(float(avg_rating or 0), 2),
+                    "review_count": review_count,
+                    "is_verified": broker.is_verified,
+                    "is_active": broker.is_active,
+                }
+            )
 
         return {
             "period_days": days,
@@ -277,67 +259,39 @@ class AdminDashboardService:
         """Get detailed matching system analytics"""
         start_date = datetime.utcnow() - timedelta(days=days)
 
-        # Match status distribution
-        status_dist = (
+        # Status, daily and score breakdowns all come from one rollup read
+        rollup_rows = (
             db.query(
-                BrokerClientMatch.status,
-                func.count(BrokerClientMatch.id).label("count"),
-            )
-            .filter(
-                BrokerClientMatch.matched_at >= start_date,
-                BrokerClientMatch.is_deleted == False,
+                DailyMatchRollup.day,
+                DailyMatchRollup.status,
+                DailyMatchRollup.score_bucket,
+                func.sum(DailyMatchRollup.matches),
             )
-            .group_by(BrokerClientMatch.status)
-            .all()
-        )
-
-        # Daily matching trends
-        daily_matches = (
-            db.query(
-                func.date(BrokerClientMatch.matched_at).label("date"),
-                func.count(BrokerClientMatch.id).label("total_matches"),
-                func.count(
-                    case((BrokerClientMatch.status == MatchStatus.ACCEPTED, 1))
-                ).label("accepted"),
-                func.count(
-                    case((BrokerClientMatch.status == MatchStatus.COMPLETED, 1))
-                ).label("completed"),
-            )
-            .filter(
-                BrokerClientMatch.matched_at >= start_date,
-                BrokerClientMatch.is_deleted == False,
+            .filter(DailyMatchRollup.day >= start_date.date())
+            .group_by(
+                DailyMatchRollup.day,
+                DailyMatchRollup.status,
+                DailyMatchRollup.score_bucket,
             )
-            .group_by(func.date(BrokerClientMatch.matched_at))
+            .order_by(DailyMatchRollup.day)
             .all()
         )
 
-        # Match score distribution
-        score_ranges = (
-            db.query(
-                case(
-                    (BrokerClientMatch.match_score >= 90, "90-100"),
-                    (BrokerClientMatch.match_score >= 80, "80-89"),
-                    (BrokerClientMatch.match_score >= 70, "70-79"),
-                    (BrokerClientMatch.match_score >= 60, "60-69"),
-                    (BrokerClientMatch.match_score < 60, "Below 60"),
-                ).label("score_range"),
-                func.count(BrokerClientMatch.id).label("count"),
+        status_counts: Dict[MatchStatus, int] = {}
+        score_counts: Dict[str, int] = {}
+        daily: Dict[Any, Dict[str, int]] = {}
+        for day, match_status, bucket, count in rollup_rows:
+            count = int(count)
+            status_counts[match_status] = status_counts.get(match_status, 0) + count
+            score_counts[bucket] = score_counts.get(bucket, 0) + count
+            trend = daily.setdefault(
+                day, {"total_matches": 0, "accepted": 0, "completed": 0}
             )
-            .filter(
-                BrokerClientMatch.matched_at >= start_date,
-                BrokerClientMatch.is_deleted == False,
-            )
-            .group_by(
-                case(
-                    (BrokerClientMatch.match_score >= 90, "90-100"),
-                    (BrokerClientMatch.match_score >= 80, "80-89"),
-                    (BrokerClientMatch.match_score >= 70, "70-79"),
-                    (BrokerClientMatch.match_score >= 60, "60-69"),
-                    (BrokerClientMatch.match_score < 60, "Below 60"),
-                )
-            )
-            .all()
-        )
+            trend["total_matches"] += count
+            if match_status == MatchStatus.ACCEPTED:
+                trend["accepted"] += count
+            elif match_status == MatchStatus.COMPLETED:
+                trend["completed"] += count
 
         # Performance metrics
         avg_response_time = (
@@ -363,29 +317,28 @@ class AdminDashboardService:
         return {
             "period_days": days,
             "status_distribution": [
-                {"status": dist.status.value, "count": dist.count}
-                for dist in status_dist
+                {"status": match_status.value, "count": count}
+                for match_status, count in status_counts.items()
             ],
             "daily_trends": [
                 {
-                    "date": trend.date.isoformat(),
-                    "total_matches": trend.total_matches,
-                    "accepted": trend.accepted,
-                    "completed": trend.completed,
+                    "date": day.isoformat(),
+                    **trend,
                     "acceptance_rate": round(
                         (
-                            (trend.accepted / trend.total_matches * 100)
-                            if trend.total_matches
+                            (trend["accepted"] / trend["total_matches"] * 100)
+                            if trend["total_matches"]
                             else 0
                         ),
                         2,
                     ),
                 }
-                for trend in daily_matches
+                for day, trend in daily.items()
             ],
             "score_distribution": [
-                {"range": range_.score_range, "count": range_.count}
-                for range_ in score_ranges
+                {"range": bucket, "count": score_counts[bucket]}
+                for bucket in SCORE_BUCKETS
+                if bucket in score_counts
             ],
             "performance_metrics": {
                 "average_response_time_seconds": int(avg_response_time or 0),
@@ -396,93 +349,71 @@ class AdminDashboardService:
     @staticmethod
     def get_quiz_analytics(db: Session, days: int = 30) -> Dict[str, Any]:
         """Get quiz and question analytics"""
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        in_window = DailyQuizUserRollup.day >= start_day
 
         # Quiz completion stats
-        total_responses = (
-            db.query(UserQuizResponse)
-            .filter(
-                UserQuizResponse.created_at >= start_date,
-                UserQuizResponse.is_deleted == False,
-            )
-            .count()
-        )
-
-        unique_users = (
-            db.query(func.count(func.distinct(UserQuizResponse.user_id)))
-            .filter(
-                UserQuizResponse.created_at >= start_date,
-                UserQuizResponse.is_deleted == False,
+        total_responses, unique_users = (
+            db.query(
+                func.coalesce(func.sum(DailyQuizUserRollup.responses), 0),
+                func.count(func.distinct(DailyQuizUserRollup.user_id)),
             )
-            .scalar()
+            .filter(in_window)
+            .one()
         )
+        total_responses = int(total_responses)
 
-        # Most answered questions (need to join with QuizQuestion to get text)
+        # Most answered questions
+        response_count = func.sum(DailyQuizQuestionRollup.responses)
         popular_questions = (
-            db.query(
-                QuizQuestion.text,
-                func.count(UserQuizResponse.id).label("response_count"),
-            )
-            .join(UserQuizResponse)
-            .filter(
-                UserQuizResponse.created_at >= start_date,
-                UserQuizResponse.is_deleted == False,
+            db.query(QuizQuestion.text, response_count.label("response_count"))
+            .join(
+                DailyQuizQuestionRollup,
+                DailyQuizQuestionRollup.question_id == QuizQuestion.id,
             )
+            .filter(DailyQuizQuestionRollup.day >= start_day)
             .group_by(QuizQuestion.text)
-            .order_by(desc(func.count(UserQuizResponse.id)))
+            .order_by(desc(response_count))
             .limit(10)
             .all()
         )
 
-        # Daily quiz activity
+        # Daily quiz activity (one rollup row per user and day)
         daily_activity = (
             db.query(
-                func.date(UserQuizResponse.created_at).label("date"),
-                func.count(UserQuizResponse.id).label("responses"),
-                func.count(func.distinct(UserQuizResponse.user_id)).label(
-                    "unique_users"
-                ),
+                DailyQuizUserRollup.day,
+                func.sum(DailyQuizUserRollup.responses).label("responses"),
+                func.count(DailyQuizUserRollup.user_id).label("unique_users"),
             )
-            .filter(
-                UserQuizResponse.created_at >= start_date,
-                UserQuizResponse.is_deleted == False,
-            )
-            .group_by(func.date(UserQuizResponse.created_at))
+            .filter(in_window)
+            .group_by(DailyQuizUserRollup.day)
+            .order_by(DailyQuizUserRollup.day)
             .all()
         )
 
         # User completion patterns
         user_response_counts = (
             db.query(
-                UserQuizResponse.user_id,
-                func.count(UserQuizResponse.id).label("response_count"),
-            )
-            .filter(
-                UserQuizResponse.created_at >= start_date,
-                UserQuizResponse.is_deleted == False,
+                DailyQuizUserRollup.user_id,
+                func.sum(DailyQuizUserRollup.responses).label("response_count"),
             )
-            .group_by(UserQuizResponse.user_id)
+            .filter(in_window)
+            .group_by(DailyQuizUserRollup.user_id)
             .subquery()
         )
 
+        completion_level = case(
+            (user_response_counts.c.response_count >= 20, "20+ responses"),
+            (user_response_counts.c.response_count >= 10, "10-19 responses"),
+            (user_response_counts.c.response_count >= 5, "5-9 responses"),
+            else_="1-4 responses",
+        )
         completion_distribution = (
             db.query(
-                case(
-                    (user_response_counts.c.response_count >= 20, "20+ responses"),
-                    (user_response_counts.c.response_count >= 10, "10-19 responses"),
-                    (user_response_counts.c.response_count >= 5, "5-9 responses"),
-                    (user_response_counts.c.response_count < 5, "1-4 responses"),
-                ).label("completion_level"),
+                completion_level.label("completion_level"),
                 func.count("*").label("user_count"),
             )
-            .group_by(
-                case(
-                    (user_response_counts.c.response_count >= 20, "20+ responses"),
-                    (user_response_counts.c.response_count >= 10, "10-19 responses"),
-                    (user_response_counts.c.response_count >= 5, "5-9 responses"),
-                    (user_response_counts.c.response_count < 5, "1-4 responses"),
-                )
-            )
+            .group_by(completion_level)
             .all()
         )
 
@@ -498,14 +429,14 @@ class AdminDashboardService:
             "popular_questions": [
                 {
                     "question": q.text[:100] + "..." if len(q.text) > 100 else q.text,
-                    "response_count": q.response_count,
+                    "response_count": int(q.response_count),
                 }
                 for q in popular_questions
             ],
             "daily_activity": [
                 {
-                    "date": activity.date.isoformat(),
-                    "responses": activity.responses,
+                    "date": activity.day.isoformat(),
+                    "responses": int(activity.responses),
                     "unique_users": activity.unique_users,
                 }
                 for activity in daily_activity
@@ -519,56 +450,23 @@ class AdminDashboardService:
     @staticmethod
     def get_platform_health(db: Session) -> Dict[str, Any]:
         """Get platform health metrics and alerts"""
-        now = datetime.utcnow()
-        one_hour_ago = now - timedelta(hours=1)
-        one_day_ago = now - timedelta(days=1)
+        metrics = get_admin_metrics(db)
+        now = metrics["computed_at"]
 
         # System activity indicators
-        recent_logins = (
-            db.query(UserActivity)
-            .filter(
-                UserActivity.activity_type == "login",
-                UserActivity.created_at >= one_hour_ago,
-            )
-            .count()
-        )
-
-        recent_matches = (
-            db.query(BrokerClientMatch)
-            .filter(
-                BrokerClientMatch.matched_at >= one_day_ago,
-                BrokerClientMatch.is_deleted == False,
-            )
-            .count()
-        )
+        recent_logins = metrics["activity"]["logins_1h"]
+        recent_matches = metrics["matches"]["new_24h"]
 
         # Error indicators (you might want to add error tracking)
-        pending_verifications = (
-            db.query(Broker)
-            .filter(
-                Broker.is_verified == False,
-                Broker.license_status == LicenseStatus.PENDING,
-                Broker.is_deleted == False,
-            )
-            .count()
-        )
-
-        inactive_brokers = (
-            db.query(Broker)
-            .filter(Broker.is_active == False, Broker.is_deleted == False)
-            .count()
-        )
+        pending_verifications = metrics["brokers"]["pending_verification"]
+        inactive_brokers = metrics["brokers"]["inactive"]
 
         # Database health (basic checks)
         total_records = {
-            "users": db.query(User).filter(User.is_deleted == False).count(),
-            "brokers": db.query(Broker).filter(Broker.is_deleted == False).count(),
-            "matches": db.query(BrokerClientMatch)
-            .filter(BrokerClientMatch.is_deleted == False)
-            .count(),
-            "reviews": db.query(BrokerReview)
-            .filter(BrokerReview.is_deleted == False)
-            .count(),
+            "users": metrics["users"]["total"],
+            "brokers": metrics["brokers"]["total"],
+            "matches": metrics["matches"]["total"],
+            "reviews": metrics["reviews"]["total"],
         }
 
         # Generate alerts
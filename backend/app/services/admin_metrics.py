@@ -0,0 +1,175 @@
+"""
+Admin Metrics
+
+Aggregated counters behind the admin overview and platform health pages.
+Each table is scanned once with conditional aggregation
+(``SUM(CASE WHEN ...)``) instead of one ``COUNT`` query per counter, and
+the combined result is kept in process for
+``ADMIN_METRICS_CACHE_SECONDS`` so repeated dashboard loads do not reach
+the database. Admin actions that change the counters call
+``invalidate_admin_metrics``.
+"""
+
+from typing import Any, Dict, Optional
+from datetime import datetime, timedelta
+import logging
+import threading
+import time
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.models.user import User, UserType
+from app.database.models.broker import Broker, LicenseStatus
+from app.database.models.response import BrokerClientMatch, MatchStatus, BrokerReview
+from app.database.models.analytics import UserActivity
+
+logger = logging.getLogger(__name__)
+
+
+def count_if(condition):
+    """SUM(CASE WHEN condition THEN 1 ELSE 0 END), 0 for an empty table"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _counters(db: Session, model, where=None, **columns) -> Dict[str, int]:
+    """Run one aggregate query over a table and return its counters"""
+    query = db.query(
+        *(column.label(name) for name, column in columns.items())
+    ).select_from(model)
+    if where is not None:
+        query = query.filter(where)
+    row = query.one()
+    return {name: int(value or 0) for name, value in row._mapping.items()}
+
+
+def user_counters(db: Session, now: datetime) -> Dict[str, int]:
+    """User totals by type and recent registrations"""
+    live = User.is_deleted.is_(None)
+    return _counters(
+        db,
+        User,
+        total=count_if(live),
+        clients=count_if(live & (User.user_type == UserType.CLIENT)),
+        brokers=count_if(live & (User.user_type == UserType.BROKER)),
+        admins=count_if(live & (User.user_type == UserType.ADMIN)),
+        new_7d=count_if(live & (User.created_at >= now - timedelta(days=7))),
+    )
+
+
+def broker_counters(db: Session) -> Dict[str, int]:
+    """Broker profile states"""
+    live = Broker.is_deleted.is_(None)
+    return _counters(
+        db,
+        Broker,
+        total=count_if(live),
+        active=count_if(live & (Broker.is_active == True)),
+        inactive=count_if(live & (Broker.is_active == False)),
+        verified=count_if(live & (Broker.is_verified == True)),
+        pending_verification=count_if(
+            live
+            & (Broker.is_verified == False)
+            & (Broker.license_status == LicenseStatus.PENDING)
+        ),
+    )
+
+
+def match_counters(db: Session, now: datetime) -> Dict[str, int]:
+    """Match totals, completions and recent matches"""
+    live = BrokerClientMatch.is_deleted.is_(None)
+    matched_at = BrokerClientMatch.matched_at
+    return _counters(
+        db,
+        BrokerClientMatch,
+        total=count_if(live),
+        completed=count_if(live & (BrokerClientMatch.status == MatchStatus.COMPLETED)),
+        new_24h=count_if(live & (matched_at >= now - timedelta(days=1))),
+        new_7d=count_if(live & (matched_at >= now - timedelta(days=7))),
+    )
+
+
+def review_counters(db: Session) -> Dict[str, int]:
+    return _counters(
+        db, BrokerReview, total=count_if(BrokerReview.is_deleted.is_(None))
+    )
+
+
+def activity_counters(db: Session, now: datetime) -> Dict[str, int]:
+    """Recent user activity; only the last day is scanned"""
+    return _counters(
+        db,
+        UserActivity,
+        where=UserActivity.created_at >= now - timedelta(days=1),
+        logins_1h=count_if(
+            (UserActivity.activity_type == "login")
+            & (UserActivity.created_at >= now - timedelta(hours=1))
+        ),
+    )
+
+
+def collect_admin_metrics(
+    db: Session, now: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Compute every overview and health counter, one query per table
+
+    Returns:
+        Dict of counter groups: users, brokers, matches, reviews, activity
+    """
+    now = now or datetime.utcnow()
+    return {
+        "users": user_counters(db, now),
+        "brokers": broker_counters(db),
+        "matches": match_counters(db, now),
+        "reviews": review_counters(db),
+        "activity": activity_counters(db, now),
+        "computed_at": now,
+    }
+
+
+_lock = threading.Lock()
+_cached: Optional[Dict[str, Any]] = None
+_cached_at = 0.0
+_generation = 0
+
+
+def get_admin_metrics(db: Session, max_age: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Get the admin counters, recomputing them if invalidated or expired
+
+    Args:
+        db: Database session used only when a recompute is needed
+        max_age: Seconds a cached result may be reused; defaults to
+            ADMIN_METRICS_CACHE_SECONDS
+
+    Returns:
+        The collect_admin_metrics() result; treat it as read-only
+    """
+    global _cached, _cached_at
+
+    if max_age is None:
+        max_age = settings.ADMIN_METRICS_CACHE_SECONDS
+
+    with _lock:
+        if _cached is not None and time.monotonic() - _cached_at <= max_age:
+            return _cached
+        generation = _generation
+
+    metrics = collect_admin_metrics(db)
+
+    with _lock:
+        # Keep the result only if nothing invalidated it meanwhile
+        if generation == _generation:
+            _cached = metrics
+            _cached_at = time.monotonic()
+    return metrics
+
+
+def invalidate_admin_metrics():
+    """Drop cached counters so the next dashboard load recomputes them"""
+    global _cached, _generation
+    with _lock:
+        _cached = None
+        _generation += 1
@@ -0,0 +1,396 @@
+"""
+Analytics Rollups
+
+Daily aggregate tables behind the admin analytics pages, so the
+dashboards read a few rows per day instead of regrouping raw users,
+matches, quiz responses and activity over the whole window:
+
+    daily_registration_rollups   users by day, user type, verification
+    daily_match_rollups          matches by day, broker, status, score bucket
+    daily_quiz_question_rollups  quiz responses by day and question
+    daily_quiz_user_rollups      quiz responses by day and user
+    daily_user_activity_rollups  activity records by day and user
+
+Rollups are maintained incrementally. Each one keeps a watermark: the
+newest source ``updated_at`` it has folded in. A refresh finds the days
+touched by rows changed since then (new rows, edits and soft deletes
+all bump ``updated_at``) and recomputes just those days. Recomputing a
+whole day keeps the job idempotent, so changes stamped shortly before
+the previous refresh started are looked at again, picking up rows
+committed late by concurrent transactions.
+
+The conversion funnel snapshots (see conversion_funnel) share the
+watermarks and refresh schedule under the name ``funnel``.
+
+Refreshes run in a background thread every
+``ANALYTICS_ROLLUP_INTERVAL_SECONDS`` (see start_rollup_scheduler) or via
+scripts/refresh_rollups.py. Each rollup is refreshed in one transaction
+that holds its watermark row lock, so the schedulers of several workers
+and the script can run at the same time.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+from datetime import date, datetime, timedelta
+import logging
+import threading
+
+from sqlalchemy import Boolean, Date, case, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.database.models.user import User
+from app.database.models.response import BrokerClientMatch
+from app.database.models.quiz import UserQuizResponse
+from app.database.models.analytics import (
+    UserActivity,
+    RollupWatermark,
+    DailyRegistrationRollup,
+    DailyMatchRollup,
+    DailyQuizQuestionRollup,
+    DailyQuizUserRollup,
+    DailyUserActivityRollup,
+    FunnelDailySnapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+# Score buckets, highest first, as shown on the matching dashboard
+SCORE_BUCKETS = ("90-100", "80-89", "70-79", "60-69", "Below 60")
+
+
+def score_bucket(score):
+    """SQL expression mapping a match score to its SCORE_BUCKETS label"""
+    return case(
+        (score >= 90, "90-100"),
+        (score >= 80, "80-89"),
+        (score >= 70, "70-79"),
+        (score >= 60, "60-69"),
+        else_="Below 60",
+    )
+
+
+class RollupSpec(NamedTuple):
+    """How one rollup table is computed from its source table"""
+
+    name: str
+    model: Any
+    source: Any
+    # Source column deciding which day a row is counted on
+    day_column: Any
+    # Rollup column name -> source expression grouped on
+    keys: Dict[str, Any]
+    # Rollup column holding the row count
+    measure: str
+
+
+ROLLUPS: List[RollupSpec] = [
+    RollupSpec(
+        "registrations",
+        DailyRegistrationRollup,
+        User,
+        User.created_at,
+        {
+            "user_type": User.user_type,
+            "is_verified": func.coalesce(User.is_verified, False, type_=Boolean),
+        },
+        "users",
+    ),
+    RollupSpec(
+        "matches",
+        DailyMatchRollup,
+        BrokerClientMatch,
+        BrokerClientMatch.matched_at,
+        {
+            "broker_id": BrokerClientMatch.broker_id,
+            "status": BrokerClientMatch.status,
+            "score_bucket": score_bucket(BrokerClientMatch.match_score),
+        },
+        "matches",
+    ),
+    RollupSpec(
+        "quiz_questions",
+        DailyQuizQuestionRollup,
+        UserQuizResponse,
+        UserQuizResponse.created_at,
+        {"question_id": UserQuizResponse.question_id},
+        "responses",
+    ),
+    RollupSpec(
+        "quiz_users",
+        DailyQuizUserRollup,
+        UserQuizResponse,
+        UserQuizResponse.created_at,
+        {"user_id": UserQuizResponse.user_id},
+        "responses",
+    ),
+    RollupSpec(
+        "user_activity",
+        DailyUserActivityRollup,
+        UserActivity,
+        UserActivity.created_at,
+        {"user_id": UserActivity.user_id},
+        "activities",
+    ),
+]
+
+# Watermark name of the conversion funnel snapshots
+FUNNEL = "funnel"
+
+# Changes stamped this long before the previous refresh are looked at again
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# Longest run of consecutive days recomputed in one transaction
+MAX_RUN_DAYS = 31
+
+
+def day_runs(days: Sequence[date], max_days: int = MAX_RUN_DAYS) -> List[tuple]:
+    """Group days into (first, last) runs of consecutive days"""
+    runs: List[list] = []
+    for day in sorted(set(days)):
+        if (
+            runs
+            and day == runs[-1][1] + timedelta(days=1)
+            and (day - runs[-1][0]).days < max_days
+        ):
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+def _day(spec: RollupSpec):
+    return func.date(spec.day_column, type_=Date)
+
+
+def _changed_days(db: Session, spec: RollupSpec, since: Optional[datetime]):
+    """Days with rows changed after `since`, and the newest change seen"""
+    day = _day(spec)
+    query = db.query(day.label("day"), func.max(spec.source.updated_at)).filter(
+        spec.day_column.isnot(None)
+    )
+    if since is not None:
+        query = query.filter(spec.source.updated_at > since)
+    rows = query.group_by(day).all()
+
+    newest = max((changed for _, changed in rows if changed is not None), default=None)
+    return [row.day for row in rows], newest
+
+
+def _recompute(db: Session, spec: RollupSpec, first: date, last: date) -> int:
+    """Replace the rollup rows for days first..last; returns rows written"""
+    day = _day(spec)
+    start = datetime.combine(first, datetime.min.time())
+    end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+    rows = (
+        db.query(
+            day.label("day"),
+            *(expr.label(name) for name, expr in spec.keys.items()),
+            func.count().label(spec.measure),
+        )
+        .filter(
+            spec.source.is_deleted.is_(None),
+            spec.day_column >= start,
+            spec.day_column < end,
+        )
+        .group_by(day, *spec.keys.values())
+        .all()
+    )
+
+    db.query(spec.model).filter(spec.model.day.between(first, last)).delete(
+        synchronize_session=False
+    )
+    if rows:
+        db.execute(insert(spec.model), [dict(row._mapping) for row in rows])
+    return len(rows)
+
+
+def database_now(db: Session) -> datetime:
+    """Current time by the database clock, the one stamping updated_at"""
+    return db.query(func.now()).scalar().replace(tzinfo=None)
+
+
+def lock_watermark(db: Session, name: str) -> RollupWatermark:
+    """
+    Lock a rollup's watermark row until the transaction ends
+
+    Refreshers in other processes (every worker's scheduler,
+    scripts/refresh_rollups.py from cron) wait here for the holder to
+    commit, so two of them never replace the same days at once. The row
+    is created, with nothing processed yet, on first use.
+    """
+    query = db.query(RollupWatermark).filter(RollupWatermark.name == name)
+    watermark = query.with_for_update().one_or_none()
+    if watermark is None:
+        try:
+            db.add(RollupWatermark(name=name, refreshed_at=database_now(db)))
+            db.commit()
+        except IntegrityError:
+            # Another refresher created it first
+            db.rollback()
+        watermark = query.with_for_update().one()
+    return watermark
+
+
+def watermark_since(watermark: Optional[RollupWatermark]) -> Optional[datetime]:
+    """Changes after this time still need folding in; None means all rows"""
+    if watermark is None or watermark.processed_until is None:
+        return None
+    return min(watermark.processed_until, watermark.refreshed_at - WATERMARK_OVERLAP)
+
+
+def advance_watermark(
+    db: Session,
+    watermark: Optional[RollupWatermark],
+    name: str,
+    newest: Optional[datetime],
+    started: datetime,
+):
+    """Record a finished refresh and commit"""
+    if watermark is None:
+        watermark = RollupWatermark(name=name)
+        db.add(watermark)
+    if newest is not None:
+        watermark.processed_until = newest.replace(tzinfo=None)
+    watermark.refreshed_at = started
+    db.commit()
+
+
+def refresh_rollup(db: Session, spec: RollupSpec) -> int:
+    """
+    Fold source changes since the watermark into one rollup table
+
+    The days are replaced and the watermark advanced in one transaction
+    holding the watermark's row lock (see lock_watermark).
+
+    Args:
+        db: Database session; committed once the rollup is refreshed
+        spec: Rollup to refresh
+
+    Returns:
+        Number of days recomputed
+    """
+    watermark = lock_watermark(db, spec.name)
+    started = database_now(db)
+
+    days, newest = _changed_days(db, spec, watermark_since(watermark))
+    for first, last in day_runs(days):
+        _recompute(db, spec, first, last)
+
+    advance_watermark(db, watermark, spec.name, newest, started)
+    return len(days)
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_rollups(
+    db: Session, names: Optional[Sequence[str]] = None
+) -> Dict[str, int]:
+    """
+    Refresh every rollup and the funnel snapshots (or the named ones)
+    incrementally
+
+    Returns:
+        Mapping of rollup name to days recomputed
+    """
+    refreshed = {}
+    with _refresh_lock:
+        for spec in ROLLUPS:
+            if names is not None and spec.name not in names:
+                continue
+            try:
+                refreshed[spec.name] = refresh_rollup(db, spec)
+            except Exception:
+                db.rollback()
+                raise
+
+        if names is None or FUNNEL in names:
+            from app.services.conversion_funnel import refresh_funnel_snapshots
+
+            try:
+                refreshed[FUNNEL] = refresh_funnel_snapshots(db)
+            except Exception:
+                db.rollback()
+                raise
+    return refreshed
+
+
+def reset_rollups(db: Session):
+    """Drop all rollup rows and watermarks so the next refresh rebuilds them"""
+    with _refresh_lock:
+        for spec in ROLLUPS:
+            db.query(spec.model).delete(synchronize_session=False)
+        db.query(FunnelDailySnapshot).delete(synchronize_session=False)
+        db.query(RollupWatermark).delete(synchronize_session=False)
+        db.commit()
+
+
+_scheduler_stop = threading.Event()
+_scheduler_thread: Optional[threading.Thread] = None
+
+
+def _flush_llm_usage(session_factory):
+    from app.services.llm_usage import flush_llm_usage
+
+    db = session_factory()
+    try:
+        flush_llm_usage(db)
+    except Exception as e:
+        logger.error(f"LLM usage flush failed: {str(e)}")
+    finally:
+        db.close()
+
+
+def start_rollup_scheduler(interval: Optional[float] = None):
+    """
+    Refresh the rollups in a background thread
+
+    Runs once straight away, then every `interval` seconds. Each pass also
+    stores this worker's pending LLM usage totals (app.services.llm_usage).
+
+    Args:
+        interval: Seconds between refreshes; defaults to
+            ANALYTICS_ROLLUP_INTERVAL_SECONDS, 0 disables the scheduler
+    """
+    global _scheduler_thread
+
+    if interval is None:
+        interval = settings.ANALYTICS_ROLLUP_INTERVAL_SECONDS
+    if not interval:
+        return
+    if _scheduler_thread is not None and _scheduler_thread.is_alive():
+        return
+    _scheduler_stop.clear()
+
+    def run():
+        from app.database.connection import SessionLocal
+
+        while True:
+            db = SessionLocal()
+            try:
+                refreshed = refresh_rollups(db)
+                logger.debug(f"Refreshed analytics rollups: {refreshed}")
+            except Exception as e:
+                logger.error(f"Analytics rollup refresh failed: {str(e)}")
+            finally:
+                db.close()
+            _flush_llm_usage(SessionLocal)
+            if _scheduler_stop.wait(interval):
+                # Store LLM usage recorded since the last pass before exiting
+                _flush_llm_usage(SessionLocal)
+                return
+
+    _scheduler_thread = threading.Thread(
+        target=run, name="analytics-rollups", daemon=True
+    )
+    _scheduler_thread.start()
+
+
+def stop_rollup_scheduler():
+    """Stop the background rollup refresh"""
+    global _scheduler_thread
+
+    _scheduler_stop.set()
+    if _scheduler_thread is not None:
+        _scheduler_thread.join(timeout=5)
+        _scheduler_thread = None
@@ -0,0 +1,133 @@
+"""
+Batch Lead Analysis
+
+Runs financial analysis for many Effi leads concurrently. Every lead is
+fetched as soon as the batch starts (the async Effi client bounds how many
+requests are actually in flight), and analyses run under a separate limit
+as their leads arrive, so Effi fetches for later leads overlap the LLM
+calls for earlier ones. Results are yielded in completion order and can
+be encoded as NDJSON or Server-Sent Events for streaming responses.
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+class BatchAnalysisEngine:
+    """
+    Fan-out executor for batch lead analysis
+    """
+
+    def __init__(self, analysis_service, effi_client, concurrency: int = 5):
+        """
+        Args:
+            analysis_service: Service providing analyze_lead_financial_profile
+                (normally the cached financial analysis service)
+            effi_client: AsyncEffiClient used to fetch leads
+            concurrency: Number of lead analyses allowed to run at once
+        """
+        self.analysis_service = analysis_service
+        self.effi_client = effi_client
+        self.concurrency = max(1, concurrency)
+
+    async def run(self, lead_ids: List[str]) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Analyze leads concurrently, yielding results as they complete
+
+        Pending work is cancelled if the consumer stops early, e.g. when a
+        streaming client disconnects.
+
+        Args:
+            lead_ids: Effi lead IDs to analyze
+
+        Yields:
+            (index, result) where index is the lead's position in lead_ids
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(index: int, lead_id: str):
+            try:
+                lead_data = await self.effi_client.get_lead(lead_id)
+                async with semaphore:
+                    analysis = (
+                        await self.analysis_service.analyze_lead_financial_profile(
+                            lead_data
+                        )
+                    )
+                result = {"lead_id": lead_id, "success": True, "analysis": analysis}
+            except Exception as e:
+                logger.warning(f"Batch analysis failed for lead {lead_id}: {str(e)}")
+                result = {"lead_id": lead_id, "success": False, "error": str(e)}
+            queue.put_nowait((index, result))
+
+        tasks = [
+            asyncio.create_task(process(index, lead_id))
+            for index, lead_id in enumerate(lead_ids)
+        ]
+        try:
+            for _ in range(len(tasks)):
+                yield await queue.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_all(self, lead_ids: List[str]) -> List[Dict[str, Any]]:
+        """Analyze leads concurrently and return results in request order"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(lead_ids)
+        async for index, result in self.run(lead_ids):
+            results[index] = result
+        return results
+
+
+def summarize_batch(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Counts reported at the end of a batch"""
+    successful = sum(1 for result in results if result["success"])
+    return {
+        "total_processed": len(results),
+        "successful": successful,
+        "failed": len(results) - successful,
+    }
+
+
+async def encode_batch_stream(
+    results: AsyncIterator[Tuple[int, Dict[str, Any]]],
+    stream_format: str,
+    summary_fields: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Encode per-lead results as NDJSON lines or SSE events
+
+    Each result becomes a "result" record carrying its request index; a
+    final "summary" record carries the batch totals.
+
+    Args:
+        results: Iterator from BatchAnalysisEngine.run
+        stream_format: "ndjson" or "sse"
+        summary_fields: Extra fields for the summary record
+
+    Yields:
+        Encoded chunks ready to send
+    """
+    completed = []
+    async for index, result in results:
+        completed.append(result)
+        yield _encode_record("result", {"index": index, **result}, stream_format)
+
+    summary = {**summarize_batch(completed), **(summary_fields or {})}
+    yield _encode_record("summary", summary, stream_format)
+
+
+def _encode_record(event: str, data: Dict[str, Any], stream_format: str) -> str:
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+    return json.dumps({"type": event, **data}, default=str) + "\n"
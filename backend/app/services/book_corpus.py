@@ -0,0 +1,462 @@
+"""
+Book Corpus
+
+Psychology books extracted once and indexed for excerpt lookup.
+
+scripts/build_book_corpus.py extracts every PDF in BOOK_DIRECTORY in a
+process pool, splits the text into segments of about BOOK_SEGMENT_CHARS
+characters on paragraph and sentence boundaries and writes them to
+BOOK_CORPUS_DIRECTORY:
+
+    segments.bin   UTF-8 text of every segment, back to back
+    offsets.bin    uint64 start of each segment in segments.bin, then the end
+    postings.bin   uint32 segment numbers containing each keyword, grouped
+                   by keyword
+    manifest.json  books with their segment ranges and source size/mtime,
+                   and each keyword's slice of postings.bin
+
+The binary files use native byte order and are memory-mapped when the
+corpus is opened, so the server only pages in the segments it reads.
+Finding excerpts for a topic is a few dictionary lookups and a scan of
+the matching postings; no PDF is read at request time. Rebuilding reuses
+the segments of PDFs whose size and modification time are unchanged.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+from array import array
+from bisect import bisect_right
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import heapq
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+
+from app.core.config import settings
+from app.services.pdf_service import PDFService
+
+logger = logging.getLogger(__name__)
+
+CORPUS_VERSION = 1
+SEGMENTS_FILE = "segments.bin"
+OFFSETS_FILE = "offsets.bin"
+POSTINGS_FILE = "postings.bin"
+MANIFEST_FILE = "manifest.json"
+
+WORD_PATTERN = re.compile(r"[a-z][a-z']{2,}")
+STOPWORDS = frozenset("""
+    about after all also and any are because been before being but can
+    could did does each for from had has have her his how into its just
+    like make more most not one only other our out over she should some
+    such than that the their them then there these they this those through
+    very was were what when where which while who will with would you your
+    """.split())
+
+
+class BookSource(NamedTuple):
+    """A PDF in the book directory"""
+
+    title: str
+    author: str
+    path: str
+    size: int
+    mtime: float
+
+
+class Excerpt(NamedTuple):
+    """A corpus segment matching a search"""
+
+    book: str
+    segment: int
+    text: str
+    score: float
+
+
+def keywords(text: str) -> Set[str]:
+    """Distinct lowercase index terms in text"""
+    words = (word.strip("'") for word in WORD_PATTERN.findall(text.lower()))
+    return {word for word in words if len(word) > 2 and word not in STOPWORDS}
+
+
+def _split_long(paragraph: str, size: int) -> Tuple[List[str], str]:
+    """Cut full-size pieces off a paragraph at sentence or word boundaries"""
+    pieces = []
+    while len(paragraph) > size:
+        cut = paragraph.rfind(". ", 0, size) + 1
+        if cut <= 0:
+            cut = paragraph.rfind(" ", 0, size)
+        if cut <= 0:
+            cut = size
+        pieces.append(paragraph[:cut].strip())
+        paragraph = paragraph[cut:].strip()
+    return pieces, paragraph
+
+
+def split_segments(
+    text: str, size: Optional[int] = None, min_chars: Optional[int] = None
+) -> List[str]:
+    """
+    Split extracted text into segments of at most `size` characters
+
+    Paragraphs are kept together where they fit; whitespace within a
+    paragraph is collapsed.
+
+    Args:
+        text: Extracted book text
+        size: Target segment length (defaults to BOOK_SEGMENT_CHARS)
+        min_chars: Shorter segments are dropped (defaults to
+            MIN_BOOK_EXCERPT_LENGTH)
+
+    Returns:
+        Segment texts in reading order
+    """
+    size = size or settings.BOOK_SEGMENT_CHARS
+    if min_chars is None:
+        min_chars = settings.MIN_BOOK_EXCERPT_LENGTH
+
+    segments: List[str] = []
+    current = ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if current and len(current) + 1 + len(paragraph) > size:
+            segments.append(current)
+            current = ""
+        pieces, paragraph = _split_long(paragraph, size)
+        segments.extend(pieces)
+        current = f"{current}\n{paragraph}" if current else paragraph
+    if current:
+        segments.append(current)
+    return [segment for segment in segments if len(segment) >= min_chars]
+
+
+def ingest_pdf(path: str, size: Optional[int] = None) -> List[str]:
+    """Extract and segment one PDF (runs in an ingestion worker process)"""
+    text = PDFService().extract_text_from_pdf(path, show_progress=False)
+    return split_segments(text, size)
+
+
+def book_sources(book_dir: str) -> List[BookSource]:
+    """PDFs in a directory, by file name"""
+    sources = []
+    for filename in sorted(os.listdir(book_dir)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        path = os.path.join(book_dir, filename)
+        stat = os.stat(path)
+        sources.append(
+            BookSource(
+                title=os.path.splitext(filename)[0],
+                author="Unknown",
+                path=os.path.abspath(path),
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+            )
+        )
+    return sources
+
+
+def write_corpus(books: Iterable[Tuple[BookSource, List[str]]], corpus_dir: str):
+    """
+    Write segmented books as a corpus, replacing any existing one
+
+    The files are written to a temporary directory that is then swapped
+    in, so readers never see a partial corpus.
+    """
+    corpus_dir = os.path.abspath(corpus_dir)
+    staging = f"{corpus_dir}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    offsets = array("Q", [0])
+    term_segments: Dict[str, List[int]] = defaultdict(list)
+    manifest_books = []
+    with open(os.path.join(staging, SEGMENTS_FILE), "wb") as out:
+        for source, segments in books:
+            first = len(offsets) - 1
+            for segment in segments:
+                data = segment.encode("utf-8")
+                out.write(data)
+                for term in keywords(segment):
+                    term_segments[term].append(len(offsets) - 1)
+                offsets.append(offsets[-1] + len(data))
+            manifest_books.append(
+                {
+                    **source._asdict(),
+                    "first_segment": first,
+                    "segments": len(offsets) - 1 - first,
+                }
+            )
+
+    postings = array("I")
+    terms = {}
+    for term in sorted(term_segments):
+        segment_ids = term_segments[term]
+        terms[term] = [len(postings), len(segment_ids)]
+        postings.extend(segment_ids)
+
+    with open(os.path.join(staging, OFFSETS_FILE), "wb") as out:
+        offsets.tofile(out)
+    with open(os.path.join(staging, POSTINGS_FILE), "wb") as out:
+        postings.tofile(out)
+    with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as out:
+        json.dump(
+            {
+                "version": CORPUS_VERSION,
+                "segments": len(offsets) - 1,
+                "books": manifest_books,
+                "terms": terms,
+            },
+            out,
+        )
+
+    retired = f"{corpus_dir}.old"
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(corpus_dir):
+        os.replace(corpus_dir, retired)
+    os.replace(staging, corpus_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+
+
+class BookCorpus:
+    """
+    Read-only, memory-mapped view of a built corpus
+    """
+
+    # Terms in more than this share of segments are ignored when searching
+    MAX_TERM_SHARE = 0.5
+
+    def __init__(self, corpus_dir: str):
+        """
+        Args:
+            corpus_dir: Directory written by write_corpus
+
+        Raises:
+            FileNotFoundError: If no corpus has been built there
+            ValueError: If it was built by an incompatible version or its
+                files do not match the manifest (e.g. truncated)
+        """
+        self.directory = corpus_dir
+        with open(os.path.join(corpus_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != CORPUS_VERSION:
+            raise ValueError(f"Unsupported book corpus version in {corpus_dir}")
+
+        self.books: List[dict] = manifest["books"]
+        self.terms: Dict[str, List[int]] = manifest["terms"]
+        self.segment_count: int = manifest["segments"]
+        self._book_starts = [book["first_segment"] for book in self.books]
+
+        self._files = []
+        self._views: List[memoryview] = []
+        try:
+            self._text = self._map(SEGMENTS_FILE)
+            self._offsets = self._map(OFFSETS_FILE, "Q")
+            self._postings = self._map(POSTINGS_FILE, "I")
+            self._check_sizes()
+        except Exception:
+            self.close()
+            raise
+
+    def _map(self, name: str, item_format: Optional[str] = None) -> memoryview:
+        view = memoryview(b"")
+        with open(os.path.join(self.directory, name), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if item_format and size % struct.calcsize(item_format):
+                raise ValueError(f"Truncated book corpus file {name}")
+            if size:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._files.append(mapped)
+                view = memoryview(mapped)
+        self._views.append(view)
+        if item_format:
+            view = view.cast(item_format)
+            self._views.append(view)
+        return view
+
+    def _check_sizes(self):
+        """Check the mapped files hold everything the manifest refers to"""
+        postings = sum(count for _, count in self.terms.values())
+        if (
+            len(self._offsets) != self.segment_count + 1
+            or len(self._text) != self._offsets[-1]
+            or len(self._postings) != postings
+        ):
+            raise ValueError(f"Book corpus in {self.directory} is incomplete")
+
+    def close(self):
+        """Release the memory maps"""
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._files:
+            mapped.close()
+        self._views, self._files = [], []
+
+    def __len__(self) -> int:
+        return self.segment_count
+
+    def segment(self, index: int) -> str:
+        """Text of a segment"""
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return str(self._text[start:end], "utf-8")
+
+    def book_of(self, index: int) -> dict:
+        """Manifest entry of the book a segment belongs to"""
+        return self.books[bisect_right(self._book_starts, index) - 1]
+
+    def book_segments(self, book: dict) -> List[str]:
+        first = book["first_segment"]
+        return [self.segment(index) for index in range(first, first + book["segments"])]
+
+    def postings(self, term: str) -> memoryview:
+        """Segments containing a term, in ascending order"""
+        start, count = self.terms.get(term, (0, 0))
+        return self._postings[start : start + count]
+
+    def search(
+        self, text: str, limit: int = 3, book: Optional[str] = None
+    ) -> List[Excerpt]:
+        """
+        Segments sharing the most distinctive keywords with `text`
+
+        Args:
+            text: Topic or question to find excerpts for
+            limit: Most excerpts returned
+            book: Only segments of the book with this title
+
+        Returns:
+            Excerpts, best match first; each matching keyword adds its
+            inverse document frequency to a segment's score
+        """
+        segment_range = None
+        if book is not None:
+            entry = next((b for b in self.books if b["title"] == book), None)
+            if entry is None:
+                return []
+            first = entry["first_segment"]
+            segment_range = range(first, first + entry["segments"])
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in keywords(text):
+            segment_ids = self.postings(term)
+            frequency = len(segment_ids)
+            if not frequency or frequency > self.segment_count * self.MAX_TERM_SHARE:
+                continue
+            weight = math.log(self.segment_count / frequency)
+            for index in segment_ids:
+                scores[index] += weight
+
+        if segment_range is not None:
+            scores = {i: s for i, s in scores.items() if i in segment_range}
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [
+            Excerpt(self.book_of(index)["title"], index, self.segment(index), score)
+            for index, score in best
+        ]
+
+
+def build_corpus(
+    book_dir: Optional[str] = None,
+    corpus_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    rebuild: bool = False,
+) -> Dict[str, int]:
+    """
+    Extract the PDFs in `book_dir` and write them as an indexed corpus
+
+    PDFs whose size and modification time match the existing corpus are
+    not extracted again unless `rebuild` is set.
+
+    Args:
+        book_dir: PDF directory (defaults to BOOK_DIRECTORY)
+        corpus_dir: Output directory (defaults to BOOK_CORPUS_DIRECTORY)
+        workers: Extraction processes (defaults to BOOK_INGEST_WORKERS,
+            or one per CPU)
+        rebuild: Extract every PDF
+
+    Returns:
+        Counts of books, books extracted and segments written
+    """
+    book_dir = book_dir or settings.BOOK_DIRECTORY
+    corpus_dir = corpus_dir or settings.BOOK_CORPUS_DIRECTORY
+    sources = book_sources(book_dir)
+
+    segments: Dict[str, List[str]] = {}
+    if not rebuild and os.path.exists(os.path.join(corpus_dir, MANIFEST_FILE)):
+        try:
+            previous = BookCorpus(corpus_dir)
+        except (ValueError, KeyError, OSError):
+            # Incomplete or outdated corpus; extract everything again
+            previous = None
+        if previous is not None:
+            current = {(s.path, s.size, s.mtime) for s in sources}
+            for book in previous.books:
+                if (book["path"], book["size"], book["mtime"]) in current:
+                    segments[book["path"]] = previous.book_segments(book)
+            previous.close()
+
+    pending = [source for source in sources if source.path not in segments]
+    if pending:
+        workers = workers or settings.BOOK_INGEST_WORKERS or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            paths = [source.path for source in pending]
+            for path, book_segments in zip(paths, pool.map(ingest_pdf, paths)):
+                segments[path] = book_segments
+                logger.info(f"Extracted {len(book_segments)} segments from {path}")
+
+    write_corpus(((source, segments[source.path]) for source in sources), corpus_dir)
+    return {
+        "books": len(sources),
+        "extracted": len(pending),
+        "segments": sum(len(segments[source.path]) for source in sources),
+    }
+
+
+_corpus: Optional[BookCorpus] = None
+_corpus_loaded = False
+_corpus_lock = threading.Lock()
+
+
+def get_book_corpus() -> Optional[BookCorpus]:
+    """
+    Process-wide corpus from BOOK_CORPUS_DIRECTORY, opened on first use
+
+    Returns:
+        The corpus, or None if it has not been built
+    """
+    global _corpus, _corpus_loaded
+    if _corpus_loaded:
+        return _corpus
+    with _corpus_lock:
+        if not _corpus_loaded:
+            try:
+                _corpus = BookCorpus(settings.BOOK_CORPUS_DIRECTORY)
+                logger.info(
+                    f"Book corpus loaded: {len(_corpus.books)} books, "
+                    f"{len(_corpus)} segments"
+                )
+            except FileNotFoundError:
+                logger.info(
+                    "No book corpus built; run scripts/build_book_corpus.py "
+                    "to enable book excerpts"
+                )
+            except Exception as e:
+                logger.warning(f"Could not open book corpus: {str(e)}")
+            _corpus_loaded = True
+    return _corpus
+
+
+def close_book_corpus():
+    """Unmap the process-wide corpus"""
+    global _corpus, _corpus_loaded
+    with _corpus_lock:
+        if _corpus is not None:
+            _corpus.close()
+        _corpus, _corpus_loaded = None, False
@@ -5,6 +5,7 @@ from uuid import UUID
 
 from app.database.models import Broker, Specialization, BrokerReview
 from app.schemas.broker import BrokerCreate, BrokerUpdate, BrokerSearchParams
+from app.services.admin_metrics import invalidate_admin_metrics
 
 
 def get_broker(db: Session, broker_id: UUID) -> Optional[Broker]:
@@ -134,6 +135,7 @@ def delete_broker(db: Session, broker_id: UUID) -> None:
     db_broker = get_broker(db, broker_id)
     db_broker.soft_delete()
     db.commit()
+    invalidate_admin_metrics()
 
 
 def search_brokers(db: Session, search_params: BrokerSearchParams) -> List[Broker]:
@@ -0,0 +1,235 @@
+"""
+Broker Feature Snapshot
+
+Keeps an immutable, compact copy of the matchable broker pool in process so
+matching does not re-run the ``Broker JOIN User`` query and lazy-load
+specializations per broker on every call.
+
+The snapshot is built once per worker and rebuilt on next use after any
+session flushes a change to ``Broker``, ``Specialization``, the
+``broker_specialization`` association table or a broker's ``User`` row,
+and again when that session commits or rolls back. Bulk UPDATE and DELETE
+statements against ``users`` also invalidate it, since they may deactivate
+or soft-delete a broker's account. Changes committed by other workers are
+picked up once the snapshot is older than ``BROKER_SNAPSHOT_MAX_AGE_SECONDS``.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from itertools import chain
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, contains_eager, selectinload
+
+from app.core.config import settings
+from app.database.models.user import User, UserType
+from app.database.models.broker import (
+    Broker,
+    Specialization,
+    ExperienceLevel,
+    broker_specialization,
+)
+from app.services.matching_engine import BrokerScoringEngine
+
+logger = logging.getLogger(__name__)
+
+
+class BrokerFeatures(NamedTuple):
+    """Immutable projection of a broker used for matching"""
+
+    id: str
+    user_id: str
+    full_name: str
+    company_name: Optional[str]
+    years_of_experience: int
+    experience_level: ExperienceLevel
+    average_rating: Optional[float]
+    success_rate: Optional[float]
+    specializations: Tuple[str, ...]
+
+
+class BrokerSnapshot:
+    """
+    Immutable broker pool with its compiled scoring engine
+    """
+
+    __slots__ = ("brokers", "engine", "generation", "built_at", "_by_id")
+
+    def __init__(self, brokers: Tuple[BrokerFeatures, ...], generation: int):
+        self.brokers = brokers
+        self.engine = BrokerScoringEngine(
+            broker_ids=[broker.id for broker in brokers],
+            specializations=[broker.specializations for broker in brokers],
+            experience_levels=[broker.experience_level for broker in brokers],
+            average_ratings=[broker.average_rating for broker in brokers],
+            success_rates=[broker.success_rate for broker in brokers],
+        )
+        self.generation = generation
+        self.built_at = time.monotonic()
+        self._by_id = {broker.id: row for row, broker in enumerate(brokers)}
+
+    def __len__(self) -> int:
+        return len(self.brokers)
+
+    def get(self, broker_id: str) -> Optional[BrokerFeatures]:
+        """Get a broker by ID"""
+        row = self._by_id.get(broker_id)
+        return self.brokers[row] if row is not None else None
+
+    def top_matches(
+        self,
+        user_responses: Dict[str, Any],
+        top_n: int = 10,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> List[Tuple[BrokerFeatures, float]]:
+        """Score a client against the pool and return the top N brokers"""
+        return [
+            (self.brokers[row], score)
+            for row, score in self.engine.top_matches(user_responses, top_n, weights)
+        ]
+
+
+# Tables whose changes invalidate the snapshot
+TRACKED_TABLES = {
+    Broker.__tablename__,
+    Specialization.__tablename__,
+    broker_specialization.name,
+}
+
+# Bulk updates and deletes of users can change a broker's account
+TRACKED_USER_TABLE = User.__tablename__
+
+_DIRTY_KEY = "broker_snapshot_dirty"
+
+# _build_lock serializes rebuilds; _lock guards the generation and snapshot
+_build_lock = threading.Lock()
+_lock = threading.Lock()
+_snapshot: Optional[BrokerSnapshot] = None
+_generation = 0
+
+
+def load_broker_features(db: Session) -> Tuple[BrokerFeatures, ...]:
+    """Load all matchable brokers (excluding test/demo brokers)"""
+    brokers = (
+        db.query(Broker)
+        .join(User, Broker.user_id == User.id)
+        .filter(
+            Broker.is_active == True,
+            Broker.is_verified == True,
+            Broker.is_deleted == None,
+            ~User.email.like("%test%"),  # Exclude test brokers
+            ~User.email.like("%demo%"),  # Exclude demo brokers
+        )
+        .options(contains_eager(Broker.user), selectinload(Broker.specializations))
+        .all()
+    )
+
+    return tuple(
+        BrokerFeatures(
+            id=broker.id,
+            user_id=broker.user_id,
+            full_name=broker.user.full_name,
+            company_name=broker.company_name,
+            years_of_experience=broker.years_of_experience,
+            experience_level=broker.experience_level,
+            average_rating=broker.average_rating,
+            success_rate=broker.success_rate,
+            specializations=tuple(spec.name for spec in broker.specializations),
+        )
+        for broker in brokers
+    )
+
+
+def get_broker_snapshot(db: Session) -> BrokerSnapshot:
+    """
+    Get the current broker snapshot, rebuilding it if invalidated or expired
+
+    Args:
+        db: Database session used only when a rebuild is needed
+
+    Returns:
+        BrokerSnapshot
+    """
+    global _snapshot
+
+    snapshot = _snapshot
+    if snapshot is not None and not _is_stale(snapshot):
+        return snapshot
+
+    with _build_lock:
+        snapshot = _snapshot
+        if snapshot is not None and not _is_stale(snapshot):
+            return snapshot
+
+        # Loading can autoflush broker changes, which invalidates under
+        # _lock, so only publish under it. The generation is read first so
+        # an invalidation during the load leaves this snapshot stale and it
+        # is rebuilt on next use.
+        generation = _generation
+        snapshot = BrokerSnapshot(load_broker_features(db), generation)
+        with _lock:
+            _snapshot = snapshot
+        logger.info(f"Built broker snapshot with {len(snapshot)} brokers")
+        return snapshot
+
+
+def invalidate_broker_snapshot():
+    """Mark the broker snapshot stale so it is rebuilt on next use"""
+    global _generation
+    with _lock:
+        _generation += 1
+
+
+def _is_stale(snapshot: BrokerSnapshot) -> bool:
+    """Check whether a snapshot was invalidated or exceeded its max age"""
+    if snapshot.generation != _generation:
+        return True
+    age = time.monotonic() - snapshot.built_at
+    return age > settings.BROKER_SNAPSHOT_MAX_AGE_SECONDS
+
+
+def _affects_brokers(instance: Any) -> bool:
+    """Check whether a flushed ORM instance feeds the snapshot"""
+    if isinstance(instance, (Broker, Specialization)):
+        return True
+    return isinstance(instance, User) and instance.user_type == UserType.BROKER
+
+
+@event.listens_for(Session, "after_flush")
+def _on_after_flush(session, flush_context):
+    """Invalidate when a flush touches brokers or specializations"""
+    if any(
+        _affects_brokers(instance)
+        for instance in chain(session.new, session.dirty, session.deleted)
+    ):
+        session.info[_DIRTY_KEY] = True
+        invalidate_broker_snapshot()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_orm_execute(orm_execute_state):
+    """Invalidate on bulk INSERT/UPDATE/DELETE against tracked tables"""
+    is_change = orm_execute_state.is_update or orm_execute_state.is_delete
+    if not (is_change or orm_execute_state.is_insert):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name in TRACKED_TABLES or (is_change and name == TRACKED_USER_TABLE):
+        orm_execute_state.session.info[_DIRTY_KEY] = True
+        invalidate_broker_snapshot()
+
+
+@event.listens_for(Session, "after_commit")
+def _on_after_commit(session):
+    """Invalidate again at commit so rebuilds during the transaction are dropped"""
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate_broker_snapshot()
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_after_rollback(session):
+    """Invalidate so snapshots built from the rolled back changes are dropped"""
+    if session.info.pop(_DIRTY_KEY, False):
+        invalidate_broker_snapshot()
@@ -0,0 +1,336 @@
+"""
+Bulk Rematch Pipeline
+
+Recomputes broker-client matches for every client after matching weights
+change or the broker pool changes (e.g. a batch of brokers gets verified).
+
+The pipeline:
+1. Streams clients with quiz responses in user ID order (keyset pagination)
+2. Scores each chunk against the compiled broker matrix across a process pool
+3. Persists each chunk's matches with set-based bulk writes, soft-deleting
+   pending matches to brokers that dropped out of a client's top N
+4. Checkpoints the last persisted user ID so an interrupted run resumes
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from datetime import datetime
+import hashlib
+import json
+import logging
+import os
+import time
+
+from sqlalchemy.orm import Session
+
+from app.database.models.user import User, UserType
+from app.database.models.quiz import QuizQuestion, UserQuizResponse
+from app.services.match_service import retire_stale_matches, upsert_match_scores
+from app.services.matching_algorithm import BrokerMatchingAlgorithm
+from app.services.matching_engine import BrokerScoringEngine
+
+logger = logging.getLogger(__name__)
+
+# A chunk of clients: [(user_id, user_responses), ...]
+ClientChunk = List[Tuple[str, Dict[str, Any]]]
+
+# Scored chunk: [(user_id, [(broker_id, score), ...]), ...]
+ScoredChunk = List[Tuple[str, List[Tuple[str, float]]]]
+
+
+class RematchCheckpoint:
+    """
+    Resumable rematch progress persisted as a JSON file
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Load saved progress, or None if there is none"""
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable rematch checkpoint: {str(e)}")
+            return None
+
+    def save(self, state: Dict[str, Any]):
+        """Atomically write progress"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def count_clients_to_rematch(db: Session, after_user_id: Optional[str] = None) -> int:
+    """Count clients with quiz responses, optionally after a user ID"""
+    query = _client_ids_query(db, after_user_id)
+    return query.count()
+
+
+def iter_client_chunks(
+    db: Session, chunk_size: int = 500, after_user_id: Optional[str] = None
+) -> Iterator[ClientChunk]:
+    """
+    Stream clients with their organized quiz responses in user ID order
+
+    Each chunk costs two queries: one for the next page of user IDs and
+    one for all of their responses.
+
+    Args:
+        db: Database session
+        chunk_size: Clients per chunk
+        after_user_id: Resume after this user ID
+
+    Yields:
+        Lists of (user_id, user_responses)
+    """
+    while True:
+        user_ids = [
+            user_id
+            for (user_id,) in _client_ids_query(db, after_user_id)
+            .order_by(User.id)
+            .limit(chunk_size)
+            .all()
+        ]
+        if not user_ids:
+            return
+
+        rows = (
+            db.query(
+                UserQuizResponse.user_id,
+                QuizQuestion.text,
+                UserQuizResponse.response,
+                QuizQuestion.question_type,
+                QuizQuestion.weight,
+            )
+            .join(QuizQuestion, UserQuizResponse.question_id == QuizQuestion.id)
+            .filter(UserQuizResponse.user_id.in_(user_ids))
+            .all()
+        )
+
+        rows_by_user: Dict[str, list] = {user_id: [] for user_id in user_ids}
+        for user_id, *response_row in rows:
+            rows_by_user[user_id].append(response_row)
+
+        yield [
+            (user_id, BrokerMatchingAlgorithm.organize_responses(rows_by_user[user_id]))
+            for user_id in user_ids
+        ]
+
+        after_user_id = user_ids[-1]
+
+
+def score_chunk(
+    engine: BrokerScoringEngine,
+    chunk: ClientChunk,
+    top_n: int,
+    weights: Dict[str, float],
+) -> ScoredChunk:
+    """Score every client in a chunk and keep each client's top N brokers"""
+    scored = []
+    for user_id, user_responses in chunk:
+        if not user_responses:
+            scored.append((user_id, []))
+            continue
+        top = engine.top_matches(user_responses, top_n, weights)
+        scored.append(
+            (user_id, [(engine.broker_ids[row], score) for row, score in top])
+        )
+    return scored
+
+
+def persist_chunk_matches(db: Session, scored: ScoredChunk) -> Dict[str, int]:
+    """
+    Write a scored chunk with set-based bulk upserts
+
+    Existing (user_id, broker_id) matches get their score refreshed; new
+    pairs are inserted as pending matches. Pending matches to brokers no
+    longer in a client's top N are soft-deleted.
+
+    Returns:
+        Counts of inserted, updated, unchanged and retired matches
+    """
+    counts = upsert_match_scores(
+        db,
+        [
+            (user_id, broker_id, round(score, 3))
+            for user_id, matches in scored
+            for broker_id, score in matches
+        ],
+        notes=f"Generated by bulk rematch on {datetime.utcnow().isoformat()}",
+    )
+    counts["retired"] = retire_stale_matches(
+        db,
+        [
+            (user_id, [broker_id for broker_id, _ in matches])
+            for user_id, matches in scored
+        ],
+    )
+    db.commit()
+    return counts
+
+
+def weights_fingerprint(weights: Dict[str, float]) -> str:
+    """Stable hash of matching weights, stored with the checkpoint"""
+    payload = json.dumps(weights, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def rematch_all_clients(
+    db: Session,
+    chunk_size: int = 500,
+    workers: Optional[int] = None,
+    top_n: int = 10,
+    weights: Optional[Dict[str, float]] = None,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Dict[str, Any]:
+    """
+    Recompute matches for all clients
+
+    Args:
+        db: Database session
+        chunk_size: Clients per chunk
+        workers: Scoring processes; 0 scores in-process, None uses CPU count
+        top_n: Matches kept per client
+        weights: Criteria weights, defaults to BrokerMatchingAlgorithm.WEIGHTS
+        checkpoint_path: JSON file for resumable progress
+        restart: Ignore any saved progress
+        progress: Called with the run state after each persisted chunk
+
+    Returns:
+        Final run state
+    """
+    from app.services.broker_snapshot import (
+        get_broker_snapshot,
+        invalidate_broker_snapshot,
+    )
+
+    weights = dict(weights or BrokerMatchingAlgorithm.WEIGHTS)
+    fingerprint = weights_fingerprint(weights)
+    checkpoint = RematchCheckpoint(checkpoint_path)
+
+    state = None if restart else checkpoint.load()
+    if state and state.get("weights_fingerprint") != fingerprint:
+        logger.warning("Matching weights changed since checkpoint, restarting")
+        state = None
+    if state and state.get("completed"):
+        logger.info("Previous rematch run completed, restarting")
+        state = None
+    if state is None:
+        state = {
+            "started_at": datetime.utcnow().isoformat(),
+            "weights_fingerprint": fingerprint,
+            "last_user_id": None,
+            "processed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "retired": 0,
+            "completed": False,
+        }
+    else:
+        # Checkpoints written before stale matches were retired lack the count
+        state.setdefault("retired", 0)
+        logger.info(
+            f"Resuming rematch after user {state['last_user_id']} "
+            f"({state['processed']} clients done)"
+        )
+
+    # Always score against the current broker pool
+    invalidate_broker_snapshot()
+    engine = get_broker_snapshot(db).engine
+    state["brokers"] = len(engine)
+    state["total"] = state["processed"] + count_clients_to_rematch(
+        db, state["last_user_id"]
+    )
+
+    started = time.monotonic()
+    processed_at_start = state["processed"]
+
+    def persist(scored: ScoredChunk):
+        counts = persist_chunk_matches(db, scored)
+        state["last_user_id"] = scored[-1][0]
+        state["processed"] += len(scored)
+        state["inserted"] += counts["inserted"]
+        state["updated"] += counts["updated"]
+        state["retired"] += counts["retired"]
+        elapsed = time.monotonic() - started
+        state["clients_per_second"] = round(
+            (state["processed"] - processed_at_start) / elapsed if elapsed else 0.0, 1
+        )
+        checkpoint.save(state)
+        logger.info(
+            f"Rematched {state['processed']}/{state['total']} clients "
+            f"({state['clients_per_second']}/s)"
+        )
+        if progress:
+            progress(state)
+
+    chunks = iter_client_chunks(db, chunk_size, state["last_user_id"])
+
+    if workers == 0 or len(engine) == 0:
+        for chunk in chunks:
+            persist(score_chunk(engine, chunk, top_n, weights))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(engine,),
+        ) as executor:
+            # Persist in submission order so the checkpoint only moves forward
+            # over fully written chunks; bound in-flight chunks to cap memory
+            pending: deque = deque()
+            for chunk in chunks:
+                pending.append(
+                    executor.submit(_score_chunk_in_worker, chunk, top_n, weights)
+                )
+                if len(pending) >= workers * 2:
+                    persist(pending.popleft().result())
+            while pending:
+                persist(pending.popleft().result())
+
+    state["completed"] = True
+    state["completed_at"] = datetime.utcnow().isoformat()
+    checkpoint.save(state)
+    return state
+
+
+# Engine shared by all tasks in a scoring worker process
+_worker_engine: Optional[BrokerScoringEngine] = None
+
+
+def _init_worker(engine: BrokerScoringEngine):
+    """Receive the compiled broker matrix once per worker process"""
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_chunk_in_worker(
+    chunk: ClientChunk, top_n: int, weights: Dict[str, float]
+) -> ScoredChunk:
+    """Process pool entry point for score_chunk"""
+    return score_chunk(_worker_engine, chunk, top_n, weights)
+
+
+def _client_ids_query(db: Session, after_user_id: Optional[str]):
+    """Client user IDs that have quiz responses"""
+    query = db.query(User.id).filter(
+        User.user_type == UserType.CLIENT,
+        User.is_deleted == None,
+        User.id.in_(db.query(UserQuizResponse.user_id)),
+    )
+    if after_user_id is not None:
+        query = query.filter(User.id > after_user_id)
+    return query
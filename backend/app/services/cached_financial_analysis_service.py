@@ -12,7 +12,8 @@ from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
 from app.services.financial_analysis_service import FinancialAnalysisService
-from app.core.redis_client import get_redis
+from app.core.async_redis_client import get_request_redis, maybe_await
+from app.core.redis_client import expand_analytics, get_redis
 from app.core.security_middleware import audit_logger
 
 logger = logging.getLogger(__name__)
@@ -27,6 +28,8 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         """Initialize the cached financial analysis service"""
         super().__init__()
         self.redis = get_redis()
+        # Client for the async request path (AsyncRedisClient by default)
+        self.cache = get_request_redis()
 
         # Cache expiration times (in seconds)
         self.cache_expiry = {
@@ -58,11 +61,11 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         cache_key = self._generate_cache_key("lead_analysis", lead_data)
 
         # Try to get from cache
-        cached_result = self.redis.cache_get(cache_key)
+        cached_result = await maybe_await(self.cache.cache_get(cache_key))
         if cached_result:
             logger.info(f"Cache HIT for lead analysis: {cache_key}")
             # Track cache hit
-            self.redis.track_event("cache_hit_lead_analysis")
+            await maybe_await(self.cache.track_event("cache_hit_lead_analysis"))
             return cached_result
 
         logger.info(f"Cache MISS for lead analysis: {cache_key}")
@@ -70,15 +73,18 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         # Generate new analysis
         analysis = await super().analyze_lead_financial_profile(lead_data)
 
-        # Cache the result if successful
-        if "error" not in analysis:
-            self.redis.cache_set(
-                cache_key, analysis, self.cache_expiry["lead_analysis"]
+        # Cache the result if successful; analyses that fell back to
+        # rule-based stages are retried next time instead
+        if "error" not in analysis and not analysis.get("degraded_stages"):
+            await maybe_await(
+                self.cache.cache_set(
+                    cache_key, analysis, self.cache_expiry["lead_analysis"]
+                )
             )
             logger.info(f"Cached lead analysis: {cache_key}")
 
         # Track cache miss
-        self.redis.track_event("cache_miss_lead_analysis")
+        await maybe_await(self.cache.track_event("cache_miss_lead_analysis"))
 
         return analysis
 
@@ -93,10 +99,10 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         cache_key = self._generate_cache_key("market_trends", cache_data)
 
         # Try to get from cache
-        cached_result = self.redis.cache_get(cache_key)
+        cached_result = await maybe_await(self.cache.cache_get(cache_key))
         if cached_result:
             logger.info(f"Cache HIT for market trends: {cache_key}")
-            self.redis.track_event("cache_hit_market_trends")
+            await maybe_await(self.cache.track_event("cache_hit_market_trends"))
             return cached_result
 
         logger.info(f"Cache MISS for market trends: {cache_key}")
@@ -106,10 +112,14 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
 
         # Cache the result if successful
         if "error" not in trends:
-            self.redis.cache_set(cache_key, trends, self.cache_expiry["market_trends"])
+            await maybe_await(
+                self.cache.cache_set(
+                    cache_key, trends, self.cache_expiry["market_trends"]
+                )
+            )
             logger.info(f"Cached market trends: {cache_key}")
 
-        self.redis.track_event("cache_miss_market_trends")
+        await maybe_await(self.cache.track_event("cache_miss_market_trends"))
 
         return trends
 
@@ -123,10 +133,10 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         cache_key = f"enhanced_matches:{user_id}"
 
         # Try to get from cache
-        cached_result = self.redis.cache_get(cache_key)
+        cached_result = await maybe_await(self.cache.cache_get(cache_key))
         if cached_result:
             logger.info(f"Cache HIT for enhanced matching: {cache_key}")
-            self.redis.track_event("cache_hit_enhanced_matching")
+            await maybe_await(self.cache.track_event("cache_hit_enhanced_matching"))
             return cached_result
 
         logger.info(f"Cache MISS for enhanced matching: {cache_key}")
@@ -136,12 +146,14 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
 
         # Cache the result if successful
         if "error" not in enhanced_matches:
-            self.redis.cache_set(
-                cache_key, enhanced_matches, self.cache_expiry["broker_matches"]
+            await maybe_await(
+                self.cache.cache_set(
+                    cache_key, enhanced_matches, self.cache_expiry["broker_matches"]
+                )
             )
             logger.info(f"Cached enhanced matches: {cache_key}")
 
-        self.redis.track_event("cache_miss_enhanced_matching")
+        await maybe_await(self.cache.track_event("cache_miss_enhanced_matching"))
 
         return enhanced_matches
 
@@ -179,10 +191,10 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         """
         cache_key = self._generate_cache_key("ai_insights", financial_indicators)
 
-        cached_result = self.redis.cache_get(cache_key)
+        cached_result = await maybe_await(self.cache.cache_get(cache_key))
         if cached_result:
             logger.info(f"Cache HIT for AI insights: {cache_key}")
-            self.redis.track_event("cache_hit_ai_insights")
+            await maybe_await(self.cache.track_event("cache_hit_ai_insights"))
             return cached_result
 
         return None
@@ -194,7 +206,9 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         Cache AI insights
         """
         cache_key = self._generate_cache_key("ai_insights", financial_indicators)
-        self.redis.cache_set(cache_key, insights, self.cache_expiry["ai_insights"])
+        await maybe_await(
+            self.cache.cache_set(cache_key, insights, self.cache_expiry["ai_insights"])
+        )
         logger.info(f"Cached AI insights: {cache_key}")
 
     async def _generate_financial_insights(
@@ -254,12 +268,16 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
         """
         try:
             # Get analytics for cache events
-            cache_hits = self.redis.get_analytics("cache_hit_lead_analysis", days=7)
-            cache_misses = self.redis.get_analytics("cache_miss_lead_analysis", days=7)
+            bulk = self.redis.get_analytics_bulk(
+                ["cache_hit_lead_analysis", "cache_miss_lead_analysis"], days=7
+            )
+            events = bulk.get("events", {})
 
             # Calculate hit rate
-            total_hits = sum(day["count"] for day in cache_hits.get("daily", []))
-            total_misses = sum(day["count"] for day in cache_misses.get("daily", []))
+            total_hits = sum(events.get("cache_hit_lead_analysis", {}).get("daily", []))
+            total_misses = sum(
+                events.get("cache_miss_lead_analysis", {}).get("daily", [])
+            )
             total_requests = total_hits + total_misses
 
             hit_rate = (total_hits / total_requests * 100) if total_requests > 0 else 0
@@ -293,7 +311,7 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
             await self.enhance_broker_matching(user_id, db)
 
             # Track cache warming
-            self.redis.track_event("cache_warming", user_id)
+            await maybe_await(self.cache.track_event("cache_warming", user_id))
 
             logger.info(f"Cache warming completed for user: {user_id}")
 
@@ -316,8 +334,9 @@ class CachedFinancialAnalysisService(FinancialAnalysisService):
                 "cache_miss_market_trends",
             ]
 
+            bulk = self.redis.get_analytics_bulk(events, days=7)
             for event in events:
-                analytics[event] = self.redis.get_analytics(event, days=7)
+                analytics[event] = expand_analytics(bulk, event) if bulk else {}
 
             return {
                 "analytics": analytics,
@@ -356,9 +375,11 @@ class SecureFinancialAnalysisService(CachedFinancialAnalysisService):
 
         # Track successful analysis
         if "error" not in result:
-            self.redis.track_event("successful_lead_analysis", user_id)
+            await maybe_await(
+                self.cache.track_event("successful_lead_analysis", user_id)
+            )
         else:
-            self.redis.track_event("failed_lead_analysis", user_id)
+            await maybe_await(self.cache.track_event("failed_lead_analysis", user_id))
 
         return result
 
@@ -386,9 +407,11 @@ class SecureFinancialAnalysisService(CachedFinancialAnalysisService):
 
         # Track analysis
         if "error" not in result:
-            self.redis.track_event("successful_market_analysis", user_id)
+            await maybe_await(
+                self.cache.track_event("successful_market_analysis", user_id)
+            )
         else:
-            self.redis.track_event("failed_market_analysis", user_id)
+            await maybe_await(self.cache.track_event("failed_market_analysis", user_id))
 
         return result
 
@@ -0,0 +1,250 @@
+"""
+Cohort Retention
+
+Monthly retention for users grouped by registration month: for each
+cohort, the share of its users with any activity in each later month.
+
+Users registered within the last MAX_MONTHS months get dense positions
+in registration order, so every cohort is a contiguous range of
+positions. A month's activity becomes one bitmap (a Python int with a
+bit per position), and a cohort's active count for that month is the
+popcount of the bitmap masked to the cohort's range. No query joins
+users to activity; each month costs one DISTINCT read of
+``user_activities`` and a few big-int operations.
+
+Counts for completed months cannot change, so they are cached in process
+and in Redis and only the current month is read on every request.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime
+import logging
+import threading
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.core.redis_client import get_redis
+from app.database.models.user import User
+from app.database.models.analytics import UserActivity
+
+logger = logging.getLogger(__name__)
+
+
+def month_start(when) -> date:
+    return date(when.year, when.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_key(month: date) -> str:
+    return month.strftime("%Y-%m")
+
+
+def build_bitmap(positions: Iterable[int], size: int) -> int:
+    """Int with a bit set for every position below size"""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+def count_range(bitmap: int, start: int, size: int) -> int:
+    """Number of set bits in positions [start, start + size)"""
+    return ((bitmap >> start) & ((1 << size) - 1)).bit_count()
+
+
+class UserIndex:
+    """
+    Append-only positions of users in registration order, from a fixed
+    first cohort month
+    """
+
+    def __init__(self, first_month: date):
+        self.first_month = first_month
+        self.positions: Dict[str, int] = {}
+        # Cohort month -> (first position, size)
+        self.cohorts: Dict[date, List[int]] = {}
+        self.last_seen: Optional[Tuple[datetime, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def load(self, db: Session):
+        """Append users registered after the last one seen"""
+        start = datetime.combine(self.first_month, datetime.min.time())
+        query = db.query(User.id, User.created_at).filter(User.created_at >= start)
+        if self.last_seen is not None:
+            created, user_id = self.last_seen
+            query = query.filter(
+                or_(
+                    User.created_at > created,
+                    and_(User.created_at == created, User.id > user_id),
+                )
+            )
+        for user_id, created in query.order_by(User.created_at, User.id):
+            month = month_start(created)
+            cohort = self.cohorts.setdefault(month, [len(self.positions), 0])
+            cohort[1] += 1
+            self.positions[user_id] = len(self.positions)
+            self.last_seen = (created, user_id)
+
+    def count_users(self, db: Session) -> int:
+        """Users the index should hold, to detect backdated registrations"""
+        start = datetime.combine(self.first_month, datetime.min.time())
+        return db.query(func.count(User.id)).filter(User.created_at >= start).scalar()
+
+    def active_counts(self, bitmap: int) -> Dict[str, int]:
+        """Active users per cohort for one month's activity bitmap"""
+        return {
+            month_key(month): count_range(bitmap, start, size)
+            for month, (start, size) in self.cohorts.items()
+        }
+
+
+class CohortRetention:
+    """Retention tables from a user index and per-month activity counts"""
+
+    # Longest window served; cohorts older than this are not indexed
+    MAX_MONTHS = 24
+    # Completed months are kept in Redis for this long
+    CACHE_TTL = 400 * 86400
+
+    def __init__(self, cache_prefix: str = "cohort_retention"):
+        """
+        Args:
+            cache_prefix: Redis cache key prefix for completed months
+        """
+        self.cache_prefix = cache_prefix
+        self._lock = threading.Lock()
+        self._index: Optional[UserIndex] = None
+        # Completed month -> active users per cohort month
+        self._completed: Dict[str, Dict[str, int]] = {}
+
+    def _user_index(self, db: Session, current: date) -> UserIndex:
+        first_month = add_months(current, -(self.MAX_MONTHS - 1))
+        index = self._index
+        if index is None or index.first_month != first_month:
+            index = UserIndex(first_month)
+            self._completed = {}
+        index.load(db)
+        if len(index) != index.count_users(db):
+            # A user was registered with an earlier date; positions shift
+            index = UserIndex(first_month)
+            index.load(db)
+            self._completed = {}
+        self._index = index
+        return index
+
+    def _month_bitmap(self, db: Session, index: UserIndex, month: date) -> int:
+        start = datetime.combine(month, datetime.min.time())
+        end = datetime.combine(add_months(month, 1), datetime.min.time())
+        active = (
+            db.query(UserActivity.user_id)
+            .filter(
+                UserActivity.created_at >= start,
+                UserActivity.created_at < end,
+                UserActivity.is_deleted.is_(None),
+            )
+            .distinct()
+        )
+        positions = index.positions
+        return build_bitmap(
+            (positions[user_id] for (user_id,) in active if user_id in positions),
+            len(positions),
+        )
+
+    def _month_counts(
+        self, db: Session, index: UserIndex, month: date, current: date
+    ) -> Dict[str, int]:
+        key = month_key(month)
+        if month < current:
+            counts = self._completed.get(key)
+            if counts is None:
+                counts = get_redis().cache_get(f"{self.cache_prefix}:{key}")
+            if counts is not None:
+                self._completed[key] = counts
+                return counts
+
+        counts = index.active_counts(self._month_bitmap(db, index, month))
+        if month < current:
+            self._completed[key] = counts
+            get_redis().cache_set(
+                f"{self.cache_prefix}:{key}", counts, expire=self.CACHE_TTL
+            )
+        return counts
+
+    def compute(
+        self, db: Session, months: int, now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Retention of the last `months` registration cohorts
+
+        Args:
+            db: Database session
+            months: Cohorts to report, up to MAX_MONTHS
+            now: Current time, for tests
+
+        Returns:
+            Cohorts with their size and retention by months since
+            registration, plus the size-weighted average curve
+        """
+        months = max(1, min(months, self.MAX_MONTHS))
+        now = now or datetime.utcnow()
+        current = month_start(now)
+        first = add_months(current, -(months - 1))
+
+        with self._lock:
+            index = self._user_index(db, current)
+            activity = {}
+            for offset in range(months):
+                month = add_months(first, offset)
+                activity[month] = self._month_counts(db, index, month, current)
+            sizes = {
+                month_key(month): size for month, (_, size) in index.cohorts.items()
+            }
+
+        cohorts = []
+        curve: Dict[int, List[int]] = {}
+        for offset in range(months):
+            cohort = add_months(first, offset)
+            key = month_key(cohort)
+            size = sizes.get(key, 0)
+            retention = []
+            for age in range(months - offset):
+                active = activity[add_months(cohort, age)].get(key, 0)
+                retention.append(
+                    {
+                        "month": age,
+                        "active_users": active,
+                        "rate": round(active / size * 100, 2) if size else 0.0,
+                    }
+                )
+                totals = curve.setdefault(age, [0, 0])
+                totals[0] += active
+                totals[1] += size
+            cohorts.append({"cohort": key, "users": size, "retention": retention})
+
+        return {
+            "months": months,
+            "cohorts": cohorts,
+            "average_retention": [
+                {
+                    "month": age,
+                    "rate": round(active / size * 100, 2) if size else 0.0,
+                }
+                for age, (active, size) in sorted(curve.items())
+            ],
+            "computed_at": now.isoformat(),
+        }
+
+
+_retention = CohortRetention()
+
+
+def get_cohort_retention(db: Session, months: int = 6) -> Dict[str, Any]:
+    """Monthly cohort retention for the admin dashboard"""
+    return _retention.compute(db, months)
@@ -0,0 +1,291 @@
+"""
+Conversion Funnel
+
+How far clients get from registration to a completed match:
+
+    Registration -> Quiz Completion -> First Match -> Match Acceptance
+    -> Completion
+
+A client counts at a stage only after reaching every earlier one. The
+funnel is computed in a single pass: clients, their quiz response counts
+and their match counts are read as three streams ordered by user_id
+(server-side cursors, each on its own connection) and merged in step,
+so no user's rows are held longer than it takes to classify them.
+
+Results are stored per registration day in ``funnel_daily_snapshots``
+and refreshed incrementally with the analytics rollups: only days whose
+clients registered, answered the quiz or had a match change since the
+last refresh are recomputed. The endpoint sums one row per day.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from datetime import date, datetime, timedelta
+import logging
+
+from sqlalchemy import Date, and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.database.models.user import User, UserType
+from app.database.models.quiz import UserQuizResponse
+from app.database.models.response import BrokerClientMatch, MatchStatus
+from app.database.models.analytics import FunnelDailySnapshot, RollupWatermark
+from app.services.admin_metrics import count_if
+from app.services.analytics_rollups import (
+    FUNNEL,
+    advance_watermark,
+    database_now,
+    day_runs,
+    lock_watermark,
+    watermark_since,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGES = (
+    "Registration",
+    "Quiz Completion",
+    "First Match",
+    "Match Acceptance",
+    "Completion",
+)
+# FunnelDailySnapshot column for each stage
+STAGE_COLUMNS = (
+    "registered",
+    "quiz_completed",
+    "first_match",
+    "match_accepted",
+    "completed",
+)
+
+# Quiz responses after which a client's quiz counts as completed
+QUIZ_COMPLETION_RESPONSES = 1
+# Rows fetched per round trip from each server-side cursor
+STREAM_BATCH = 5000
+
+
+def funnel_stage(responses: int, matches: int, accepted: int, completed: int) -> int:
+    """Index of the furthest stage reached without skipping one"""
+    reached = 0
+    for passed in (
+        responses >= QUIZ_COMPLETION_RESPONSES,
+        matches > 0,
+        accepted > 0,
+        completed > 0,
+    ):
+        if not passed:
+            break
+        reached += 1
+    return reached
+
+
+def merge_user_streams(
+    users: Iterator[Sequence[Any]],
+    responses: Iterator[Sequence[Any]],
+    matches: Iterator[Sequence[Any]],
+) -> Iterator[Tuple[date, int]]:
+    """
+    Walk three user_id-ordered streams together
+
+    Args:
+        users: (user_id, created_at) rows
+        responses: (user_id, responses) rows
+        matches: (user_id, matches, accepted, completed) rows
+
+    Yields:
+        (registration day, furthest stage) per user
+    """
+    response = next(responses, None)
+    match = next(matches, None)
+    for user_id, created_at in users:
+        while response is not None and response[0] < user_id:
+            response = next(responses, None)
+        while match is not None and match[0] < user_id:
+            match = next(matches, None)
+
+        answered = response[1] if response is not None and response[0] == user_id else 0
+        counts = match[1:] if match is not None and match[0] == user_id else (0, 0, 0)
+        yield created_at.date(), funnel_stage(answered, *counts)
+
+
+def compute_funnel_days(
+    users: Iterator[Sequence[Any]],
+    responses: Iterator[Sequence[Any]],
+    matches: Iterator[Sequence[Any]],
+) -> Dict[date, List[int]]:
+    """Users reaching each stage, per registration day"""
+    days: Dict[date, List[int]] = {}
+    for day, reached in merge_user_streams(users, responses, matches):
+        counts = days.setdefault(day, [0] * len(STAGES))
+        for stage in range(reached + 1):
+            counts[stage] += 1
+    return days
+
+
+def _scope(runs: Optional[List[tuple]]):
+    """Condition selecting clients registered in the given day runs"""
+    if runs is None:
+        return None
+    return or_(
+        *(
+            and_(
+                User.created_at >= datetime.combine(first, datetime.min.time()),
+                User.created_at
+                < datetime.combine(last + timedelta(days=1), datetime.min.time()),
+            )
+            for first, last in runs
+        )
+    )
+
+
+def _statements(scope):
+    """The three user_id-ordered queries merged by the funnel"""
+    clients = [User.user_type == UserType.CLIENT, User.is_deleted.is_(None)]
+    if scope is not None:
+        clients.append(scope)
+    client_ids = select(User.id).where(*clients)
+
+    users = select(User.id, User.created_at).where(*clients).order_by(User.id)
+    responses = (
+        select(UserQuizResponse.user_id, func.count())
+        .where(
+            UserQuizResponse.is_deleted.is_(None),
+            UserQuizResponse.user_id.in_(client_ids),
+        )
+        .group_by(UserQuizResponse.user_id)
+        .order_by(UserQuizResponse.user_id)
+    )
+    status = BrokerClientMatch.status
+    matches = (
+        select(
+            BrokerClientMatch.user_id,
+            func.count(),
+            count_if(status.in_([MatchStatus.ACCEPTED, MatchStatus.COMPLETED])),
+            count_if(status == MatchStatus.COMPLETED),
+        )
+        .where(
+            BrokerClientMatch.is_deleted.is_(None),
+            BrokerClientMatch.user_id.in_(client_ids),
+        )
+        .group_by(BrokerClientMatch.user_id)
+        .order_by(BrokerClientMatch.user_id)
+    )
+    return users, responses, matches
+
+
+def stream_funnel_days(db: Session, runs: Optional[List[tuple]] = None):
+    """
+    Run the single-pass funnel over clients registered in `runs`
+    (all clients if None)
+    """
+    engine = db.get_bind()
+    statements = _statements(_scope(runs))
+    connections = [engine.connect() for _ in statements]
+    try:
+        streams = [
+            iter(
+                connection.execution_options(yield_per=STREAM_BATCH).execute(statement)
+            )
+            for connection, statement in zip(connections, statements)
+        ]
+        return compute_funnel_days(*streams)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _changed_days(db: Session, since: Optional[datetime]):
+    """Registration days of clients with changes after `since`"""
+    day = func.date(User.created_at, type_=Date)
+    days = set()
+    newest = None
+    for source in (User, UserQuizResponse, BrokerClientMatch):
+        query = db.query(day, func.max(source.updated_at))
+        if source is not User:
+            query = query.join(User, User.id == source.user_id)
+        if since is not None:
+            query = query.filter(source.updated_at > since)
+        for changed_day, changed_at in query.group_by(day):
+            days.add(changed_day)
+            if changed_at is not None and (newest is None or changed_at > newest):
+                newest = changed_at
+    return days, newest
+
+
+def refresh_funnel_snapshots(db: Session) -> int:
+    """
+    Recompute the funnel snapshots of days with changes since the last
+    refresh
+
+    Returns:
+        Number of days recomputed
+    """
+    watermark = lock_watermark(db, FUNNEL)
+    started = database_now(db)
+    since = watermark_since(watermark)
+
+    days, newest = _changed_days(db, since)
+    if days:
+        # A first refresh scans every client instead of listing each day
+        runs = day_runs(days) if since is not None else None
+        funnel = stream_funnel_days(db, runs)
+
+        query = db.query(FunnelDailySnapshot)
+        if runs is not None:
+            query = query.filter(
+                or_(*(FunnelDailySnapshot.day.between(*run) for run in runs))
+            )
+        query.delete(synchronize_session=False)
+        for day, counts in funnel.items():
+            db.add(FunnelDailySnapshot(day=day, **dict(zip(STAGE_COLUMNS, counts))))
+
+    advance_watermark(db, watermark, FUNNEL, newest, started)
+    return len(days)
+
+
+def get_conversion_funnel(db: Session, days: int = 30) -> Dict[str, Any]:
+    """
+    Funnel of clients registered in the last `days` days, from the daily
+    snapshots
+
+    Returns:
+        Stage counts with step and overall conversion, the biggest
+        drop-off and when the snapshots were last refreshed
+    """
+    start_day = (datetime.utcnow() - timedelta(days=days)).date()
+    totals = (
+        db.query(
+            *(
+                func.coalesce(func.sum(getattr(FunnelDailySnapshot, column)), 0)
+                for column in STAGE_COLUMNS
+            )
+        )
+        .filter(FunnelDailySnapshot.day >= start_day)
+        .one()
+    )
+    totals = [int(total) for total in totals]
+
+    stages = []
+    for index, (name, users) in enumerate(zip(STAGES, totals)):
+        previous = totals[index - 1] if index else users
+        stages.append(
+            {
+                "stage": name,
+                "users": users,
+                "conversion_rate": (
+                    round(users / previous * 100, 2) if previous else 0.0
+                ),
+                "overall_rate": round(users / totals[0] * 100, 2) if totals[0] else 0.0,
+                "drop_off": previous - users,
+            }
+        )
+
+    biggest = max(stages[1:], key=lambda stage: stage["drop_off"])
+    watermark = db.get(RollupWatermark, FUNNEL)
+    return {
+        "period_days": days,
+        "stages": stages,
+        "biggest_drop_off": biggest["stage"] if biggest["drop_off"] else None,
+        "refreshed_at": (
+            watermark.refreshed_at.isoformat() if watermark is not None else None
+        ),
+    }
@@ -13,8 +13,9 @@ import asyncio
 from statistics import mean, median
 import json
 
-from app.api.effi.client import EffiClient
 from app.ai.gemini_service import GeminiService
+from app.ai.token_tracker import FEATURE_LEAD_ANALYSIS, FEATURE_MARKET_TRENDS
+from app.services.stage_graph import StageGraph
 from app.database.models.user import User
 from app.database.models.broker import Broker
 
@@ -26,9 +27,28 @@ class FinancialAnalysisService:
     Service for analyzing financial data from Effi API and generating AI-powered insights
     """
 
+    # Seconds to reuse LLM responses for identical prompts; these prompts are
+    # templates over a handful of numbers, so repeats are common
+    LLM_CACHE_TTL = {
+        "insights": 3600,  # 1 hour
+        "recommendations": 21600,  # 6 hours
+        "market_trends": 21600,  # 6 hours
+    }
+
+    # Seconds before an LLM stage of lead analysis gives up and uses the
+    # rule-based fallback instead
+    STAGE_TIMEOUTS = {
+        "ai_insights": 20,
+        "recommendations": 20,
+    }
+
     def __init__(self):
         """Initialize the financial analysis service"""
-        self.effi_client = EffiClient()
+        # Imported here: app.api imports the endpoint modules, which import
+        # this service
+        from app.api.effi.async_client import get_async_effi_client
+
+        self.effi_client = get_async_effi_client()
         self.gemini_service = GeminiService()
 
     async def analyze_lead_financial_profile(
@@ -44,32 +64,20 @@ class FinancialAnalysisService:
             Dictionary containing financial analysis and insights
         """
         try:
-            # Extract financial indicators
-            financial_indicators = self._extract_financial_indicators(lead_data)
-
-            # Generate AI insights
-            ai_insights = await self._generate_financial_insights(
-                financial_indicators, lead_data
-            )
-
-            # Calculate risk profile
-            risk_profile = self._calculate_risk_profile(financial_indicators)
-
-            # Generate recommendations
-            recommendations = await self._generate_recommendations(
-                financial_indicators, risk_profile
-            )
+            # Insights and recommendations only need the cheap indicator and
+            # risk stages, so the two LLM calls run concurrently
+            run = await self._build_analysis_graph().run(lead_data=lead_data)
+            results = run.results
 
             return {
                 "lead_id": lead_data.get("Id") or lead_data.get("id"),
-                "financial_indicators": financial_indicators,
-                "risk_profile": risk_profile,
-                "ai_insights": ai_insights,
-                "recommendations": recommendations,
+                "financial_indicators": results["financial_indicators"],
+                "risk_profile": results["risk_profile"],
+                "ai_insights": results["ai_insights"],
+                "recommendations": results["recommendations"],
                 "analysis_timestamp": datetime.utcnow().isoformat(),
-                "confidence_score": self._calculate_confidence_score(
-                    financial_indicators
-                ),
+                "confidence_score": results["confidence_score"],
+                "degraded_stages": run.degraded,
             }
 
         except Exception as e:
@@ -79,6 +87,43 @@ class FinancialAnalysisService:
                 "analysis_timestamp": datetime.utcnow().isoformat(),
             }
 
+    def _build_analysis_graph(self) -> StageGraph:
+        """
+        Stages of a lead analysis and what each one depends on
+
+        Returns:
+            Graph taking lead_data as input
+        """
+        graph = StageGraph(inputs=["lead_data"])
+        graph.add(
+            "financial_indicators",
+            self._extract_financial_indicators,
+            deps=["lead_data"],
+        )
+        graph.add(
+            "risk_profile", self._calculate_risk_profile, deps=["financial_indicators"]
+        )
+        graph.add(
+            "ai_insights",
+            self._generate_financial_insights,
+            deps=["financial_indicators", "lead_data"],
+            timeout=self.STAGE_TIMEOUTS["ai_insights"],
+            fallback=lambda indicators, _: self._generate_fallback_insights(indicators),
+        )
+        graph.add(
+            "recommendations",
+            self._generate_recommendations,
+            deps=["financial_indicators", "risk_profile"],
+            timeout=self.STAGE_TIMEOUTS["recommendations"],
+            fallback=self._generate_fallback_recommendations,
+        )
+        graph.add(
+            "confidence_score",
+            self._calculate_confidence_score,
+            deps=["financial_indicators"],
+        )
+        return graph
+
     def _extract_financial_indicators(
         self, lead_data: Dict[str, Any]
     ) -> Dict[str, Any]:
@@ -235,7 +280,12 @@ class FinancialAnalysisService:
             Focus on practical insights that would help match them with the right broker.
             """
 
-            insights = await self.gemini_service.generate_json(prompt, strict=False)
+            insights = await self.gemini_service.generate_json(
+                prompt,
+                strict=False,
+                cache_ttl=self.LLM_CACHE_TTL["insights"],
+                feature=FEATURE_LEAD_ANALYSIS,
+            )
 
             if insights:
                 return insights
@@ -325,7 +375,10 @@ class FinancialAnalysisService:
             """
 
             recommendations = await self.gemini_service.generate_json(
-                prompt, strict=False
+                prompt,
+                strict=False,
+                cache_ttl=self.LLM_CACHE_TTL["recommendations"],
+                feature=FEATURE_LEAD_ANALYSIS,
             )
 
             if isinstance(recommendations, list):
@@ -428,7 +481,7 @@ class FinancialAnalysisService:
             )
             to_date = datetime.now().strftime("%Y-%m-%d")
 
-            leads_response = self.effi_client.get_leads(
+            leads_response = await self.effi_client.get_leads(
                 from_date=from_date, to_date=to_date, top=100
             )
 
@@ -543,7 +596,12 @@ class FinancialAnalysisService:
             }}
             """
 
-            insights = await self.gemini_service.generate_json(prompt, strict=False)
+            insights = await self.gemini_service.generate_json(
+                prompt,
+                strict=False,
+                cache_ttl=self.LLM_CACHE_TTL["market_trends"],
+                feature=FEATURE_MARKET_TRENDS,
+            )
             return insights or {
                 "market_sentiment": "neutral",
                 "key_trends": ["Insufficient data for detailed analysis"],
@@ -576,7 +634,7 @@ class FinancialAnalysisService:
             similar_leads = []
             if user.email:
                 try:
-                    search_results = self.effi_client.search_leads(
+                    search_results = await self.effi_client.search_leads(
                         email=user.email, page_size=5
                     )
                     similar_leads = search_results.get("Items", [])
@@ -0,0 +1,154 @@
+"""
+LLM Usage Rollups
+
+Hourly LLM calls, tokens and cost per model and calling feature (quiz
+question generation, psychology insights, lead analysis, market trends).
+
+TokenUsageTracker accumulates each worker's usage in memory
+(app.ai.usage_log.hourly_usage); the analytics rollup scheduler adds
+those totals to ``llm_usage_hourly_rollups`` every
+ANALYTICS_ROLLUP_INTERVAL_SECONDS, so workers only write to the database
+once per interval. Rows are added to, never recomputed, which keeps the
+flush safe with several workers.
+"""
+
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.ai.usage_log import hourly_usage
+from app.database.models.analytics import LLMUsageHourlyRollup
+
+# Totals columns, in the order HourlyUsage keeps them
+TOTAL_COLUMNS = (
+    "calls",
+    "estimated_calls",
+    "input_tokens",
+    "output_tokens",
+    "cost_usd",
+)
+
+
+def _add_totals(db: Session, pending: Dict[tuple, List]):
+    for (hour, model, feature), totals in pending.items():
+        values = dict(zip(TOTAL_COLUMNS, totals))
+        updated = (
+            db.query(LLMUsageHourlyRollup)
+            .filter(
+                LLMUsageHourlyRollup.hour == hour,
+                LLMUsageHourlyRollup.model == model,
+                LLMUsageHourlyRollup.feature == feature,
+            )
+            .update(
+                {
+                    getattr(LLMUsageHourlyRollup, column): getattr(
+                        LLMUsageHourlyRollup, column
+                    )
+                    + value
+                    for column, value in values.items()
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.add(
+                LLMUsageHourlyRollup(hour=hour, model=model, feature=feature, **values)
+            )
+    db.commit()
+
+
+def flush_llm_usage(db: Session) -> int:
+    """
+    Add this worker's pending usage totals to the hourly rollups
+
+    Totals that cannot be stored are kept for the next flush.
+
+    Returns:
+        Number of (hour, model, feature) rows written
+    """
+    pending = hourly_usage.take()
+    if not pending:
+        return 0
+    try:
+        try:
+            _add_totals(db, pending)
+        except IntegrityError:
+            # Another worker inserted one of the rows first; add to it instead
+            db.rollback()
+            _add_totals(db, pending)
+    except Exception:
+        db.rollback()
+        hourly_usage.restore(pending)
+        raise
+    return len(pending)
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {column: 0 for column in TOTAL_COLUMNS}
+
+
+def _finish(totals: Dict[str, Any]) -> Dict[str, Any]:
+    totals["total_tokens"] = totals["input_tokens"] + totals["output_tokens"]
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    return totals
+
+
+def get_llm_usage(
+    db: Session,
+    hours: int = 24,
+    feature: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    LLM usage over the last `hours` hours from the hourly rollups
+
+    Args:
+        db: Database session
+        hours: Hours covered, including the current one
+        feature: Only this calling feature
+        now: End of the period (defaults to the current UTC time)
+
+    Returns:
+        Hourly points and totals by feature and by model, most expensive
+        feature first
+    """
+    now = now or datetime.utcnow()
+    start = now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    rollup = LLMUsageHourlyRollup
+    query = db.query(rollup).filter(rollup.hour >= start)
+    if feature is not None:
+        query = query.filter(rollup.feature == feature)
+
+    hourly: Dict[datetime, Dict[str, Any]] = {}
+    by_feature: Dict[str, Dict[str, Any]] = {}
+    by_model: Dict[str, Dict[str, Any]] = {}
+    overall = _empty_totals()
+    for row in query:
+        for target in (
+            hourly.setdefault(row.hour, _empty_totals()),
+            by_feature.setdefault(row.feature, _empty_totals()),
+            by_model.setdefault(row.model, _empty_totals()),
+            overall,
+        ):
+            for column in TOTAL_COLUMNS:
+                target[column] += getattr(row, column) or 0
+
+    return {
+        "period_hours": hours,
+        "start": start.isoformat(),
+        "totals": _finish(overall),
+        "by_feature": dict(
+            sorted(
+                ((name, _finish(totals)) for name, totals in by_feature.items()),
+                key=lambda item: item[1]["cost_usd"],
+                reverse=True,
+            )
+        ),
+        "by_model": {name: _finish(totals) for name, totals in by_model.items()},
+        "hourly": [
+            {"hour": hour.isoformat(), **_finish(totals)}
+            for hour, totals in sorted(hourly.items())
+        ],
+    }
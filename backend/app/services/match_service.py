@@ -3,7 +3,8 @@ Service module for broker-client matching business logic.
 """
 
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from sqlalchemy import case, func, insert, null, update
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from uuid import uuid4
 from datetime import datetime
 
@@ -130,26 +131,233 @@ def generate_matches(
         db=db, user_id=params.user_id, save_to_db=False  # We'll handle saving ourselves
     )
 
-    # Create BrokerClientMatch objects from results
-    matches = []
-    for match_data in match_results:
-        if match_data["match_score"] >= params.min_match_score:
-            db_match = BrokerClientMatch(
-                id=str(uuid4()),
-                broker_id=match_data["broker_id"],
-                user_id=params.user_id,
-                match_score=match_data["match_score"],
-                status=MatchStatus.PENDING,
-                notes=f"Algorithm match - Score: {match_data['match_score']:.3f}",
-            )
-            db.add(db_match)
-            matches.append(db_match)
+    selected = [
+        match_data
+        for match_data in match_results
+        if match_data["match_score"] >= params.min_match_score
+    ]
+    if not selected:
+        return []
 
+    upsert_match_scores(
+        db,
+        [
+            (params.user_id, match_data["broker_id"], match_data["match_score"])
+            for match_data in selected
+        ],
+        notes="Algorithm match",
+    )
     db.commit()
-    for match in matches:
-        db.refresh(match)
 
-    return matches
+    broker_ids = [match_data["broker_id"] for match_data in selected]
+
+    # Load the persisted matches in one query
+    return (
+        db.query(BrokerClientMatch)
+        .filter(
+            BrokerClientMatch.user_id == params.user_id,
+            BrokerClientMatch.broker_id.in_(broker_ids),
+            BrokerClientMatch.is_deleted == None,
+        )
+        .order_by(BrokerClientMatch.match_score.desc())
+        .all()
+    )
+
+
+def upsert_match_scores(
+    db: Session, match_scores: Iterable[Tuple[str, str, float]], notes: str
+) -> Dict[str, int]:
+    """
+    Persist match scores with one lookup query and one bulk upsert
+
+    New (user_id, broker_id) pairs are inserted as pending matches, live
+    matches get their score refreshed and soft-deleted matches are revived
+    as new pending matches. Does not commit.
+
+    Args:
+        db: Database session
+        match_scores: (user_id, broker_id, score) tuples
+        notes: Notes stored on new matches
+
+    Returns:
+        Counts of inserted, updated and unchanged matches
+    """
+    match_scores = [
+        (user_id, broker_id, round(score, 3))
+        for user_id, broker_id, score in match_scores
+    ]
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    if not match_scores:
+        return counts
+
+    # Fetch existing pairs (including soft-deleted ones) in one query
+    user_ids = {user_id for user_id, _, _ in match_scores}
+    existing = {
+        (row.user_id, row.broker_id): row
+        for row in db.query(
+            BrokerClientMatch.id,
+            BrokerClientMatch.user_id,
+            BrokerClientMatch.broker_id,
+            BrokerClientMatch.match_score,
+            BrokerClientMatch.is_deleted,
+        ).filter(BrokerClientMatch.user_id.in_(user_ids))
+    }
+
+    now = datetime.utcnow()
+    rows = []
+    for user_id, broker_id, score in match_scores:
+        current = existing.get((user_id, broker_id))
+        if current is None or current.is_deleted is not None:
+            counts["inserted"] += 1
+        elif current.match_score == score:
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["updated"] += 1
+
+        rows.append(
+            {
+                "id": current.id if current is not None else str(uuid4()),
+                "user_id": user_id,
+                "broker_id": broker_id,
+                "match_score": score,
+                "status": MatchStatus.PENDING,
+                "notes": f"{notes} on {now.isoformat()}",
+                "matched_at": now,
+                "responded_at": None,
+                "completed_at": None,
+                "is_deleted": None,
+            }
+        )
+
+    if not rows:
+        return counts
+
+    statement = _match_upsert_statement(db.get_bind().dialect.name)
+    if statement is not None:
+        db.execute(statement, rows)
+    else:
+        _write_matches_without_upsert(db, rows, existing)
+
+    return counts
+
+
+def retire_stale_matches(
+    db: Session, kept_matches: Iterable[Tuple[str, Iterable[str]]]
+) -> int:
+    """
+    Soft-delete pending matches to brokers that left a client's top matches
+
+    Matches the client or broker already acted on (accepted, completed,
+    rejected, cancelled) are kept. Does not commit.
+
+    Args:
+        db: Database session
+        kept_matches: (user_id, broker_ids) of each rematched client's
+            current top matches
+
+    Returns:
+        Number of matches soft-deleted
+    """
+    kept = {user_id: set(broker_ids) for user_id, broker_ids in kept_matches}
+    if not kept:
+        return 0
+
+    stale_ids = [
+        row.id
+        for row in db.query(
+            BrokerClientMatch.id,
+            BrokerClientMatch.user_id,
+            BrokerClientMatch.broker_id,
+        ).filter(
+            BrokerClientMatch.user_id.in_(kept),
+            BrokerClientMatch.status == MatchStatus.PENDING,
+            BrokerClientMatch.is_deleted == None,
+        )
+        if row.broker_id not in kept[row.user_id]
+    ]
+    if stale_ids:
+        db.query(BrokerClientMatch).filter(BrokerClientMatch.id.in_(stale_ids)).update(
+            {BrokerClientMatch.is_deleted: datetime.utcnow()}, synchronize_session=False
+        )
+    return len(stale_ids)
+
+
+def _match_upsert_statement(dialect_name: str):
+    """
+    Build a dialect-specific INSERT ... upsert for broker_client_matches
+
+    Returns None for dialects without upsert support.
+    """
+    table = BrokerClientMatch.__table__
+
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        statement = mysql_insert(table)
+        # MySQL applies assignments left to right, so is_deleted goes last
+        return statement.on_duplicate_key_update(
+            _conflict_assignments(table, statement.inserted)
+        )
+
+    if dialect_name in ("postgresql", "sqlite"):
+        if dialect_name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        statement = dialect_insert(table)
+        return statement.on_conflict_do_update(
+            index_elements=["user_id", "broker_id"],
+            set_=dict(_conflict_assignments(table, statement.excluded)),
+        )
+
+    return None
+
+
+def _conflict_assignments(table, proposed) -> List[Tuple[str, Any]]:
+    """
+    Column assignments for an upsert conflict
+
+    Live matches keep their lifecycle and only take the new score; a
+    soft-deleted match is reset to the proposed pending match.
+    """
+    revived = table.c.is_deleted.isnot(None)
+
+    def revive_to(value, column):
+        return case((revived, value), else_=table.c[column])
+
+    return [
+        ("match_score", proposed.match_score),
+        ("status", revive_to(proposed.status, "status")),
+        ("notes", revive_to(proposed.notes, "notes")),
+        ("matched_at", revive_to(proposed.matched_at, "matched_at")),
+        ("responded_at", revive_to(null(), "responded_at")),
+        ("completed_at", revive_to(null(), "completed_at")),
+        ("updated_at", func.now()),
+        ("is_deleted", null()),
+    ]
+
+
+def _write_matches_without_upsert(
+    db: Session, rows: List[Dict[str, Any]], existing: Dict[Tuple[str, str], Any]
+):
+    """Bulk INSERT new matches and bulk UPDATE existing ones by primary key"""
+    inserts = []
+    updates = []
+    for row in rows:
+        current = existing.get((row["user_id"], row["broker_id"]))
+        if current is None:
+            inserts.append(row)
+        elif current.is_deleted is not None:
+            updates.append(row)
+        else:
+            updates.append({"id": row["id"], "match_score": row["match_score"]})
+
+    if inserts:
+        db.execute(insert(BrokerClientMatch), inserts)
+    if updates:
+        db.execute(update(BrokerClientMatch), updates)
 
 
 def get_user_matches(
@@ -5,17 +5,18 @@ This module implements a sophisticated matching algorithm that scores brokers
 based on client quiz responses, broker attributes, and weighted criteria.
 """
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, TYPE_CHECKING
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import or_
 import json
-from datetime import datetime
 from collections import defaultdict
 
 from app.database.models.user import User, UserType
 from app.database.models.broker import Broker, Specialization, ExperienceLevel
 from app.database.models.quiz import UserQuizResponse, QuizQuestion, QuizCategory
-from app.database.models.response import BrokerClientMatch, MatchStatus
+
+if TYPE_CHECKING:
+    from app.services.broker_snapshot import BrokerFeatures
 
 
 class BrokerMatchingAlgorithm:
@@ -62,12 +63,79 @@ class BrokerMatchingAlgorithm:
         "aggressive": ["moderate_aggressive", "aggressive"],
     }
 
+    # Quiz questions read by each scoring criterion
+    QUESTION_TEXTS = {
+        "investment_goals": "What is your primary investment goal?",
+        "risk_tolerance": "What is your risk tolerance level?",
+        "experience_match": "How would you describe your investment experience?",
+        "service_alignment": "Which services are most important to you?",
+        "investment_amount": "What is your approximate investment amount?",
+        "sector_interests": "Which sectors are you most interested in investing?",
+        "communication_style": "How would you prefer to communicate with your broker?",
+        "certification_match": "Do you have any specific broker certification preferences?",
+    }
+
+    # Map goals to broker specializations
+    GOAL_TO_SPECIALIZATION = {
+        "retirement": ["retirement_planning", "financial_planning"],
+        "wealth_growth": ["investment_management", "wealth_management"],
+        "income": ["income_strategies", "dividend_investing"],
+        "education": ["education_planning", "529_plans"],
+        "home_purchase": ["real_estate_planning", "savings_strategies"],
+    }
+
+    # Map services to broker specializations
+    SERVICE_TO_SPECIALIZATION = {
+        "financial_planning": "financial_planning",
+        "tax_planning": "tax_strategies",
+        "estate_planning": "estate_planning",
+        "retirement_planning": "retirement_planning",
+        "education_planning": "education_planning",
+        "insurance": "insurance_planning",
+        "investment_management": "investment_management",
+        "budgeting": "budgeting",
+    }
+
+    # Broker risk management style (would need to be added to broker model)
+    # For now, use a simplified approach based on experience
+    BROKER_RISK_STYLES = {
+        ExperienceLevel.JUNIOR: ["conservative", "moderate_conservative"],
+        ExperienceLevel.INTERMEDIATE: ["moderate_conservative", "moderate"],
+        ExperienceLevel.SENIOR: ["moderate", "moderate_aggressive"],
+        ExperienceLevel.EXPERT: ["moderate_aggressive", "aggressive"],
+    }
+
+    # Map broker experience enum to string
+    BROKER_EXPERIENCE_NAMES = {
+        ExperienceLevel.JUNIOR: "junior",
+        ExperienceLevel.INTERMEDIATE: "intermediate",
+        ExperienceLevel.SENIOR: "senior",
+        ExperienceLevel.EXPERT: "expert",
+    }
+
+    # Map amounts to minimum requirements (simplified)
+    AMOUNT_REQUIREMENTS = {
+        "less_10k": 0,
+        "10k_50k": 10000,
+        "50k_100k": 50000,
+        "100k_500k": 100000,
+        "500k_plus": 500000,
+    }
+
+    # Higher experience brokers typically handle larger accounts
+    BROKER_MINIMUMS = {
+        ExperienceLevel.JUNIOR: 0,
+        ExperienceLevel.INTERMEDIATE: 10000,
+        ExperienceLevel.SENIOR: 50000,
+        ExperienceLevel.EXPERT: 100000,
+    }
+
     def __init__(self, db: Session):
         self.db = db
 
     def calculate_matches(
         self, user_id: str, top_n: int = 10
-    ) -> List[Tuple[Broker, float]]:
+    ) -> List[Tuple["BrokerFeatures", float]]:
         """
         Calculate broker matches for a given client
 
@@ -76,7 +144,9 @@ class BrokerMatchingAlgorithm:
             top_n: Number of top matches to return
 
         Returns:
-            List of tuples containing (Broker, match_score)
+            List of tuples containing (BrokerFeatures, match_score). These are
+            snapshot projections, not Broker ORM objects: the broker's name is
+            ``full_name`` and ``specializations`` is a tuple of names.
         """
         # Get user and their quiz responses
         user = (
@@ -93,45 +163,41 @@ class BrokerMatchingAlgorithm:
         if not user_responses:
             return []
 
-        # Get all active brokers (excluding test/demo brokers)
-        brokers = (
-            self.db.query(Broker)
-            .join(User, Broker.user_id == User.id)
-            .filter(
-                Broker.is_active == True,
-                Broker.is_verified == True,
-                Broker.is_deleted == None,
-                ~User.email.like("%test%"),  # Exclude test brokers
-                ~User.email.like("%demo%"),  # Exclude demo brokers
-            )
-            .all()
-        )
-
-        # Calculate match scores for each broker
-        broker_scores = []
-        for broker in brokers:
-            score = self._calculate_broker_score(broker, user_responses)
-            broker_scores.append((broker, score))
+        # Score against the cached broker pool (excluding test/demo brokers)
+        from app.services.broker_snapshot import get_broker_snapshot
 
-        # Sort by score and return top N
-        broker_scores.sort(key=lambda x: x[1], reverse=True)
-        return broker_scores[:top_n]
+        snapshot = get_broker_snapshot(self.db)
+        return snapshot.top_matches(user_responses, top_n, self.WEIGHTS)
 
     def _get_user_responses(self, user_id: str) -> Dict[str, Any]:
         """Get and organize user's quiz responses"""
-        responses = (
-            self.db.query(UserQuizResponse)
-            .join(QuizQuestion)
+        rows = (
+            self.db.query(
+                QuizQuestion.text,
+                UserQuizResponse.response,
+                QuizQuestion.question_type,
+                QuizQuestion.weight,
+            )
+            .join(QuizQuestion, UserQuizResponse.question_id == QuizQuestion.id)
             .filter(UserQuizResponse.user_id == user_id)
             .all()
         )
 
-        # Organize responses by question text for easier access
-        response_dict = {}
-        for response in responses:
-            question_text = response.question.text
-            response_data = response.response
+        return self.organize_responses(rows)
+
+    @staticmethod
+    def organize_responses(rows) -> Dict[str, Any]:
+        """
+        Organize response rows by question text for easier access
+
+        Args:
+            rows: Iterable of (question_text, response, question_type, weight)
 
+        Returns:
+            Dict mapping question text to response, question type and weight
+        """
+        response_dict = {}
+        for question_text, response_data, question_type, weight in rows:
             # Handle different response formats
             if isinstance(response_data, str):
                 try:
@@ -141,8 +207,8 @@ class BrokerMatchingAlgorithm:
 
             response_dict[question_text] = {
                 "response": response_data,
-                "question_type": response.question.question_type.value,
-                "weight": response.question.weight,
+                "question_type": question_type.value,
+                "weight": weight,
             }
 
         return response_dict
@@ -205,7 +271,7 @@ class BrokerMatchingAlgorithm:
         self, broker: Broker, user_responses: Dict[str, Any]
     ) -> float:
         """Score based on investment goals alignment"""
-        goal_response = user_responses.get("What is your primary investment goal?", {})
+        goal_response = user_responses.get(self.QUESTION_TEXTS["investment_goals"], {})
         if not goal_response:
             return 0.5  # Neutral score if no response
 
@@ -222,18 +288,9 @@ class BrokerMatchingAlgorithm:
         if not user_goal:
             return 0.5
 
-        # Map goals to broker specializations
-        goal_to_specialization = {
-            "retirement": ["retirement_planning", "financial_planning"],
-            "wealth_growth": ["investment_management", "wealth_management"],
-            "income": ["income_strategies", "dividend_investing"],
-            "education": ["education_planning", "529_plans"],
-            "home_purchase": ["real_estate_planning", "savings_strategies"],
-        }
-
         # Check if broker has matching specializations
         broker_specializations = [spec.name.lower() for spec in broker.specializations]
-        required_specs = goal_to_specialization.get(str(user_goal).lower(), [])
+        required_specs = self.GOAL_TO_SPECIALIZATION.get(str(user_goal).lower(), [])
 
         if not required_specs:
             return 0.7  # Default score if no specific mapping
@@ -251,7 +308,7 @@ class BrokerMatchingAlgorithm:
         self, broker: Broker, user_responses: Dict[str, Any]
     ) -> float:
         """Score based on risk tolerance compatibility"""
-        risk_response = user_responses.get("What is your risk tolerance level?", {})
+        risk_response = user_responses.get(self.QUESTION_TEXTS["risk_tolerance"], {})
         if not risk_response:
             return 0.5
 
@@ -268,19 +325,13 @@ class BrokerMatchingAlgorithm:
         if not user_risk:
             return 0.5
 
-        # Check broker's risk management style (would need to be added to broker model)
-        # For now, use a simplified approach based on experience
-        broker_risk_styles = {
-            ExperienceLevel.JUNIOR: ["conservative", "moderate_conservative"],
-            ExperienceLevel.INTERMEDIATE: ["moderate_conservative", "moderate"],
-            ExperienceLevel.SENIOR: ["moderate", "moderate_aggressive"],
-            ExperienceLevel.EXPERT: ["moderate_aggressive", "aggressive"],
-        }
-
+        # Check broker's risk management style
         compatible_risks = self.RISK_COMPATIBILITY.get(
             str(user_risk).lower(), [str(user_risk).lower()]
         )
-        broker_styles = broker_risk_styles.get(broker.experience_level, ["moderate"])
+        broker_styles = self.BROKER_RISK_STYLES.get(
+            broker.experience_level, ["moderate"]
+        )
 
         # Check compatibility
         compatibility = any(style in compatible_risks for style in broker_styles)
@@ -290,9 +341,7 @@ class BrokerMatchingAlgorithm:
         self, broker: Broker, user_responses: Dict[str, Any]
     ) -> float:
         """Score based on experience level matching"""
-        exp_response = user_responses.get(
-            "How would you describe your investment experience?", {}
-        )
+        exp_response = user_responses.get(self.QUESTION_TEXTS["experience_match"], {})
         if not exp_response:
             return 0.5
 
@@ -314,15 +363,9 @@ class BrokerMatchingAlgorithm:
             str(user_experience).lower(), []
         )
 
-        # Map broker experience enum to string
-        broker_exp_map = {
-            ExperienceLevel.JUNIOR: "junior",
-            ExperienceLevel.INTERMEDIATE: "intermediate",
-            ExperienceLevel.SENIOR: "senior",
-            ExperienceLevel.EXPERT: "expert",
-        }
-
-        broker_exp = broker_exp_map.get(broker.experience_level, "intermediate")
+        broker_exp = self.BROKER_EXPERIENCE_NAMES.get(
+            broker.experience_level, "intermediate"
+        )
 
         if broker_exp in compatible_levels:
             # Perfect match gets higher score
@@ -340,7 +383,7 @@ class BrokerMatchingAlgorithm:
     ) -> float:
         """Score based on service preferences alignment"""
         service_response = user_responses.get(
-            "Which services are most important to you?", {}
+            self.QUESTION_TEXTS["service_alignment"], {}
         )
         if not service_response:
             return 0.5
@@ -360,25 +403,13 @@ class BrokerMatchingAlgorithm:
         elif not isinstance(user_services, list):
             user_services = [str(user_services)]
 
-        # Map services to broker specializations
-        service_to_specialization = {
-            "financial_planning": "financial_planning",
-            "tax_planning": "tax_strategies",
-            "estate_planning": "estate_planning",
-            "retirement_planning": "retirement_planning",
-            "education_planning": "education_planning",
-            "insurance": "insurance_planning",
-            "investment_management": "investment_management",
-            "budgeting": "budgeting",
-        }
-
         broker_specializations = [spec.name.lower() for spec in broker.specializations]
 
         # Calculate match score
         matches = 0
         for service in user_services:
             service_str = str(service)
-            spec_needed = service_to_specialization.get(service_str, service_str)
+            spec_needed = self.SERVICE_TO_SPECIALIZATION.get(service_str, service_str)
             if any(
                 spec_needed in broker_spec for broker_spec in broker_specializations
             ):
@@ -391,7 +422,7 @@ class BrokerMatchingAlgorithm:
     ) -> float:
         """Score based on investment amount compatibility"""
         amount_response = user_responses.get(
-            "What is your approximate investment amount?", {}
+            self.QUESTION_TEXTS["investment_amount"], {}
         )
         if not amount_response:
             return 0.5
@@ -409,25 +440,8 @@ class BrokerMatchingAlgorithm:
         if not user_amount:
             return 0.5
 
-        # Map amounts to minimum requirements (simplified)
-        amount_requirements = {
-            "less_10k": 0,
-            "10k_50k": 10000,
-            "50k_100k": 50000,
-            "100k_500k": 100000,
-            "500k_plus": 500000,
-        }
-
-        # Higher experience brokers typically handle larger accounts
-        broker_minimums = {
-            ExperienceLevel.JUNIOR: 0,
-            ExperienceLevel.INTERMEDIATE: 10000,
-            ExperienceLevel.SENIOR: 50000,
-            ExperienceLevel.EXPERT: 100000,
-        }
-
-        user_min = amount_requirements.get(str(user_amount).lower(), 0)
-        broker_min = broker_minimums.get(broker.experience_level, 0)
+        user_min = self.AMOUNT_REQUIREMENTS.get(str(user_amount).lower(), 0)
+        broker_min = self.BROKER_MINIMUMS.get(broker.experience_level, 0)
 
         # Score based on compatibility
         if user_min >= broker_min:
@@ -442,7 +456,7 @@ class BrokerMatchingAlgorithm:
     ) -> float:
         """Score based on sector interest alignment"""
         sector_response = user_responses.get(
-            "Which sectors are you most interested in investing?", {}
+            self.QUESTION_TEXTS["sector_interests"], {}
         )
         if not sector_response:
             return 0.5
@@ -479,7 +493,7 @@ class BrokerMatchingAlgorithm:
     ) -> float:
         """Score based on communication preferences"""
         comm_response = user_responses.get(
-            "How would you prefer to communicate with your broker?", {}
+            self.QUESTION_TEXTS["communication_style"], {}
         )
         if not comm_response:
             return 0.8  # Most brokers are flexible with communication
@@ -492,7 +506,7 @@ class BrokerMatchingAlgorithm:
     ) -> float:
         """Score based on certification preferences"""
         cert_response = user_responses.get(
-            "Do you have any specific broker certification preferences?", {}
+            self.QUESTION_TEXTS["certification_match"], {}
         )
         if not cert_response:
             return 0.8
@@ -552,39 +566,22 @@ def generate_broker_matches(
             "broker_id": broker.id,
             "user_id": user_id,
             "match_score": round(score, 3),
-            "broker_name": broker.user.full_name,
+            "broker_name": broker.full_name,
             "company_name": broker.company_name,
             "experience_level": broker.experience_level.value,
             "average_rating": broker.average_rating,
-            "specializations": [spec.name for spec in broker.specializations],
+            "specializations": list(broker.specializations),
         }
         results.append(match_data)
 
-        if save_to_db:
-            # Check if match already exists
-            existing_match = (
-                db.query(BrokerClientMatch)
-                .filter(
-                    and_(
-                        BrokerClientMatch.user_id == user_id,
-                        BrokerClientMatch.broker_id == broker.id,
-                        BrokerClientMatch.is_deleted == None,
-                    )
-                )
-                .first()
-            )
-
-            if not existing_match:
-                new_match = BrokerClientMatch(
-                    user_id=user_id,
-                    broker_id=broker.id,
-                    match_score=round(score, 3),
-                    status=MatchStatus.PENDING,
-                    notes=f"Generated by matching algorithm on {datetime.utcnow().isoformat()}",
-                )
-                db.add(new_match)
-
     if save_to_db:
+        from app.services.match_service import upsert_match_scores
+
+        upsert_match_scores(
+            db,
+            [(user_id, match["broker_id"], match["match_score"]) for match in results],
+            notes="Generated by matching algorithm",
+        )
         db.commit()
 
     return results
@@ -0,0 +1,358 @@
+"""
+Vectorized Broker Scoring Engine
+
+This module compiles a broker pool into NumPy arrays once and scores a client
+against every broker with array operations instead of calling the nine
+``_score_*`` methods of ``BrokerMatchingAlgorithm`` per broker.
+
+Scores are identical to ``BrokerMatchingAlgorithm._calculate_broker_score``:
+each criterion is reduced to either a constant, a lookup on the broker's
+experience level code, or a "broker has a specialization containing term"
+test evaluated against a one-hot specialization matrix.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+
+import numpy as np
+
+from app.database.models.broker import Broker, ExperienceLevel
+from app.services.matching_algorithm import BrokerMatchingAlgorithm
+
+
+class BrokerScoringEngine:
+    """
+    Broker pool compiled into arrays for batch scoring:
+    1. One-hot specialization matrix (brokers x specialization names)
+    2. Experience level codes
+    3. Pre-computed broker performance scores (rating and success rate)
+    """
+
+    # Experience level codes; brokers without a known level get UNKNOWN_LEVEL
+    EXPERIENCE_LEVELS = [
+        ExperienceLevel.JUNIOR,
+        ExperienceLevel.INTERMEDIATE,
+        ExperienceLevel.SENIOR,
+        ExperienceLevel.EXPERT,
+    ]
+    UNKNOWN_LEVEL = len(EXPERIENCE_LEVELS)
+
+    def __init__(
+        self,
+        broker_ids: Sequence[str],
+        specializations: Sequence[Iterable[str]],
+        experience_levels: Sequence[Optional[ExperienceLevel]],
+        average_ratings: Sequence[Optional[float]],
+        success_rates: Sequence[Optional[float]],
+    ):
+        """
+        Compile a broker pool
+
+        Args:
+            broker_ids: Broker IDs, one per row
+            specializations: Specialization names for each broker
+            experience_levels: Experience level for each broker
+            average_ratings: Average rating (0-5) for each broker
+            success_rates: Success rate (0-1) for each broker
+        """
+        self.broker_ids = list(broker_ids)
+        size = len(self.broker_ids)
+
+        # One-hot specialization matrix over the lowercased vocabulary
+        lowered = [[name.lower() for name in names] for names in specializations]
+        self.specialization_names = sorted(
+            {name for names in lowered for name in names}
+        )
+        column = {name: i for i, name in enumerate(self.specialization_names)}
+        self.specialization_matrix = np.zeros(
+            (size, len(self.specialization_names)), dtype=bool
+        )
+        for row, names in enumerate(lowered):
+            for name in names:
+                self.specialization_matrix[row, column[name]] = True
+
+        level_codes = {level: i for i, level in enumerate(self.EXPERIENCE_LEVELS)}
+        self.experience_codes = np.array(
+            [level_codes.get(level, self.UNKNOWN_LEVEL) for level in experience_levels],
+            dtype=np.int8,
+        )
+
+        ratings = np.array([rating or 0.0 for rating in average_ratings], dtype=float)
+        success = np.array([rate or 0.0 for rate in success_rates], dtype=float)
+        self.average_ratings = ratings
+        self.success_rates = success
+
+        # Weight rating more heavily as it's based on client feedback
+        rating_score = np.where(ratings != 0, ratings / 5.0, 0.5)
+        success_score = np.where(success != 0, success, 0.5)
+        self.performance_scores = (rating_score * 0.7) + (success_score * 0.3)
+
+        # Term -> brokers having a specialization containing that term
+        self._term_cache: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_brokers(cls, brokers: Sequence[Broker]) -> "BrokerScoringEngine":
+        """Compile an engine from Broker ORM objects (specializations loaded)"""
+        return cls(
+            broker_ids=[broker.id for broker in brokers],
+            specializations=[
+                [spec.name for spec in broker.specializations] for broker in brokers
+            ],
+            experience_levels=[broker.experience_level for broker in brokers],
+            average_ratings=[broker.average_rating for broker in brokers],
+            success_rates=[broker.success_rate for broker in brokers],
+        )
+
+    def __len__(self) -> int:
+        return len(self.broker_ids)
+
+    def score(
+        self,
+        user_responses: Dict[str, Any],
+        weights: Optional[Dict[str, float]] = None,
+    ) -> np.ndarray:
+        """
+        Score one client against every broker in the pool
+
+        Args:
+            user_responses: Responses as built by _get_user_responses
+            weights: Criteria weights, defaults to BrokerMatchingAlgorithm.WEIGHTS
+
+        Returns:
+            Array of match scores aligned with broker_ids
+        """
+        weights = weights if weights is not None else BrokerMatchingAlgorithm.WEIGHTS
+
+        scores = {
+            "investment_goals": self._score_investment_goals(user_responses),
+            "risk_tolerance": self._score_risk_tolerance(user_responses),
+            "experience_match": self._score_experience_match(user_responses),
+            "service_alignment": self._score_service_alignment(user_responses),
+            "investment_amount": self._score_investment_amount(user_responses),
+            "sector_interests": self._score_sector_interests(user_responses),
+            "communication_style": self._score_communication_style(user_responses),
+            "certification_match": self._score_certification_match(user_responses),
+            "broker_performance": self.performance_scores,
+        }
+
+        # Accumulate in criteria order so totals match the per-broker path exactly
+        total = np.zeros(len(self.broker_ids))
+        for criteria, score in scores.items():
+            total = total + score * weights.get(criteria, 0)
+
+        return np.minimum(total, 1.0)  # Cap at 1.0
+
+    def top_matches(
+        self,
+        user_responses: Dict[str, Any],
+        top_n: int = 10,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Get the top N brokers for a client
+
+        Returns:
+            List of (broker row index, match score) sorted by score descending
+        """
+        scores = self.score(user_responses, weights)
+        return [(int(row), float(scores[row])) for row in self.rank(scores, top_n)]
+
+    @staticmethod
+    def rank(scores: np.ndarray, top_n: int) -> np.ndarray:
+        """
+        Row indices of the top N scores, highest first
+
+        Uses argpartition to avoid a full sort; ties keep pool order, the same
+        as a stable descending sort over the whole pool.
+        """
+        if top_n <= 0 or len(scores) == 0:
+            return np.empty(0, dtype=np.intp)
+        if top_n < len(scores):
+            partitioned = np.argpartition(-scores, top_n - 1)[:top_n]
+            threshold = scores[partitioned].min()
+            candidates = np.flatnonzero(scores >= threshold)
+        else:
+            candidates = np.arange(len(scores))
+        order = np.argsort(-scores[candidates], kind="stable")
+        return candidates[order][:top_n]
+
+    def _has_term(self, term: str) -> np.ndarray:
+        """Brokers with any specialization name containing term"""
+        has_term = self._term_cache.get(term)
+        if has_term is None:
+            columns = np.array(
+                [term in name for name in self.specialization_names], dtype=bool
+            )
+            has_term = self.specialization_matrix[:, columns].any(axis=1)
+            self._term_cache[term] = has_term
+        return has_term
+
+    def _level_lookup(self, table: Sequence[float]) -> np.ndarray:
+        """Map experience codes through a per-level score table"""
+        return np.asarray(table, dtype=float)[self.experience_codes]
+
+    def _score_investment_goals(self, user_responses: Dict[str, Any]):
+        """Score based on investment goals alignment"""
+        user_goal = _single_answer(user_responses, "investment_goals")
+        if not user_goal:
+            return 0.5
+
+        required_specs = BrokerMatchingAlgorithm.GOAL_TO_SPECIALIZATION.get(
+            str(user_goal).lower(), []
+        )
+        if not required_specs:
+            return 0.7
+
+        matches = sum(self._has_term(spec).astype(int) for spec in required_specs)
+        return np.minimum(matches / len(required_specs), 1.0)
+
+    def _score_risk_tolerance(self, user_responses: Dict[str, Any]):
+        """Score based on risk tolerance compatibility"""
+        user_risk = _single_answer(user_responses, "risk_tolerance")
+        if not user_risk:
+            return 0.5
+
+        compatible_risks = BrokerMatchingAlgorithm.RISK_COMPATIBILITY.get(
+            str(user_risk).lower(), [str(user_risk).lower()]
+        )
+        table = []
+        for level in self.EXPERIENCE_LEVELS + [None]:
+            broker_styles = BrokerMatchingAlgorithm.BROKER_RISK_STYLES.get(
+                level, ["moderate"]
+            )
+            compatible = any(style in compatible_risks for style in broker_styles)
+            table.append(1.0 if compatible else 0.3)
+        return self._level_lookup(table)
+
+    def _score_experience_match(self, user_responses: Dict[str, Any]):
+        """Score based on experience level matching"""
+        user_experience = _single_answer(user_responses, "experience_match")
+        if not user_experience:
+            return 0.5
+
+        user_experience = str(user_experience).lower()
+        compatible_levels = BrokerMatchingAlgorithm.EXPERIENCE_COMPATIBILITY.get(
+            user_experience, []
+        )
+        table = []
+        for level in self.EXPERIENCE_LEVELS + [None]:
+            broker_exp = BrokerMatchingAlgorithm.BROKER_EXPERIENCE_NAMES.get(
+                level, "intermediate"
+            )
+            if broker_exp not in compatible_levels:
+                table.append(0.3)
+            elif (user_experience, broker_exp) in (
+                ("none", "junior"),
+                ("expert", "expert"),
+            ):
+                table.append(1.0)
+            else:
+                table.append(0.8)
+        return self._level_lookup(table)
+
+    def _score_service_alignment(self, user_responses: Dict[str, Any]):
+        """Score based on service preferences alignment"""
+        user_services = _list_answer(user_responses, "service_alignment")
+        if not user_services:
+            return 0.5
+
+        matches = np.zeros(len(self.broker_ids), dtype=int)
+        for service in user_services:
+            service_str = str(service)
+            spec_needed = BrokerMatchingAlgorithm.SERVICE_TO_SPECIALIZATION.get(
+                service_str, service_str
+            )
+            matches += self._has_term(spec_needed)
+
+        return matches / len(user_services)
+
+    def _score_investment_amount(self, user_responses: Dict[str, Any]):
+        """Score based on investment amount compatibility"""
+        user_amount = _single_answer(user_responses, "investment_amount")
+        if not user_amount:
+            return 0.5
+
+        user_min = BrokerMatchingAlgorithm.AMOUNT_REQUIREMENTS.get(
+            str(user_amount).lower(), 0
+        )
+        table = []
+        for level in self.EXPERIENCE_LEVELS + [None]:
+            broker_min = BrokerMatchingAlgorithm.BROKER_MINIMUMS.get(level, 0)
+            if user_min >= broker_min:
+                table.append(1.0)
+            elif user_min >= broker_min * 0.5:
+                table.append(0.7)
+            else:
+                table.append(0.4)
+        return self._level_lookup(table)
+
+    def _score_sector_interests(self, user_responses: Dict[str, Any]):
+        """Score based on sector interest alignment"""
+        user_sectors = _list_answer(user_responses, "sector_interests")
+        if not user_sectors:
+            return 0.5
+
+        matches = np.zeros(len(self.broker_ids), dtype=int)
+        for sector in user_sectors:
+            matches += self._has_term(str(sector).lower())
+
+        return np.minimum(matches / len(user_sectors), 1.0)
+
+    def _score_communication_style(self, user_responses: Dict[str, Any]):
+        """Score based on communication preferences"""
+        comm_response = user_responses.get(
+            BrokerMatchingAlgorithm.QUESTION_TEXTS["communication_style"], {}
+        )
+        return 0.9 if comm_response else 0.8
+
+    def _score_certification_match(self, user_responses: Dict[str, Any]):
+        """Score based on certification preferences"""
+        user_certs = _list_answer(user_responses, "certification_match")
+        if user_certs is None:
+            return 0.8
+
+        if "no_preference" in [str(cert).lower() for cert in user_certs]:
+            return 1.0
+
+        return 0.7
+
+
+def _single_answer(user_responses: Dict[str, Any], criteria: str) -> Any:
+    """Extract a single-valued answer the way the per-broker scorers do"""
+    response = user_responses.get(BrokerMatchingAlgorithm.QUESTION_TEXTS[criteria], {})
+    if not response:
+        return None
+
+    answer = response.get("response")
+    if not answer:
+        return None
+
+    # Handle both list and string formats
+    if isinstance(answer, list):
+        answer = answer[0] if answer else None
+    elif isinstance(answer, dict):
+        answer = answer.get("answer", str(answer))
+
+    return answer
+
+
+def _list_answer(user_responses: Dict[str, Any], criteria: str) -> Any:
+    """Extract a multi-valued answer the way the per-broker scorers do"""
+    response = user_responses.get(BrokerMatchingAlgorithm.QUESTION_TEXTS[criteria], {})
+    if not response:
+        return None
+
+    answers = response.get("response", [])
+    if not answers:
+        return None
+
+    # Handle both list and string formats
+    if isinstance(answers, str):
+        try:
+            answers = json.loads(answers)
+        except (json.JSONDecodeError, TypeError):
+            answers = [answers]
+    elif not isinstance(answers, list):
+        answers = [str(answers)]
+
+    return answers
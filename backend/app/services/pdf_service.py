@@ -7,7 +7,7 @@ from tqdm import tqdm
 class PDFService:
     """Service for handling PDF operations"""
 
-    def extract_text_from_pdf(self, pdf_path):
+    def extract_text_from_pdf(self, pdf_path, show_progress=True):
         """Extract text content from a PDF file"""
         text = ""
         try:
@@ -19,6 +19,7 @@ class PDFService:
                 pbar = tqdm(
                     total=total_pages,
                     desc=f"Extracting text from {os.path.basename(pdf_path)}",
+                    disable=not show_progress,
                 )
 
                 # Process each page with progress
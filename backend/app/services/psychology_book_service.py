@@ -21,6 +21,8 @@ except ImportError:
     logging.warning("PyPDF2 not installed. PDF reading disabled.")
 
 from app.ai.gemini_service import GeminiService
+from app.ai.token_tracker import FEATURE_PSYCHOLOGY_INSIGHTS
+from app.services.book_corpus import get_book_corpus
 
 logger = logging.getLogger(__name__)
 
@@ -28,16 +30,19 @@ logger = logging.getLogger(__name__)
 class PsychologyBookService:
     """Service for extracting and using psychology insights from books"""
 
+    # Book excerpts added to each question prompt, and their maximum length
+    EXCERPTS_PER_QUESTION = 2
+    MAX_EXCERPT_CHARS = 800
+
     def __init__(self):
         self.gemini_service = GeminiService()
 
         # Fix path resolution for the backend directory structure
         backend_dir = Path(__file__).parent.parent.parent  # Go up to backend/ directory
         self.books_dir = backend_dir / "data" / "books"
-        self.cache_dir = backend_dir / "data" / "cache"
 
-        # Create cache directory with parents if it doesn't exist
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Pre-extracted book text (None until scripts/build_book_corpus.py runs)
+        self.corpus = get_book_corpus()
 
         # Initialize book metadata
         self.book_metadata = {
@@ -168,6 +173,13 @@ class PsychologyBookService:
         - Create emotional engagement without being verbose
         """
 
+        excerpts = self._get_book_excerpts(f"{topic} {category}")
+        if excerpts:
+            prompt += (
+                "\n\nRelevant passages from the psychology books "
+                "(draw on them, don't quote them):\n" + "\n\n".join(excerpts)
+            )
+
         if existing_questions:
             prompt += f"\n\nAvoid similarity to these existing questions:\n{existing_questions}"
 
@@ -235,12 +247,23 @@ class PsychologyBookService:
             """
 
         try:
-            result = await self.gemini_service.generate_json(prompt)
+            result = await self.gemini_service.generate_json(
+                prompt, feature=FEATURE_PSYCHOLOGY_INSIGHTS
+            )
             return result
         except Exception as e:
             logger.error(f"Error generating psychology-enhanced question: {str(e)}")
             return None
 
+    def _get_book_excerpts(self, text: str) -> List[str]:
+        """Book passages most relevant to text, from the pre-extracted corpus"""
+        if self.corpus is None:
+            return []
+        return [
+            f"[{excerpt.book}] {excerpt.text[: self.MAX_EXCERPT_CHARS]}"
+            for excerpt in self.corpus.search(text, limit=self.EXCERPTS_PER_QUESTION)
+        ]
+
     def _get_relevant_psychology(
         self, topic: str, insights: Dict[str, Any]
     ) -> Dict[str, Any]:
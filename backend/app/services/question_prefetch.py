@@ -0,0 +1,189 @@
+"""
+Speculative Question Prefetch
+
+While a user reads adaptive quiz question N, question N+1 is generated in
+the background from its question plan entry. When the answer arrives the
+speculative question is used as long as the inputs it was generated from
+(topic, category, type, order and the questions already asked) still
+match; otherwise it is thrown away and the question is generated again.
+
+In-flight generations are tracked per worker. Finished questions are also
+published to the Redis cache, through the request-path client so the event
+loop is not blocked, and a different worker serving the next answer can
+reuse them.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+from collections import OrderedDict
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+
+from app.core.async_redis_client import maybe_await
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PrefetchKey = Tuple[str, int]
+
+
+def question_signature(spec: Dict[str, Any]) -> str:
+    """Stable hash of the inputs a question is generated from"""
+    payload = json.dumps(spec, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class QuestionPrefetcher:
+    """
+    Tracks speculative question generations keyed by (session_id, order)
+    """
+
+    CACHE_PREFIX = "quiz_prefetch"
+
+    def __init__(self, max_pending: int = 1000, ttl: int = 900, redis_client=None):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.redis = redis_client
+        self._pending: "OrderedDict[PrefetchKey, Tuple[str, asyncio.Task]]" = (
+            OrderedDict()
+        )
+        # Publishes still writing to Redis, referenced until they finish
+        self._publishing: Set[asyncio.Task] = set()
+        self.stats = {"scheduled": 0, "hits": 0, "misses": 0, "discarded": 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def schedule(
+        self,
+        session_id: str,
+        order: int,
+        spec: Dict[str, Any],
+        generate: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ):
+        """
+        Start generating a question in the background
+
+        Args:
+            session_id: Quiz session the question belongs to
+            order: Question number within the session
+            spec: Inputs the question is generated from
+            generate: Coroutine factory producing the question data
+        """
+        key = (session_id, order)
+        self.discard(session_id, order)
+
+        signature = question_signature(spec)
+        task = asyncio.ensure_future(generate())
+        task.add_done_callback(lambda done: self._publish(key, signature, done))
+        self._pending[key] = (signature, task)
+        self.stats["scheduled"] += 1
+
+        while len(self._pending) > self.max_pending:
+            _, (_, oldest) = self._pending.popitem(last=False)
+            oldest.cancel()
+
+    async def take(
+        self, session_id: str, order: int, spec: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Claim a speculative question if it was generated from the same inputs
+
+        Waits for an in-flight generation on this worker. Returns None when
+        there is no usable speculative question.
+        """
+        key = (session_id, order)
+        signature = question_signature(spec)
+        question = None
+
+        entry = self._pending.pop(key, None)
+        if entry is not None:
+            expected, task = entry
+            if expected != signature:
+                task.cancel()
+                self.stats["discarded"] += 1
+                return None
+            try:
+                question = await task
+            except asyncio.CancelledError:
+                question = None
+            except Exception as e:
+                logger.warning(f"Speculative question generation failed: {str(e)}")
+                question = None
+        else:
+            question = await self._read_published(key, signature)
+
+        if self.redis is not None:
+            await maybe_await(self.redis.cache_delete(self._cache_key(key)))
+
+        if question is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return copy.deepcopy(question)
+
+    def discard(self, session_id: str, order: int):
+        """Cancel a pending speculative question"""
+        entry = self._pending.pop((session_id, order), None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def _publish(self, key: PrefetchKey, signature: str, task: asyncio.Task):
+        """Share a finished question with other workers in the background"""
+        if self.redis is None or task.cancelled() or task.exception() is not None:
+            return
+        question = task.result()
+        if question:
+            publish = asyncio.ensure_future(
+                maybe_await(
+                    self.redis.cache_set(
+                        self._cache_key(key),
+                        {"signature": signature, "question": question},
+                        self.ttl,
+                    )
+                )
+            )
+            self._publishing.add(publish)
+            publish.add_done_callback(self._publishing.discard)
+
+    async def _read_published(
+        self, key: PrefetchKey, signature: str
+    ) -> Optional[Dict[str, Any]]:
+        """Question published by another worker, if its inputs still match"""
+        if self.redis is None:
+            return None
+        cached = await maybe_await(self.redis.cache_get(self._cache_key(key)))
+        if not isinstance(cached, dict):
+            return None
+        if cached.get("signature") != signature:
+            self.stats["discarded"] += 1
+            return None
+        return cached.get("question")
+
+    def _cache_key(self, key: PrefetchKey) -> str:
+        session_id, order = key
+        return f"{self.CACHE_PREFIX}:{session_id}:{order}"
+
+
+_prefetcher: Optional[QuestionPrefetcher] = None
+
+
+def get_question_prefetcher() -> Optional[QuestionPrefetcher]:
+    """Process-wide prefetcher, or None when prefetching is disabled"""
+    global _prefetcher
+
+    if not settings.ADAPTIVE_QUIZ_PREFETCH:
+        return None
+    if _prefetcher is None:
+        redis_client = None
+        if settings.QUIZ_SESSION_BACKEND == "redis":
+            from app.core.async_redis_client import get_request_redis
+
+            redis_client = get_request_redis()
+        _prefetcher = QuestionPrefetcher(
+            ttl=settings.ADAPTIVE_QUIZ_PREFETCH_TTL_SECONDS,
+            redis_client=redis_client,
+        )
+    return _prefetcher
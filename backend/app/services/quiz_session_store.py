@@ -0,0 +1,301 @@
+"""
+Adaptive Quiz Session Store
+
+Keeps in-progress adaptive quiz state outside the per-request
+AdaptiveQuizService instance, so any worker can serve the next /respond
+without rebuilding the session from the database.
+
+State is kept as a compact blob (compact JSON, zlib-compressed, base64)
+next to a version number. Writes are compare-and-set against the version
+the caller read, so two concurrent answers to the same question cannot
+both advance the session.
+
+Backends:
+- MemoryQuizSessionStore: per-worker LRU with TTL
+- RedisQuizSessionStore: shared across workers via RedisClient sessions
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import base64
+import json
+import logging
+import threading
+import time
+import zlib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QuizSessionConflictError(Exception):
+    """Raised when a session changed since the caller read it"""
+
+    def __init__(self, session_id: str, expected_version: Optional[int]):
+        super().__init__(
+            f"Quiz session {session_id} was modified concurrently "
+            f"(expected version {expected_version})"
+        )
+        self.session_id = session_id
+        self.expected_version = expected_version
+
+
+class QuizSessionStoreUnavailableError(Exception):
+    """Raised when the store backend cannot be reached"""
+
+
+def encode_quiz_state(state: Dict[str, Any]) -> str:
+    """Serialize quiz state to a compact string blob"""
+    raw = json.dumps(state, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+
+
+def decode_quiz_state(blob: str) -> Dict[str, Any]:
+    """Inverse of encode_quiz_state"""
+    return json.loads(zlib.decompress(base64.b64decode(blob)).decode("utf-8"))
+
+
+class QuizSessionStore(ABC):
+    """
+    Versioned storage for adaptive quiz state
+
+    A quiz state is the dict returned by AdaptiveQuizService when a quiz is
+    started or answered: {"session": ..., "question": ..., "progress": ...}.
+    The session's "session_id" and "user_id" identify it and its "version"
+    is maintained by the store.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    def load(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load quiz state with session["version"] set, or None"""
+        stored = self._read(session_id)
+        if stored is None:
+            return None
+        version, blob = stored
+        try:
+            state = decode_quiz_state(blob)
+        except (ValueError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable quiz session {session_id}: {e}")
+            return None
+        state["session"]["version"] = version
+        return state
+
+    def save(
+        self,
+        state: Dict[str, Any],
+        expected_version: Optional[int] = None,
+        track_user: bool = True,
+    ) -> int:
+        """
+        Store quiz state if the stored version still matches
+
+        Args:
+            state: Quiz state containing a "session" dict
+            expected_version: Version the caller loaded (0 for a new
+                session), or None to overwrite unconditionally
+            track_user: Remember this as the user's latest session
+
+        Returns:
+            The new version, also written to state["session"]["version"]
+
+        Raises:
+            QuizSessionConflictError: The stored version has moved on
+        """
+        session = state["session"]
+        session_id = session["session_id"]
+        # The version lives next to the blob, not inside it
+        payload = dict(
+            state, session={k: v for k, v in session.items() if k != "version"}
+        )
+        version = self._compare_and_set(
+            session_id, encode_quiz_state(payload), expected_version
+        )
+        if not version:
+            raise QuizSessionConflictError(session_id, expected_version)
+
+        session["version"] = version
+        if track_user and session.get("user_id"):
+            self._set_user_session(session["user_id"], session_id)
+        return version
+
+    @abstractmethod
+    def find_user_session(self, user_id: str) -> Optional[str]:
+        """Session ID of the user's most recently saved quiz"""
+
+    @abstractmethod
+    def delete(self, session_id: str, user_id: Optional[str] = None):
+        """Remove a session and, if given, the user's pointer to it"""
+
+    @abstractmethod
+    def _read(self, session_id: str) -> Optional[Tuple[int, str]]:
+        """Stored (version, blob) of a session, or None"""
+
+    @abstractmethod
+    def _compare_and_set(
+        self, session_id: str, blob: str, expected_version: Optional[int]
+    ) -> int:
+        """Store blob if the version matches; the new version, or 0 if not"""
+
+    @abstractmethod
+    def _set_user_session(self, user_id: str, session_id: str):
+        """Remember session_id as the user's latest session"""
+
+
+class MemoryQuizSessionStore(QuizSessionStore):
+    """
+    Per-worker LRU session store with TTL
+
+    Only consistent within one process; use RedisQuizSessionStore when
+    running several workers.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: int = 86400):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # session_id -> (version, blob, expires_at)
+        self._sessions: "OrderedDict[str, Tuple[int, str, float]]" = OrderedDict()
+        # user_id -> (session_id, expires_at)
+        self._user_sessions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def find_user_session(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            entry = self._get_live(self._user_sessions, user_id)
+            return entry[0] if entry else None
+
+    def delete(self, session_id: str, user_id: Optional[str] = None):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            if user_id is not None:
+                self._user_sessions.pop(user_id, None)
+
+    def _read(self, session_id: str) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            entry = self._get_live(self._sessions, session_id)
+            return entry[:2] if entry else None
+
+    def _compare_and_set(
+        self, session_id: str, blob: str, expected_version: Optional[int]
+    ) -> int:
+        with self._lock:
+            entry = self._get_live(self._sessions, session_id)
+            version = entry[0] if entry else 0
+            if expected_version is not None and expected_version != version:
+                return 0
+            self._put(self._sessions, session_id, (version + 1, blob, self._expiry()))
+            return version + 1
+
+    def _set_user_session(self, user_id: str, session_id: str):
+        with self._lock:
+            self._put(self._user_sessions, user_id, (session_id, self._expiry()))
+
+    def _expiry(self) -> float:
+        return time.monotonic() + self.ttl
+
+    def _get_live(self, entries: OrderedDict, key: str):
+        """Entry for key if present and not expired, marking it recently used"""
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[-1] <= time.monotonic():
+            del entries[key]
+            return None
+        entries.move_to_end(key)
+        return entry
+
+    def _put(self, entries: OrderedDict, key: str, entry: tuple):
+        entries[key] = entry
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+class RedisQuizSessionStore(QuizSessionStore):
+    """
+    Redis-backed session store shared by all workers
+
+    Sessions live under RedisClient's session namespace as
+    "<version>:<blob>"; the compare-and-set runs as a Lua script so the
+    version check and write are a single atomic step.
+    """
+
+    KEY_PREFIX = "adaptive_quiz:"
+    USER_KEY_PREFIX = "adaptive_quiz_user:"
+
+    def __init__(self, redis_client, ttl: int = 86400):
+        super().__init__(ttl)
+        self.redis = redis_client
+
+    def find_user_session(self, user_id: str) -> Optional[str]:
+        pointer = self.redis.session_get(f"{self.USER_KEY_PREFIX}{user_id}")
+        if isinstance(pointer, dict):
+            return pointer.get("session_id")
+        return None
+
+    def delete(self, session_id: str, user_id: Optional[str] = None):
+        self.redis.session_delete(f"{self.KEY_PREFIX}{session_id}")
+        if user_id is not None:
+            self.redis.session_delete(f"{self.USER_KEY_PREFIX}{user_id}")
+
+    def _read(self, session_id: str) -> Optional[Tuple[int, str]]:
+        value = self.redis.session_get(f"{self.KEY_PREFIX}{session_id}")
+        if not isinstance(value, str) or ":" not in value:
+            return None
+        version, _, blob = value.partition(":")
+        return int(version), blob
+
+    def _compare_and_set(
+        self, session_id: str, blob: str, expected_version: Optional[int]
+    ) -> int:
+        version = self.redis.session_compare_and_set(
+            f"{self.KEY_PREFIX}{session_id}", blob, expected_version, self.ttl
+        )
+        if version is None:
+            raise QuizSessionStoreUnavailableError("Redis is unavailable")
+        return version
+
+    def _set_user_session(self, user_id: str, session_id: str):
+        self.redis.session_set(
+            f"{self.USER_KEY_PREFIX}{user_id}", {"session_id": session_id}, self.ttl
+        )
+
+
+# Process-wide memory store, also used while Redis is unreachable
+_memory_store: Optional[MemoryQuizSessionStore] = None
+_redis_store: Optional[RedisQuizSessionStore] = None
+
+
+def get_quiz_session_store() -> QuizSessionStore:
+    """
+    Get the configured quiz session store
+
+    Falls back to the per-worker memory store when Redis is not configured
+    or currently unreachable.
+    """
+    global _memory_store, _redis_store
+
+    if settings.QUIZ_SESSION_BACKEND == "redis":
+        from app.core.redis_client import get_redis
+
+        redis = get_redis()
+        if redis.is_connected():
+            if _redis_store is None or _redis_store.redis is not redis:
+                _redis_store = RedisQuizSessionStore(
+                    redis, ttl=settings.QUIZ_SESSION_TTL_SECONDS
+                )
+            return _redis_store
+        logger.debug("Redis unavailable, using in-memory quiz session store")
+
+    if _memory_store is None:
+        _memory_store = MemoryQuizSessionStore(
+            max_entries=settings.QUIZ_SESSION_MAX_ENTRIES,
+            ttl=settings.QUIZ_SESSION_TTL_SECONDS,
+        )
+    return _memory_store
@@ -0,0 +1,136 @@
+"""
+Stage Graph Executor
+
+Runs a small dependency graph of analysis stages. Every stage starts as
+soon as the stages it depends on have finished, so independent stages
+(typically LLM calls) run concurrently. Slow or failing stages can be
+given a timeout and a fallback that produces a degraded result instead of
+failing the whole run.
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import asyncio
+import inspect
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class Stage(NamedTuple):
+    """A node in the graph; func and fallback receive the dependency values"""
+
+    name: str
+    func: Callable[..., Any]
+    deps: Sequence[str]
+    timeout: Optional[float]
+    fallback: Optional[Callable[..., Any]]
+
+
+class StageRun(NamedTuple):
+    """Outcome of a graph run"""
+
+    results: Dict[str, Any]
+    # Stages whose fallback was used, in completion order
+    degraded: List[str]
+    # Seconds spent in each stage
+    durations: Dict[str, float]
+
+
+class StageGraph:
+    """
+    Dependency-ordered executor for sync and async stages
+    """
+
+    def __init__(self, inputs: Sequence[str] = ()):
+        """
+        Args:
+            inputs: Names of the values passed to run() that stages may depend on
+        """
+        self.inputs = tuple(inputs)
+        self.stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Sequence[str] = (),
+        timeout: Optional[float] = None,
+        fallback: Optional[Callable[..., Any]] = None,
+    ) -> "StageGraph":
+        """
+        Add a stage; dependencies must be inputs or stages added earlier
+
+        Args:
+            name: Stage name, also the key of its result
+            func: Sync function or coroutine function called with the
+                dependency values in order
+            deps: Names of inputs or stages this stage needs
+            timeout: Seconds before an async stage is abandoned
+            fallback: Called with the same arguments when the stage times out
+                or raises; without one the error fails the run
+
+        Returns:
+            The graph, for chaining
+        """
+        if name in self.stages or name in self.inputs:
+            raise ValueError(f"Duplicate stage name: {name}")
+        unknown = [
+            dep for dep in deps if dep not in self.stages and dep not in self.inputs
+        ]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {unknown}")
+        self.stages[name] = Stage(name, func, tuple(deps), timeout, fallback)
+        return self
+
+    async def run(self, **inputs) -> StageRun:
+        """
+        Execute all stages
+
+        Raises:
+            Exception: The error of the first stage that failed without a
+                fallback; remaining stages are cancelled
+        """
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing graph inputs: {missing}")
+
+        degraded: List[str] = []
+        durations: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: Stage) -> Any:
+            args = [
+                await tasks[dep] if dep in tasks else inputs[dep] for dep in stage.deps
+            ]
+            started = time.perf_counter()
+            try:
+                result = stage.func(*args)
+                if inspect.isawaitable(result):
+                    result = await asyncio.wait_for(result, stage.timeout)
+                return result
+            except Exception as e:
+                if stage.fallback is None:
+                    raise
+                reason = (
+                    f"timed out after {stage.timeout}s"
+                    if isinstance(e, asyncio.TimeoutError)
+                    else str(e)
+                )
+                logger.warning(f"Stage {stage.name} degraded to fallback: {reason}")
+                degraded.append(stage.name)
+                return stage.fallback(*args)
+            finally:
+                durations[stage.name] = round(time.perf_counter() - started, 4)
+
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        try:
+            values = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        return StageRun(dict(zip(tasks, values)), degraded, durations)
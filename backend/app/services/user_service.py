@@ -5,6 +5,7 @@ from uuid import UUID
 from app.database.models import User, UserType
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import get_password_hash, verify_password
+from app.services.admin_metrics import invalidate_admin_metrics
 
 
 def get_user(db: Session, user_id: UUID) -> Optional[User]:
@@ -74,6 +75,7 @@ def delete_user(db: Session, user_id: UUID) -> None:
     db_user = get_user(db, user_id)
     db_user.soft_delete()
     db.commit()
+    invalidate_admin_metrics()
 
 
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
@@ -142,15 +142,13 @@ def test_matching_algorithm():
         print("-" * 60)
 
         for i, (broker, score) in enumerate(matches, 1):
-            print(f"\n{i}. {broker.user.full_name} - {broker.company_name}")
+            print(f"\n{i}. {broker.full_name} - {broker.company_name}")
             print(f"   Match Score: {score:.3f} ({score*100:.1f}%)")
             print(
                 f"   Experience: {broker.experience_level.value} ({broker.years_of_experience} years)"
             )
             print(f"   Rating: {broker.average_rating}/5.0")
-            print(
-                f"   Specializations: {', '.join([s.name for s in broker.specializations])}"
-            )
+            print(f"   Specializations: {', '.join(broker.specializations)}")
 
         # Test the generate_broker_matches function
         print("\n" + "=" * 60)
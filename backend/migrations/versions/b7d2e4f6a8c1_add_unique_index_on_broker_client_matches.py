@@ -0,0 +1,73 @@
+"""Add unique index on broker_client_matches user/broker pair
+
+Revision ID: b7d2e4f6a8c1
+Revises: ee1dbbcf1c4a
+Create Date: 2025-06-20 10:12:41.118204
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b7d2e4f6a8c1"
+down_revision = "ee1dbbcf1c4a"
+branch_labels = None
+depends_on = None
+
+
+# Rows that lose to another row for the same (user_id, broker_id): live rows
+# win over soft-deleted ones, then the newest row wins
+DUPLICATE_MATCH_IDS = sa.text("""
+    SELECT DISTINCT m.id
+    FROM broker_client_matches m
+    JOIN broker_client_matches k
+      ON k.user_id = m.user_id
+     AND k.broker_id = m.broker_id
+     AND k.id <> m.id
+     AND (
+          (k.is_deleted IS NULL AND m.is_deleted IS NOT NULL)
+          OR (
+              (k.is_deleted IS NULL) = (m.is_deleted IS NULL)
+              AND (
+                  k.created_at > m.created_at
+                  OR (k.created_at = m.created_at AND k.id > m.id)
+              )
+          )
+     )
+    """)
+
+DELETE_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    # Remove duplicate matches created before persistence became upsert-based.
+    # The losers are selected up front: MySQL rejects a DELETE whose subquery
+    # reads the table being deleted from (error 1093).
+    bind = op.get_bind()
+    duplicate_ids = [row[0] for row in bind.execute(DUPLICATE_MATCH_IDS)]
+    for start in range(0, len(duplicate_ids), DELETE_BATCH_SIZE):
+        batch = duplicate_ids[start : start + DELETE_BATCH_SIZE]
+        for table, column in (
+            ("match_metrics", "match_id"),
+            ("broker_client_matches", "id"),
+        ):
+            bind.execute(
+                sa.text(f"DELETE FROM {table} WHERE {column} IN :ids").bindparams(
+                    sa.bindparam("ids", expanding=True)
+                ),
+                {"ids": batch},
+            )
+
+    op.create_index(
+        "uq_broker_client_matches_user_broker",
+        "broker_client_matches",
+        ["user_id", "broker_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "uq_broker_client_matches_user_broker", table_name="broker_client_matches"
+    )
@@ -0,0 +1,88 @@
+"""Add daily analytics rollup tables
+
+Revision ID: c4e8a1d2f3b5
+Revises: b7d2e4f6a8c1
+Create Date: 2025-07-02 09:41:17.502913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1d2f3b5'
+down_revision = 'b7d2e4f6a8c1'
+branch_labels = None
+depends_on = None
+
+
+USER_TYPES = ('CLIENT', 'BROKER', 'ADMIN')
+MATCH_STATUSES = ('PENDING', 'ACCEPTED', 'REJECTED', 'COMPLETED', 'CANCELLED')
+
+# Source tables scanned by updated_at to find changed rows
+SOURCE_TABLES = (
+    'users',
+    'broker_client_matches',
+    'user_quiz_responses',
+    'user_activities',
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rollup_watermarks',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('processed_until', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    )
+    op.create_table(
+        'daily_registration_rollups',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column(
+            'user_type', sa.Enum(*USER_TYPES, name='usertype'), primary_key=True
+        ),
+        sa.Column('is_verified', sa.Boolean(), primary_key=True),
+        sa.Column('users', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'daily_match_rollups',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('broker_id', sa.String(36), primary_key=True),
+        sa.Column(
+            'status', sa.Enum(*MATCH_STATUSES, name='matchstatus'), primary_key=True
+        ),
+        sa.Column('score_bucket', sa.String(20), primary_key=True),
+        sa.Column('matches', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'daily_quiz_question_rollups',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('question_id', sa.String(36), primary_key=True),
+        sa.Column('responses', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'daily_quiz_user_rollups',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('user_id', sa.String(36), primary_key=True),
+        sa.Column('responses', sa.Integer(), nullable=False),
+    )
+    op.create_table(
+        'daily_user_activity_rollups',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('user_id', sa.String(36), primary_key=True),
+        sa.Column('activities', sa.Integer(), nullable=False),
+    )
+
+    for table in SOURCE_TABLES:
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+
+def downgrade() -> None:
+    for table in SOURCE_TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+
+    op.drop_table('daily_user_activity_rollups')
+    op.drop_table('daily_quiz_user_rollups')
+    op.drop_table('daily_quiz_question_rollups')
+    op.drop_table('daily_match_rollups')
+    op.drop_table('daily_registration_rollups')
+    op.drop_table('rollup_watermarks')
@@ -0,0 +1,31 @@
+"""Add funnel daily snapshots
+
+Revision ID: d9f3b6c1e7a2
+Revises: c4e8a1d2f3b5
+Create Date: 2025-07-09 14:05:52.871406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd9f3b6c1e7a2'
+down_revision = 'c4e8a1d2f3b5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'funnel_daily_snapshots',
+        sa.Column('day', sa.Date(), primary_key=True),
+        sa.Column('registered', sa.Integer(), nullable=False),
+        sa.Column('quiz_completed', sa.Integer(), nullable=False),
+        sa.Column('first_match', sa.Integer(), nullable=False),
+        sa.Column('match_accepted', sa.Integer(), nullable=False),
+        sa.Column('completed', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('funnel_daily_snapshots')
@@ -0,0 +1,33 @@
+"""Add LLM usage hourly rollups
+
+Revision ID: e6b2d8f4a1c7
+Revises: d9f3b6c1e7a2
+Create Date: 2025-07-14 10:22:37.508193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e6b2d8f4a1c7'
+down_revision = 'd9f3b6c1e7a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_usage_hourly_rollups',
+        sa.Column('hour', sa.DateTime(), primary_key=True),
+        sa.Column('model', sa.String(length=100), primary_key=True),
+        sa.Column('feature', sa.String(length=50), primary_key=True),
+        sa.Column('calls', sa.Integer(), nullable=False),
+        sa.Column('estimated_calls', sa.Integer(), nullable=False),
+        sa.Column('input_tokens', sa.Integer(), nullable=False),
+        sa.Column('output_tokens', sa.Integer(), nullable=False),
+        sa.Column('cost_usd', sa.Float(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('llm_usage_hourly_rollups')
@@ -0,0 +1,105 @@
+"""
+Analytics Overhead Benchmark
+
+Measures requests/sec through SecurityMiddleware with request analytics
+enabled and disabled, against the Redis server configured by REDIS_URL.
+Counters are written under a "bench:ts" prefix with a short TTL so the
+real analytics series are left alone.
+
+Usage:
+    python scripts/benchmark_analytics.py --requests 2000 --concurrency 20
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+from fastapi import FastAPI
+
+# Add the parent directory to sys.path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from app.core.redis_client import RedisClient
+from app.core.security_middleware import SecurityMiddleware
+from app.core.timeseries import TimeSeriesStore, default_resolutions
+
+
+class BenchmarkMiddleware(SecurityMiddleware):
+    """SecurityMiddleware with rate limits high enough not to interfere."""
+
+    def __init__(self, app, redis_client=None, track_analytics=None):
+        super().__init__(app, redis_client, track_analytics)
+        self.rate_limits = {"default": {"limit": 10**9, "window": 60}}
+
+
+def build_app(redis_client: RedisClient, track_analytics: bool) -> FastAPI:
+    """Minimal app whose only cost is the middleware."""
+    app = FastAPI()
+
+    @app.get("/api/v1/brokers/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.add_middleware(
+        BenchmarkMiddleware,
+        redis_client=redis_client,
+        track_analytics=track_analytics,
+    )
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> float:
+    """Send requests through the app in-process and return requests/sec."""
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark"
+    ) as client:
+
+        async def send():
+            async with semaphore:
+                response = await client.get("/api/v1/brokers/ping")
+                response.raise_for_status()
+
+        # Warm up connections and code paths
+        await asyncio.gather(*(send() for _ in range(min(50, requests))))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send() for _ in range(requests)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    timeseries = TimeSeriesStore(
+        "bench:ts",
+        [resolution._replace(ttl=300) for resolution in default_resolutions()],
+    )
+    redis_client = RedisClient(timeseries=timeseries)
+    if not redis_client.is_connected():
+        print("Redis is not reachable; set REDIS_URL to benchmark against a server")
+        sys.exit(1)
+
+    results = {}
+    for label, enabled in (("analytics disabled", False), ("analytics enabled", True)):
+        app = build_app(redis_client, enabled)
+        results[label] = asyncio.run(measure(app, args.requests, args.concurrency))
+        print(f"{label:>20}: {results[label]:8.1f} req/s")
+
+    overhead = 1 - results["analytics enabled"] / results["analytics disabled"]
+    print(f"{'overhead':>20}: {overhead * 100:7.1f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 """
 Book Questions Generator
 
-This script reads PDF books from the data folder, allows selecting one,
-and generates psychological questions based on its content.
+This script reads books from the pre-extracted book corpus (built from the
+PDFs in the data folder by scripts/build_book_corpus.py), allows selecting
+one, and generates psychological questions based on its content.
 """
 
 import os
@@ -18,7 +19,7 @@ from tqdm import tqdm
 sys.path.append(str(Path(__file__).parent.parent))
 
 from dotenv import load_dotenv
-from app.services.pdf_service import PDFService
+from app.services.book_corpus import get_book_corpus
 from app.core.config import settings
 
 # Load environment variables
@@ -34,9 +35,6 @@ def main():
     print("Book Questions Generator")
     print("========================\n")
 
-    # Initialize PDF service
-    pdf_service = PDFService()
-
     # Get book directory path
     book_dir = settings.BOOK_DIRECTORY
     if not os.path.exists(book_dir):
@@ -46,12 +44,19 @@ def main():
         print(f"Please place PDF books in: {os.path.abspath(book_dir)}")
         return
 
-    # Process all books in the directory - now with tqdm progress in pdf_service
-    print(f"Reading books from: {os.path.abspath(book_dir)}")
-    books = pdf_service.process_pdf_directory(book_dir)
+    # Books are extracted once by scripts/build_book_corpus.py
+    corpus = get_book_corpus()
+    if corpus is None:
+        print(f"No book corpus found in: {settings.BOOK_CORPUS_DIRECTORY}")
+        print("Build it with: python scripts/build_book_corpus.py")
+        return
+
+    print(f"Reading books from: {os.path.abspath(corpus.directory)}")
+    books = [book for book in corpus.books if book["segments"]]
 
     if not books:
         print("No PDF books found! Please add some PDFs to the data/books directory.")
+        print("Then rebuild the corpus: python scripts/build_book_corpus.py")
         return
 
     # Display available books
@@ -75,12 +80,10 @@ def main():
     # Generate questions from the selected book
     print(f"\nGenerating questions for: {selected_book['title']}")
 
-    # Get a section of the book content
-    content = selected_book["content"]
-    if len(content) > MAX_CONTENT_LENGTH:
-        # Take a random section for variety
-        start = random.randint(0, len(content) - MAX_CONTENT_LENGTH)
-        content = content[start : start + MAX_CONTENT_LENGTH]
+    # Take a random section of the book for variety
+    first = selected_book["first_segment"]
+    segment = random.randrange(first, first + selected_book["segments"])
+    content = corpus.segment(segment)[:MAX_CONTENT_LENGTH]
 
     # Prepare request data
     request_data = {
@@ -0,0 +1,61 @@
+"""
+Book Corpus Build
+
+Extracts the psychology book PDFs once, in parallel, into the indexed
+corpus the server memory-maps for book excerpts. Run it after adding or
+replacing PDFs; unchanged books are reused from the existing corpus
+unless --rebuild is given. Restart the server to pick up a new corpus.
+
+Usage:
+    python scripts/build_book_corpus.py [--books DIR] [--output DIR]
+        [--workers N] [--rebuild]
+"""
+
+import sys
+from pathlib import Path
+import argparse
+import logging
+
+# Add the parent directory to sys.path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from app.core.config import settings
+from app.services.book_corpus import build_corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--books",
+        default=settings.BOOK_DIRECTORY,
+        help="Directory of PDF books",
+    )
+    parser.add_argument(
+        "--output",
+        default=settings.BOOK_CORPUS_DIRECTORY,
+        help="Corpus directory to write",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Extraction processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Extract every PDF, even if unchanged",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    counts = build_corpus(args.books, args.output, args.workers, args.rebuild)
+    print(
+        f"{counts['books']} books ({counts['extracted']} extracted), "
+        f"{counts['segments']} segments written to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Event Counter Migration
+
+Copies the loose analytics counters written before the time series store
+(events:{type}:{date}, events:{type}:{date}:{hour} and
+user_events:{user}:{date}) into the time series hashes, so dashboards keep
+their history. Daily counts fill the day and month series, hourly counts
+the hour series. Counts are added, so the script records that it ran and
+refuses to run twice unless --force is given.
+
+Usage:
+    python scripts/migrate_event_counters.py [--delete]
+"""
+
+import sys
+from pathlib import Path
+import argparse
+from datetime import datetime
+
+# Add the parent directory to sys.path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from app.core.redis_client import RedisClient
+from app.core.timeseries import DAY, HOUR, MONTH, TimeSeriesStore
+
+MIGRATED_MARKER = "ts:migrated_event_counters"
+BATCH_SIZE = 500
+
+
+def parse_legacy_key(key: str):
+    """
+    (series, resolutions, time) for a legacy counter key, or None
+
+    Daily counters map to the day and month series, hourly ones to the
+    hour series.
+    """
+    parts = key.split(":")
+    try:
+        if parts[0] == "events" and len(parts) == 3:
+            return parts[1], (DAY, MONTH), datetime.strptime(parts[2], "%Y-%m-%d")
+        if parts[0] == "events" and len(parts) == 4:
+            when = datetime.strptime(f"{parts[2]}:{parts[3]}", "%Y-%m-%d:%H")
+            return parts[1], (HOUR,), when
+        if parts[0] == "user_events" and len(parts) == 3:
+            series = TimeSeriesStore.user_series(parts[1])
+            return series, (DAY,), datetime.strptime(parts[2], "%Y-%m-%d")
+    except ValueError:
+        pass
+    return None
+
+
+def migrate(redis_client: RedisClient, delete: bool) -> int:
+    """Copy legacy counters into the time series; returns keys migrated"""
+    store = redis_client.timeseries
+    client = redis_client._client
+    migrated = 0
+    pipe = client.pipeline(transaction=False)
+    legacy_keys = []
+
+    for pattern in ("events:*", "user_events:*"):
+        for key in client.scan_iter(match=pattern, count=BATCH_SIZE):
+            parsed = parse_legacy_key(key)
+            if parsed is None:
+                continue
+            value = client.get(key)
+            if not value:
+                continue
+
+            series, resolutions, when = parsed
+            for name in resolutions:
+                resolution = store.resolution(name)
+                target = store.series_key(series, resolution, when)
+                pipe.hincrby(target, when.strftime(resolution.field), int(value))
+                if resolution.ttl:
+                    pipe.expire(target, resolution.ttl)
+            legacy_keys.append(key)
+            migrated += 1
+
+            if len(legacy_keys) >= BATCH_SIZE:
+                pipe.execute()
+                if delete:
+                    client.delete(*legacy_keys)
+                legacy_keys = []
+
+    pipe.execute()
+    if delete and legacy_keys:
+        client.delete(*legacy_keys)
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--delete", action="store_true", help="Delete legacy keys once copied"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Run even if already migrated"
+    )
+    args = parser.parse_args()
+
+    redis_client = RedisClient()
+    if not redis_client.is_connected():
+        print("Redis is not reachable; check REDIS_URL")
+        sys.exit(1)
+    if redis_client.exists(MIGRATED_MARKER) and not args.force:
+        print("Counters were already migrated; use --force to add them again")
+        sys.exit(1)
+
+    migrated = migrate(redis_client, args.delete)
+    redis_client.set(MIGRATED_MARKER, datetime.now().isoformat())
+    print(f"Migrated {migrated} counters into the time series store")
+
+
+if __name__ == "__main__":
+    main()
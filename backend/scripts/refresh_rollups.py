@@ -0,0 +1,58 @@
+"""
+Analytics Rollup Refresh
+
+Folds new and changed rows into the daily analytics rollup tables. The
+server refreshes them in the background; run this from cron when the
+in-process scheduler is disabled (ANALYTICS_ROLLUP_INTERVAL_SECONDS=0),
+or with --rebuild to recompute every rollup from scratch.
+
+Usage:
+    python scripts/refresh_rollups.py [--rebuild] [--only NAME ...]
+"""
+
+import sys
+from pathlib import Path
+import argparse
+
+# Add the parent directory to sys.path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from app.database.connection import SessionLocal
+from app.services.analytics_rollups import (
+    FUNNEL,
+    ROLLUPS,
+    refresh_rollups,
+    reset_rollups,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Drop all rollup rows and watermarks before refreshing",
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[spec.name for spec in ROLLUPS] + [FUNNEL],
+        help="Refresh only these rollups",
+    )
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.rebuild:
+            reset_rollups(db)
+        refreshed = refresh_rollups(db, args.only)
+    finally:
+        db.close()
+
+    for name, days in refreshed.items():
+        print(f"{name}: {days} days recomputed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Bulk Rematch Script
+
+Recomputes broker matches for all clients, e.g. after matching weights
+change or a batch of brokers gets verified. Progress is checkpointed so an
+interrupted run picks up where it left off when started again.
+"""
+
+import sys
+from pathlib import Path
+import argparse
+
+from tqdm import tqdm
+
+# Add the parent directory to sys.path
+parent_dir = Path(__file__).parent.parent
+sys.path.append(str(parent_dir))
+
+from app.database.connection import SessionLocal
+from app.services.bulk_rematch import rematch_all_clients
+
+DEFAULT_CHECKPOINT = parent_dir / "data" / "cache" / "rematch_checkpoint.json"
+
+
+def run_rematch(args):
+    """Run the bulk rematch with a progress bar."""
+    db = SessionLocal()
+    progress_bar = None
+
+    def report(state):
+        nonlocal progress_bar
+        if progress_bar is None:
+            progress_bar = tqdm(
+                total=state["total"], desc="Rematching clients", unit="client"
+            )
+        progress_bar.n = state["processed"]
+        progress_bar.set_postfix(
+            inserted=state["inserted"],
+            updated=state["updated"],
+            retired=state["retired"],
+        )
+        progress_bar.refresh()
+
+    try:
+        state = rematch_all_clients(
+            db,
+            chunk_size=args.chunk_size,
+            workers=args.workers,
+            top_n=args.top_n,
+            checkpoint_path=str(args.checkpoint),
+            restart=args.restart,
+            progress=report,
+        )
+    finally:
+        if progress_bar is not None:
+            progress_bar.close()
+        db.close()
+
+    print(
+        f"Rematched {state['processed']} clients against {state['brokers']} brokers: "
+        f"{state['inserted']} new matches, {state['updated']} updated, "
+        f"{state['retired']} stale matches removed"
+    )
+
+
+def main():
+    """Parse arguments and run the rematch."""
+    parser = argparse.ArgumentParser(description="Recompute matches for all clients.")
+    parser.add_argument(
+        "--chunk-size", type=int, default=500, help="Clients scored per chunk"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Scoring processes (0 scores in-process, default: CPU count)",
+    )
+    parser.add_argument("--top-n", type=int, default=10, help="Matches kept per client")
+    parser.add_argument(
+        "--checkpoint",
+        type=Path,
+        default=DEFAULT_CHECKPOINT,
+        help="Progress file used to resume interrupted runs",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress")
+
+    args = parser.parse_args()
+    run_rematch(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.core.config import settings
 from app.ai.token_tracker import TokenUsageTracker, track_tokens
+from app.ai.usage_log import get_usage_log_writer
 from app.ai.direct_question_generator import DirectQuestionGenerator
 import google.generativeai as genai
 
@@ -121,6 +122,7 @@ class TokenTrackingDemo:
 
         # Show final summary
         self.tracker.print_summary()
+        get_usage_log_writer(self.log_file).flush()
         print(f"\nToken usage log saved to: {self.log_file}")
 
 
@@ -45,9 +45,46 @@ async def lifespan(app: FastAPI):
         logger.info("Application will start without database initialization")
         db_initialized = False
 
+    # Watch Redis health in the background instead of pinging per call
+    from app.core.redis_client import get_redis
+
+    get_redis().start_health_probe()
+
+    # Keep the admin analytics rollups up to date
+    from app.services.analytics_rollups import (
+        start_rollup_scheduler,
+        stop_rollup_scheduler,
+    )
+
+    if db_initialized:
+        start_rollup_scheduler()
+
+    # Map the pre-extracted psychology book corpus
+    from app.services.book_corpus import close_book_corpus, get_book_corpus
+
+    get_book_corpus()
+
     yield
 
-    # Cleanup code can go here if needed
+    stop_rollup_scheduler()
+    get_redis().stop_health_probe()
+
+    from app.core.password_hasher import get_password_hasher
+
+    get_password_hasher().shutdown()
+
+    # Write out queued token usage records
+    from app.ai.usage_log import close_usage_log_writers
+
+    close_usage_log_writers()
+    close_book_corpus()
+
+    # Release pooled outbound connections
+    from app.api.effi.async_client import close_async_effi_client
+    from app.core.async_redis_client import close_async_redis
+
+    await close_async_effi_client()
+    await close_async_redis()
     logger.info("Application shutdown")
 
 
@@ -0,0 +1,180 @@
+"""Tests for the async Effi API client against a local stub server."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.api.effi.async_client import AsyncEffiClient
+
+TEST_LEAD = {"Id": "123", "FirstName": "John", "LastName": "Doe"}
+
+
+class StubEffiHandler(BaseHTTPRequestHandler):
+    """Serves queued responses per path and records what it received."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._respond()
+
+    def do_PUT(self):
+        self._respond()
+
+    def do_POST(self):
+        self._respond()
+
+    def _respond(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?")[0]
+
+        with server.lock:
+            server.requests.append((self.command, self.path, body))
+            server.client_ports.add(self.client_address[1])
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            queue = server.responses.get(path) or [(200, TEST_LEAD, {})]
+            status, payload, headers = queue.pop(0) if len(queue) > 1 else queue[0]
+
+        time.sleep(server.delay)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+        with server.lock:
+            server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    """Run the stub Effi API on a free local port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubEffiHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests = []
+    server.client_ports = set()
+    server.responses = {}
+    server.active = 0
+    server.max_active = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    """Client pointed at the stub server with fast retries."""
+    options = {"api_key": "test_api_key", "backoff": 0.01, "max_retries": 2}
+    options.update(kwargs)
+    host, port = server.server_address
+    return AsyncEffiClient(base_url=f"http://{host}:{port}", **options)
+
+
+class TestAsyncEffiClient:
+    """Tests for AsyncEffiClient."""
+
+    @pytest.mark.asyncio
+    async def test_list_responses_are_paginated_like_sync_client(self, stub_server):
+        """Bare lists are wrapped the same way EffiClient wraps them."""
+        stub_server.responses["/api/Leads/Search"] = [(200, [TEST_LEAD], {})]
+
+        async with make_client(stub_server) as client:
+            result = await client.search_leads(name="John", page=2, page_size=10)
+
+        assert result == {
+            "Items": [TEST_LEAD],
+            "TotalCount": 1,
+            "CurrentPage": 2,
+            "PageSize": 10,
+            "TotalPages": 1,
+        }
+        method, path, _ = stub_server.requests[0]
+        assert method == "GET"
+        assert "search=John" in path and "skip=10" in path
+
+    @pytest.mark.asyncio
+    async def test_import_wraps_bare_id(self, stub_server):
+        """An import that returns just the new ID is normalized."""
+        stub_server.responses["/api/Leads/Import"] = [(200, "new-id", {})]
+
+        async with make_client(stub_server) as client:
+            result = await client.import_lead(
+                "Jane", "Doe", "jane@example.com", "0400", loan_amount=500000
+            )
+
+        assert result["id"] == "new-id"
+        assert result["email"] == "jane@example.com"
+        body = json.loads(stub_server.requests[0][2])
+        assert body["LoanAmount"] == 500000
+
+    @pytest.mark.asyncio
+    async def test_retries_rate_limit_and_server_errors(self, stub_server):
+        """429 and 5xx responses are retried until one succeeds."""
+        stub_server.responses["/api/Leads/123"] = [
+            (429, {}, {"Retry-After": "0"}),
+            (503, {}, {}),
+            (200, TEST_LEAD, {}),
+        ]
+
+        async with make_client(stub_server) as client:
+            assert await client.get_lead("123") == TEST_LEAD
+            assert client.stats["retries"] == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, stub_server):
+        """The final error response is raised once retries run out."""
+        stub_server.responses["/api/Leads/123"] = [(500, {}, {})]
+
+        async with make_client(stub_server) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.get_lead("123")
+
+        assert len(stub_server.requests) == 3
+
+    @pytest.mark.asyncio
+    async def test_post_is_not_retried_on_server_error(self, stub_server):
+        """Non-idempotent requests are not repeated after a 5xx."""
+        stub_server.responses["/api/Leads/Import"] = [(500, {}, {})]
+
+        async with make_client(stub_server) as client:
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.import_lead("Jane", "Doe", "jane@example.com", "0400")
+
+        assert len(stub_server.requests) == 1
+
+    @pytest.mark.asyncio
+    async def test_connections_are_reused_and_concurrency_bounded(self, stub_server):
+        """Concurrent calls share a bounded set of keep-alive connections."""
+        stub_server.delay = 0.02
+
+        async with make_client(stub_server, max_concurrency=3) as client:
+            await asyncio.gather(*(client.get_lead(str(i)) for i in range(12)))
+
+        assert len(stub_server.requests) == 12
+        assert stub_server.max_active <= 3
+        assert len(stub_server.client_ports) <= 3
+
+    @pytest.mark.asyncio
+    async def test_per_call_timeout(self, stub_server):
+        """A per-call timeout overrides the client default."""
+        stub_server.delay = 0.5
+
+        async with make_client(stub_server, max_retries=0, timeout=5) as client:
+            with pytest.raises(httpx.TimeoutException):
+                await client.get_lead("123", timeout=0.05)
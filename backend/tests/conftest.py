@@ -0,0 +1,29 @@
+"""Shared fixtures for the backend tests."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.connection import Base
+
+
+@pytest.fixture
+def engine():
+    """Provide a fresh in-memory SQLite database, usable from any thread."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    """Provide a session bound to the in-memory database."""
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
@@ -0,0 +1,147 @@
+"""Tests for the aggregated admin dashboard counters."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database.models import Broker, ExperienceLevel, User, UserType
+from app.database.models.analytics import UserActivity
+from app.database.models.response import BrokerClientMatch, MatchStatus
+from app.services import admin_metrics
+from app.services.admin_dashboard_service import AdminDashboardService
+from app.services.admin_metrics import collect_admin_metrics, get_admin_metrics
+
+
+@pytest.fixture
+def db(db):
+    """Start each test without cached metrics."""
+    admin_metrics.invalidate_admin_metrics()
+    return db
+
+
+def add_user(db, user_type, **kwargs):
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Test",
+        last_name="User",
+        email=f"{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        user_type=user_type,
+        **kwargs,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_broker(db, verified=True, active=True):
+    broker = Broker(
+        id=str(uuid.uuid4()),
+        user=add_user(db, UserType.BROKER),
+        license_number=str(uuid.uuid4()),
+        years_of_experience=5,
+        experience_level=ExperienceLevel.SENIOR,
+        is_verified=verified,
+        is_active=active,
+    )
+    db.add(broker)
+    db.commit()
+    return broker
+
+
+@pytest.fixture
+def populated(db):
+    """Two clients (one deleted, one old), three brokers and a few matches."""
+    now = datetime.utcnow()
+    client = add_user(db, UserType.CLIENT)
+    add_user(db, UserType.CLIENT, created_at=now - timedelta(days=30))
+    add_user(db, UserType.CLIENT, is_deleted=now)
+    add_user(db, UserType.ADMIN)
+    brokers = [
+        add_broker(db),
+        add_broker(db, verified=False),
+        add_broker(db, active=False),
+    ]
+
+    for broker, status, age in (
+        (brokers[0], MatchStatus.COMPLETED, timedelta(hours=2)),
+        (brokers[1], MatchStatus.PENDING, timedelta(days=3)),
+        (brokers[2], MatchStatus.COMPLETED, timedelta(days=20)),
+    ):
+        db.add(
+            BrokerClientMatch(
+                id=str(uuid.uuid4()),
+                user_id=client.id,
+                broker_id=broker.id,
+                status=status,
+                matched_at=now - age,
+            )
+        )
+    db.add(
+        UserActivity(
+            id=str(uuid.uuid4()),
+            user_id=client.id,
+            activity_type="login",
+            created_at=now - timedelta(minutes=5),
+        )
+    )
+    db.commit()
+    return db
+
+
+class TestCollectAdminMetrics:
+    """Tests for the conditional-aggregate counters."""
+
+    def test_counters(self, populated):
+        """Soft-deleted rows are excluded and time windows are applied."""
+        metrics = collect_admin_metrics(populated)
+
+        assert metrics["users"] == {
+            "total": 6,
+            "clients": 2,
+            "brokers": 3,
+            "admins": 1,
+            "new_7d": 5,
+        }
+        assert metrics["brokers"]["verified"] == 2
+        assert metrics["brokers"]["inactive"] == 1
+        assert metrics["matches"] == {
+            "total": 3,
+            "completed": 2,
+            "new_24h": 1,
+            "new_7d": 2,
+        }
+        assert metrics["activity"]["logins_1h"] == 1
+
+    def test_empty_database(self, db):
+        """An empty table yields zeros rather than NULL."""
+        metrics = collect_admin_metrics(db)
+
+        assert metrics["reviews"]["total"] == 0
+        assert metrics["activity"]["logins_1h"] == 0
+
+
+class TestAdminMetricsCache:
+    """Tests for get_admin_metrics caching and the dashboard service."""
+
+    def test_overview_and_health_share_snapshot(self, populated):
+        """Both pages are built from one cached computation."""
+        overview = AdminDashboardService.get_system_overview(populated)
+        add_user(populated, UserType.CLIENT)
+        health = AdminDashboardService.get_platform_health(populated)
+
+        assert overview["users"]["total"] == 6
+        assert overview["matches"]["success_rate"] == pytest.approx(66.67)
+        assert health["database_health"]["total_records"]["users"] == 6
+        assert health["activity_indicators"]["recent_matches_24h"] == 1
+
+    def test_invalidation_recomputes(self, populated):
+        """Invalidating drops the cached counters."""
+        first = get_admin_metrics(populated)
+        add_user(populated, UserType.CLIENT)
+
+        assert get_admin_metrics(populated) is first
+        admin_metrics.invalidate_admin_metrics()
+        assert get_admin_metrics(populated)["users"]["total"] == 7
+        assert get_admin_metrics(populated, max_age=0)["users"]["total"] == 7
@@ -0,0 +1,189 @@
+"""Tests for the incremental daily analytics rollups."""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.database.models import (
+    Broker,
+    BrokerClientMatch,
+    DailyMatchRollup,
+    DailyRegistrationRollup,
+    ExperienceLevel,
+    MatchStatus,
+    QuestionType,
+    Quiz,
+    QuizCategory,
+    QuizQuestion,
+    RollupWatermark,
+    User,
+    UserQuizResponse,
+    UserType,
+)
+from app.services.admin_dashboard_service import AdminDashboardService
+from app.services.analytics_rollups import day_runs, lock_watermark, refresh_rollups
+
+NOW = datetime.utcnow()
+# Rows written before the first refresh look old to the watermark
+LONG_AGO = NOW - timedelta(days=2)
+
+
+def add_user(db, user_type=UserType.CLIENT, days_ago=0, **kwargs):
+    created = NOW - timedelta(days=days_ago)
+    kwargs.setdefault("updated_at", min(created, LONG_AGO))
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Test",
+        last_name="User",
+        email=f"{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        user_type=user_type,
+        created_at=created,
+        **kwargs,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_match(db, client, broker, status, score, days_ago=0):
+    match = BrokerClientMatch(
+        id=str(uuid.uuid4()),
+        user_id=client.id,
+        broker_id=broker.id,
+        status=status,
+        match_score=score,
+        matched_at=NOW - timedelta(days=days_ago),
+        updated_at=LONG_AGO,
+    )
+    db.add(match)
+    db.commit()
+    return match
+
+
+@pytest.fixture
+def populated(db):
+    """Clients, a broker with matches on two days and a few quiz answers."""
+    clients = [add_user(db, days_ago=1), add_user(db), add_user(db, days_ago=40)]
+    add_user(db, UserType.ADMIN, is_verified=True)
+    broker = Broker(
+        id=str(uuid.uuid4()),
+        user=add_user(db, UserType.BROKER),
+        license_number=str(uuid.uuid4()),
+        years_of_experience=5,
+        experience_level=ExperienceLevel.SENIOR,
+        updated_at=LONG_AGO,
+    )
+    db.add(broker)
+    add_match(db, clients[0], broker, MatchStatus.COMPLETED, 92, days_ago=1)
+    add_match(db, clients[1], broker, MatchStatus.ACCEPTED, 75)
+    add_match(db, clients[2], broker, MatchStatus.PENDING, 40, days_ago=40)
+
+    quiz = Quiz(id=str(uuid.uuid4()), title="Q", category=QuizCategory.EXPERIENCE)
+    question = QuizQuestion(
+        id=str(uuid.uuid4()),
+        quiz=quiz,
+        text="How long have you invested?",
+        question_type=QuestionType.TEXT,
+        order=1,
+    )
+    db.add(question)
+    for client in clients[:2]:
+        db.add(
+            UserQuizResponse(
+                id=str(uuid.uuid4()),
+                user_id=client.id,
+                question_id=question.id,
+                response={"answer": "years"},
+                created_at=NOW,
+                updated_at=LONG_AGO,
+            )
+        )
+    db.commit()
+    return db
+
+
+class TestDayRuns:
+    """Tests for grouping dirty days into recompute ranges."""
+
+    def test_consecutive_days_are_merged(self):
+        """Gaps split runs and long runs are capped."""
+        days = [date(2024, 1, d) for d in (5, 1, 2, 3)]
+
+        assert day_runs(days) == [
+            (date(2024, 1, 1), date(2024, 1, 3)),
+            (date(2024, 1, 5), date(2024, 1, 5)),
+        ]
+        assert len(day_runs(days[1:], max_days=2)) == 2
+
+
+class TestRefreshRollups:
+    """Tests for refresh_rollups and the dashboards reading the rollups."""
+
+    def test_dashboards_read_rollups(self, populated):
+        """Analytics pages are built from the rollup tables."""
+        refreshed = refresh_rollups(populated)
+
+        assert refreshed["registrations"] == 3
+        users = AdminDashboardService.get_user_analytics(populated)
+        assert {
+            d["user_type"]: d["count"] for d in users["user_type_distribution"]
+        } == {"client": 3, "admin": 1, "broker": 1}
+        assert {"verified": True, "count": 1} in users["verification_stats"]
+
+        matching = AdminDashboardService.get_matching_analytics(populated)
+        assert {d["range"]: d["count"] for d in matching["score_distribution"]} == {
+            "90-100": 1,
+            "70-79": 1,
+        }
+        assert matching["daily_trends"][-1]["acceptance_rate"] == 100.0
+
+        brokers = AdminDashboardService.get_broker_analytics(populated)
+        top = brokers["top_performing_brokers"][0]
+        assert (top["total_matches"], top["completed_matches"]) == (3, 1)
+
+        quiz = AdminDashboardService.get_quiz_analytics(populated)
+        assert quiz["overview"]["total_responses"] == 2
+        assert quiz["overview"]["unique_users"] == 2
+        assert quiz["popular_questions"][0]["response_count"] == 2
+
+    def test_only_changed_days_are_recomputed(self, populated):
+        """New rows and soft deletes after the watermark update their days."""
+        refresh_rollups(populated)
+        watermark = populated.get(RollupWatermark, "matches").processed_until
+
+        assert refresh_rollups(populated, ["matches"]) == {"matches": 0}
+
+        match = populated.query(BrokerClientMatch).filter_by(match_score=75).one()
+        match.soft_delete()
+        add_user(populated, days_ago=10, updated_at=NOW)
+        populated.commit()
+
+        assert refresh_rollups(populated) == {
+            "registrations": 1,
+            "matches": 1,
+            "quiz_questions": 0,
+            "quiz_users": 0,
+            "user_activity": 0,
+            "funnel": 2,
+        }
+        assert populated.get(RollupWatermark, "matches").processed_until > watermark
+        today = populated.query(DailyMatchRollup).filter_by(day=NOW.date()).all()
+        assert today == []
+        ten_days_ago = (
+            populated.query(DailyRegistrationRollup)
+            .filter_by(day=(NOW - timedelta(days=10)).date())
+            .one()
+        )
+        assert ten_days_ago.users == 1
+
+    def test_watermark_row_is_created_for_locking(self, db):
+        """The first refresher creates the watermark row it then locks."""
+        watermark = lock_watermark(db, "matches")
+        assert watermark.processed_until is None
+        db.commit()
+
+        assert lock_watermark(db, "matches") is watermark
+        assert refresh_rollups(db, ["matches"]) == {"matches": 0}
+        assert db.query(RollupWatermark).count() == 1
@@ -0,0 +1,85 @@
+"""Tests for the asyncio Redis client."""
+
+import uuid
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+
+from app.core.async_redis_client import AsyncRedisClient, maybe_await
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.rate_limiter import RateLimitRule
+from app.core.timeseries import TimeSeriesStore
+
+UNREACHABLE_REDIS = "redis://127.0.0.1:1/0"
+
+
+@pytest_asyncio.fixture
+async def client():
+    """Client writing analytics under a unique prefix, skipped without Redis."""
+    client = AsyncRedisClient(
+        timeseries=TimeSeriesStore(f"test:{uuid.uuid4().hex}"), max_connections=4
+    )
+    if not await client.connect():
+        pytest.skip("Redis is not available")
+    yield client
+    await client.close()
+
+
+class TestAsyncRedisClient:
+    """Tests for AsyncRedisClient operations."""
+
+    @pytest.mark.asyncio
+    async def test_cache_and_session_round_trip(self, client):
+        """Values are JSON encoded like RedisClient's."""
+        key = uuid.uuid4().hex
+
+        assert await client.cache_set(key, {"score": 1}, expire=10)
+        assert await client.cache_get(key) == {"score": 1}
+        assert await client.session_compare_and_set(key, "{}", 0, expire=10) == 1
+        assert await client.session_compare_and_set(key, "{}", 0, expire=10) == 0
+        assert await client.cache_delete(key)
+        assert await client.cache_get(key) is None
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_and_track_events(self, client):
+        """Scripts shared with RedisClient run over the pool."""
+        rule = RateLimitRule("ip", f"test:{uuid.uuid4().hex}", 1, 60)
+
+        assert (await client.check_rate_limits([rule]))["allowed"]
+        assert not (await client.check_rate_limits([rule]))["allowed"]
+
+        assert await client.track_events(["api_request", "api_request"], "user-1")
+        now = datetime.now()
+        series = await client.get_series(["api_request", "total"], now, now, "hour")
+        assert series["series"] == {"api_request": [2], "total": [2]}
+        assert (await client.get_analytics("api_request", days=1))["daily"] == [
+            {"date": now.strftime("%Y-%m-%d"), "count": 2}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_falls_back(self, monkeypatch):
+        """Once the breaker opens, calls return immediately."""
+        monkeypatch.setenv("REDIS_URL", UNREACHABLE_REDIS)
+        client = AsyncRedisClient()
+
+        assert not await client.connect()
+        assert client.breaker.state == CircuitBreaker.OPEN
+        assert await client.get("key") is None
+        result = await client.rate_limit_check("ip", 10, 60)
+        assert result["allowed"] and result["backend"] == "local"
+        assert await client.get_analytics("api_request") == {}
+
+
+class TestMaybeAwait:
+    """Tests for maybe_await."""
+
+    @pytest.mark.asyncio
+    async def test_accepts_values_and_coroutines(self):
+        """Sync and async client results resolve the same way."""
+
+        async def value():
+            return 1
+
+        assert await maybe_await(1) == 1
+        assert await maybe_await(value()) == 1
@@ -0,0 +1,143 @@
+"""Tests for concurrent batch lead analysis."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.batch_analysis import BatchAnalysisEngine, encode_batch_stream
+
+
+class FakeEffiClient:
+    """Returns leads after a short delay; unknown IDs fail."""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.fetched = []
+
+    async def get_lead(self, lead_id):
+        await asyncio.sleep(self.delay)
+        if lead_id.startswith("missing"):
+            raise RuntimeError(f"Lead {lead_id} not found")
+        self.fetched.append(lead_id)
+        return {"Id": lead_id}
+
+
+class FakeAnalysisService:
+    """Records how many analyses run at once."""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.started = 0
+        self.active = 0
+        self.max_active = 0
+        self.fetched_while_analyzing = 0
+        self.effi_client = None
+
+    async def analyze_lead_financial_profile(self, lead_data):
+        self.started += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        fetched_before = len(self.effi_client.fetched)
+        try:
+            await asyncio.sleep(self.delays.get(lead_data["Id"], 0.02))
+        finally:
+            self.active -= 1
+        self.fetched_while_analyzing += len(self.effi_client.fetched) - fetched_before
+        return {"lead_id": lead_data["Id"], "risk_profile": {"level": "low"}}
+
+
+def make_engine(concurrency=2, delays=None):
+    effi_client = FakeEffiClient()
+    service = FakeAnalysisService(delays)
+    service.effi_client = effi_client
+    return BatchAnalysisEngine(service, effi_client, concurrency), service
+
+
+class TestBatchAnalysisEngine:
+    """Tests for BatchAnalysisEngine."""
+
+    @pytest.mark.asyncio
+    async def test_results_keep_request_order_and_report_failures(self):
+        """run_all returns one result per lead in request order."""
+        engine, _ = make_engine()
+
+        results = await engine.run_all(["a", "missing-1", "b"])
+
+        assert [result["lead_id"] for result in results] == ["a", "missing-1", "b"]
+        assert [result["success"] for result in results] == [True, False, True]
+        assert "not found" in results[1]["error"]
+
+    @pytest.mark.asyncio
+    async def test_analyses_are_bounded_and_overlap_fetches(self):
+        """Analyses respect the limit while other leads are being fetched."""
+        engine, service = make_engine(concurrency=2)
+        service.effi_client.delay = 0.005
+
+        await engine.run_all([f"lead-{i}" for i in range(8)])
+
+        assert service.max_active == 2
+        assert service.fetched_while_analyzing > 0
+
+    @pytest.mark.asyncio
+    async def test_results_stream_in_completion_order(self):
+        """A slow lead does not hold back the ones behind it."""
+        engine, _ = make_engine(concurrency=3, delays={"slow": 0.1})
+
+        order = [index async for index, _ in engine.run(["slow", "a", "b"])]
+
+        assert order[-1] == 0
+
+    @pytest.mark.asyncio
+    async def test_stopping_early_cancels_pending_work(self):
+        """Leads still queued are dropped when the consumer goes away."""
+        engine, service = make_engine(concurrency=1)
+
+        stream = engine.run([f"lead-{i}" for i in range(10)])
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+
+        assert service.active == 0
+        assert service.started < 10
+
+
+class TestEncodeBatchStream:
+    """Tests for the NDJSON and SSE encodings."""
+
+    @pytest.mark.asyncio
+    async def test_ndjson_lines_end_with_summary(self):
+        """Each line is a JSON record; the last one has the totals."""
+        engine, _ = make_engine()
+
+        chunks = [
+            chunk
+            async for chunk in encode_batch_stream(
+                engine.run(["a", "missing-1"]), "ndjson", {"analyzed_by": "admin"}
+            )
+        ]
+        records = [json.loads(chunk) for chunk in chunks]
+
+        assert all(chunk.endswith("\n") for chunk in chunks)
+        assert {record["type"] for record in records[:2]} == {"result"}
+        assert records[-1] == {
+            "type": "summary",
+            "total_processed": 2,
+            "successful": 1,
+            "failed": 1,
+            "analyzed_by": "admin",
+        }
+
+    @pytest.mark.asyncio
+    async def test_sse_events(self):
+        """SSE output uses named events with JSON data."""
+        engine, _ = make_engine()
+
+        chunks = [
+            chunk async for chunk in encode_batch_stream(engine.run(["a"]), "sse")
+        ]
+
+        assert chunks[0].startswith("event: result\ndata: ")
+        assert json.loads(chunks[0].split("data: ")[1])["index"] == 0
+        assert chunks[-1].startswith("event: summary\n")
+        assert chunks[-1].endswith("\n\n")
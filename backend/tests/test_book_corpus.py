@@ -0,0 +1,168 @@
+"""Tests for the pre-extracted psychology book corpus."""
+
+import os
+
+import pytest
+
+from app.services.book_corpus import (
+    BookCorpus,
+    BookSource,
+    build_corpus,
+    keywords,
+    split_segments,
+    write_corpus,
+)
+
+
+def make_pdf(path, lines):
+    """Write a one-page PDF whose text is `lines`."""
+    text = " ".join(
+        "(" + line.replace("(", "").replace(")", "") + ") '" for line in lines
+    )
+    stream = f"BT /F1 12 Tf 72 720 Td 14 TL {text} ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+        b"/Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream),
+    ]
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(data)
+
+
+class TestSegmenting:
+    """Tests for splitting text and extracting keywords."""
+
+    def test_split_segments(self):
+        """Paragraphs are packed up to the size and long ones are cut."""
+        text = "Short one here.\n\nAnother short one.\n\n" + "Word " * 30
+        segments = split_segments(text, size=40, min_chars=10)
+
+        assert segments[0] == "Short one here.\nAnother short one."
+        assert all(len(segment) <= 40 for segment in segments)
+        assert " ".join(segments[1:]).split() == ["Word"] * 30
+        assert split_segments("Too short", size=40, min_chars=20) == []
+
+    def test_keywords(self):
+        """Keywords are lowercase, skip stopwords and short words."""
+        assert keywords("The investors' Loss aversion is OK") == {
+            "investors",
+            "loss",
+            "aversion",
+        }
+
+
+class TestBookCorpus:
+    """Tests for writing, mapping and searching a corpus."""
+
+    def test_search(self, tmp_path):
+        """Segments are ranked by their distinctive shared keywords."""
+        source = BookSource("Buyology", "Unknown", "/books/buyology.pdf", 1, 1.0)
+        other = BookSource("ADKAR", "Unknown", "/books/adkar.pdf", 1, 1.0)
+        write_corpus(
+            [
+                (
+                    source,
+                    [
+                        "Loss aversion shapes every investment decision.",
+                        "Brands trigger emotional buying decisions.",
+                    ],
+                ),
+                (other, ["Change management needs awareness and desire."]),
+                (other, []),
+            ],
+            str(tmp_path / "corpus"),
+        )
+
+        corpus = BookCorpus(str(tmp_path / "corpus"))
+        try:
+            assert len(corpus) == 3
+            assert corpus.segment(2).startswith("Change management")
+            assert corpus.book_of(2)["title"] == "ADKAR"
+
+            excerpts = corpus.search("fear of loss in an investment", limit=2)
+            assert [(e.book, e.segment) for e in excerpts] == [("Buyology", 0)]
+            assert corpus.search("change desire", book="Buyology") == []
+            assert corpus.search("change desire", book="ADKAR")[0].segment == 2
+            assert corpus.search("unrelated words entirely") == []
+        finally:
+            corpus.close()
+
+    def test_build_reuses_unchanged_books(self, tmp_path):
+        """PDFs are extracted into the corpus, and only again when changed."""
+        books = tmp_path / "books"
+        books.mkdir()
+        make_pdf(books / "contagious.pdf", ["Social currency makes ideas spread."] * 4)
+        make_pdf(books / "adkar.pdf", ["Reinforcement sustains any change."] * 4)
+        corpus_dir = str(tmp_path / "corpus")
+
+        counts = build_corpus(str(books), corpus_dir, workers=2)
+        assert counts == {"books": 2, "extracted": 2, "segments": 2}
+
+        make_pdf(books / "contagious.pdf", ["Practical value travels by word."] * 4)
+        os.utime(books / "contagious.pdf", (1, 1))
+        assert build_corpus(str(books), corpus_dir, workers=1)["extracted"] == 1
+        assert build_corpus(str(books), corpus_dir)["extracted"] == 0
+
+        corpus = BookCorpus(corpus_dir)
+        try:
+            assert [book["title"] for book in corpus.books] == ["adkar", "contagious"]
+            assert corpus.search("practical value")[0].book == "contagious"
+            assert corpus.search("social currency") == []
+        finally:
+            corpus.close()
+
+    def test_build_replaces_incomplete_corpus(self, tmp_path):
+        """A corpus missing its data files is rebuilt from the PDFs."""
+        books = tmp_path / "books"
+        books.mkdir()
+        make_pdf(books / "contagious.pdf", ["Social currency makes ideas spread."] * 4)
+        make_pdf(books / "adkar.pdf", ["Reinforcement sustains any change."] * 4)
+        corpus_dir = tmp_path / "corpus"
+        build_corpus(str(books), str(corpus_dir))
+
+        os.remove(corpus_dir / "segments.bin")
+        assert build_corpus(str(books), str(corpus_dir))["extracted"] == 2
+
+        corpus = BookCorpus(str(corpus_dir))
+        try:
+            assert corpus.search("reinforcement")[0].book == "adkar"
+        finally:
+            corpus.close()
+
+    def test_truncated_corpus_is_rejected_and_rebuilt(self, tmp_path):
+        """A cut-off offsets file fails to open and is extracted again."""
+        books = tmp_path / "books"
+        books.mkdir()
+        make_pdf(books / "contagious.pdf", ["Social currency makes ideas spread."] * 4)
+        make_pdf(books / "adkar.pdf", ["Reinforcement sustains any change."] * 4)
+        corpus_dir = tmp_path / "corpus"
+        build_corpus(str(books), str(corpus_dir))
+
+        offsets = corpus_dir / "offsets.bin"
+        offsets.write_bytes(offsets.read_bytes()[:-3])
+        with pytest.raises(ValueError):
+            BookCorpus(str(corpus_dir))
+        offsets.write_bytes(offsets.read_bytes()[:-5])
+        with pytest.raises(ValueError):
+            BookCorpus(str(corpus_dir))
+
+        assert build_corpus(str(books), str(corpus_dir))["extracted"] == 2
+        corpus = BookCorpus(str(corpus_dir))
+        try:
+            assert corpus.search("reinforcement")[0].book == "adkar"
+        finally:
+            corpus.close()
@@ -0,0 +1,169 @@
+"""Tests for the in-process broker feature snapshot."""
+
+import threading
+import uuid
+
+import pytest
+from sqlalchemy import update
+
+from app.database.models import Broker, ExperienceLevel, Specialization, User, UserType
+from app.services import broker_snapshot
+from app.services.broker_snapshot import get_broker_snapshot
+
+
+@pytest.fixture
+def db(db):
+    """Start each test with the snapshot invalidated."""
+    broker_snapshot.invalidate_broker_snapshot()
+    return db
+
+
+def add_broker(db, email, specializations=(), verified=True):
+    """Create a broker user with a profile and specializations."""
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Broker",
+        last_name=email.split("@")[0],
+        email=email,
+        password_hash="x",
+        user_type=UserType.BROKER,
+    )
+    broker = Broker(
+        id=str(uuid.uuid4()),
+        user=user,
+        license_number=str(uuid.uuid4()),
+        years_of_experience=5,
+        experience_level=ExperienceLevel.SENIOR,
+        average_rating=4.0,
+        success_rate=0.8,
+        is_verified=verified,
+        is_active=True,
+        specializations=list(specializations),
+    )
+    db.add(broker)
+    db.commit()
+    return broker
+
+
+class TestBrokerSnapshot:
+    """Tests for get_broker_snapshot and its invalidation."""
+
+    def test_snapshot_filters_and_projects_brokers(self, db):
+        """Only verified, non-test brokers are included with their features."""
+        spec = Specialization(id=str(uuid.uuid4()), name="retirement_planning")
+        broker = add_broker(db, "alice@brokers.com", [spec])
+        add_broker(db, "bob.test@brokers.com")
+        add_broker(db, "carol@brokers.com", verified=False)
+
+        snapshot = get_broker_snapshot(db)
+
+        assert len(snapshot) == 1
+        features = snapshot.get(broker.id)
+        assert features.full_name == "Broker alice"
+        assert features.specializations == ("retirement_planning",)
+        assert features.experience_level == ExperienceLevel.SENIOR
+
+    def test_snapshot_is_reused_until_brokers_change(self, db):
+        """The snapshot is cached and rebuilt after a broker flush."""
+        broker = add_broker(db, "alice@brokers.com")
+        snapshot = get_broker_snapshot(db)
+        assert get_broker_snapshot(db) is snapshot
+
+        broker.average_rating = 5.0
+        db.commit()
+
+        rebuilt = get_broker_snapshot(db)
+        assert rebuilt is not snapshot
+        assert rebuilt.get(broker.id).average_rating == 5.0
+
+    def test_specialization_change_invalidates(self, db):
+        """Adding a specialization to a broker rebuilds the snapshot."""
+        broker = add_broker(db, "alice@brokers.com")
+        snapshot = get_broker_snapshot(db)
+
+        broker.specializations.append(
+            Specialization(id=str(uuid.uuid4()), name="tax_strategies")
+        )
+        db.commit()
+
+        rebuilt = get_broker_snapshot(db)
+        assert rebuilt is not snapshot
+        assert rebuilt.get(broker.id).specializations == ("tax_strategies",)
+
+    def test_bulk_update_invalidates(self, db):
+        """Bulk UPDATE statements against brokers rebuild the snapshot."""
+        broker = add_broker(db, "alice@brokers.com")
+        snapshot = get_broker_snapshot(db)
+
+        db.execute(update(Broker).values(is_active=False))
+        db.commit()
+
+        rebuilt = get_broker_snapshot(db)
+        assert rebuilt is not snapshot
+        assert rebuilt.get(broker.id) is None
+
+    def test_bulk_user_update_invalidates(self, db):
+        """Deactivating a broker's account in bulk rebuilds the snapshot."""
+        broker = add_broker(db, "alice@brokers.com")
+        snapshot = get_broker_snapshot(db)
+
+        db.query(User).filter(User.id == broker.user_id).update(
+            {User.email: "alice.test@brokers.com"}
+        )
+        db.commit()
+
+        rebuilt = get_broker_snapshot(db)
+        assert rebuilt is not snapshot
+        assert rebuilt.get(broker.id) is None
+
+    def test_unrelated_changes_keep_snapshot(self, db):
+        """Flushing non-broker rows does not invalidate the snapshot."""
+        add_broker(db, "alice@brokers.com")
+        snapshot = get_broker_snapshot(db)
+
+        db.add(
+            User(
+                id=str(uuid.uuid4()),
+                first_name="Client",
+                last_name="One",
+                email="client@example.com",
+                password_hash="x",
+                user_type=UserType.CLIENT,
+            )
+        )
+        db.commit()
+
+        assert get_broker_snapshot(db) is snapshot
+
+    def test_rebuild_with_pending_broker_change(self, db):
+        """A rebuild that autoflushes a dirty broker does not deadlock."""
+        broker = add_broker(db, "alice@brokers.com")
+        get_broker_snapshot(db)
+        broker.average_rating = 4.5
+        broker_snapshot.invalidate_broker_snapshot()
+
+        result = []
+        worker = threading.Thread(
+            target=lambda: result.append(get_broker_snapshot(db)), daemon=True
+        )
+        worker.start()
+        worker.join(timeout=5)
+
+        assert not worker.is_alive()
+        assert result[0].get(broker.id).average_rating == 4.5
+        db.commit()
+        assert get_broker_snapshot(db) is not result[0]
+
+    def test_rollback_drops_snapshot_with_uncommitted_changes(self, db):
+        """A snapshot built from flushed changes is rebuilt after rollback."""
+        broker = add_broker(db, "alice@brokers.com")
+        broker.average_rating = 1.0
+        db.flush()
+
+        uncommitted = get_broker_snapshot(db)
+        assert uncommitted.get(broker.id).average_rating == 1.0
+        db.rollback()
+
+        rebuilt = get_broker_snapshot(db)
+        assert rebuilt is not uncommitted
+        assert rebuilt.get(broker.id).average_rating == 4.0
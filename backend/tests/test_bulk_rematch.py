@@ -0,0 +1,217 @@
+"""Tests for the bulk rematch pipeline."""
+
+import json
+import uuid
+
+import pytest
+
+from app.database.models import (
+    Broker,
+    BrokerClientMatch,
+    ExperienceLevel,
+    MatchStatus,
+    QuestionType,
+    Quiz,
+    QuizCategory,
+    QuizQuestion,
+    Specialization,
+    User,
+    UserQuizResponse,
+    UserType,
+)
+from app.services.bulk_rematch import rematch_all_clients
+from app.services.matching_algorithm import BrokerMatchingAlgorithm
+
+
+@pytest.fixture
+def db(db):
+    """Provide a session with brokers and clients who answered the quiz."""
+    specs = [
+        Specialization(id=str(uuid.uuid4()), name=name)
+        for name in ("retirement_planning", "investment_management", "tax_strategies")
+    ]
+    for i, level in enumerate(ExperienceLevel):
+        db.add(
+            Broker(
+                id=str(uuid.uuid4()),
+                user=make_user(f"broker{i}@brokers.com", UserType.BROKER),
+                license_number=f"LIC-{i}",
+                years_of_experience=i * 4,
+                experience_level=level,
+                average_rating=3.0 + i * 0.5,
+                success_rate=0.5 + i * 0.1,
+                is_verified=True,
+                specializations=specs[: i % 3 + 1],
+            )
+        )
+
+    quiz = Quiz(
+        id=str(uuid.uuid4()), title="Matching", category=QuizCategory.BROKER_MATCHING
+    )
+    goal = QuizQuestion(
+        id=str(uuid.uuid4()),
+        quiz=quiz,
+        text=BrokerMatchingAlgorithm.QUESTION_TEXTS["investment_goals"],
+        question_type=QuestionType.SINGLE_CHOICE,
+        order=1,
+    )
+    risk = QuizQuestion(
+        id=str(uuid.uuid4()),
+        quiz=quiz,
+        text=BrokerMatchingAlgorithm.QUESTION_TEXTS["risk_tolerance"],
+        question_type=QuestionType.SINGLE_CHOICE,
+        order=2,
+    )
+    for i in range(7):
+        client = make_user(f"client{i}@example.com", UserType.CLIENT)
+        db.add(client)
+        db.add_all(
+            [
+                UserQuizResponse(
+                    id=str(uuid.uuid4()),
+                    user=client,
+                    question=goal,
+                    response=json.dumps(["retirement", "wealth_growth"][i % 2]),
+                ),
+                UserQuizResponse(
+                    id=str(uuid.uuid4()),
+                    user=client,
+                    question=risk,
+                    response=["conservative", "aggressive"][i % 2],
+                ),
+            ]
+        )
+    db.commit()
+
+    return db
+
+
+def make_user(email, user_type):
+    """Build a user row."""
+    return User(
+        id=str(uuid.uuid4()),
+        first_name="Test",
+        last_name="User",
+        email=email,
+        password_hash="x",
+        user_type=user_type,
+    )
+
+
+def expected_matches(db, top_n):
+    """Per-client matches from the interactive matching path."""
+    algorithm = BrokerMatchingAlgorithm(db)
+    clients = db.query(User).filter(User.user_type == UserType.CLIENT).all()
+    return {
+        (client.id, broker.id): round(score, 3)
+        for client in clients
+        for broker, score in algorithm.calculate_matches(client.id, top_n)
+    }
+
+
+def stored_matches(db):
+    """Matches persisted in the database."""
+    return {
+        (match.user_id, match.broker_id): match.match_score
+        for match in db.query(BrokerClientMatch).all()
+    }
+
+
+def live_matches(db):
+    """Persisted matches that are not soft-deleted."""
+    return {
+        (match.user_id, match.broker_id): match.match_score
+        for match in db.query(BrokerClientMatch).filter(
+            BrokerClientMatch.is_deleted == None
+        )
+    }
+
+
+class TestBulkRematch:
+    """Tests for rematch_all_clients."""
+
+    def test_rematch_in_process(self, db, tmp_path):
+        """All clients get the same matches as calculate_matches."""
+        state = rematch_all_clients(
+            db,
+            chunk_size=3,
+            workers=0,
+            top_n=2,
+            checkpoint_path=str(tmp_path / "checkpoint.json"),
+        )
+
+        assert state["completed"]
+        assert state["processed"] == state["total"] == 7
+        assert state["inserted"] == 14
+        assert stored_matches(db) == expected_matches(db, 2)
+
+    def test_rematch_with_process_pool(self, db):
+        """Scoring across worker processes yields the same matches."""
+        state = rematch_all_clients(db, chunk_size=2, workers=2, top_n=3)
+
+        assert state["processed"] == 7
+        assert stored_matches(db) == expected_matches(db, 3)
+
+    def test_rerun_updates_existing_matches(self, db):
+        """A second run refreshes scores instead of duplicating rows."""
+        rematch_all_clients(db, workers=0, top_n=2)
+        weights = dict(BrokerMatchingAlgorithm.WEIGHTS, broker_performance=0.5)
+        state = rematch_all_clients(db, workers=0, top_n=2, weights=weights)
+
+        assert state["updated"] > 0
+        assert db.query(BrokerClientMatch).count() == 14 + state["inserted"]
+
+    def test_resume_after_interruption(self, db, tmp_path):
+        """An interrupted run resumes after the last persisted client."""
+        checkpoint_path = str(tmp_path / "checkpoint.json")
+
+        def interrupt(state):
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            rematch_all_clients(
+                db,
+                chunk_size=3,
+                workers=0,
+                top_n=2,
+                checkpoint_path=checkpoint_path,
+                progress=interrupt,
+            )
+
+        with open(checkpoint_path) as f:
+            saved = json.load(f)
+        assert saved["processed"] == 3
+        assert not saved["completed"]
+
+        seen = []
+        state = rematch_all_clients(
+            db,
+            chunk_size=3,
+            workers=0,
+            top_n=2,
+            checkpoint_path=checkpoint_path,
+            progress=lambda state: seen.append(state["processed"]),
+        )
+
+        assert seen == [6, 7]
+        assert state["completed"]
+        assert stored_matches(db) == expected_matches(db, 2)
+
+    def test_rerun_retires_matches_outside_top_n(self, db):
+        """Pending matches that fall out of a client's top N are soft-deleted."""
+        rematch_all_clients(db, workers=0, top_n=3)
+        dropped = set(stored_matches(db)) - set(expected_matches(db, 2))
+        accepted_pair = sorted(dropped)[0]
+        accepted = (
+            db.query(BrokerClientMatch)
+            .filter_by(user_id=accepted_pair[0], broker_id=accepted_pair[1])
+            .one()
+        )
+        accepted.status = MatchStatus.ACCEPTED
+        db.commit()
+
+        state = rematch_all_clients(db, workers=0, top_n=2)
+
+        assert state["retired"] == len(dropped) - 1
+        assert set(live_matches(db)) == set(expected_matches(db, 2)) | {accepted_pair}
+        assert db.query(BrokerClientMatch).count() == 21
@@ -0,0 +1,101 @@
+"""Tests for the circuit breaker and Redis connection health."""
+
+import time
+
+import pytest
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.redis_client import RedisClient
+
+UNREACHABLE_REDIS = "redis://127.0.0.1:1/0"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable monotonic clock for the breaker."""
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestCircuitBreaker:
+    """Tests for CircuitBreaker state transitions."""
+
+    def test_opens_after_failures_within_window(self, clock):
+        """Only failures close together open the breaker."""
+        breaker = CircuitBreaker("test", failure_threshold=3, failure_window=10)
+
+        breaker.record_failure()
+        clock[0] += 11
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_trial_closes_or_reopens(self, clock):
+        """One trial call decides whether the breaker closes again."""
+        breaker = CircuitBreaker("test", reset_timeout=15)
+        breaker.trip()
+
+        clock[0] += 16
+        assert breaker.allow_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow_request()
+
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        clock[0] += 16
+        assert breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        metrics = breaker.metrics()
+        assert metrics["transitions"] == {
+            "closed->open": 1,
+            "open->half_open": 2,
+            "half_open->open": 1,
+            "half_open->closed": 1,
+        }
+        assert metrics["rejected_calls"] == 1
+        assert [entry["transition"] for entry in metrics["history"]][-1] == (
+            "half_open->closed"
+        )
+
+
+class TestRedisClientHealth:
+    """Tests for RedisClient behaviour around outages."""
+
+    def test_unreachable_redis_fails_fast(self, monkeypatch):
+        """With the breaker open, operations return without connecting."""
+        monkeypatch.setenv("REDIS_URL", UNREACHABLE_REDIS)
+        client = RedisClient()
+
+        assert client.breaker.state == CircuitBreaker.OPEN
+        started = time.perf_counter()
+        assert client.get("key") is None
+        assert client.rate_limit_check("ip", 10, 60)["allowed"]
+        assert not client.track_events(["api_request"])
+        assert time.perf_counter() - started < 0.1
+
+    def test_reconnects_after_cool_down(self, monkeypatch):
+        """The trial after the cool-down reconnects once Redis is back."""
+        client = RedisClient()
+        if not client.is_connected():
+            pytest.skip("Redis is not available")
+        working_url = client.redis_url
+
+        client.redis_url = UNREACHABLE_REDIS
+        client.reconnect()
+        assert not client.is_connected()
+
+        client.redis_url = working_url
+        client.breaker.reset_timeout = 0
+        assert client.is_connected()
+        assert client.set("test:breaker", "ok", expire=10)
+        transitions = client.breaker.metrics()["transitions"]
+        assert transitions["half_open->closed"] == 1
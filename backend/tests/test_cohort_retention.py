@@ -0,0 +1,111 @@
+"""Tests for bitmap-based cohort retention."""
+
+import uuid
+from datetime import datetime
+
+import pytest
+
+from app.database.models import User, UserActivity, UserType
+from app.services.cohort_retention import (
+    CohortRetention,
+    add_months,
+    build_bitmap,
+    count_range,
+)
+
+NOW = datetime(2024, 6, 15, 12, 0)
+
+
+@pytest.fixture
+def retention():
+    """Engine caching completed months under a unique Redis prefix."""
+    return CohortRetention(cache_prefix=f"test:{uuid.uuid4().hex}")
+
+
+def add_user(db, created, active_in=()):
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Test",
+        last_name="User",
+        email=f"{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        user_type=UserType.CLIENT,
+        created_at=created,
+    )
+    db.add(user)
+    for when in active_in:
+        # Two records in a month still count the user once
+        for _ in range(2):
+            db.add(
+                UserActivity(
+                    id=str(uuid.uuid4()),
+                    user_id=user.id,
+                    activity_type="login",
+                    created_at=when,
+                )
+            )
+    db.commit()
+    return user
+
+
+class TestBitmaps:
+    """Tests for the bitmap helpers."""
+
+    def test_count_range(self):
+        """Popcounts are limited to the cohort's positions."""
+        bitmap = build_bitmap([0, 3, 4, 9, 15], 16)
+
+        assert count_range(bitmap, 0, 4) == 2
+        assert count_range(bitmap, 4, 6) == 2
+        assert count_range(bitmap, 10, 6) == 1
+        assert add_months(datetime(2024, 11, 1).date(), 3).isoformat() == "2025-02-01"
+
+
+class TestCohortRetention:
+    """Tests for CohortRetention.compute."""
+
+    def test_retention_by_cohort(self, db, retention):
+        """Each cohort reports its active share per month since signup."""
+        april, may, june = (datetime(2024, m, 10) for m in (4, 5, 6))
+        add_user(db, april, [april, may])
+        add_user(db, april, [june])
+        add_user(db, april)
+        add_user(db, may, [may, june])
+        add_user(db, datetime(2023, 1, 5), [may])
+
+        result = retention.compute(db, 3, now=NOW)
+
+        cohorts = {cohort["cohort"]: cohort for cohort in result["cohorts"]}
+        assert cohorts["2024-04"]["users"] == 3
+        assert [r["active_users"] for r in cohorts["2024-04"]["retention"]] == [
+            1,
+            1,
+            1,
+        ]
+        assert cohorts["2024-04"]["retention"][1]["rate"] == 33.33
+        assert [r["active_users"] for r in cohorts["2024-05"]["retention"]] == [1, 1]
+        assert cohorts["2024-06"]["users"] == 0
+        assert result["average_retention"][0] == {"month": 0, "rate": 50.0}
+
+    def test_completed_months_are_cached(self, db, retention):
+        """Past months are not recomputed; the current month is."""
+        may, june = datetime(2024, 5, 10), datetime(2024, 6, 10)
+        user = add_user(db, may, [may])
+        retention.compute(db, 2, now=NOW)
+
+        db.add(
+            UserActivity(
+                id=str(uuid.uuid4()),
+                user_id=user.id,
+                activity_type="login",
+                created_at=datetime(2024, 5, 20),
+            )
+        )
+        add_user(db, datetime(2024, 5, 11), [may, june])
+        result = retention.compute(db, 2, now=NOW)
+
+        may_cohort = result["cohorts"][0]
+        assert may_cohort["users"] == 2
+        # May was cached before the second user was seen as active in it
+        assert may_cohort["retention"][0]["active_users"] == 1
+        assert may_cohort["retention"][1]["active_users"] == 1
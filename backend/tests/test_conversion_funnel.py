@@ -0,0 +1,143 @@
+"""Tests for the single-pass conversion funnel and its daily snapshots."""
+
+import uuid
+from datetime import date, datetime, timedelta
+
+from app.database.models import (
+    Broker,
+    BrokerClientMatch,
+    ExperienceLevel,
+    FunnelDailySnapshot,
+    MatchStatus,
+    QuestionType,
+    Quiz,
+    QuizCategory,
+    QuizQuestion,
+    User,
+    UserQuizResponse,
+    UserType,
+)
+from app.services.conversion_funnel import (
+    compute_funnel_days,
+    get_conversion_funnel,
+    refresh_funnel_snapshots,
+)
+
+NOW = datetime.utcnow()
+LONG_AGO = NOW - timedelta(days=2)
+
+
+class Platform:
+    """Builds clients at chosen funnel stages."""
+
+    def __init__(self, db):
+        self.db = db
+        self.question = QuizQuestion(
+            id=str(uuid.uuid4()),
+            quiz=Quiz(
+                id=str(uuid.uuid4()), title="Q", category=QuizCategory.EXPERIENCE
+            ),
+            text="Goal?",
+            question_type=QuestionType.TEXT,
+            order=1,
+        )
+        db.add(self.question)
+
+    def broker(self):
+        broker = Broker(
+            id=str(uuid.uuid4()),
+            user=self.user(UserType.BROKER),
+            license_number=str(uuid.uuid4()),
+            years_of_experience=3,
+            experience_level=ExperienceLevel.JUNIOR,
+        )
+        self.db.add(broker)
+        return broker
+
+    def user(self, user_type=UserType.CLIENT, days_ago=1):
+        user = User(
+            id=str(uuid.uuid4()),
+            first_name="Test",
+            last_name="User",
+            email=f"{uuid.uuid4().hex}@example.com",
+            password_hash="x",
+            user_type=user_type,
+            created_at=NOW - timedelta(days=days_ago),
+            updated_at=LONG_AGO,
+        )
+        self.db.add(user)
+        return user
+
+    def client(self, quiz=False, statuses=(), days_ago=1):
+        client = self.user(days_ago=days_ago)
+        if quiz:
+            self.answer(client)
+        for status in statuses:
+            self.match(client, status)
+        self.db.commit()
+        return client
+
+    def answer(self, client, updated_at=LONG_AGO):
+        self.db.add(
+            UserQuizResponse(
+                id=str(uuid.uuid4()),
+                user_id=client.id,
+                question_id=self.question.id,
+                response={"answer": "retire"},
+                updated_at=updated_at,
+            )
+        )
+
+    def match(self, client, status):
+        self.db.add(
+            BrokerClientMatch(
+                id=str(uuid.uuid4()),
+                user_id=client.id,
+                broker_id=self.broker().id,
+                status=status,
+                updated_at=LONG_AGO,
+            )
+        )
+
+
+class TestComputeFunnel:
+    """Tests for merging the ordered streams."""
+
+    def test_merge(self):
+        """Users missing from a stream count as not reaching its stages."""
+        day = datetime(2024, 3, 1, 9)
+        users = iter([("a", day), ("b", day), ("c", day), ("d", day)])
+        responses = iter([("a", 3), ("c", 1), ("d", 2)])
+        matches = iter([("b", 1, 1, 1), ("c", 2, 1, 0), ("d", 1, 0, 0)])
+
+        assert compute_funnel_days(users, responses, matches) == {
+            date(2024, 3, 1): [4, 3, 2, 1, 0]
+        }
+
+
+class TestFunnelSnapshots:
+    """Tests for refresh_funnel_snapshots and the endpoint service."""
+
+    def test_refresh_and_read(self, db):
+        """Stages require every earlier stage; snapshots update per day."""
+        platform = Platform(db)
+        platform.client()
+        platform.client(quiz=True)
+        platform.client(quiz=True, statuses=[MatchStatus.PENDING])
+        platform.client(quiz=True, statuses=[MatchStatus.COMPLETED])
+        late = platform.client(days_ago=5)
+        platform.client(quiz=True, days_ago=400)
+
+        assert refresh_funnel_snapshots(db) == 3
+        funnel = get_conversion_funnel(db, days=30)
+        assert [stage["users"] for stage in funnel["stages"]] == [5, 3, 2, 1, 1]
+        assert funnel["stages"][1]["conversion_rate"] == 60.0
+        assert funnel["biggest_drop_off"] == "Quiz Completion"
+
+        # Only the day of the client who answered is recomputed
+        platform.answer(late, updated_at=NOW)
+        db.commit()
+        assert refresh_funnel_snapshots(db) == 1
+        snapshot = db.get(FunnelDailySnapshot, late.created_at.date())
+        assert (snapshot.registered, snapshot.quiz_completed) == (1, 1)
+        assert get_conversion_funnel(db)["stages"][1]["users"] == 4
@@ -0,0 +1,218 @@
+"""Tests for the content-addressed LLM response cache."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.ai import response_cache
+from app.ai.gemini_service import GeminiService
+from app.ai.response_cache import LLMResponseCache, make_cache_key
+from app.ai.token_tracker import TokenUsageTracker
+
+
+def counting_generator(response="answer", delay=0.0):
+    """Coroutine factory that records how often it is called."""
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return response
+
+    generate.calls = calls
+    return generate
+
+
+class AsyncCache:
+    """Dict-backed stand-in for the async request-path Redis client."""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def cache_set(self, key, value, expire=3600):
+        self.entries[key] = value
+        return True
+
+    async def cache_get(self, key):
+        return self.entries.get(key)
+
+    async def cache_delete(self, key):
+        return self.entries.pop(key, None) is not None
+
+
+class TestMakeCacheKey:
+    """Tests for make_cache_key."""
+
+    def test_key_covers_model_config_and_prompt(self):
+        """Any change to the request changes the key."""
+        base = make_cache_key("model", {"temperature": 0.8}, None, "prompt")
+
+        assert base == make_cache_key("model", {"temperature": 0.8}, None, "prompt")
+        assert base != make_cache_key("other", {"temperature": 0.8}, None, "prompt")
+        assert base != make_cache_key("model", {"temperature": 0.2}, None, "prompt")
+        assert base != make_cache_key("model", {"temperature": 0.8}, None, "prompt!")
+
+
+class TestLLMResponseCache:
+    """Tests for LLMResponseCache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_prompt_is_served_locally(self):
+        """The second identical request does not call the model."""
+        cache = LLMResponseCache()
+        generate = counting_generator()
+
+        assert await cache.get_or_generate("key", generate, 60) == ("answer", None)
+        assert await cache.get_or_generate("key", generate, 60) == ("answer", "local")
+        assert len(generate.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_prompts_share_one_call(self):
+        """Identical in-flight requests wait for the first one."""
+        cache = LLMResponseCache()
+        generate = counting_generator(delay=0.01)
+
+        results = await asyncio.gather(
+            *(cache.get_or_generate("key", generate, 60) for _ in range(5))
+        )
+
+        assert len(generate.calls) == 1
+        assert [text for text, _ in results] == ["answer"] * 5
+        assert cache.stats["shared_in_flight"] == 4
+
+    @pytest.mark.asyncio
+    async def test_failures_propagate_and_are_not_cached(self):
+        """Waiters see the error and the next request retries."""
+        cache = LLMResponseCache()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("quota exceeded")
+
+        results = await asyncio.gather(
+            cache.get_or_generate("key", fail, 60),
+            cache.get_or_generate("key", fail, 60),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert await cache.get_or_generate("key", counting_generator(), 60) == (
+            "answer",
+            None,
+        )
+
+    @pytest.mark.asyncio
+    async def test_other_worker_reads_shared_tier(self):
+        """A response written to Redis is reused by another worker's cache."""
+        redis = AsyncCache()
+        generate = counting_generator()
+
+        await LLMResponseCache(redis_client=redis).get_or_generate("key", generate, 60)
+        other = LLMResponseCache(redis_client=redis)
+        assert await other.get_or_generate("key", generate, 60) == ("answer", "redis")
+        assert len(generate.calls) == 1
+
+        await other.invalidate("key")
+        assert redis.entries == {}
+
+    @pytest.mark.asyncio
+    async def test_empty_responses_are_not_cached(self):
+        """Blocked or failed generations are retried next time."""
+        cache = LLMResponseCache()
+        generate = counting_generator(response=None)
+
+        await cache.get_or_generate("key", generate, 60)
+        await cache.get_or_generate("key", generate, 60)
+
+        assert len(generate.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_entries_expire_and_are_bounded(self, monkeypatch):
+        """Entries honour their TTL and the LRU size limit."""
+        now = [100.0]
+        monkeypatch.setattr(response_cache.time, "monotonic", lambda: now[0])
+        cache = LLMResponseCache(max_entries=2)
+
+        await cache.get_or_generate("short", counting_generator(), 10)
+        await cache.get_or_generate("a", counting_generator(), 60)
+        await cache.get_or_generate("b", counting_generator(), 60)
+        assert len(cache) == 2
+
+        now[0] += 30
+        generate = counting_generator()
+        await cache.get_or_generate("a", generate, 60)
+        assert generate.calls == []
+
+
+@pytest.fixture
+def gemini(monkeypatch, tmp_path):
+    """GeminiService with a fresh cache and a fake model."""
+    monkeypatch.setattr(response_cache, "_response_cache", LLMResponseCache())
+    tracker = TokenUsageTracker(
+        streaming=False, log_file=str(tmp_path / "token_usage.jsonl")
+    )
+    service = GeminiService(token_tracker=tracker)
+    service.calls = []
+
+    async def generate_content_async(prompt):
+        service.calls.append(prompt)
+        part = SimpleNamespace(text='{"score": 1}')
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))]
+        )
+
+    service.model = SimpleNamespace(generate_content_async=generate_content_async)
+    return service
+
+
+class TestGeminiServiceCache:
+    """Tests for caching in GeminiService."""
+
+    @pytest.mark.asyncio
+    async def test_cached_calls_report_saved_tokens(self, gemini):
+        """Cache hits skip the model and are counted by the tracker."""
+        prompt = "Summarise the market " * 20
+
+        first = await gemini.generate_json(prompt, cache_ttl=60)
+        second = await gemini.generate_json(prompt, cache_ttl=60)
+
+        assert first == second == {"score": 1}
+        assert len(gemini.calls) == 1
+        summary = gemini.token_tracker.get_cache_summary()
+        assert summary["hits"] == 1
+        assert summary["misses"] == 1
+        assert summary["hits_by_source"] == {"local": 1}
+        assert summary["saved_input_tokens"] == gemini.token_tracker.count_tokens(
+            prompt
+        )
+
+    @pytest.mark.asyncio
+    async def test_zero_ttl_bypasses_cache(self, gemini):
+        """Calls without a TTL always reach the model by default."""
+        await gemini.generate_text("prompt")
+        await gemini.generate_text("prompt")
+        await gemini.generate_text("prompt", cache_ttl=0)
+
+        assert len(gemini.calls) == 3
+        assert gemini.token_tracker.get_cache_summary()["hits"] == 0
+
+
+class TestInFlightCancellation:
+    """Tests for callers sharing a request that gets cancelled."""
+
+    @pytest.mark.asyncio
+    async def test_waiter_generates_when_owner_is_cancelled(self):
+        """A timed-out owner does not cancel callers waiting on it."""
+        cache = LLMResponseCache()
+        slow = counting_generator(delay=1)
+        fast = counting_generator(response="retried")
+
+        owner = asyncio.create_task(cache.get_or_generate("key", slow, 60))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache.get_or_generate("key", fast, 60))
+        await asyncio.sleep(0)
+        owner.cancel()
+
+        assert await waiter == ("retried", None)
+        assert len(fast.calls) == 1
@@ -0,0 +1,99 @@
+"""Tests for reported token accounting and the hourly LLM usage rollups."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from app.ai.gemini_service import GeminiService
+from app.ai.token_tracker import (
+    FEATURE_LEAD_ANALYSIS,
+    FEATURE_MARKET_TRENDS,
+    TokenUsageTracker,
+)
+from app.ai.usage_log import hourly_usage
+from app.services.llm_usage import flush_llm_usage, get_llm_usage
+
+MODEL = "gemini-2.5-flash-preview-05-20"
+HOUR = datetime(2024, 6, 1, 9)
+
+
+@pytest.fixture
+def db(db):
+    """Start each test without pending hourly usage."""
+    hourly_usage.take()
+    return db
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    return TokenUsageTracker(
+        MODEL, log_file=str(tmp_path / "token_usage.jsonl"), streaming=False
+    )
+
+
+class TestReportedTokens:
+    """Tests for using Gemini's usage_metadata."""
+
+    @pytest.mark.asyncio
+    async def test_usage_metadata_and_calibration(self, tracker):
+        """Reported counts are used, attributed and calibrate estimates."""
+        service = GeminiService(model_name=MODEL, token_tracker=tracker)
+        usage = SimpleNamespace(
+            prompt_token_count=40, candidates_token_count=10, thoughts_token_count=5
+        )
+
+        async def generate_content_async(prompt):
+            part = SimpleNamespace(text="x" * 20)
+            return SimpleNamespace(
+                candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))],
+                usage_metadata=usage,
+            )
+
+        service.model = SimpleNamespace(generate_content_async=generate_content_async)
+        await service.generate_text(
+            "p" * 80, cache_ttl=0, feature=FEATURE_LEAD_ANALYSIS
+        )
+
+        record = tracker.usage_log[-1]
+        assert (record["input_tokens"], record["output_tokens"]) == (40, 15)
+        assert record["feature"] == FEATURE_LEAD_ANALYSIS
+        assert record["token_source"] == "reported"
+        # 80 characters were estimated at 20 tokens but Gemini reported 40
+        assert tracker.count_tokens("q" * 80) == 40
+        assert tracker.count_tokens("y" * 20, direction="output") == 15
+
+    @pytest.mark.asyncio
+    async def test_estimate_without_metadata(self, tracker):
+        """Calls without usage metadata fall back to the estimator."""
+        record = await tracker.track_usage("p" * 40, "r" * 8)
+
+        assert (record["input_tokens"], record["output_tokens"]) == (10, 2)
+        assert record["token_source"] == "estimate"
+        assert record["feature"] == "unattributed"
+
+
+class TestHourlyRollups:
+    """Tests for flushing and querying the hourly rollups."""
+
+    def test_flush_adds_to_rows(self, db):
+        """Repeated flushes add to the same hour, model and feature."""
+        hourly_usage.record(MODEL, FEATURE_LEAD_ANALYSIS, 100, 20, 0.5, at=HOUR)
+        hourly_usage.record(MODEL, FEATURE_MARKET_TRENDS, 10, 5, 0.1, at=HOUR)
+        assert flush_llm_usage(db) == 2
+
+        hourly_usage.record(
+            MODEL, FEATURE_LEAD_ANALYSIS, 50, 10, 0.25, estimated=True, at=HOUR
+        )
+        assert flush_llm_usage(db) == 1
+        assert flush_llm_usage(db) == 0
+
+        usage = get_llm_usage(db, hours=2, now=HOUR.replace(minute=30))
+        lead = usage["by_feature"][FEATURE_LEAD_ANALYSIS]
+        assert (lead["calls"], lead["estimated_calls"]) == (2, 1)
+        assert (lead["total_tokens"], lead["cost_usd"]) == (180, 0.75)
+        assert list(usage["by_feature"]) == [
+            FEATURE_LEAD_ANALYSIS,
+            FEATURE_MARKET_TRENDS,
+        ]
+        assert usage["hourly"][0]["calls"] == 3
+        assert get_llm_usage(db, now=HOUR.replace(day=3))["totals"]["calls"] == 0
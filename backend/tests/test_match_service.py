@@ -0,0 +1,145 @@
+"""Tests for upsert-based match persistence."""
+
+import uuid
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.database.models import (
+    Broker,
+    BrokerClientMatch,
+    ExperienceLevel,
+    MatchStatus,
+    User,
+    UserType,
+)
+from app.services import match_service
+from app.services.match_service import upsert_match_scores
+
+
+@pytest.fixture
+def db(db):
+    """Provide a session with one client and three brokers."""
+    db.add(make_user("client", UserType.CLIENT))
+    for i in range(3):
+        db.add(
+            Broker(
+                id=f"broker-{i}",
+                user=make_user(f"broker-user-{i}", UserType.BROKER),
+                license_number=f"LIC-{i}",
+                years_of_experience=5,
+                experience_level=ExperienceLevel.SENIOR,
+            )
+        )
+    db.commit()
+    return db
+
+
+def make_user(user_id, user_type):
+    """Build a user row."""
+    return User(
+        id=user_id,
+        first_name="Test",
+        last_name="User",
+        email=f"{user_id}@example.com",
+        password_hash="x",
+        user_type=user_type,
+    )
+
+
+def stored(db):
+    """Persisted matches keyed by broker ID."""
+    db.expire_all()
+    return {match.broker_id: match for match in db.query(BrokerClientMatch).all()}
+
+
+@pytest.fixture(params=["upsert", "fallback"])
+def write_path(request, monkeypatch):
+    """Run each test through the dialect upsert and the portable fallback."""
+    if request.param == "fallback":
+        monkeypatch.setattr(
+            match_service, "_match_upsert_statement", lambda dialect_name: None
+        )
+    return request.param
+
+
+class TestUpsertMatchScores:
+    """Tests for upsert_match_scores."""
+
+    def test_inserts_new_pairs(self, db, write_path):
+        """New pairs become pending matches."""
+        counts = upsert_match_scores(
+            db, [("client", "broker-0", 0.81234), ("client", "broker-1", 0.5)], "Test"
+        )
+        db.commit()
+
+        assert counts == {"inserted": 2, "updated": 0, "unchanged": 0}
+        matches = stored(db)
+        assert matches["broker-0"].match_score == 0.812
+        assert matches["broker-0"].status == MatchStatus.PENDING
+        assert matches["broker-0"].notes.startswith("Test on ")
+
+    def test_rerun_updates_scores_without_duplicates(self, db, write_path):
+        """Existing matches keep their lifecycle and only take the new score."""
+        upsert_match_scores(
+            db, [("client", "broker-0", 0.8), ("client", "broker-1", 0.5)], "Test"
+        )
+        db.commit()
+        match = stored(db)["broker-0"]
+        match.status = MatchStatus.ACCEPTED
+        db.commit()
+
+        counts = upsert_match_scores(
+            db,
+            [
+                ("client", "broker-0", 0.9),
+                ("client", "broker-1", 0.5),
+                ("client", "broker-2", 0.3),
+            ],
+            "Rerun",
+        )
+        db.commit()
+
+        assert counts == {"inserted": 1, "updated": 1, "unchanged": 1}
+        matches = stored(db)
+        assert len(matches) == 3
+        assert matches["broker-0"].id == match.id
+        assert matches["broker-0"].match_score == 0.9
+        assert matches["broker-0"].status == MatchStatus.ACCEPTED
+        assert matches["broker-0"].notes.startswith("Test on ")
+
+    def test_revives_soft_deleted_match(self, db, write_path):
+        """A soft-deleted pair is reset to a new pending match in place."""
+        upsert_match_scores(db, [("client", "broker-0", 0.8)], "Test")
+        db.commit()
+        match = stored(db)["broker-0"]
+        match.status = MatchStatus.REJECTED
+        match.is_deleted = func.now()
+        db.commit()
+
+        counts = upsert_match_scores(db, [("client", "broker-0", 0.8)], "Rerun")
+        db.commit()
+
+        assert counts["inserted"] == 1
+        revived = stored(db)["broker-0"]
+        assert revived.id == match.id
+        assert revived.is_deleted is None
+        assert revived.status == MatchStatus.PENDING
+        assert revived.notes.startswith("Rerun on ")
+
+    def test_unique_pair_is_enforced(self, db):
+        """The database rejects a second row for the same pair."""
+        upsert_match_scores(db, [("client", "broker-0", 0.8)], "Test")
+        db.commit()
+
+        db.add(
+            BrokerClientMatch(
+                id=str(uuid.uuid4()),
+                user_id="client",
+                broker_id="broker-0",
+                match_score=0.1,
+            )
+        )
+        with pytest.raises(IntegrityError):
+            db.commit()
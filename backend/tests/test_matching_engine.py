@@ -0,0 +1,110 @@
+"""Tests for the vectorized broker scoring engine."""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from app.database.models.broker import ExperienceLevel
+from app.services.matching_algorithm import BrokerMatchingAlgorithm
+from app.services.matching_engine import BrokerScoringEngine
+
+SPECIALIZATIONS = [
+    "Retirement_Planning",
+    "financial_planning",
+    "Investment_Management",
+    "wealth_management",
+    "tax_strategies",
+    "estate_planning",
+    "technology",
+    "healthcare",
+    "Real_Estate_Planning",
+]
+
+ANSWERS = {
+    "investment_goals": ["retirement", "wealth_growth", "income", "other", ["income"]],
+    "risk_tolerance": ["conservative", "moderate", "aggressive", {"answer": "bold"}],
+    "experience_match": ["none", "beginner", "advanced", "expert", ["intermediate"]],
+    "service_alignment": [["tax_planning", "budgeting"], '["estate_planning"]', "x"],
+    "investment_amount": ["less_10k", "50k_100k", "500k_plus", ["10k_50k"]],
+    "sector_interests": [["technology", "energy"], "healthcare", "[]"],
+    "communication_style": ["email"],
+    "certification_match": [["no_preference"], ["cfa"], "[]"],
+}
+
+
+def make_broker(rng, index):
+    """Build a broker-like object with random attributes."""
+    level = rng.choice(list(ExperienceLevel) + [None])
+    names = rng.sample(SPECIALIZATIONS, rng.randint(0, 4))
+    return SimpleNamespace(
+        id=f"broker-{index}",
+        specializations=[SimpleNamespace(name=name) for name in names],
+        experience_level=level,
+        average_rating=rng.choice([None, 0.0, 3.5, 4.8]),
+        success_rate=rng.choice([None, 0.0, 0.6, 0.9]),
+    )
+
+
+def make_responses(rng):
+    """Build a random subset of quiz responses keyed by question text."""
+    responses = {}
+    for criteria, options in ANSWERS.items():
+        if rng.random() < 0.8:
+            question = BrokerMatchingAlgorithm.QUESTION_TEXTS[criteria]
+            responses[question] = {"response": rng.choice(options)}
+    return responses
+
+
+class TestBrokerScoringEngine:
+    """Tests for BrokerScoringEngine."""
+
+    def test_scores_match_per_broker_algorithm(self):
+        """Vectorized scores equal the per-broker _calculate_broker_score."""
+        rng = random.Random(7)
+        brokers = [make_broker(rng, i) for i in range(60)]
+        engine = BrokerScoringEngine.from_brokers(brokers)
+        algorithm = BrokerMatchingAlgorithm(db=None)
+
+        for _ in range(50):
+            responses = make_responses(rng)
+            scores = engine.score(responses)
+            expected = [
+                algorithm._calculate_broker_score(broker, responses)
+                for broker in brokers
+            ]
+            assert scores.tolist() == expected
+
+    def test_top_matches_matches_stable_sort(self):
+        """Top-N selection agrees with a full stable descending sort."""
+        rng = random.Random(11)
+        brokers = [make_broker(rng, i) for i in range(40)]
+        engine = BrokerScoringEngine.from_brokers(brokers)
+        algorithm = BrokerMatchingAlgorithm(db=None)
+
+        for top_n in (1, 5, 10, 40, 100):
+            responses = make_responses(rng)
+            expected = sorted(
+                (
+                    (row, algorithm._calculate_broker_score(broker, responses))
+                    for row, broker in enumerate(brokers)
+                ),
+                key=lambda x: x[1],
+                reverse=True,
+            )[:top_n]
+            assert engine.top_matches(responses, top_n) == expected
+
+    def test_custom_weights(self):
+        """Weights passed at score time override the class defaults."""
+        rng = random.Random(3)
+        brokers = [make_broker(rng, i) for i in range(10)]
+        engine = BrokerScoringEngine.from_brokers(brokers)
+
+        scores = engine.score({}, weights={"broker_performance": 1.0})
+        assert scores.tolist() == pytest.approx(engine.performance_scores.tolist())
+
+    def test_empty_pool(self):
+        """An empty broker pool yields no matches."""
+        engine = BrokerScoringEngine.from_brokers([])
+        assert len(engine) == 0
+        assert engine.top_matches({}, 10) == []
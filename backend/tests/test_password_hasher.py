@@ -0,0 +1,65 @@
+"""Tests for the bounded password hashing pool."""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.core.password_hasher import (
+    PasswordHasher,
+    PasswordHasherBusy,
+    make_crypt_context,
+)
+
+
+@pytest.fixture
+def hasher():
+    """Hasher using the cheapest bcrypt cost."""
+    hasher = PasswordHasher(make_crypt_context(4), workers=2, queue_limit=1)
+    yield hasher
+    hasher.shutdown()
+
+
+class TestPasswordHasher:
+    """Tests for PasswordHasher."""
+
+    @pytest.mark.asyncio
+    async def test_hash_and_verify(self, hasher):
+        """Hashes verify in the pool and record latency."""
+        password_hash = await hasher.hash("secret")
+
+        assert await hasher.verify("secret", password_hash)
+        assert not await hasher.verify("wrong", password_hash)
+        stats = hasher.stats()
+        assert stats["latency_ms"]["verify"]["count"] == 2
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rehash_on_cost_change(self, hasher):
+        """Hashes with another cost are replaced on successful verification."""
+        old_hash = make_crypt_context(5).hash("secret")
+
+        valid, new_hash = await hasher.verify_and_update("secret", old_hash)
+        assert valid and new_hash.startswith("$2b$04$")
+        assert await hasher.verify_and_update("secret", new_hash) == (True, None)
+        assert await hasher.verify_and_update("wrong", old_hash) == (False, None)
+        assert hasher.rehashed == 1
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_saturated(self, hasher):
+        """Calls beyond the workers and queue limit fail fast."""
+        release = threading.Event()
+        hasher.context = type(
+            "Blocking", (), {"hash": lambda self, password: release.wait(5)}
+        )()
+
+        pending = [asyncio.ensure_future(hasher.hash("x")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert hasher.queue_depth == 1
+
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("x")
+        release.set()
+        await asyncio.gather(*pending)
+        assert hasher.stats()["rejected"] == 1
+        assert hasher.stats()["peak_in_flight"] == 3
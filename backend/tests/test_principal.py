@@ -0,0 +1,169 @@
+"""Tests for the cached authenticated principal."""
+
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.auth import create_access_token, get_current_user
+from app.core.principal import (
+    Principal,
+    get_principal,
+    principal_cache,
+    request_subject,
+)
+from app.database.models import User, UserType
+
+
+@pytest.fixture
+def engine(engine):
+    """Start each test with an empty principal cache."""
+    principal_cache.clear()
+    return engine
+
+
+@pytest.fixture
+def queries(engine):
+    """Record the statements sent to the database."""
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+def add_user(session, **kwargs):
+    user = User(
+        id=str(uuid.uuid4()),
+        first_name="Test",
+        last_name="User",
+        email=f"{uuid.uuid4().hex}@example.com",
+        password_hash="x",
+        user_type=UserType.BROKER,
+        **kwargs,
+    )
+    session.add(user)
+    session.commit()
+    return user
+
+
+def make_request(token):
+    return SimpleNamespace(
+        headers={"Authorization": f"Bearer {token}"}, state=SimpleNamespace()
+    )
+
+
+async def authenticate(engine, token, request=None):
+    session = sessionmaker(bind=engine)()
+    try:
+        user = await get_current_user(request or make_request(token), token, session)
+        return user, session
+    except Exception:
+        session.close()
+        raise
+
+
+class TestRequestSubject:
+    """Tests for decoding the token once per request."""
+
+    def test_decoded_once(self, monkeypatch):
+        """The subject is reused from request.state for the same token."""
+        token = create_access_token("user-1")
+        request = make_request(token)
+        assert request_subject(request) == "user-1"
+
+        monkeypatch.setattr("app.core.principal.decode_subject", lambda token: None)
+        assert request_subject(request, token) == "user-1"
+        assert request_subject(make_request("invalid")) is None
+
+
+class TestGetCurrentUser:
+    """Tests for get_current_user with the principal cache."""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_database(self, engine, queries):
+        """A cached principal yields a user without querying."""
+        seed = sessionmaker(bind=engine)()
+        user_id = add_user(seed).id
+        seed.close()
+        token = create_access_token(user_id)
+
+        first, session = await authenticate(engine, token)
+        session.close()
+        queries.clear()
+
+        user, session = await authenticate(engine, token)
+        assert (user.id, user.user_type) == (user_id, UserType.BROKER)
+        assert queries == []
+        # Columns outside the projection load on access
+        assert user.first_name == "Test"
+        assert len(queries) == 1
+        session.close()
+
+    @pytest.mark.asyncio
+    async def test_updates_invalidate(self, engine):
+        """Flushing a change or soft delete drops the cached principal."""
+        seed = sessionmaker(bind=engine)()
+        user = add_user(seed)
+        token = create_access_token(user.id)
+        (await authenticate(engine, token))[1].close()
+
+        user.user_type = UserType.ADMIN
+        seed.commit()
+        current, session = await authenticate(engine, token)
+        assert current.user_type == UserType.ADMIN
+        session.close()
+
+        user.is_deleted = datetime.utcnow()
+        seed.commit()
+        with pytest.raises(HTTPException) as error:
+            await authenticate(engine, token)
+        assert error.value.status_code == 404
+        seed.close()
+
+    def test_commit_drops_principal_loaded_before_it(self, engine):
+        """A principal cached between flush and commit does not survive."""
+        seed = sessionmaker(bind=engine)()
+        user = add_user(seed)
+        user.is_deleted = datetime.utcnow()
+        seed.flush()
+
+        # Another request loads the still-committed row before the commit
+        principal_cache.set(
+            Principal(user.id, UserType.BROKER, False, False),
+            principal_cache.generation,
+        )
+        assert principal_cache.get(user.id) is not None
+
+        seed.commit()
+        assert principal_cache.get(user.id) is None
+        seed.close()
+
+    def test_rollback_drops_principal_loaded_from_uncommitted_change(self, engine):
+        """A principal read through the session's own flush is not kept."""
+        seed = sessionmaker(bind=engine)()
+        user = add_user(seed)
+        user.user_type = UserType.ADMIN
+        seed.flush()
+
+        principal = get_principal(seed, user.id)
+        assert principal.user_type == UserType.ADMIN
+        assert principal_cache.get(user.id) is principal
+
+        seed.rollback()
+        assert principal_cache.get(user.id) is None
+        assert get_principal(seed, user.id).user_type == UserType.BROKER
+        seed.close()
+
+    @pytest.mark.asyncio
+    async def test_invalid_token(self, engine):
+        """Tokens that do not decode are rejected with 401."""
+        with pytest.raises(HTTPException) as error:
+            await authenticate(engine, "invalid")
+        assert error.value.status_code == 401
@@ -0,0 +1,207 @@
+"""Tests for speculative next-question generation in the adaptive quiz."""
+
+import asyncio
+
+import pytest
+from app.database.models import User, UserType
+from app.services import question_prefetch
+from app.services.adaptive_quiz_service import AdaptiveQuizService
+from app.services.question_prefetch import QuestionPrefetcher
+from app.services.quiz_session_store import MemoryQuizSessionStore
+
+
+@pytest.fixture
+def prefetcher(monkeypatch):
+    """Use a fresh worker-local prefetcher."""
+    prefetcher = QuestionPrefetcher()
+    monkeypatch.setattr(question_prefetch, "_prefetcher", prefetcher)
+    return prefetcher
+
+
+@pytest.fixture
+def db(db):
+    """Provide a session with one client."""
+    db.add(
+        User(
+            id="client",
+            first_name="Test",
+            last_name="Client",
+            email="client@example.com",
+            password_hash="x",
+            user_type=UserType.CLIENT,
+        )
+    )
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def service(db, prefetcher):
+    """Adaptive quiz service whose question generation is recorded."""
+    service = AdaptiveQuizService(db, session_store=MemoryQuizSessionStore())
+    service.generated = []
+
+    async def generate(topic, category, question_type, existing_questions):
+        service.generated.append(topic)
+        await asyncio.sleep(0)
+        return {
+            "text": f"Question about {topic}",
+            "question_type": question_type,
+            "options": [],
+        }
+
+    service.psychology_service.generate_psychology_enhanced_question = generate
+    return service
+
+
+class TestQuestionPrefetcher:
+    """Tests for QuestionPrefetcher."""
+
+    @pytest.mark.asyncio
+    async def test_matching_spec_reuses_question(self, prefetcher):
+        """A question generated from the same inputs is handed out once."""
+        spec = {"topic": "Risk", "order": 2, "existing_questions": ["Q1"]}
+
+        async def generate():
+            return {"text": "Speculative"}
+
+        prefetcher.schedule("session", 2, spec, generate)
+
+        assert await prefetcher.take("session", 2, dict(spec)) == {
+            "text": "Speculative"
+        }
+        assert await prefetcher.take("session", 2, spec) is None
+        assert prefetcher.stats["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_changed_spec_discards_question(self, prefetcher):
+        """A question generated from outdated inputs is cancelled."""
+        started = asyncio.Event()
+
+        async def generate():
+            started.set()
+            await asyncio.sleep(10)
+
+        prefetcher.schedule("session", 2, {"topic": "Risk"}, generate)
+        await started.wait()
+
+        assert await prefetcher.take("session", 2, {"topic": "Goals"}) is None
+        assert prefetcher.stats["discarded"] == 1
+        assert len(prefetcher) == 0
+
+    @pytest.mark.asyncio
+    async def test_oldest_pending_question_is_evicted(self):
+        """Pending generations are bounded."""
+        prefetcher = QuestionPrefetcher(max_pending=1)
+
+        async def generate():
+            return {"text": "Q"}
+
+        prefetcher.schedule("first", 2, {}, generate)
+        prefetcher.schedule("second", 2, {}, generate)
+
+        assert len(prefetcher) == 1
+        assert await prefetcher.take("first", 2, {}) is None
+        assert await prefetcher.take("second", 2, {}) == {"text": "Q"}
+
+
+class AsyncCache:
+    """Dict-backed stand-in for the async request-path Redis client."""
+
+    def __init__(self):
+        self.entries = {}
+
+    async def cache_set(self, key, value, expire=3600):
+        self.entries[key] = value
+        return True
+
+    async def cache_get(self, key):
+        return self.entries.get(key)
+
+    async def cache_delete(self, key):
+        return self.entries.pop(key, None) is not None
+
+
+class TestPublishedQuestions:
+    """Tests for sharing speculative questions between workers."""
+
+    @pytest.mark.asyncio
+    async def test_other_worker_reuses_published_question(self):
+        """A finished question is published and claimed once elsewhere."""
+        cache = AsyncCache()
+        generating, answering = (
+            QuestionPrefetcher(redis_client=cache),
+            QuestionPrefetcher(redis_client=cache),
+        )
+        spec = {"topic": "Risk", "order": 2}
+
+        async def generate():
+            return {"text": "Speculative"}
+
+        generating.schedule("session", 2, spec, generate)
+        await asyncio.sleep(0.01)
+        assert cache.entries
+
+        assert await answering.take("session", 2, {"topic": "Goals"}) is None
+        generating.schedule("session", 2, spec, generate)
+        await asyncio.sleep(0.01)
+        assert await answering.take("session", 2, spec) == {"text": "Speculative"}
+        assert cache.entries == {}
+
+
+class TestAdaptiveQuizPrefetch:
+    """Tests for prefetching in AdaptiveQuizService."""
+
+    @pytest.mark.asyncio
+    async def test_next_question_comes_from_prefetch(self, service, prefetcher):
+        """Answering uses the question generated while the user was reading."""
+        result = await service.start_adaptive_quiz("client")
+        await asyncio.sleep(0.01)
+        assert service.generated == [
+            "Investment goals and timeline",
+            "Risk tolerance and emotional response",
+        ]
+
+        result = await service.submit_response_and_get_next(
+            result["session"], {"answer": "retirement"}
+        )
+
+        assert result["question"]["order"] == 2
+        assert result["question"]["text"].endswith("emotional response")
+        assert "retirement_planning" in result["session"]["focus_areas"]
+        assert prefetcher.stats["hits"] == 1
+        # Question 3 is now being prefetched; question 2 was not regenerated
+        await asyncio.sleep(0.01)
+        assert service.generated.count("Risk tolerance and emotional response") == 1
+        assert service.generated[-1] == "Investment experience and knowledge"
+
+    @pytest.mark.asyncio
+    async def test_changed_inputs_regenerate_question(self, service, prefetcher):
+        """A speculative question is dropped when the asked questions differ."""
+        result = await service.start_adaptive_quiz("client")
+        session = result["session"]
+        session["current_question_text"] = "A different first question"
+
+        result = await service.submit_response_and_get_next(
+            session, {"answer": "growth"}
+        )
+
+        assert result["question"]["order"] == 2
+        assert prefetcher.stats["discarded"] == 1
+        assert prefetcher.stats["hits"] == 0
+
+    @pytest.mark.asyncio
+    async def test_without_prefetch_question_is_generated(self, service, monkeypatch):
+        """With prefetching disabled every question is generated on demand."""
+        monkeypatch.setattr(question_prefetch, "_prefetcher", None)
+        monkeypatch.setattr(question_prefetch.settings, "ADAPTIVE_QUIZ_PREFETCH", False)
+
+        result = await service.start_adaptive_quiz("client")
+        assert len(service.generated) == 1
+
+        result = await service.submit_response_and_get_next(
+            result["session"], {"answer": "growth"}
+        )
+
+        assert result["question"]["order"] == 2
+        assert len(service.generated) == 2
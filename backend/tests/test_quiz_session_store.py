@@ -0,0 +1,296 @@
+"""Tests for the adaptive quiz session store."""
+
+import asyncio
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1.endpoints import adaptive_quiz
+from app.core.auth import get_current_user
+from app.database import get_db
+from app.database.models import User, UserType
+from app.services import quiz_session_store
+from app.services.adaptive_quiz_service import AdaptiveQuizService
+from app.services.quiz_session_store import (
+    MemoryQuizSessionStore,
+    QuizSessionConflictError,
+    QuizSessionStore,
+    RedisQuizSessionStore,
+    decode_quiz_state,
+    encode_quiz_state,
+)
+
+
+def make_state(user_id="user-1", current_question=1):
+    """Build a quiz state like the one returned by AdaptiveQuizService."""
+    return {
+        "session": {
+            "session_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "current_question": current_question,
+            "responses": [],
+            "question_plan": [{"order": i, "type": "scale"} for i in range(10)],
+        },
+        "question": {"id": "q1", "text": "How do you feel about risk?"},
+        "progress": {"current": current_question, "total": 10},
+    }
+
+
+@pytest.fixture
+def redis_store():
+    """Redis-backed store, skipped when no Redis server is reachable."""
+    from app.core.redis_client import RedisClient
+
+    client = RedisClient()
+    if not client.is_connected():
+        pytest.skip("Redis is not available")
+    return RedisQuizSessionStore(client, ttl=60)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    """Run behavioural tests against both backends."""
+    if request.param == "redis":
+        return request.getfixturevalue("redis_store")
+    return MemoryQuizSessionStore(max_entries=100, ttl=60)
+
+
+class TestQuizSessionStore:
+    """Tests shared by all session store backends."""
+
+    def test_round_trip_assigns_versions(self, store):
+        """Saved state loads back unchanged with its version."""
+        state = make_state()
+
+        assert store.save(state, expected_version=0) == 1
+        loaded = store.load(state["session"]["session_id"])
+
+        assert loaded == state
+        assert loaded["session"]["version"] == 1
+
+    def test_stale_version_is_rejected(self, store):
+        """Only one of two writers holding the same version succeeds."""
+        state = make_state()
+        store.save(state, expected_version=0)
+        first = store.load(state["session"]["session_id"])
+        second = store.load(state["session"]["session_id"])
+
+        first["session"]["current_question"] = 2
+        store.save(first, expected_version=1)
+        second["session"]["current_question"] = 5
+        with pytest.raises(QuizSessionConflictError):
+            store.save(second, expected_version=1)
+
+        loaded = store.load(state["session"]["session_id"])
+        assert loaded["session"]["current_question"] == 2
+        assert loaded["session"]["version"] == 2
+
+    def test_creating_an_existing_session_conflicts(self, store):
+        """Expected version 0 means the session must not exist yet."""
+        state = make_state()
+        store.save(state, expected_version=0)
+
+        with pytest.raises(QuizSessionConflictError):
+            store.save(state, expected_version=0)
+
+    def test_unconditional_save_bumps_version(self, store):
+        """Saving without an expected version always wins."""
+        state = make_state()
+        store.save(state, expected_version=0)
+
+        assert store.save(state) == 2
+
+    def test_user_pointer_and_delete(self, store):
+        """The user's latest session is tracked and can be discarded."""
+        user_id = str(uuid.uuid4())
+        older, newer = make_state(user_id), make_state(user_id)
+        store.save(older, 0)
+        store.save(newer, 0)
+
+        assert store.find_user_session(user_id) == newer["session"]["session_id"]
+
+        store.delete(newer["session"]["session_id"], user_id)
+        assert store.load(newer["session"]["session_id"]) is None
+        assert store.find_user_session(user_id) is None
+
+    def test_untracked_save_keeps_user_pointer(self, store):
+        """Scratch sessions do not replace the user's quiz session."""
+        user_id = str(uuid.uuid4())
+        state = make_state(user_id)
+        store.save(state, 0)
+
+        store.save(make_state(user_id), track_user=False)
+
+        assert store.find_user_session(user_id) == state["session"]["session_id"]
+
+
+class TestMemoryQuizSessionStore:
+    """Tests for the per-worker LRU store."""
+
+    def test_least_recently_used_session_is_evicted(self):
+        """Reading a session keeps it; the oldest untouched one is evicted."""
+        store = MemoryQuizSessionStore(max_entries=2, ttl=60)
+        first, second, third = make_state(), make_state(), make_state()
+        store.save(first, 0)
+        store.save(second, 0)
+        store.load(first["session"]["session_id"])
+
+        store.save(third, 0)
+
+        assert len(store) == 2
+        assert store.load(second["session"]["session_id"]) is None
+        assert store.load(first["session"]["session_id"]) is not None
+
+    def test_expired_session_is_dropped(self, monkeypatch):
+        """Sessions are gone once their TTL elapses."""
+        now = [1000.0]
+        monkeypatch.setattr(quiz_session_store.time, "monotonic", lambda: now[0])
+        store = MemoryQuizSessionStore(ttl=60)
+        state = make_state()
+        store.save(state, 0)
+
+        now[0] += 61
+
+        assert store.load(state["session"]["session_id"]) is None
+        assert store.find_user_session("user-1") is None
+        # An expired session can be created again from scratch
+        assert store.save(state, 0) == 1
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """A backend missing an operation fails at construction."""
+
+        class ReadOnlyStore(QuizSessionStore):
+            def _read(self, session_id):
+                return None
+
+        with pytest.raises(TypeError):
+            ReadOnlyStore(ttl=60)
+
+
+class TestEncoding:
+    """Tests for the compact state blob."""
+
+    def test_blob_is_compact_and_reversible(self):
+        """Encoded state round-trips and is smaller than plain JSON."""
+        import json
+
+        state = make_state()
+        blob = encode_quiz_state(state)
+
+        assert decode_quiz_state(blob) == state
+        assert len(blob) < len(json.dumps(state))
+
+
+@pytest.fixture
+def service(db):
+    """Adaptive quiz service for one client with canned question generation."""
+    db.add(
+        User(
+            id="client",
+            first_name="Test",
+            last_name="Client",
+            email="client@example.com",
+            password_hash="x",
+            user_type=UserType.CLIENT,
+        )
+    )
+    db.commit()
+    service = AdaptiveQuizService(db, session_store=MemoryQuizSessionStore())
+
+    async def generate(topic, category, question_type, existing_questions):
+        await asyncio.sleep(0)
+        return {
+            "text": f"Question about {topic}",
+            "question_type": question_type,
+            "options": [],
+        }
+
+    service.psychology_service.generate_psychology_enhanced_question = generate
+    return service
+
+
+class TestSessionResume:
+    """Tests for continuing a quiz from the client's copy of the session."""
+
+    @pytest.mark.asyncio
+    async def test_expired_session_resumes_from_posted_copy(self, service):
+        """A session the store lost is saved again instead of conflicting."""
+        posted = (await service.start_adaptive_quiz("client"))["session"]
+        assert posted["version"] == 1
+        service.session_store = MemoryQuizSessionStore()
+
+        session, from_store = service.resume_session(posted)
+        assert not from_store
+        result = await service.submit_response_and_get_next(
+            session, {"answer": "growth"}
+        )
+
+        assert result["question"]["order"] == 2
+        stored = service.load_quiz_state(posted["session_id"])
+        assert stored["session"]["current_question"] == 2
+        with pytest.raises(QuizSessionConflictError):
+            service.resume_session({**posted, "version": 5})
+
+
+class TestRespondEndpoint:
+    """Tests for answering through POST /adaptive-quiz/respond."""
+
+    @pytest.fixture
+    def client(self, db, service, monkeypatch):
+        """API client signed in as the quiz client, sharing the test service."""
+        monkeypatch.setattr(adaptive_quiz, "AdaptiveQuizService", lambda _db: service)
+        app = FastAPI()
+        app.include_router(adaptive_quiz.router, prefix="/adaptive-quiz")
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: db.get(User, "client")
+        with TestClient(app) as client:
+            yield client
+
+    def respond(self, client, data, answer):
+        return client.post(
+            "/adaptive-quiz/respond",
+            json={
+                "session_data": data["session"],
+                "response": {
+                    "question_id": data["question"]["id"],
+                    "answer": answer,
+                },
+            },
+        )
+
+    def test_two_responses_continue_stored_session(self, client, service):
+        """Each answer continues the stored session and advances the quiz."""
+        started = client.post("/adaptive-quiz/start")
+        assert started.status_code == 200
+        data = started.json()["data"]
+
+        first = self.respond(client, data, "retirement")
+        assert first.status_code == 200
+        data = first.json()["data"]
+        assert data["question"]["order"] == 2
+
+        second = self.respond(client, data, "growth")
+        assert second.status_code == 200
+        data = second.json()["data"]
+        assert data["question"]["order"] == 3
+
+        stored = service.load_quiz_state(data["session"]["session_id"])
+        assert [r["question_number"] for r in stored["session"]["responses"]] == [
+            1,
+            2,
+        ]
+
+    def test_lost_session_keeps_only_current_response(self, client, service):
+        """A posted copy is not trusted for earlier answers."""
+        data = client.post("/adaptive-quiz/start").json()["data"]
+        data = self.respond(client, data, "retirement").json()["data"]
+        service.session_store = MemoryQuizSessionStore()
+
+        response = self.respond(client, data, "growth")
+
+        assert response.status_code == 200
+        session = response.json()["data"]["session"]
+        assert session["current_question"] == 3
+        assert {r["question_number"] for r in session["responses"]} == {2}
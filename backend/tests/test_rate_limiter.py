@@ -0,0 +1,114 @@
+"""Tests for the multi-rule rate limiter."""
+
+import uuid
+
+import pytest
+
+from app.core.rate_limiter import (
+    SLIDING_WINDOW,
+    TOKEN_BUCKET,
+    LocalRateLimiter,
+    RateLimiter,
+    RateLimitRule,
+)
+from app.core.redis_client import RedisClient
+
+UNREACHABLE_REDIS = "redis://127.0.0.1:1/0"
+
+
+@pytest.fixture
+def connected_client():
+    """Client against a real server, skipped without Redis."""
+    client = RedisClient()
+    if not client.is_connected():
+        pytest.skip("Redis is not available")
+    return client
+
+
+class TestLocalRateLimiter:
+    """Tests for the in-process fallback limiter."""
+
+    def test_sliding_window_limits_and_expires(self):
+        """At most `limit` requests are allowed in any window."""
+        limiter = LocalRateLimiter()
+        rule = RateLimitRule("ip", "1.2.3.4", limit=2, window=10)
+
+        assert limiter.check([rule], 0)[0]
+        assert limiter.check([rule], 4000)[0]
+        allowed, results = limiter.check([rule], 9000)
+        assert not allowed
+        assert results[0] == (False, 0, 10000)
+
+        assert limiter.check([rule], 10000)[0]
+
+    def test_token_bucket_refills(self):
+        """Tokens come back continuously after a burst."""
+        limiter = LocalRateLimiter()
+        rule = RateLimitRule("ip", "1.2.3.4", 2, 10, TOKEN_BUCKET)
+
+        assert limiter.check([rule], 0)[0]
+        assert limiter.check([rule], 0)[0]
+        assert not limiter.check([rule], 1000)[0]
+        # One token per 5 seconds
+        assert limiter.check([rule], 5000)[0]
+
+    def test_rejected_request_does_not_count(self):
+        """A rule that allows a rejected request is left untouched."""
+        limiter = LocalRateLimiter()
+        tight = RateLimitRule("user", "user-1", 1, 60)
+        loose = RateLimitRule("ip", "1.2.3.4", 2, 60)
+
+        assert limiter.check([tight, loose], 0)[0]
+        assert not limiter.check([tight, loose], 1)[0]
+        allowed, results = limiter.check([loose], 2)
+        assert allowed
+        assert results[0][1] == 0
+
+    def test_evicts_least_recently_used_keys(self):
+        """State is bounded by max_keys."""
+        limiter = LocalRateLimiter(max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.check([RateLimitRule("ip", key, 1, 60)], 0)
+
+        assert len(limiter) == 2
+        assert limiter.check([RateLimitRule("ip", "a", 1, 60)], 1)[0]
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter against Redis and its fallback."""
+
+    def test_falls_back_to_local_limiter(self, monkeypatch):
+        """Limits still apply while Redis is unreachable."""
+        monkeypatch.setenv("REDIS_URL", UNREACHABLE_REDIS)
+        limiter = RateLimiter(RedisClient())
+        rule = RateLimitRule("ip", "1.2.3.4", 1, 60)
+
+        first = limiter.check([rule])
+        second = limiter.check([rule])
+
+        assert first["allowed"] and first["backend"] == "local"
+        assert not second["allowed"]
+        assert second["rule"] == "ip"
+        assert 59 <= second["retry_after"] <= 60
+
+    def test_unknown_algorithm_is_rejected(self):
+        """Typos in rate_limits fail loudly."""
+        limiter = RateLimiter(RedisClient())
+
+        with pytest.raises(ValueError):
+            limiter.check([RateLimitRule("ip", "x", 1, 60, "fixed_window")])
+
+    @pytest.mark.parametrize("algorithm", [SLIDING_WINDOW, TOKEN_BUCKET])
+    def test_redis_rules_are_atomic(self, connected_client, algorithm):
+        """The script reports the limiting rule and only counts allowed calls."""
+        key = uuid.uuid4().hex
+        user = RateLimitRule("user", f"test:user:{key}", 1, 60, algorithm)
+        ip = RateLimitRule("ip", f"test:ip:{key}", 3, 60, algorithm)
+
+        first = connected_client.check_rate_limits([ip, user])
+        second = connected_client.check_rate_limits([ip, user])
+        ip_only = connected_client.check_rate_limits([ip])
+
+        assert first["allowed"] and first["backend"] == "redis"
+        assert not second["allowed"] and second["rule"] == "user"
+        assert ip_only["allowed"] and ip_only["remaining"] == 1
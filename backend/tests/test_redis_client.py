@@ -0,0 +1,139 @@
+"""Tests for RedisClient analytics counters."""
+
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.redis_client import (
+    RedisClient,
+    analytics_queries,
+    compact_analytics,
+    expand_analytics,
+)
+from app.core.timeseries import TimeSeriesStore
+
+NOW = datetime(2024, 5, 6, 13, 47, 12)
+
+
+@pytest.fixture
+def client():
+    """Client with the default layout (no server needed for key planning)."""
+    return RedisClient()
+
+
+@pytest.fixture
+def connected_client():
+    """Client writing series under a unique prefix, skipped without Redis."""
+    client = RedisClient(timeseries=TimeSeriesStore(f"test:{uuid.uuid4().hex}"))
+    if not client.is_connected():
+        pytest.skip("Redis is not available")
+    return client
+
+
+class TestEventIncrements:
+    """Tests for the counters planned by track_events."""
+
+    def test_default_layout_keys(self, client):
+        """Every resolution of the event, total and user series is updated."""
+        increments = client.event_increments(["api_request"], "user-1", NOW)
+
+        assert set(increments) == {
+            ("ts:api_request:minute:2024-05-06T13", "47"),
+            ("ts:api_request:hour:2024-05-06", "13"),
+            ("ts:api_request:day:2024-05", "06"),
+            ("ts:api_request:month:2024", "05"),
+            ("ts:total:minute:2024-05-06T13", "47"),
+            ("ts:total:hour:2024-05-06", "13"),
+            ("ts:total:day:2024-05", "06"),
+            ("ts:total:month:2024", "05"),
+            ("ts:user:user-1:day:2024-05", "06"),
+        }
+        assert increments[("ts:api_request:hour:2024-05-06", "13")] == (
+            1,
+            90 * 86400,
+        )
+        assert increments[("ts:total:month:2024", "05")] == (1, None)
+
+    def test_shared_keys_are_combined(self, client):
+        """Events from one request share a single total and user increment."""
+        increments = client.event_increments(
+            ["api_request", "api_error"], "user-1", NOW
+        )
+
+        assert increments[("ts:total:day:2024-05", "06")][0] == 2
+        assert increments[("ts:user:user-1:day:2024-05", "06")][0] == 2
+        assert increments[("ts:api_error:day:2024-05", "06")][0] == 1
+
+    def test_anonymous_events_skip_user_counters(self, client):
+        """Templates using {user} are skipped without a user."""
+        increments = client.event_increments(["api_request"], None, NOW)
+
+        assert not any(key.startswith("ts:user:") for key, _ in increments)
+
+
+class TestTrackEvents:
+    """Tests for track_events against a Redis server."""
+
+    def test_series_and_ttls_are_written(self, connected_client):
+        """One call updates every resolution and sets its expiry."""
+        client = connected_client
+
+        assert client.track_events(["api_request", "quiz_request"], "user-1")
+        client.track_event("api_request")
+
+        now = datetime.now()
+        series = client.get_series(
+            ["api_request", "quiz_request", "total", "user:user-1"],
+            now - timedelta(minutes=1),
+            now,
+            resolution="day",
+        )
+        assert series["resolution"] == "day"
+        assert series["series"]["api_request"][-1] == 2
+        assert series["series"]["quiz_request"][-1] == 1
+        assert series["series"]["total"][-1] == 3
+        assert series["series"]["user:user-1"][-1] == 2
+
+        store = client.timeseries
+        hour_key = store.series_key("api_request", store.resolution("hour"), now)
+        assert client.ttl(hour_key) > 0
+
+
+class TestBulkAnalytics:
+    """Tests for get_analytics_bulk and its helpers."""
+
+    def test_queries_and_compact_arrays(self):
+        """Daily and hourly points map onto a few hashes."""
+        store = TimeSeriesStore()
+        daily, hourly = analytics_queries(store, ["a", "b"], 2, NOW)
+
+        assert [point.day for point in daily.points] == [5, 6]
+        assert daily.keys == ["ts:a:day:2024-05", "ts:b:day:2024-05"]
+        assert hourly.keys == ["ts:a:hour:2024-05-06", "ts:b:hour:2024-05-06"]
+
+        raw = [["05", "1"], [], ["23", "3"], ["00", "4"]]
+        bulk = compact_analytics(daily, hourly, raw)
+        assert bulk["dates"] == ["2024-05-05", "2024-05-06"]
+        assert bulk["events"]["a"]["daily"] == [1, 0]
+        assert bulk["events"]["b"]["hourly"][0] == 4
+
+        expanded = expand_analytics(bulk, "a")
+        assert expanded["daily"][0] == {"date": "2024-05-05", "count": 1}
+        assert expanded["hourly"][23] == {"hour": 23, "count": 3}
+
+    def test_repeated_reads_are_memoized(self, connected_client):
+        """Dashboard refreshes within the memo TTL reuse the last read."""
+        client = connected_client
+        event = f"test_{uuid.uuid4().hex}"
+        client.track_events([event, event])
+
+        first = client.get_analytics_bulk([event, "other"], days=3)
+        client.track_event(event)
+
+        assert client.get_analytics_bulk([event, "other"], days=3) is first
+        assert first["events"][event]["daily"] == [0, 0, 2]
+        assert first["events"][event]["hourly"][datetime.now().hour] == 2
+
+        client.analytics_memo.clear()
+        assert client.get_analytics(event, days=3)["daily"][-1]["count"] == 3
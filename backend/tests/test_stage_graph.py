@@ -0,0 +1,140 @@
+"""Tests for the stage graph executor and concurrent lead analysis."""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.financial_analysis_service import FinancialAnalysisService
+from app.services.stage_graph import StageGraph
+
+LEAD = {
+    "Id": "lead-1",
+    "LoanAmount": 600000,
+    "EstimatedPropertyValue": 800000,
+    "Suburb": "Parramatta",
+    "State": "NSW",
+}
+
+
+def sleeper(value, delay):
+    """Async stage returning value after delay."""
+
+    async def stage(*args):
+        await asyncio.sleep(delay)
+        return value
+
+    return stage
+
+
+class TestStageGraph:
+    """Tests for StageGraph."""
+
+    @pytest.mark.asyncio
+    async def test_independent_stages_run_concurrently(self):
+        """Stages sharing only a dependency overlap."""
+        graph = StageGraph(inputs=["x"])
+        graph.add("double", lambda x: x * 2, deps=["x"])
+        graph.add("slow_a", sleeper("a", 0.1), deps=["double"])
+        graph.add("slow_b", sleeper("b", 0.1), deps=["double"])
+        graph.add("joined", lambda a, b: a + b, deps=["slow_a", "slow_b"])
+
+        started = time.perf_counter()
+        run = await graph.run(x=21)
+
+        assert time.perf_counter() - started < 0.18
+        assert run.results["double"] == 42
+        assert run.results["joined"] == "ab"
+        assert run.degraded == []
+        assert set(run.durations) == {"double", "slow_a", "slow_b", "joined"}
+
+    @pytest.mark.asyncio
+    async def test_timeout_degrades_to_fallback(self):
+        """A stage past its timeout yields its fallback value."""
+        graph = StageGraph(inputs=["x"])
+        graph.add(
+            "slow",
+            sleeper("late", 1),
+            deps=["x"],
+            timeout=0.02,
+            fallback=lambda x: f"fallback-{x}",
+        )
+
+        run = await graph.run(x=1)
+
+        assert run.results["slow"] == "fallback-1"
+        assert run.degraded == ["slow"]
+
+    @pytest.mark.asyncio
+    async def test_failure_without_fallback_cancels_run(self):
+        """An unhandled error fails the run and stops other stages."""
+        finished = []
+
+        async def slow():
+            await asyncio.sleep(0.1)
+            finished.append("slow")
+
+        def fail():
+            raise RuntimeError("boom")
+
+        graph = StageGraph()
+        graph.add("slow", slow)
+        graph.add("fail", fail)
+
+        with pytest.raises(RuntimeError):
+            await graph.run()
+        await asyncio.sleep(0.15)
+
+        assert finished == []
+
+    def test_unknown_dependency_is_rejected(self):
+        """Stages can only depend on inputs or earlier stages."""
+        graph = StageGraph(inputs=["x"])
+
+        with pytest.raises(ValueError):
+            graph.add("stage", lambda y: y, deps=["y"])
+
+
+@pytest.fixture
+def service():
+    """Financial analysis service with a slow fake Gemini."""
+    service = FinancialAnalysisService()
+    service.prompts = []
+
+    async def generate_json(prompt, strict=True, cache_ttl=None, feature=None):
+        service.prompts.append(prompt)
+        await asyncio.sleep(0.1)
+        if "recommendations" in prompt:
+            return [{"title": "LLM recommendation"}]
+        return {"financial_health_score": 70}
+
+    service.gemini_service.generate_json = generate_json
+    return service
+
+
+class TestLeadAnalysisStages:
+    """Tests for the staged analyze_lead_financial_profile."""
+
+    @pytest.mark.asyncio
+    async def test_llm_stages_run_concurrently(self, service):
+        """Insights and recommendations are generated at the same time."""
+        started = time.perf_counter()
+        analysis = await service.analyze_lead_financial_profile(LEAD)
+
+        assert time.perf_counter() - started < 0.18
+        assert len(service.prompts) == 2
+        assert analysis["ai_insights"] == {"financial_health_score": 70}
+        assert analysis["recommendations"] == [{"title": "LLM recommendation"}]
+        assert analysis["risk_profile"]
+        assert analysis["degraded_stages"] == []
+
+    @pytest.mark.asyncio
+    async def test_slow_stage_uses_rule_based_fallback(self, service):
+        """A stage past its timeout degrades instead of failing."""
+        service.STAGE_TIMEOUTS = {"ai_insights": 0.01, "recommendations": 1}
+
+        analysis = await service.analyze_lead_financial_profile(LEAD)
+
+        assert analysis["degraded_stages"] == ["ai_insights"]
+        assert "key_strengths" in analysis["ai_insights"]
+        assert analysis["recommendations"] == [{"title": "LLM recommendation"}]
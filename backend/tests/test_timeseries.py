@@ -0,0 +1,101 @@
+"""Tests for the time series store layout and range queries."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.timeseries import (
+    DAY,
+    HOUR,
+    MINUTE,
+    MONTH,
+    TimeSeriesStore,
+    advance,
+    align,
+)
+
+NOW = datetime(2024, 12, 31, 22, 15, 40)
+
+
+@pytest.fixture
+def store():
+    """Store with the default resolutions and retention."""
+    return TimeSeriesStore()
+
+
+class TestAlignment:
+    """Tests for point alignment."""
+
+    def test_align_and_advance(self):
+        """Points start on resolution boundaries and months roll over."""
+        assert align(HOUR, NOW) == datetime(2024, 12, 31, 22)
+        assert align(MONTH, NOW) == datetime(2024, 12, 1)
+        assert advance(MONTH, align(MONTH, NOW)) == datetime(2025, 1, 1)
+        assert advance(MINUTE, align(MINUTE, NOW)) == datetime(2024, 12, 31, 22, 16)
+
+
+class TestRangeQuery:
+    """Tests for RangeQuery planning and parsing."""
+
+    def test_points_share_bucket_hashes(self, store):
+        """A range across a month boundary reads one hash per month."""
+        query = store.range_query(
+            ["api_request"], NOW - timedelta(days=2), NOW + timedelta(days=1), DAY
+        )
+
+        assert len(query.points) == 4
+        assert query.keys == [
+            "ts:api_request:day:2024-12",
+            "ts:api_request:day:2025-01",
+        ]
+        raw = [["29", "5", "31", "2"], ["01", "7"]]
+        assert query.parse(raw) == {"api_request": [5, 0, 2, 7]}
+
+    def test_rejects_reversed_range(self, store):
+        """The end must not come before the start."""
+        with pytest.raises(ValueError):
+            store.range_query(["x"], NOW, NOW - timedelta(hours=1))
+
+    def test_rejects_too_many_points(self, store):
+        """An explicit fine resolution over a long range is refused."""
+        start = NOW - timedelta(days=3650)
+        with pytest.raises(ValueError):
+            store.range_query(["x"], start, NOW, MINUTE)
+        assert len(store.range_query(["x"], start, NOW).points) < 500
+
+    @pytest.mark.asyncio
+    async def test_series_endpoint_limits_points(self):
+        """The series endpoint answers 400 instead of reading the range."""
+        from fastapi import HTTPException
+
+        from app.api.v1.endpoints.monitoring import get_analytics_series
+
+        with pytest.raises(HTTPException) as error:
+            await get_analytics_series(
+                events=["api_request"],
+                start=NOW - timedelta(days=3650),
+                end=NOW,
+                resolution=MINUTE,
+                current_user=None,
+            )
+        assert error.value.status_code == 400
+
+
+class TestResolutionChoice:
+    """Tests for downsampled resolution selection."""
+
+    def test_short_recent_range_uses_minutes(self, store):
+        """Recent, short ranges keep full detail."""
+        assert store.pick_resolution(NOW - timedelta(hours=2), NOW, now=NOW) == MINUTE
+
+    def test_point_budget_and_retention(self, store):
+        """Longer or older ranges fall back to coarser series."""
+        week = store.pick_resolution(NOW - timedelta(days=7), NOW, now=NOW)
+        old = store.pick_resolution(
+            NOW - timedelta(days=200), NOW - timedelta(days=199), now=NOW
+        )
+        years = store.pick_resolution(NOW - timedelta(days=3000), NOW, now=NOW)
+
+        assert week == HOUR
+        assert old == DAY
+        assert years == MONTH
@@ -0,0 +1,86 @@
+"""Tests for the batched token usage sink and rolling aggregates."""
+
+import json
+
+import pytest
+
+from app.ai.token_tracker import TokenUsageTracker
+from app.ai.usage_log import RollingUsage, UsageLogWriter, get_usage_log_writer
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestUsageLogWriter:
+    """Tests for UsageLogWriter."""
+
+    def test_batches_and_rotates(self, tmp_path):
+        """Records are written in batches and the log rotates by size."""
+        path = tmp_path / "usage.jsonl"
+        writer = UsageLogWriter(str(path), batch_size=10, max_bytes=200, backups=2)
+        try:
+            for index in range(5):
+                writer.submit({"call": index})
+            assert writer.flush()
+            assert [line["call"] for line in read_lines(path)] == list(range(5))
+
+            for index in range(5, 20):
+                writer.submit({"call": index, "padding": "x" * 40})
+                writer.flush()
+        finally:
+            writer.close()
+
+        assert writer.stats()["written"] == 20
+        assert writer.rotations >= 2
+        assert (tmp_path / "usage.jsonl.2").exists()
+        assert not (tmp_path / "usage.jsonl.3").exists()
+        assert read_lines(path)[-1]["call"] == 19
+
+    def test_drops_when_full(self, tmp_path):
+        """A full queue drops records instead of blocking."""
+        writer = UsageLogWriter(str(tmp_path / "usage.jsonl"), queue_size=1)
+        writer._ensure_thread = lambda: None
+
+        assert writer.submit({"call": 1})
+        assert not writer.submit({"call": 2})
+        assert writer.dropped == 1
+
+
+class TestRollingUsage:
+    """Tests for RollingUsage."""
+
+    def test_window(self):
+        """Totals group by model and feature and expire with the window."""
+        usage = RollingUsage(window=600)
+        usage.record("flash", "quiz", 100, 50, 0.1, at=1000)
+        usage.record("pro", "quiz", 10, 5, 0.5, at=1100)
+        usage.record("flash", "leads", 1, 1, 0.01, at=1500)
+
+        summary = usage.summary(now=1500)
+        assert summary["by_feature"]["quiz"]["total_tokens"] == 165
+        assert summary["by_model"]["flash"]["calls"] == 2
+
+        later = usage.summary(now=1650)
+        assert later["by_model"].keys() == {"flash", "pro"}
+        assert later["by_feature"]["quiz"]["calls"] == 1
+        assert usage.summary(now=1800)["by_feature"].keys() == {"leads"}
+
+
+class TestTrackerSink:
+    """Tests for TokenUsageTracker writing through the sink."""
+
+    @pytest.mark.asyncio
+    async def test_track_usage(self, tmp_path):
+        """Usage goes to the log writer and a bounded in-memory buffer."""
+        path = tmp_path / "usage.jsonl"
+        tracker = TokenUsageTracker("gemini-pro", log_file=str(path), streaming=False)
+        tracker.usage_log = tracker.usage_log.__class__(maxlen=2)
+
+        for _ in range(3):
+            await tracker.track_usage("prompt text", "response", {"feature": "quiz"})
+        get_usage_log_writer(str(path)).flush()
+
+        assert len(read_lines(path)) == 3
+        assert len(tracker.usage_log) == 2
+        assert tracker.get_summary()["total_calls"] == 3